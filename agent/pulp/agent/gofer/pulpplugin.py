@@ -18,13 +18,14 @@ from gofer.pmon import PathMonitor
 from gofer.agent.rmi import Context
 from gofer.messaging.auth import ValidationFailed
 
+from pulp.common import profile as profile_utils
 from pulp.common.bundle import Bundle
 from pulp.common.config import parse_bool
 from pulp.agent.lib.dispatcher import Dispatcher
 from pulp.agent.lib.conduit import Conduit as HandlerConduit
 from pulp.bindings.server import PulpConnection
 from pulp.bindings.bindings import Bindings
-from pulp.bindings.exceptions import NotFoundException
+from pulp.bindings.exceptions import ConflictException, NotFoundException
 from pulp.client.consumer.config import read_config
 
 
@@ -45,6 +46,10 @@ plugin = Plugin.find(__name__)
 # registration status
 registered = False
 
+# profiles last acknowledged by the server
+# key: (consumer_id, type_id), value: (profile hash, profile)
+acknowledged = {}
+
 
 class ValidateRegistrationFailed(Exception):
     """
@@ -166,6 +171,54 @@ def get_agent_id():
         return None
 
 
+def report_profile(bindings, consumer_id, type_id, profile):
+    """
+    Report a content profile to the server.
+    The hash of the profile is sent first, and nothing else is sent when the
+    server reports the profile unchanged. Otherwise, the changes made to the
+    profile the server last acknowledged are sent when possible, and the whole
+    profile is sent when they are not. The whole profile is also sent to
+    servers that do not support comparing hashes.
+    :param bindings: The pulp bindings.
+    :type bindings: PulpBindings
+    :param consumer_id: The consumer ID.
+    :type consumer_id: str
+    :param type_id: The profile (content) type ID.
+    :type type_id: str
+    :param profile: The content profile.
+    :type profile: object
+    :return: The response to the last request, or None when unchanged.
+    :rtype: pulp.bindings.responses.Response
+    """
+    key = (consumer_id, type_id)
+    profile_hash = profile_utils.calculate_hash(profile)
+    try:
+        http = bindings.profile.compare_hash(consumer_id, type_id, profile_hash)
+    except NotFoundException:
+        # the server predates profile hashes and deltas
+        http = bindings.profile.send(consumer_id, type_id, profile)
+        acknowledged[key] = (profile_hash, profile)
+        return http
+    if http.response_body['unchanged']:
+        acknowledged[key] = (profile_hash, profile)
+        return None
+    if key in acknowledged:
+        base_hash, base_profile = acknowledged[key]
+        delta = profile_utils.make_delta(base_profile, profile)
+        if delta is not None:
+            try:
+                http = bindings.profile.send_delta(
+                    consumer_id, type_id, base_hash, profile_utils.encode_delta(delta))
+                acknowledged[key] = (profile_hash, profile)
+                return http
+            except ConflictException:
+                msg = _('profile (%(t)s), delta rejected, sending the whole profile')
+                log.info(msg, {'t': type_id})
+    http = bindings.profile.send(consumer_id, type_id, profile)
+    acknowledged[key] = (profile_hash, profile)
+    return http
+
+
 def get_secret():
     """
     Get the shared secret.
@@ -274,13 +327,17 @@ class PulpBindings(Bindings):
         port = int(cfg.server.port)
         verify_ssl = parse_bool(cfg.server.verify_ssl)
         ca_path = cfg.server.ca_path
+        persistent_connections = parse_bool(cfg.server.persistent_connections)
+        max_idle_time = int(cfg.server.max_idle_time)
         cert = os.path.join(cfg.filesystem.id_cert_dir, cfg.filesystem.id_cert_filename)
         connection = PulpConnection(
             host=host,
             port=port,
             cert_filename=cert,
             verify_ssl=verify_ssl,
-            ca_path=ca_path)
+            ca_path=ca_path,
+            persistent_connections=persistent_connections,
+            max_idle_time=max_idle_time)
         Bindings.__init__(self, connection)
 
 
@@ -493,7 +550,11 @@ class Profile(object):
                 continue
 
             details = profile_report['details']
-            http = bindings.profile.send(consumer_id, type_id, details)
+            http = report_profile(bindings, consumer_id, type_id, details)
+            if http is None:
+                msg = _('profile (%(t)s), unchanged')
+                log.info(msg, {'t': type_id})
+                continue
 
             msg = _('profile (%(t)s), reported: %(r)s')
             log.info(msg, {'t': type_id, 'r': http.response_code})
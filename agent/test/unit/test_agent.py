@@ -418,6 +418,8 @@ class TestBindings(PluginTest):
                 'port': '443',
                 'verify_ssl': 'True',
                 'ca_path': '/some/path/',
+                'persistent_connections': 'True',
+                'max_idle_time': '2',
             },
             'filesystem': {
                 'id_cert_dir': TEST_ID_CERT_DIR,
@@ -433,7 +435,8 @@ class TestBindings(PluginTest):
             host='test-host',
             port=443,
             cert_filename=CERT_PATH,
-            verify_ssl=True, ca_path='/some/path/')
+            verify_ssl=True, ca_path='/some/path/',
+            persistent_connections=True, max_idle_time=2)
         mock_bindings.assert_called_with(bindings, mock_conn())
 
 
@@ -866,6 +869,8 @@ class TestProfile(PluginTest):
         _report.dict = Mock(return_value=_report.details)
 
         mock_dispatcher().profile.return_value = _report
+        mock_bindings().profile.compare_hash.return_value = Mock(
+            response_body={'unchanged': False})
 
         # test
         profile = self.plugin.Profile()
@@ -873,4 +878,91 @@ class TestProfile(PluginTest):
 
         # validation
         mock_dispatcher().profile.assert_called_with(mock_conduit())
+        mock_bindings().profile.compare_hash.assert_called_once_with(
+            TEST_CN, 'BB', self.plugin.profile_utils.calculate_hash(5678))
         mock_bindings().profile.send.assert_called_once_with(TEST_CN, 'BB', 5678)
+
+
+class TestReportProfile(PluginTest):
+
+    OLD_PROFILE = [{'name': 'zsh', 'version': '1.0'}, {'name': 'kmod', 'version': '12'}]
+    NEW_PROFILE = [{'name': 'zsh', 'version': '1.1'}, {'name': 'kmod', 'version': '12'}]
+
+    def setUp(self):
+        super(TestReportProfile, self).setUp()
+        self.bindings = Mock()
+        self.bindings.profile.compare_hash.return_value = Mock(
+            response_body={'unchanged': False})
+        self.old_hash = self.plugin.profile_utils.calculate_hash(self.OLD_PROFILE)
+        self.new_hash = self.plugin.profile_utils.calculate_hash(self.NEW_PROFILE)
+
+    def test_unchanged(self):
+        self.bindings.profile.compare_hash.return_value = Mock(
+            response_body={'unchanged': True})
+
+        # test
+        http = self.plugin.report_profile(self.bindings, TEST_CN, 'rpm', self.NEW_PROFILE)
+
+        # validation
+        self.assertEqual(http, None)
+        self.bindings.profile.compare_hash.assert_called_once_with(TEST_CN, 'rpm', self.new_hash)
+        self.assertFalse(self.bindings.profile.send.called)
+        self.assertFalse(self.bindings.profile.send_delta.called)
+        self.assertEqual(self.plugin.acknowledged[(TEST_CN, 'rpm')],
+                         (self.new_hash, self.NEW_PROFILE))
+
+    def test_first_report(self):
+        # test
+        http = self.plugin.report_profile(self.bindings, TEST_CN, 'rpm', self.NEW_PROFILE)
+
+        # validation
+        self.assertEqual(http, self.bindings.profile.send.return_value)
+        self.bindings.profile.send.assert_called_once_with(TEST_CN, 'rpm', self.NEW_PROFILE)
+        self.assertFalse(self.bindings.profile.send_delta.called)
+        self.assertEqual(self.plugin.acknowledged[(TEST_CN, 'rpm')],
+                         (self.new_hash, self.NEW_PROFILE))
+
+    def test_delta(self):
+        self.plugin.acknowledged[(TEST_CN, 'rpm')] = (self.old_hash, self.OLD_PROFILE)
+
+        # test
+        http = self.plugin.report_profile(self.bindings, TEST_CN, 'rpm', self.NEW_PROFILE)
+
+        # validation
+        self.assertEqual(http, self.bindings.profile.send_delta.return_value)
+        self.assertFalse(self.bindings.profile.send.called)
+        consumer_id, type_id, base_hash, encoded = \
+            self.bindings.profile.send_delta.call_args[0]
+        self.assertEqual((consumer_id, type_id, base_hash), (TEST_CN, 'rpm', self.old_hash))
+        delta = self.plugin.profile_utils.decode_delta(encoded)
+        self.assertEqual(self.plugin.profile_utils.apply_delta(self.OLD_PROFILE, delta),
+                         self.NEW_PROFILE)
+        self.assertEqual(self.plugin.acknowledged[(TEST_CN, 'rpm')],
+                         (self.new_hash, self.NEW_PROFILE))
+
+    def test_delta_rejected(self):
+        self.plugin.acknowledged[(TEST_CN, 'rpm')] = (self.old_hash, self.OLD_PROFILE)
+        self.bindings.profile.send_delta.side_effect = self.plugin.ConflictException({})
+
+        # test
+        http = self.plugin.report_profile(self.bindings, TEST_CN, 'rpm', self.NEW_PROFILE)
+
+        # validation
+        self.assertEqual(http, self.bindings.profile.send.return_value)
+        self.bindings.profile.send.assert_called_once_with(TEST_CN, 'rpm', self.NEW_PROFILE)
+        self.assertEqual(self.plugin.acknowledged[(TEST_CN, 'rpm')],
+                         (self.new_hash, self.NEW_PROFILE))
+
+    def test_compare_hash_not_supported(self):
+        self.plugin.acknowledged[(TEST_CN, 'rpm')] = (self.old_hash, self.OLD_PROFILE)
+        self.bindings.profile.compare_hash.side_effect = self.plugin.NotFoundException({})
+
+        # test
+        http = self.plugin.report_profile(self.bindings, TEST_CN, 'rpm', self.NEW_PROFILE)
+
+        # validation
+        self.assertEqual(http, self.bindings.profile.send.return_value)
+        self.bindings.profile.send.assert_called_once_with(TEST_CN, 'rpm', self.NEW_PROFILE)
+        self.assertFalse(self.bindings.profile.send_delta.called)
+        self.assertEqual(self.plugin.acknowledged[(TEST_CN, 'rpm')],
+                         (self.new_hash, self.NEW_PROFILE))
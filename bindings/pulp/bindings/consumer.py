@@ -173,6 +173,24 @@ class ProfilesAPI(PulpAPI):
         data = {'content_type': content_type, 'profile': profile}
         return self.server.POST(path, data)
 
+    def compare_hash(self, id, content_type, profile_hash):
+        """
+        Ask whether the profile last sent has the given hash. The response
+        body's "unchanged" value is True if it does.
+        """
+        path = self.BASE_PATH % id + '%s/hash/' % content_type
+        data = {'profile_hash': profile_hash}
+        return self.server.POST(path, data)
+
+    def send_delta(self, id, content_type, base_hash, delta):
+        """
+        Send the changes to the profile last sent, whose hash is base_hash,
+        as encoded by pulp.common.profile.encode_delta().
+        """
+        path = self.BASE_PATH % id + '%s/' % content_type
+        data = {'base_hash': base_hash, 'delta': delta}
+        return self.server.PUT(path, data)
+
 
 class ConsumerHistoryAPI(PulpAPI):
     """
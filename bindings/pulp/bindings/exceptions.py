@@ -71,14 +71,17 @@ class ApacheServerException(Exception):
     wrong.
     """
 
-    def __init__(self, message):
+    def __init__(self, message, response_code=None):
         """
         @param message: the response body apache returns with the error
         @type  message: str
+        @param response_code: the HTTP status code of the response
+        @type  response_code: int
         """
         Exception.__init__(self)
 
         self.message = message
+        self.response_code = response_code
 
 
 class ClientSSLException(Exception):
@@ -1,8 +1,13 @@
 from types import NoneType
 import base64
+import httplib
 import locale
 import logging
 import os
+import select
+import socket
+import threading
+import time
 import urllib
 try:
     import oauth2 as oauth
@@ -19,6 +24,26 @@ from pulp.common.constants import DEFAULT_CA_PATH
 from pulp.common.util import ensure_utf_8, encode_unicode
 
 
+# Most idle connections kept open by a PooledHTTPSServerWrapper
+DEFAULT_POOL_SIZE = 4
+
+# Seconds a PooledHTTPSServerWrapper keeps a connection idle before it is closed rather than reused.
+# This is below httpd's default KeepAliveTimeout of 5 seconds, so that a connection is not reused
+# just as the server is closing it.
+DEFAULT_MAX_IDLE_TIME = 4
+
+# Errors sending a request on a kept-alive connection that mean the server had already closed it,
+# so the request never reached the server and is sent again on a new connection
+SEND_RETRY_EXCEPTIONS = (httplib.CannotSendRequest, socket.error)
+
+# Errors reading the response on a kept-alive connection that mean the server closed it. The
+# request may have been handled, so it is only sent again if its method is in IDEMPOTENT_METHODS.
+RESPONSE_RETRY_EXCEPTIONS = (httplib.BadStatusLine, socket.error)
+
+# Methods whose requests can be sent again without changing anything on the server
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
 class PulpConnection(object):
     """
     Stub for invoking methods against the Pulp server. By default, the
@@ -27,6 +52,11 @@ class PulpConnection(object):
     parameter can be used to pass in another mechanism to make the actual
     call to the server. The likely use of this is a duck-typed mock object
     for unit testing purposes.
+
+    With persistent_connections set, connections to the server are kept open
+    and reused across calls, which saves a TLS handshake on most calls for
+    scripts that make many of them. A connection that has been idle for more
+    than max_idle_time seconds is closed rather than reused.
     """
 
     def __init__(self,
@@ -44,7 +74,9 @@ class PulpConnection(object):
                  cert_filename=None,
                  server_wrapper=None,
                  verify_ssl=True,
-                 ca_path=DEFAULT_CA_PATH):
+                 ca_path=DEFAULT_CA_PATH,
+                 persistent_connections=False,
+                 max_idle_time=DEFAULT_MAX_IDLE_TIME):
 
         self.host = host
         self.port = port
@@ -77,6 +109,8 @@ class PulpConnection(object):
         # Server Wrapper
         if server_wrapper:
             self.server_wrapper = server_wrapper
+        elif persistent_connections:
+            self.server_wrapper = PooledHTTPSServerWrapper(self, max_idle_time=max_idle_time)
         else:
             self.server_wrapper = HTTPSServerWrapper(self)
 
@@ -194,7 +228,7 @@ class PulpConnection(object):
             # so differentiate based on that so we don't get a parse error
 
             if isinstance(response_body, basestring):
-                raise exceptions.ApacheServerException(response_body)
+                raise exceptions.ApacheServerException(response_body, response_code)
             else:
                 raise exceptions.PulpServerException(response_body)
 
@@ -274,8 +308,31 @@ class HTTPSServerWrapper(object):
                        returned as a string.
         :rtype:        tuple
         """
-        headers = dict(self.pulp_connection.headers)  # copy so we don't affect the calling method
+        ssl_context = self._ssl_context()
+        headers = self._headers(method, url)
+
+        connection = httpslib.HTTPSConnection(
+            self.pulp_connection.host, self.pulp_connection.port, ssl_context=ssl_context)
+
+        try:
+            # Request against the server
+            connection.request(method, url, body=body, headers=headers)
+            response = connection.getresponse()
+        except SSL.SSLError, err:
+            self._raise_ssl_error(err)
+
+        # Attempt to deserialize the body (should pass unless the server is busted)
+        response_body = response.read()
+        return response.status, self._parse_body(response_body)
+
+    def _ssl_context(self):
+        """
+        Build the SSL context for the settings of the pulp connection.
 
+        :return: SSL context to open connections to the server with
+        :rtype:  M2Crypto.SSL.Context
+        :raises MissingCAPathException: if the CA path is neither a file nor a directory
+        """
         # Despite the confusing name, 'sslv23' configures m2crypto to use any available protocol in
         # the underlying openssl implementation.
         ssl_context = SSL.Context('sslv23')
@@ -298,12 +355,29 @@ class HTTPSServerWrapper(object):
                 raise exceptions.MissingCAPathException(self.pulp_connection.ca_path)
         ssl_context.set_session_timeout(self.pulp_connection.timeout)
 
+        if not (self.pulp_connection.username and self.pulp_connection.password) and \
+                self.pulp_connection.cert_filename:
+            ssl_context.load_cert(self.pulp_connection.cert_filename)
+
+        return ssl_context
+
+    def _headers(self, method, url):
+        """
+        Build the headers of a request, including its credentials.
+
+        :param method: The HTTP method to be used for the request (GET, POST, etc.)
+        :type  method: str
+        :param url:    The Pulp URL to make the request against
+        :type  url:    str
+        :return:       headers to send with the request
+        :rtype:        dict
+        """
+        headers = dict(self.pulp_connection.headers)  # copy so we don't affect the calling method
+
         if self.pulp_connection.username and self.pulp_connection.password:
             raw = ':'.join((self.pulp_connection.username, self.pulp_connection.password))
             encoded = base64.encodestring(raw)[:-1]
             headers['Authorization'] = 'Basic ' + encoded
-        elif self.pulp_connection.cert_filename:
-            ssl_context.load_cert(self.pulp_connection.cert_filename)
 
         # oauth configuration. This block is only True if oauth is not None, so it won't run on RHEL
         # 5.
@@ -324,28 +398,275 @@ class HTTPSServerWrapper(object):
             headers.update(oauth_header)
             headers['pulp-user'] = self.pulp_connection.oauth_user
 
-        connection = httpslib.HTTPSConnection(
-            self.pulp_connection.host, self.pulp_connection.port, ssl_context=ssl_context)
+        return headers
 
-        try:
-            # Request against the server
-            connection.request(method, url, body=body, headers=headers)
-            response = connection.getresponse()
-        except SSL.SSLError, err:
-            # Translate stale login certificate to an auth exception
-            if 'sslv3 alert certificate expired' == str(err):
-                raise exceptions.ClientCertificateExpiredException(
-                    self.pulp_connection.cert_filename)
-            elif 'certificate verify failed' in str(err):
-                raise exceptions.CertificateVerificationException()
-            else:
-                raise exceptions.ConnectionException(None, str(err), None)
+    def _raise_ssl_error(self, err):
+        """
+        Translate an SSL error raised by a request into the matching bindings exception.
 
-        # Attempt to deserialize the body (should pass unless the server is busted)
-        response_body = response.read()
+        :param err: the error raised by the request
+        :type  err: M2Crypto.SSL.SSLError
+        """
+        # Translate stale login certificate to an auth exception
+        if 'sslv3 alert certificate expired' == str(err):
+            raise exceptions.ClientCertificateExpiredException(
+                self.pulp_connection.cert_filename)
+        elif 'certificate verify failed' in str(err):
+            raise exceptions.CertificateVerificationException()
+        else:
+            raise exceptions.ConnectionException(None, str(err), None)
 
+    @staticmethod
+    def _parse_body(response_body):
+        """
+        :param response_body: body of a response from the server
+        :type  response_body: str
+        :return:              the body deserialized from json, or as it is if it is not json
+        """
         try:
             response_body = json.loads(response_body)
         except:
             pass
-        return response.status, response_body
+        return response_body
+
+
+class _ConnectionClosed(Exception):
+    """
+    Raised when a request on a kept-alive connection found the connection closed by the server,
+    and can be sent again on a new connection.
+    """
+
+
+class PooledHTTPSServerWrapper(HTTPSServerWrapper):
+    """
+    Server wrapper that keeps connections to the server open and reuses them for later
+    requests, instead of opening a new connection for each request.
+
+    The SSL context is built once for each combination of the connection settings it depends
+    on, and new connections resume the TLS session of the last connection that was opened, so
+    even the connections that have to be opened skip most of the handshake. A request that could
+    not be sent on a kept-alive connection that the server has since closed is retried on a new
+    connection. When the connection is found closed while reading the response, only GET, HEAD
+    and OPTIONS requests are retried, since the server may already have handled the request. A
+    timed out request is never retried. To keep that from happening, an idle connection is not
+    reused if the server has already closed it, or if it has been idle for more than
+    max_idle_time seconds. Errors from the connection that cannot be recovered from are raised
+    as ConnectionException.
+
+    The wrapper is safe to use from several threads at once; each request has a connection of
+    its own, and up to pool_size idle connections are kept for later requests.
+    """
+
+    def __init__(self, pulp_connection, pool_size=DEFAULT_POOL_SIZE,
+                 max_idle_time=DEFAULT_MAX_IDLE_TIME):
+        """
+        :param pulp_connection: A pulp connection object.
+        :type pulp_connection: PulpConnection
+        :param pool_size: The most idle connections kept open at once.
+        :type pool_size: int
+        :param max_idle_time: Seconds a connection may be idle and still be reused.
+        :type max_idle_time: int
+        """
+        super(PooledHTTPSServerWrapper, self).__init__(pulp_connection)
+        self.pool_size = pool_size
+        self.max_idle_time = max_idle_time
+        self._lock = threading.Lock()
+        self._idle = []
+        self._ssl_context_key = None
+        self._cached_ssl_context = None
+        self._session = None
+
+    def request(self, method, url, body):
+        """
+        Make the request against the Pulp server, returning a tuple of (status_code, respose_body).
+        An idle connection is used if there is one, otherwise a new connection is opened.
+
+        :param method: The HTTP method to be used for the request (GET, POST, etc.)
+        :type  method: str
+        :param url:    The Pulp URL to make the request against
+        :type  url:    str
+        :param body:   The body to pass with the request
+        :type  body:   str
+        :return:       A 2-tuple of the status_code and response_body. status_code is the HTTP
+                       status code (200, 404, etc.). If the server's response is valid json,
+                       it will be parsed and response_body will be a dictionary. If not, it will be
+                       returned as a string.
+        :rtype:        tuple
+        :raises ConnectionException: if the request could not be made, or no response was read
+        """
+        ssl_context = self._ssl_context()
+        headers = self._headers(method, url)
+
+        connection = None
+        try:
+            connection, reused = self._checkout(ssl_context)
+            try:
+                response, response_body = self._send(connection, method, url, body, headers,
+                                                     retry=reused)
+            except _ConnectionClosed:
+                # the server closed the idle connection; try again on a new one
+                connection.close()
+                connection = self._connect(ssl_context)
+                response, response_body = self._send(connection, method, url, body, headers)
+        except SSL.SSLError, err:
+            if connection is not None:
+                connection.close()
+            self._raise_ssl_error(err)
+        except (httplib.HTTPException, socket.error), err:
+            if connection is not None:
+                connection.close()
+            raise exceptions.ConnectionException(None, '%s: %s' % (type(err).__name__, err), None)
+        except Exception:
+            if connection is not None:
+                connection.close()
+            raise
+
+        self._checkin(connection, ssl_context, response)
+        return response.status, self._parse_body(response_body)
+
+    def close(self):
+        """
+        Close the idle connections.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, ssl_context, idle_since in idle:
+            connection.close()
+
+    @staticmethod
+    def _send(connection, method, url, body, headers, retry=False):
+        """
+        :param retry: True if the request may be sent again when the connection turns out to have
+                      been closed by the server
+        :type  retry: bool
+        :return: the response, and its body read in full so the connection can be reused
+        :rtype:  tuple
+        :raises _ConnectionClosed: if retry is True and the request can be sent again on a new
+                                   connection
+        """
+        try:
+            connection.request(method, url, body=body, headers=headers)
+        except socket.timeout:
+            raise
+        except SEND_RETRY_EXCEPTIONS:
+            if not retry:
+                raise
+            raise _ConnectionClosed()
+        try:
+            response = connection.getresponse()
+        except socket.timeout:
+            raise
+        except RESPONSE_RETRY_EXCEPTIONS:
+            if not (retry and method.upper() in IDEMPOTENT_METHODS):
+                raise
+            raise _ConnectionClosed()
+        return response, response.read()
+
+    def _ssl_context(self):
+        """
+        Return the SSL context for the current settings of the pulp connection, building it
+        only when the settings, or the client certificate file, have changed since it was
+        last built.
+
+        :return: SSL context to open connections to the server with
+        :rtype:  M2Crypto.SSL.Context
+        """
+        conn = self.pulp_connection
+        cert_mtime = None
+        if conn.cert_filename and os.path.exists(conn.cert_filename):
+            cert_mtime = os.path.getmtime(conn.cert_filename)
+        key = (conn.verify_ssl, conn.ca_path, conn.timeout, conn.username, conn.password,
+               conn.cert_filename, cert_mtime)
+
+        with self._lock:
+            if key == self._ssl_context_key:
+                return self._cached_ssl_context
+
+        ssl_context = super(PooledHTTPSServerWrapper, self)._ssl_context()
+        with self._lock:
+            self._ssl_context_key = key
+            self._cached_ssl_context = ssl_context
+            self._session = None
+        return ssl_context
+
+    def _checkout(self, ssl_context):
+        """
+        Take an idle connection opened with the given SSL context, or open a new one. Idle
+        connections that the server has closed, or that have been idle for too long, are closed.
+
+        :param ssl_context: SSL context the connection must have been opened with
+        :type  ssl_context: M2Crypto.SSL.Context
+        :return:            the connection, and whether it was used before
+        :rtype:             tuple
+        """
+        now = time.time()
+        with self._lock:
+            while self._idle:
+                connection, connection_ssl_context, idle_since = self._idle.pop()
+                if connection_ssl_context is not ssl_context:
+                    # opened with settings that have since changed
+                    connection.close()
+                elif now - idle_since > self.max_idle_time or self._is_dropped(connection):
+                    # closed by the server, or likely to be closed as it is used
+                    connection.close()
+                else:
+                    return connection, True
+        return self._connect(ssl_context), False
+
+    @staticmethod
+    def _is_dropped(connection):
+        """
+        Tell whether the server has closed an idle connection. Nothing is expected from the
+        server on an idle connection, so the socket being readable means it was closed, or that
+        it cannot be used for another request anyway.
+
+        :param connection: an idle connection
+        :type  connection: M2Crypto.httpslib.HTTPSConnection
+        :return:           True if the connection should not be reused
+        :rtype:            bool
+        """
+        sock = connection.sock
+        if sock is None:
+            return True
+        try:
+            readable, writable, errored = select.select([sock], [], [], 0)
+        except (select.error, socket.error, ValueError):
+            return True
+        return bool(readable)
+
+    def _connect(self, ssl_context):
+        """
+        Open a new connection, resuming the TLS session of the last connection opened.
+
+        :param ssl_context: SSL context to open the connection with
+        :type  ssl_context: M2Crypto.SSL.Context
+        :return:            the connection
+        :rtype:             M2Crypto.httpslib.HTTPSConnection
+        """
+        connection = httpslib.HTTPSConnection(
+            self.pulp_connection.host, self.pulp_connection.port, ssl_context=ssl_context)
+        session = self._session
+        if session is not None:
+            connection.set_session(session)
+        connection.connect()
+        self._session = connection.get_session()
+        return connection
+
+    def _checkin(self, connection, ssl_context, response):
+        """
+        Keep a connection for later requests, unless the server is closing it or enough
+        connections are already idle.
+
+        :param connection:  the connection a request was just made on
+        :type  connection:  M2Crypto.httpslib.HTTPSConnection
+        :param ssl_context: SSL context the connection was opened with
+        :type  ssl_context: M2Crypto.SSL.Context
+        :param response:    the response to the request
+        :type  response:    httplib.HTTPResponse
+        """
+        if not response.will_close:
+            with self._lock:
+                if len(self._idle) < self.pool_size:
+                    self._idle.append((connection, ssl_context, time.time()))
+                    return
+        connection.close()
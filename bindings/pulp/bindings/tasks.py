@@ -43,6 +43,31 @@ class TasksAPI(PulpAPI):
         response.response_body = Task(response.response_body)
         return response
 
+    def get_tasks_status(self, task_ids, changed_since=None):
+        """
+        Retrieves the status of many tasks with a single call. If changed_since is specified,
+        only the tasks whose status was updated since then are included.
+
+        @param task_ids: IDs of the tasks to retrieve
+        @type  task_ids: list of str
+        @param changed_since: timestamp returned by a previous call to this method
+        @type  changed_since: float
+
+        @return: response with a dict in the response_body containing the server "timestamp"
+                 to pass as changed_since on the next call, a list of Task objects under
+                 "tasks" and the IDs of the tasks that do not exist under "missing"
+        @rtype:  Response
+        """
+        path = '/v2/tasks/status/'
+        body = {'task_ids': list(task_ids)}
+        if changed_since is not None:
+            body['changed_since'] = changed_since
+        response = self.server.POST(path, body)
+
+        tasks = [Task(doc) for doc in response.response_body['tasks']]
+        response.response_body['tasks'] = tasks
+        return response
+
     def get_all_tasks(self, tags=()):
         """
         Retrieves all tasks in the system. If tags are specified, only tasks
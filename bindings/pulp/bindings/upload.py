@@ -9,9 +9,12 @@ class UploadAPI(PulpAPI):
     def __init__(self, pulp_connection):
         super(UploadAPI, self).__init__(pulp_connection)
 
-    def initialize_upload(self):
+    def initialize_upload(self, size=None):
         url = '/v2/content/uploads/'
-        return self.server.POST(url)
+        body = None
+        if size is not None:
+            body = {'size': size}
+        return self.server.POST(url, body)
 
     def upload_segment(self, upload_id, offset, data):
         url = '/v2/content/uploads/%s/%s/' % (upload_id, offset)
@@ -2,7 +2,7 @@ import unittest
 
 import mock
 
-from pulp.bindings.consumer import ConsumerSearchAPI
+from pulp.bindings.consumer import ConsumerSearchAPI, ProfilesAPI
 
 
 class TestConsumerSearchAPI(unittest.TestCase):
@@ -10,3 +10,22 @@ class TestConsumerSearchAPI(unittest.TestCase):
         api = ConsumerSearchAPI(mock.MagicMock())
         self.assertTrue(api.PATH is not None)
         self.assertTrue(len(api.PATH) > 0)
+
+
+class TestProfilesAPI(unittest.TestCase):
+    def setUp(self):
+        self.api = ProfilesAPI(mock.MagicMock())
+
+    def test_compare_hash(self):
+        response = self.api.compare_hash('c1', 'rpm', 'abc')
+
+        self.api.server.POST.assert_called_once_with('/v2/consumers/c1/profiles/rpm/hash/',
+                                                     {'profile_hash': 'abc'})
+        self.assertEqual(response, self.api.server.POST.return_value)
+
+    def test_send_delta(self):
+        response = self.api.send_delta('c1', 'rpm', 'abc', 'encoded')
+
+        self.api.server.PUT.assert_called_once_with('/v2/consumers/c1/profiles/rpm/',
+                                                    {'base_hash': 'abc', 'delta': 'encoded'})
+        self.assertEqual(response, self.api.server.PUT.return_value)
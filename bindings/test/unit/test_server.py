@@ -1,8 +1,10 @@
 """
 This module contains tests for the pulp.bindings.server module.
 """
+import httplib
 import locale
 import logging
+import socket
 import unittest
 
 from M2Crypto import m2, SSL
@@ -172,6 +174,219 @@ class TestHTTPSServerWrapper(unittest.TestCase):
         load_verify_locations.assert_called_once_with(cafile=ca_path)
 
 
+class TestPooledHTTPSServerWrapper(unittest.TestCase):
+    """
+    This class contains tests for the PooledHTTPSServerWrapper class.
+    """
+    def setUp(self):
+        self.conn = server.PulpConnection('host', verify_ssl=False)
+        self.wrapper = server.PooledHTTPSServerWrapper(self.conn)
+        # the mock connections have no socket for select() to check
+        select_patcher = mock.patch('pulp.bindings.server.select.select',
+                                    return_value=([], [], []))
+        self.select = select_patcher.start()
+        self.addCleanup(select_patcher.stop)
+
+    @staticmethod
+    def _response(will_close=False):
+        response = mock.MagicMock()
+        response.status = 200
+        response.read.return_value = '{"it": "worked!"}'
+        response.will_close = will_close
+        return response
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_reuses_connection(self, HTTPSConnection):
+        HTTPSConnection.return_value.getresponse.return_value = self._response()
+
+        self.assertEqual(self.wrapper.request('GET', '/a/', ''), (200, {'it': 'worked!'}))
+        self.assertEqual(self.wrapper.request('GET', '/b/', ''), (200, {'it': 'worked!'}))
+
+        self.assertEqual(HTTPSConnection.call_count, 1)
+        self.assertEqual(HTTPSConnection.return_value.request.call_count, 2)
+        self.assertEqual(HTTPSConnection.return_value.close.call_count, 0)
+
+    @mock.patch('pulp.bindings.server.SSL.Context')
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_caches_ssl_context(self, HTTPSConnection, Context):
+        connection = HTTPSConnection.return_value
+        connection.getresponse.return_value = self._response(will_close=True)
+
+        self.wrapper.request('GET', '/a/', '')
+        self.wrapper.request('GET', '/b/', '')
+
+        self.assertEqual(Context.call_count, 1)
+        self.assertEqual(HTTPSConnection.call_count, 2)
+        # the second connection resumes the TLS session of the first
+        connection.set_session.assert_called_once_with(connection.get_session.return_value)
+
+    @mock.patch('pulp.bindings.server.SSL.Context')
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_settings_changed(self, HTTPSConnection, Context):
+        Context.side_effect = [mock.MagicMock(), mock.MagicMock()]
+        connection = HTTPSConnection.return_value
+        connection.getresponse.return_value = self._response()
+
+        self.wrapper.request('GET', '/a/', '')
+        self.conn.timeout = 5
+        self.wrapper.request('GET', '/b/', '')
+
+        self.assertEqual(Context.call_count, 2)
+        # the idle connection was opened with the old settings
+        self.assertEqual(HTTPSConnection.call_count, 2)
+        self.assertEqual(connection.close.call_count, 1)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_reconnects(self, HTTPSConnection):
+        stale = mock.MagicMock()
+        stale.getresponse.return_value = self._response()
+        stale.request.side_effect = [None, httplib.CannotSendRequest()]
+        fresh = mock.MagicMock()
+        fresh.getresponse.return_value = self._response()
+        HTTPSConnection.side_effect = [stale, fresh]
+
+        self.wrapper.request('GET', '/a/', '')
+        status, body = self.wrapper.request('POST', '/b/', 'body')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(stale.close.call_count, 1)
+        fresh.request.assert_called_once_with('POST', '/b/', body='body', headers=mock.ANY)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_reconnects_idempotent(self, HTTPSConnection):
+        stale = mock.MagicMock()
+        stale.getresponse.side_effect = [self._response(), httplib.BadStatusLine('')]
+        fresh = mock.MagicMock()
+        fresh.getresponse.return_value = self._response()
+        HTTPSConnection.side_effect = [stale, fresh]
+
+        self.wrapper.request('GET', '/a/', '')
+        status, body = self.wrapper.request('GET', '/b/', '')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(stale.close.call_count, 1)
+        fresh.request.assert_called_once_with('GET', '/b/', body='', headers=mock.ANY)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_no_reconnect_after_sent(self, HTTPSConnection):
+        stale = mock.MagicMock()
+        stale.getresponse.side_effect = [self._response(), httplib.BadStatusLine('')]
+        HTTPSConnection.side_effect = [stale, mock.MagicMock()]
+
+        self.wrapper.request('GET', '/a/', '')
+        self.assertRaises(exceptions.ConnectionException, self.wrapper.request,
+                          'POST', '/b/', 'body')
+
+        self.assertEqual(HTTPSConnection.call_count, 1)
+        self.assertEqual(stale.request.call_count, 2)
+        self.assertEqual(stale.close.call_count, 1)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_no_reconnect_on_timeout(self, HTTPSConnection):
+        stale = mock.MagicMock()
+        stale.getresponse.side_effect = [self._response(), socket.timeout()]
+        HTTPSConnection.side_effect = [stale, mock.MagicMock()]
+
+        self.wrapper.request('GET', '/a/', '')
+        self.assertRaises(exceptions.ConnectionException, self.wrapper.request, 'GET', '/b/', '')
+
+        self.assertEqual(HTTPSConnection.call_count, 1)
+        self.assertEqual(stale.request.call_count, 2)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_new_connection_error(self, HTTPSConnection):
+        HTTPSConnection.return_value.request.side_effect = socket.error()
+
+        self.assertRaises(exceptions.ConnectionException, self.wrapper.request, 'GET', '/a/', '')
+
+        self.assertEqual(HTTPSConnection.call_count, 1)
+        self.assertEqual(HTTPSConnection.return_value.close.call_count, 1)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_handles_untrusted_server_cert(self, HTTPSConnection):
+        HTTPSConnection.return_value.getresponse.side_effect = SSL.SSLError(
+            'oh nos certificate verify failed can you believe it?')
+
+        self.assertRaises(exceptions.CertificateVerificationException, self.wrapper.request,
+                          'GET', '/awesome/api/', '')
+        self.assertEqual(HTTPSConnection.return_value.close.call_count, 1)
+
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_dropped_connection(self, HTTPSConnection):
+        dropped = mock.MagicMock()
+        dropped.getresponse.return_value = self._response()
+        fresh = mock.MagicMock()
+        fresh.getresponse.return_value = self._response()
+        HTTPSConnection.side_effect = [dropped, fresh]
+
+        self.wrapper.request('GET', '/a/', '')
+        # the server closed the connection while it was idle
+        self.select.return_value = ([dropped.sock], [], [])
+        status, body = self.wrapper.request('POST', '/b/', 'body')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(dropped.request.call_count, 1)
+        self.assertEqual(dropped.close.call_count, 1)
+        fresh.request.assert_called_once_with('POST', '/b/', body='body', headers=mock.ANY)
+
+    @mock.patch('pulp.bindings.server.time.time')
+    @mock.patch('pulp.bindings.server.httpslib.HTTPSConnection')
+    def test_request_max_idle_time(self, HTTPSConnection, time):
+        wrapper = server.PooledHTTPSServerWrapper(self.conn, max_idle_time=4)
+        connection = HTTPSConnection.return_value
+        connection.getresponse.return_value = self._response()
+
+        time.return_value = 100
+        wrapper.request('GET', '/a/', '')
+        time.return_value = 104
+        wrapper.request('GET', '/b/', '')
+
+        self.assertEqual(HTTPSConnection.call_count, 1)
+
+        time.return_value = 109
+        wrapper.request('GET', '/c/', '')
+
+        self.assertEqual(HTTPSConnection.call_count, 2)
+        self.assertEqual(connection.close.call_count, 1)
+
+    def test_checkin_pool_size(self):
+        wrapper = server.PooledHTTPSServerWrapper(self.conn, pool_size=1)
+        ssl_context = mock.MagicMock()
+        connection_1 = mock.MagicMock()
+        connection_2 = mock.MagicMock()
+
+        wrapper._checkin(connection_1, ssl_context, self._response())
+        wrapper._checkin(connection_2, ssl_context, self._response())
+
+        self.assertEqual(connection_1.close.call_count, 0)
+        self.assertEqual(connection_2.close.call_count, 1)
+
+        wrapper.close()
+        self.assertEqual(connection_1.close.call_count, 1)
+
+
+class TestPooledHTTPSServerWrapperIsDropped(unittest.TestCase):
+    """
+    This class contains tests for the PooledHTTPSServerWrapper._is_dropped() method.
+    """
+    def test_is_dropped(self):
+        local, remote = socket.socketpair()
+        self.addCleanup(local.close)
+        connection = mock.MagicMock()
+        connection.sock = local
+
+        self.assertFalse(server.PooledHTTPSServerWrapper._is_dropped(connection))
+
+        remote.close()
+        self.assertTrue(server.PooledHTTPSServerWrapper._is_dropped(connection))
+
+    def test_is_dropped_no_socket(self):
+        connection = mock.MagicMock()
+        connection.sock = None
+
+        self.assertTrue(server.PooledHTTPSServerWrapper._is_dropped(connection))
+
+
 class TestPulpConnection(unittest.TestCase):
     """
     This class contains tests for the PulpConnection object.
@@ -214,6 +429,24 @@ class TestPulpConnection(unittest.TestCase):
         # 1142376 - verify default path points to a known valid file
         self.assertEqual(server.DEFAULT_CA_PATH, '/etc/pki/tls/certs/ca-bundle.crt')
 
+    def test___init___persistent_connections(self):
+        """
+        Test __init__() with persistent_connections set to True.
+        """
+        connection = server.PulpConnection('host', persistent_connections=True)
+
+        self.assertTrue(isinstance(connection.server_wrapper, server.PooledHTTPSServerWrapper))
+        self.assertEqual(connection.server_wrapper.pulp_connection, connection)
+        self.assertEqual(connection.server_wrapper.max_idle_time, server.DEFAULT_MAX_IDLE_TIME)
+
+    def test___init___max_idle_time(self):
+        """
+        Test __init__() with persistent_connections and max_idle_time set.
+        """
+        connection = server.PulpConnection('host', persistent_connections=True, max_idle_time=2)
+
+        self.assertEqual(connection.server_wrapper.max_idle_time, 2)
+
     def test___init___ca_path_set(self):
         """
         Test __init__() with the ca_path argument explicitly set.
@@ -239,3 +472,17 @@ class TestPulpConnection(unittest.TestCase):
         connection = server.PulpConnection('host', verify_ssl=True)
 
         self.assertEqual(connection.verify_ssl, True)
+
+    def test__handle_exceptions_apache_error(self):
+        """
+        Test that an error that is not in the Pulp format keeps the status code of the response.
+        """
+        connection = server.PulpConnection('host')
+
+        try:
+            connection._handle_exceptions(405, '')
+        except exceptions.ApacheServerException, e:
+            self.assertEqual(e.response_code, 405)
+            self.assertEqual(e.message, '')
+        else:
+            self.fail('ApacheServerException should have been raised.')
@@ -76,6 +76,31 @@ class TestGetAllTasks(unittest.TestCase):
             self.assertTrue(isinstance(task, responses.Task))
 
 
+class TestGetTasksStatus(unittest.TestCase):
+    def setUp(self):
+        self.server = mock.MagicMock()
+        self.api = tasks.TasksAPI(self.server)
+
+        self.server.POST.return_value.response_body = {
+            'timestamp': 1000.0, 'tasks': copy.deepcopy(TASKS), 'missing': ['foo']}
+
+    def test_get_tasks_status(self):
+        response = self.api.get_tasks_status(['a', 'b'])
+
+        self.server.POST.assert_called_once_with('/v2/tasks/status/', {'task_ids': ['a', 'b']})
+        self.assertEqual(response.response_body['timestamp'], 1000.0)
+        self.assertEqual(response.response_body['missing'], ['foo'])
+        self.assertEqual(len(response.response_body['tasks']), 3)
+        for task in response.response_body['tasks']:
+            self.assertTrue(isinstance(task, responses.Task))
+
+    def test_changed_since(self):
+        self.api.get_tasks_status(('a',), changed_since=900.0)
+
+        self.server.POST.assert_called_once_with(
+            '/v2/tasks/status/', {'task_ids': ['a'], 'changed_since': 900.0})
+
+
 class TestPurgeTasks(unittest.TestCase):
     def setUp(self):
         self.server = mock.MagicMock()
@@ -12,13 +12,18 @@ DEFAULT = {
         'api_prefix': '/pulp/api',
         'verify_ssl': 'true',
         'ca_path': '/etc/pki/tls/certs/ca-bundle.crt',
+        'persistent_connections': 'false',
+        'max_idle_time': '4',
         'upload_chunk_size': '1048576',
+        'upload_concurrency': '1',
     },
     'client': {
-        'role': 'admin'
+        'role': 'admin',
+        'lazy_extensions': 'false',
     },
     'filesystem': {
         'extensions_dir': '/usr/lib/pulp/admin/extensions',
+        'extensions_manifest': '~/.pulp/admin_extensions.json',
         'id_cert_dir': '~/.pulp',
         'id_cert_filename': 'user-cert.pem',
         'upload_working_dir': '~/.pulp/uploads',
@@ -40,17 +45,22 @@ SCHEMA = (
             ('api_prefix', REQUIRED, ANY),
             ('verify_ssl', REQUIRED, BOOL),
             ('ca_path', REQUIRED, ANY),
+            ('persistent_connections', REQUIRED, BOOL),
+            ('max_idle_time', REQUIRED, NUMBER),
             ('upload_chunk_size', REQUIRED, NUMBER),
+            ('upload_concurrency', REQUIRED, NUMBER),
         )
      ),
     ('client', REQUIRED,
         (
             ('role', REQUIRED, r'admin'),
+            ('lazy_extensions', REQUIRED, BOOL),
         )
      ),
     ('filesystem', REQUIRED,
         (
             ('extensions_dir', REQUIRED, ANY),
+            ('extensions_manifest', REQUIRED, ANY),
             ('id_cert_dir', REQUIRED, ANY),
             ('id_cert_filename', REQUIRED, ANY),
             ('upload_working_dir', REQUIRED, ANY),
@@ -12,16 +12,20 @@ DEFAULT = {
         'rsa_pub': '/etc/pki/pulp/consumer/server/rsa_pub.key',
         'verify_ssl': 'true',
         'ca_path': '/etc/pki/tls/certs/ca-bundle.crt',
+        'persistent_connections': 'false',
+        'max_idle_time': '4',
     },
     'authentication': {
         'rsa_key': '/etc/pki/pulp/consumer/rsa.key',
         'rsa_pub': '/etc/pki/pulp/consumer/rsa_pub.key'
     },
     'client': {
-        'role': 'consumer'
+        'role': 'consumer',
+        'lazy_extensions': 'false',
     },
     'filesystem': {
         'extensions_dir': '/usr/lib/pulp/consumer/extensions',
+        'extensions_manifest': '~/.pulp/consumer_extensions.json',
         'repo_file': '/etc/yum.repos.d/pulp.repo',
         'mirror_list_dir': '/etc/yum.repos.d',
         'gpg_keys_dir': '/etc/pki/pulp-gpg-keys',
@@ -60,14 +64,18 @@ SCHEMA = (
       ('api_prefix', REQUIRED, ANY),
       ('verify_ssl', REQUIRED, BOOL),
       ('ca_path', REQUIRED, ANY),
+      ('persistent_connections', REQUIRED, BOOL),
+      ('max_idle_time', REQUIRED, NUMBER),
       ('rsa_pub', REQUIRED, ANY))),
     ('authentication', REQUIRED,
      (('rsa_key', REQUIRED, ANY),
       ('rsa_pub', REQUIRED, ANY))),
     ('client', REQUIRED,
-     (('role', REQUIRED, r'consumer'),),),
+     (('role', REQUIRED, r'consumer'),
+      ('lazy_extensions', REQUIRED, BOOL))),
     ('filesystem', REQUIRED,
      (('extensions_dir', REQUIRED, ANY),
+      ('extensions_manifest', REQUIRED, ANY),
       ('repo_file', REQUIRED, ANY),
       ('mirror_list_dir', REQUIRED, ANY),
       ('gpg_keys_dir', REQUIRED, ANY),
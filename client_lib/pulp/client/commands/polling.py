@@ -6,6 +6,7 @@ import time
 from gettext import gettext as _
 
 from pulp.client.extensions.extensions import PulpCliCommand, PulpCliFlag
+from pulp.bindings.exceptions import ApacheServerException, NotFoundException, PulpServerException
 from pulp.bindings.responses import Task
 
 # Returned from the poll command if one or more of the tasks in the given list
@@ -22,6 +23,9 @@ DESC_BACKGROUND = _('if specified, the client process will end immediately (the
                     'continue to run on the server)')
 FLAG_BACKGROUND = PulpCliFlag('--bg', DESC_BACKGROUND)
 
+# Status codes a server that predates the bulk task status call answers it with
+BULK_STATUS_UNSUPPORTED_CODES = (404, 405)
+
 
 class PollingCommand(PulpCliCommand):
     """
@@ -64,6 +68,14 @@ class PollingCommand(PulpCliCommand):
         # list of tasks we already know about
         self.known_tasks = set()
 
+        # tasks being polled, and the latest report retrieved for each of them
+        self._polled_tasks = []
+        self._latest_tasks = {}
+        # server timestamp returned by the last bulk status call
+        self._changed_since = None
+        # set to False once the server is found not to support the bulk status call
+        self._bulk_status_supported = True
+
     def poll(self, task_list, user_input):
         """
         Entry point to begin polling on the tasks in the given list. Each task will be polled
@@ -112,6 +124,12 @@ class PollingCommand(PulpCliCommand):
         msg = _('This command may be exited via ctrl+c without affecting the request.')
         self.prompt.render_paragraph(msg, tag='abort')
 
+        # Spawned tasks are added to this same list as they are discovered below, so they are
+        # included in the status refreshes as well.
+        self._polled_tasks = task_list
+        self._latest_tasks = {}
+        self._changed_since = None
+
         try:
             # Keep a copy of the final reports for all tasks to return to the caller
             completed_task_list = []
@@ -197,6 +215,9 @@ class PollingCommand(PulpCliCommand):
         running_spinner = self.context.prompt.create_spinner()
         running_spinner.spin_tag = 'running-spinner'
 
+        # The task may have progressed while earlier tasks in the list were being polled
+        task = self._latest_tasks.get(task.task_id, task)
+
         first_run = True
         while not task.is_completed():
 
@@ -212,8 +233,7 @@ class PollingCommand(PulpCliCommand):
 
             time.sleep(self.poll_frequency_in_seconds)
 
-            response = self.context.server.tasks.get_task(task.task_id)
-            task = response.response_body
+            task = self._refresh_task(task)
 
         # One final call to update the progress with the end state. It's possible the run state
         # was never hit in the loop above, so we check for first_run again for the missing blank
@@ -225,6 +245,41 @@ class PollingCommand(PulpCliCommand):
 
         return task
 
+    def _refresh_task(self, task):
+        """
+        Retrieves the latest report for the task being polled. The reports for all incomplete
+        tasks being polled are retrieved together with a single call, asking only for those
+        that changed since the previous call. If the server does not support that call, only
+        the given task is retrieved.
+
+        :param task: the task being polled
+        :type  task: pulp.bindings.responses.Task
+
+        :return: the latest report for the task
+        :rtype:  pulp.bindings.responses.Task
+        """
+        if self._bulk_status_supported:
+            task_ids = [t.task_id for t in self._polled_tasks
+                        if not self._latest_tasks.get(t.task_id, t).is_completed()]
+            try:
+                response = self.context.server.tasks.get_tasks_status(task_ids,
+                                                                      self._changed_since)
+            except (NotFoundException, ApacheServerException, PulpServerException), e:
+                if not _bulk_status_unsupported(e):
+                    raise
+                self._bulk_status_supported = False
+            else:
+                self._changed_since = response.response_body['timestamp']
+                for latest in response.response_body['tasks']:
+                    self._latest_tasks[latest.task_id] = latest
+                # A task that no longer exists falls through to get_task, which raises the
+                # same error as it always has.
+                if task.task_id not in response.response_body['missing']:
+                    return self._latest_tasks.get(task.task_id, task)
+
+        response = self.context.server.tasks.get_task(task.task_id)
+        return response.response_body
+
     def task_header(self, task):
         """
         Displays information to the user to indicate which task is about to be tracked.
@@ -356,3 +411,18 @@ class PollingCommand(PulpCliCommand):
         """
         msg = _('The request has been queued on the server.')
         self.context.prompt.render_paragraph(msg, tag='background')
+
+
+def _bulk_status_unsupported(e):
+    """
+    :param e: the error raised by the bulk task status call
+    :type  e: Exception
+
+    :return: True if the error means the server does not support the call
+    :rtype:  bool
+    """
+    if isinstance(e, NotFoundException):
+        return True
+    if isinstance(e, ApacheServerException):
+        return e.response_code in BULK_STATUS_UNSUPPORTED_CODES
+    return getattr(e, 'http_status', None) in BULK_STATUS_UNSUPPORTED_CODES
@@ -8,6 +8,7 @@ then uses it to instantiate the extension components.
 
 import copy
 from gettext import gettext as _
+import json
 import logging
 import os
 import sys
@@ -30,6 +31,17 @@ _ENTRY_POINTS = 'entry points'
 # name of the entry point
 ENTRY_POINT_EXTENSIONS = 'pulp.extensions.%s'
 
+# Identifiers of each extension in the manifest of lazily loaded extensions
+_PACK_ID = 'pack:%s'
+_ENTRY_POINT_ID = 'entry point:%s'
+
+# Version of the manifest format; a manifest of any other version is rebuilt
+MANIFEST_VERSION = 1
+
+# Compiled files are written by the first import of a pack, so they are not
+# considered when deciding whether a pack has changed
+_COMPILED_SUFFIXES = ('.pyc', '.pyo')
+
 
 class ExtensionLoaderException(Exception):
     """ Base class for all loading-related exceptions. """
@@ -104,6 +116,88 @@ def load_extensions(extensions_dir, context, role):
     if not os.access(extensions_dir, os.F_OK | os.R_OK):
         raise InvalidExtensionsDirectory(extensions_dir)
 
+    extensions = _find_extensions(extensions_dir, role)
+    _load_ordered(extensions_dir, context, extensions)
+
+
+def load_extensions_lazily(extensions_dir, context, role, manifest_filename, section_name):
+    """
+    Loads only the extensions needed to run the given root section or command
+    of the CLI. The root sections and commands each extension adds are kept in
+    a manifest which is rebuilt, by loading every extension, whenever an
+    extension pack is modified or an entry point's distribution version
+    changes. If the section is not in the manifest, for instance when None is
+    given to display the usage, every extension is loaded.
+
+    An extension is loaded if it adds anything under the given section, or if
+    an extension already chosen adds to a section that an extension before it
+    adds to, in case the former expects to find the latter's section.
+
+    @param extensions_dir: directory in which to find extension packs
+    @type  extensions_dir: str
+
+    @param context: pre-populated context the extensions should be given to
+                    interact with the client; its cli must be set
+    @type  context: pulp.client.extensions.core.ClientContext
+
+    @param role:    name of a role, either "admin" or "consumer", so we know
+                    which extensions to load
+    @type  role:    str
+
+    @param manifest_filename: full path to the file in which the manifest is kept
+    @type  manifest_filename: str
+
+    @param section_name: name of the root section or command being run; may be None
+    @type  section_name: str
+    """
+
+    # Validation
+    if not os.access(extensions_dir, os.F_OK | os.R_OK):
+        raise InvalidExtensionsDirectory(extensions_dir)
+
+    entry_points = list(pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role))
+    stamps = _extension_stamps(extensions_dir, entry_points)
+
+    manifest = _read_manifest(manifest_filename)
+    if manifest is not None and manifest.get('version') == MANIFEST_VERSION and \
+            manifest.get('extensions_dir') == extensions_dir and manifest.get('stamps') == stamps:
+        required = _required_extensions(manifest['extensions'], section_name)
+        if required is None:
+            extensions = _find_extensions(extensions_dir, role, entry_points)
+            _load_ordered(extensions_dir, context, extensions)
+        else:
+            _load_required(extensions_dir, context, manifest['extensions'], required,
+                           entry_points)
+        return
+
+    _logger.debug(_('Rebuilding the extensions manifest [%(m)s]' % {'m': manifest_filename}))
+    recorded = []
+    extensions = _find_extensions(extensions_dir, role, entry_points)
+    _load_ordered(extensions_dir, context, extensions, recorded)
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'extensions_dir': extensions_dir,
+        'stamps': stamps,
+        'extensions': recorded,
+    }
+    _write_manifest(manifest_filename, manifest)
+
+
+def _find_extensions(extensions_dir, role, entry_points=None):
+    """
+    Imports each extension pack and orders the packs and entry points in the
+    order in which they are to be initialized.
+
+    @param entry_points: entry points for the role, if already retrieved
+    @type  entry_points: list
+
+    @return: list of (extension id, priority, pack module or entry point) tuples
+    @rtype:  list
+
+    @raises LoadFailed: if one of the packs cannot be imported
+    """
+
     # identify modules and sort them
     try:
         unsorted_modules = _load_pack_modules(extensions_dir)
@@ -112,27 +206,213 @@ def load_extensions(extensions_dir, context, role):
         raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
 
     # find extensions from entry points and add them to the sorted structure
-    for extension in pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role):
+    if entry_points is None:
+        entry_points = pkg_resources.iter_entry_points(ENTRY_POINT_EXTENSIONS % role)
+    for extension in entry_points:
         priority = getattr(extension, PRIORITY_VAR, DEFAULT_PRIORITY)
         sorted_extensions.setdefault(priority, {}).setdefault(_ENTRY_POINTS, []).append(extension)
 
-    error_packs = []
+    extensions = []
     for priority in sorted(sorted_extensions.keys()):
         for module in sorted_extensions[priority].get(_MODULES, []):
+            extensions.append((_PACK_ID % module.__name__, priority, module))
+        for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
+            extensions.append((_ENTRY_POINT_ID % entry_point, priority, entry_point))
+
+    return extensions
+
+
+def _load_ordered(extensions_dir, context, extensions, recorded=None):
+    """
+    Initializes each of the given extensions in order.
+
+    @param extensions: list of (extension id, priority, pack module or entry
+                       point) tuples, as returned by _find_extensions
+    @type  extensions: list
+
+    @param recorded: if specified, an entry describing each initialized
+                     extension and the root sections and commands it added to
+                     is appended to this list
+    @type  recorded: list
+
+    @raises LoadFailed: if one or more of the packs failed to initialize
+    """
+    error_packs = []
+    if recorded is not None:
+        before = _cli_paths(context.cli.root_section)
+    for extension_id, priority, extension in extensions:
+        if extension_id.startswith(_PACK_ID % ''):
             try:
-                _load_pack(extensions_dir, module, context)
+                _load_pack(extensions_dir, extension, context)
             except ExtensionLoaderException, e:
                 # Do a best-effort attempt to load all extensions. If any fail,
                 # the cause will be logged by _load_pack. This method should
                 # continue to load extensions so all of the errors are logged.
-                error_packs.append(module.__name__)
-        for entry_point in sorted_extensions[priority].get(_ENTRY_POINTS, []):
-            entry_point.load()(context)
+                error_packs.append(extension.__name__)
+                continue
+        else:
+            extension.load()(context)
+
+        if recorded is not None:
+            after = _cli_paths(context.cli.root_section)
+            sections = sorted(set(path[0] for path in after - before))
+            recorded.append({'id': extension_id, 'priority': priority, 'sections': sections})
+            before = after
 
     if len(error_packs) > 0:
         raise LoadFailed(error_packs)
 
 
+def _load_required(extensions_dir, context, manifest_extensions, required, entry_points):
+    """
+    Initializes the extensions in the manifest that are required, importing
+    only the packs among them.
+
+    @param manifest_extensions: extensions listed in the manifest, in load order
+    @type  manifest_extensions: list
+
+    @param required: IDs of the extensions to initialize
+    @type  required: set
+
+    @param entry_points: entry points for the role
+    @type  entry_points: list
+
+    @raises LoadFailed: if one or more of the packs failed to load
+    """
+    if extensions_dir not in sys.path:
+        sys.path.append(extensions_dir)
+
+    entry_points_by_id = dict((_ENTRY_POINT_ID % e, e) for e in entry_points)
+
+    extensions = []
+    for entry in manifest_extensions:
+        extension_id = entry['id']
+        if extension_id not in required:
+            continue
+        if extension_id in entry_points_by_id:
+            extension = entry_points_by_id[extension_id]
+        else:
+            pack = extension_id[len(_PACK_ID % ''):]
+            try:
+                extension = _import_pack(pack)
+            except ImportFailed, e:
+                raise LoadFailed([e.pack_name]), None, sys.exc_info()[2]
+        extensions.append((extension_id, entry['priority'], extension))
+
+    _load_ordered(extensions_dir, context, extensions)
+
+
+def _required_extensions(manifest_extensions, section_name):
+    """
+    Determines which extensions must be initialized to run the given root
+    section or command.
+
+    @param manifest_extensions: extensions listed in the manifest, in load order
+    @type  manifest_extensions: list
+
+    @param section_name: name of the root section or command being run
+    @type  section_name: str
+
+    @return: IDs of the extensions to initialize, or None if no extension adds
+             the section
+    @rtype:  set
+    """
+    contributors = {}  # key: root section name, value: list of extension indexes
+    for index, entry in enumerate(manifest_extensions):
+        for name in entry['sections']:
+            contributors.setdefault(name, []).append(index)
+
+    if section_name not in contributors:
+        return None
+
+    required = set(contributors[section_name])
+    pending = list(required)
+    while pending:
+        index = pending.pop()
+        for name in manifest_extensions[index]['sections']:
+            # an extension may only rely on sections added by those initialized before it
+            for other in contributors[name]:
+                if other < index and other not in required:
+                    required.add(other)
+                    pending.append(other)
+
+    return set(manifest_extensions[i]['id'] for i in required)
+
+
+def _cli_paths(section, parent=()):
+    """
+    @return: set of tuples of names leading to each subsection and command
+             under the given section
+    @rtype:  set
+    """
+    paths = set()
+    for name in section.commands:
+        paths.add(parent + (name,))
+    for name, subsection in section.subsections.items():
+        path = parent + (name,)
+        paths.add(path)
+        paths.update(_cli_paths(subsection, path))
+    return paths
+
+
+def _extension_stamps(extensions_dir, entry_points):
+    """
+    Describes the current state of each extension, so a change to any of them
+    can be detected.
+
+    @return: dict of extension ID to the pack's file count and most recent
+             modification time, or to the entry point's distribution and version
+    @rtype:  dict
+    """
+    stamps = {}
+    for pack in os.listdir(extensions_dir):
+        if pack.startswith('.'):
+            continue
+        count = 0
+        latest = os.path.getmtime(os.path.join(extensions_dir, pack))
+        for root, dirs, files in os.walk(os.path.join(extensions_dir, pack)):
+            for name in files:
+                if name.endswith(_COMPILED_SUFFIXES):
+                    continue
+                count += 1
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+        stamps[_PACK_ID % pack] = [count, latest]
+    for entry_point in entry_points:
+        dist = entry_point.dist
+        version = dist and '%s-%s' % (dist.project_name, dist.version)
+        stamps[_ENTRY_POINT_ID % entry_point] = version
+    return stamps
+
+
+def _read_manifest(manifest_filename):
+    """
+    @return: the manifest, or None if it does not exist or cannot be read
+    @rtype:  dict
+    """
+    try:
+        with open(manifest_filename) as manifest_file:
+            return json.load(manifest_file)
+    except (IOError, ValueError), e:
+        _logger.debug(_('Could not read the extensions manifest [%(m)s]: %(e)s' %
+                        {'m': manifest_filename, 'e': e}))
+        return None
+
+
+def _write_manifest(manifest_filename, manifest):
+    """
+    Writes the manifest, replacing the previous one at once. Failing to write
+    it is logged but otherwise ignored, since the extensions are loaded anyway.
+    """
+    temp_filename = '%s.%d' % (manifest_filename, os.getpid())
+    try:
+        with open(temp_filename, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.rename(temp_filename, manifest_filename)
+    except (IOError, OSError), e:
+        _logger.debug(_('Could not write the extensions manifest [%(m)s]: %(e)s' %
+                        {'m': manifest_filename, 'e': e}))
+
+
 def _load_pack_modules(extensions_dir):
     """
     Loads the modules for each pack in the extensions directory, taking care
@@ -156,15 +436,25 @@ def _load_pack_modules(extensions_dir):
     for pack in pack_names:
         if pack.startswith('.'):
             continue
-        try:
-            mod = __import__(pack)
-            modules.append(mod)
-        except Exception:
-            raise ImportFailed(pack), None, sys.exc_info()[2]
+        modules.append(_import_pack(pack))
 
     return modules
 
 
+def _import_pack(pack):
+    """
+    @return: the extension pack's module, imported from the extensions directory
+             previously added to the path
+    @rtype:  module
+
+    @raises ImportFailed: if the pack cannot be imported
+    """
+    try:
+        return __import__(pack)
+    except Exception:
+        raise ImportFailed(pack), None, sys.exc_info()[2]
+
+
 def _resolve_order(modules):
     """
     Determines the order in which the given modules should be initialized. The
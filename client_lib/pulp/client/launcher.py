@@ -99,7 +99,17 @@ def main(config, exception_handler_class=ExceptionHandler):
 
     role = config['client']['role']
     try:
-        extensions_loader.load_extensions(extensions_dir, context, role)
+        if config.parse_bool(config['client']['lazy_extensions']):
+            # Only the extensions adding to the section being run are needed, unless the
+            # usage or the map of every section is displayed
+            section_name = None
+            if args and not options.print_map:
+                section_name = args[0]
+            manifest_filename = os.path.expanduser(config['filesystem']['extensions_manifest'])
+            extensions_loader.load_extensions_lazily(extensions_dir, context, role,
+                                                     manifest_filename, section_name)
+        else:
+            extensions_loader.load_extensions(extensions_dir, context, role)
     except extensions_loader.LoadFailed, e:
         prompt.write(
             _('The following extensions failed to load: %(f)s' % {'f': ', '.join(e.failed_packs)}))
@@ -203,10 +213,13 @@ def _create_bindings(config, cli_logger, username, password, verbose=None):
     # Create the connection and bindings
     verify_ssl = config.parse_bool(config['server']['verify_ssl'])
     ca_path = config['server']['ca_path']
+    persistent_connections = config.parse_bool(config['server']['persistent_connections'])
+    max_idle_time = int(config['server']['max_idle_time'])
     conn = PulpConnection(
         hostname, port, username=username, password=password, cert_filename=cert_filename,
         logger=cli_logger, api_responses_logger=api_logger, verify_ssl=verify_ssl,
-        ca_path=ca_path)
+        ca_path=ca_path, persistent_connections=persistent_connections,
+        max_idle_time=max_idle_time)
     bindings = Bindings(conn)
 
     return bindings
@@ -7,6 +7,9 @@ client-side tracking of upload requests on the server.
 
 import copy
 import errno
+import itertools
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
 import os
 import pickle
 
@@ -14,6 +17,11 @@ from pulp.common.lock import LockFile
 
 
 DEFAULT_CHUNKSIZE = 1048576  # 1 MB per upload call
+DEFAULT_CONCURRENCY = 1  # number of upload calls in flight at once
+
+# Seconds to wait for an upload call to finish before waiting again, so a KeyboardInterrupt
+# is not held off while the calls run in other threads
+UPLOAD_WAIT_INTERVAL = 1
 
 
 class ManagerUninitializedException(Exception):
@@ -71,7 +79,8 @@ class UploadManager(object):
     on disk state files.
     """
 
-    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE):
+    def __init__(self, upload_working_dir, bindings, chunk_size=DEFAULT_CHUNKSIZE,
+                 concurrency=DEFAULT_CONCURRENCY):
         """
         @param upload_working_dir: directory in which to store client-side files
                to track upload requests; if it doesn't exist it will be created
@@ -84,10 +93,15 @@ class UploadManager(object):
         @param chunk_size: size in bytes of data to upload on each call to the
                server
         @type  chunk_size: int
+
+        @param concurrency: number of upload calls to the server to have in
+               flight at once
+        @type  concurrency: int
         """
         self.upload_working_dir = upload_working_dir
         self.bindings = bindings
         self.chunk_size = chunk_size
+        self.concurrency = concurrency
 
         # Internal state
         self.tracker_files = {}
@@ -100,7 +114,9 @@ class UploadManager(object):
 
         This initializes the class with a default upload working directory. It
         uses code that had been copy-pasted into all type-specific extensions,
-        which allows them to eliminate that copy-pasted code.
+        which allows them to eliminate that copy-pasted code. The chunk size
+        and concurrency of uploads are read from the server section of the
+        client configuration.
 
         :param context: a bunch of stuff that the whole CLI passes around
         :type  context: pulp.client.extensions.core.ClientContext
@@ -111,7 +127,10 @@ class UploadManager(object):
         upload_working_dir = os.path.join(context.config['filesystem']['upload_working_dir'],
                                           'default')
         upload_working_dir = os.path.expanduser(upload_working_dir)
-        return cls(upload_working_dir, context.server)
+        server_config = context.config.get('server', {})
+        chunk_size = int(server_config.get('upload_chunk_size', DEFAULT_CHUNKSIZE))
+        concurrency = int(server_config.get('upload_concurrency', DEFAULT_CONCURRENCY))
+        return cls(upload_working_dir, context.server, chunk_size, concurrency)
 
     def initialize(self):
         """
@@ -153,7 +172,11 @@ class UploadManager(object):
         if not os.path.exists(self.upload_working_dir):
             os.makedirs(self.upload_working_dir)
 
-        response = self.bindings.uploads.initialize_upload().response_body
+        # Declaring the size lets the server allocate the file up front
+        size = None
+        if filename and os.path.exists(filename):
+            size = os.path.getsize(filename)
+        response = self.bindings.uploads.initialize_upload(size).response_body
 
         upload_id = response['upload_id']
         location = response['_href']
@@ -184,15 +207,21 @@ class UploadManager(object):
         Begins or resumes the upload process for the given upload request.
         This call will not return until the upload is complete. The other
         expected exit point is a KeyboardError to kill the process. The
-        client-side on disk tracker files will store the current offset and
-        resume the upload from where it left off on the next call to this method.
+        client-side on disk tracker files will store the offsets of the chunks
+        that were uploaded and resume the upload from where it left off on the
+        next call to this method.
+
+        When the concurrency of this instance is greater than one, that many
+        chunks are uploaded at once, each by its own call to the server, and
+        they may finish in any order.
 
         The callback_func is used to get feedback on the upload process. After
         each successful upload segment call to the server, this function
-        will be invoked with the new offset in the file and the file size
-        (intended to be fed into a progress indicator). As this is called
-        after each upload segment call, the granularity at which it is called
-        depends on the chunk_size value for this instance.
+        will be invoked with the number of bytes of the file uploaded so far and
+        the file size (intended to be fed into a progress indicator). When the
+        chunks are uploaded one at a time, the former is the new offset in the
+        file. As this is called after each upload segment call, the granularity
+        at which it is called depends on the chunk_size value for this instance.
 
         The callback_func should have a signature of (int, int).
 
@@ -235,22 +264,29 @@ class UploadManager(object):
 
             source_file_size = os.path.getsize(tracker_file.source_filename)
 
-            f = open(tracker_file.source_filename, 'r')
-            while True:
-                # Load the chunk to upload
-                f.seek(tracker_file.offset)
-                data = f.read(self.chunk_size)
-                if not data:
-                    break
+            # Chunks that were uploaded out of order by a previous call are on the
+            # boundaries of the chunk size used at the time.
+            if not tracker_file.completed_offsets:
+                tracker_file.chunk_size = self.chunk_size
+            chunk_size = tracker_file.chunk_size
 
-                # Server request
-                self.bindings.uploads.upload_segment(upload_id, tracker_file.offset, data)
+            offsets = [offset for offset in xrange(tracker_file.offset, source_file_size,
+                                                   chunk_size)
+                       if offset not in tracker_file.completed_offsets]
+            uploaded = source_file_size - sum(min(chunk_size, source_file_size - offset)
+                                              for offset in offsets)
 
+            for offset in self._upload_chunks(upload_id, tracker_file, offsets):
                 # Status update and callback notification
-                tracker_file.offset = min(tracker_file.offset + self.chunk_size, source_file_size)
+                tracker_file.completed_offsets.add(offset)
+                while tracker_file.offset in tracker_file.completed_offsets:
+                    tracker_file.completed_offsets.remove(tracker_file.offset)
+                    tracker_file.offset = min(tracker_file.offset + chunk_size, source_file_size)
                 tracker_file.save()
 
-                callback_func(tracker_file.offset, source_file_size)
+                uploaded += min(chunk_size, source_file_size - offset)
+                if callback_func:
+                    callback_func(uploaded, source_file_size)
 
             tracker_file.is_finished_uploading = True
         finally:
@@ -259,6 +295,53 @@ class UploadManager(object):
             tracker_file.is_running = False
             tracker_file.save()
 
+    def _upload_chunks(self, upload_id, tracker_file, offsets):
+        """
+        Uploads the chunks of the source file that start at the given offsets,
+        self.concurrency of them at a time.
+
+        @param upload_id: identifies the upload request
+        @type  upload_id: str
+
+        @param tracker_file: tracker of the upload request
+        @type  tracker_file: UploadTracker
+
+        @param offsets: offsets of the chunks to upload
+        @type  offsets: list of int
+
+        @return: the offset of each chunk, as soon as it is uploaded
+        @rtype:  generator of int
+        """
+        def upload_chunk(offset):
+            f = open(tracker_file.source_filename, 'r')
+            try:
+                f.seek(offset)
+                data = f.read(tracker_file.chunk_size)
+            finally:
+                f.close()
+
+            # Server request
+            self.bindings.uploads.upload_segment(upload_id, offset, data)
+            return offset
+
+        if self.concurrency <= 1:
+            for offset in itertools.imap(upload_chunk, offsets):
+                yield offset
+            return
+
+        pool = ThreadPool(self.concurrency)
+        try:
+            results = pool.imap_unordered(upload_chunk, offsets)
+            while True:
+                try:
+                    yield results.next(UPLOAD_WAIT_INTERVAL)
+                except TimeoutError:
+                    continue
+                except StopIteration:
+                    return
+        finally:
+            pool.terminate()
+
     def import_upload(self, upload_id):
         """
         Once the file is finished uploading, this call will request the server
@@ -397,7 +480,9 @@ class UploadTracker(object):
         # Upload call information
         self.upload_id = None
         self.location = None  # URL to the upload request on the server
-        self.offset = None  # start of next chunk to upload
+        self.offset = None  # start of the first chunk that is not uploaded
+        self.completed_offsets = set()  # starts of chunks past offset that are uploaded
+        self.chunk_size = None  # size of the chunks the file is uploaded in
         self.source_filename = None  # path on disk to the file to upload
 
         # Import call information
@@ -436,6 +521,11 @@ class UploadTracker(object):
     def delete(self):
         os.remove(self.filename)
 
+    def __setstate__(self, state):
+        # Tracker files saved by older versions lack the attributes added since
+        self.__init__(state['filename'])
+        self.__dict__.update(state)
+
     @classmethod
     def load(cls, filename):
         """
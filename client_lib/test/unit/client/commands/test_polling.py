@@ -1,7 +1,8 @@
 import mock
 
+from pulp.bindings.exceptions import ApacheServerException, NotFoundException
 from pulp.bindings.responses import (
-    Task, STATE_WAITING, STATE_CANCELED, STATE_ERROR, STATE_FINISHED,
+    Response, Task, STATE_WAITING, STATE_CANCELED, STATE_ERROR, STATE_FINISHED,
     STATE_RUNNING, STATE_SKIPPED, STATE_ACCEPTED)
 from pulp.client.commands.polling import (
     PollingCommand, RESULT_ABORTED, FLAG_BACKGROUND, RESULT_BACKGROUND)
@@ -209,6 +210,121 @@ class PollingCommandTests(base.PulpClientTests):
         for i in range(0, 3):
             self.assertEqual(STATE_FINISHED, completed_tasks[i].state)
 
+    @mock.patch('time.sleep')
+    def test_poll_task_list_batched(self, mock_sleep):
+        """
+        Tasks that complete while an earlier task is being polled are retrieved with the same
+        status calls and are not polled on their own.
+        """
+        # Setup
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+
+        sim.add_task_states('1', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        sim.add_task_states('2', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        sim.add_task_states('3', [STATE_WAITING, STATE_FINISHED])
+        sim.get_task = mock.MagicMock()
+
+        # Test
+        task_list = sim.get_all_tasks().response_body
+        with mock.patch.object(sim, 'get_tasks_status',
+                               wraps=sim.get_tasks_status) as get_tasks_status:
+            completed_tasks = self.command.poll(task_list, {})
+
+        # Verify
+        self.assertEqual(3, len(completed_tasks))
+        for task in completed_tasks:
+            self.assertEqual(STATE_FINISHED, task.state)
+        self.assertEqual(2, mock_sleep.call_count)
+        self.assertEqual(get_tasks_status.call_args_list,
+                         [mock.call(['1', '2', '3'], None), mock.call(['1', '2'], 0)])
+        self.assertFalse(sim.get_task.called)
+
+    @mock.patch('time.sleep')
+    def test_poll_bulk_status_not_supported(self, mock_sleep):
+        """
+        When the server does not support retrieving the status of many tasks at once, each
+        task is retrieved on its own.
+        """
+        # Setup
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+
+        sim.add_task_states('1', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        sim.add_task_states('2', [STATE_WAITING, STATE_FINISHED])
+        sim.get_tasks_status = mock.MagicMock(side_effect=NotFoundException({}))
+
+        # Test
+        task_list = sim.get_all_tasks().response_body
+        completed_tasks = self.command.poll(task_list, {})
+
+        # Verify
+        self.assertEqual(2, len(completed_tasks))
+        for task in completed_tasks:
+            self.assertEqual(STATE_FINISHED, task.state)
+        self.assertEqual(1, sim.get_tasks_status.call_count)
+        self.assertEqual(3, mock_sleep.call_count)
+
+    @mock.patch('time.sleep')
+    def test_poll_bulk_status_method_not_allowed(self, mock_sleep):
+        """
+        A server that predates the bulk status call routes it to the task resource, which
+        answers a POST with an empty 405. Each task is then retrieved on its own.
+        """
+        # Setup
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+
+        sim.add_task_states('1', [STATE_WAITING, STATE_RUNNING, STATE_FINISHED])
+        sim.get_tasks_status = mock.MagicMock(side_effect=ApacheServerException('', 405))
+
+        # Test
+        task_list = sim.get_all_tasks().response_body
+        completed_tasks = self.command.poll(task_list, {})
+
+        # Verify
+        self.assertEqual(1, len(completed_tasks))
+        self.assertEqual(STATE_FINISHED, completed_tasks[0].state)
+        self.assertEqual(1, sim.get_tasks_status.call_count)
+
+    @mock.patch('time.sleep')
+    def test_poll_bulk_status_server_error(self, mock_sleep):
+        """
+        Other errors from the bulk status call are raised.
+        """
+        # Setup
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+
+        sim.add_task_states('1', [STATE_WAITING, STATE_FINISHED])
+        sim.get_tasks_status = mock.MagicMock(side_effect=ApacheServerException('', 500))
+
+        # Test
+        task_list = sim.get_all_tasks().response_body
+        self.assertRaises(ApacheServerException, self.command.poll, task_list, {})
+
+    @mock.patch('time.sleep')
+    def test_poll_missing_task(self, mock_sleep):
+        """
+        A task reported missing by the status call is retrieved on its own, so the error
+        raised for it is the same as when polling a single task.
+        """
+        # Setup
+        sim = TaskSimulator()
+        sim.install(self.bindings)
+
+        sim.add_task_states('1', [STATE_WAITING])
+        body = {'timestamp': 0, 'tasks': [], 'missing': ['1']}
+        sim.get_tasks_status = mock.MagicMock(return_value=Response('200', body))
+        sim.get_task = mock.MagicMock(side_effect=NotFoundException({}))
+
+        # Test
+        task_list = sim.get_all_tasks().response_body
+        self.assertRaises(NotFoundException, self.command.poll, task_list, {})
+
+        # Verify
+        sim.get_task.assert_called_once_with('1')
+
     def test_get_tasks_to_poll_duplicate_tasks(self):
         sim = TaskSimulator()
         sim.add_task_state('1', STATE_FINISHED)
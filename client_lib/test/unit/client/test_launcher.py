@@ -11,6 +11,7 @@ import unittest
 
 import mock
 
+from pulp.bindings.server import PooledHTTPSServerWrapper
 from pulp.client import constants, launcher
 from pulp.common import config
 
@@ -24,7 +25,8 @@ class TestCreateBindings(unittest.TestCase):
         self.ca_path = '/some/path'
         self.config['filesystem'] = {'id_cert_dir': '/dir/', 'id_cert_filename': 'file'}
         self.config['server'] = {'host': 'awesome_host', 'port': 1234, 'verify_ssl': 'true',
-                                 'ca_path': self.ca_path}
+                                 'ca_path': self.ca_path, 'persistent_connections': 'false',
+                                 'max_idle_time': '4'}
 
     def test_verify_ssl_false(self):
         """
@@ -51,6 +53,19 @@ class TestCreateBindings(unittest.TestCase):
         self.assertEqual(bindings.bindings.server.verify_ssl, True)
         self.assertEqual(bindings.bindings.server.ca_path, different_path)
 
+    def test_persistent_connections(self):
+        """
+        Make sure the PulpConnection keeps connections open when persistent_connections is true.
+        """
+        self.config['server']['persistent_connections'] = 'true'
+        self.config['server']['max_idle_time'] = '2'
+
+        bindings = launcher._create_bindings(self.config, None, 'username', 'password')
+
+        server_wrapper = bindings.bindings.server.server_wrapper
+        self.assertTrue(isinstance(server_wrapper, PooledHTTPSServerWrapper))
+        self.assertEqual(server_wrapper.max_idle_time, 2)
+
     def test_verify_default_logging(self):
         """
         Make sure that the None or 1 values for verbose set api_responses_logger to None
@@ -55,6 +55,16 @@ class UploadManagerTests(unittest.TestCase):
         self.assertTrue(isinstance(manager, upload_util.UploadManager))
         self.assertEqual(manager.upload_working_dir, '/a/b/c/default')
 
+    def test_init_with_defaults_upload_config(self):
+        context = mock.MagicMock()
+        context.config = {'filesystem': {'upload_working_dir': '/a/b/c'},
+                          'server': {'upload_chunk_size': '100', 'upload_concurrency': '4'}}
+
+        manager = upload_util.UploadManager.init_with_defaults(context)
+
+        self.assertEqual(manager.chunk_size, 100)
+        self.assertEqual(manager.concurrency, 4)
+
     def test_initialize_no_trackers(self):
         os.makedirs(self.upload_working_dir)
 
@@ -156,6 +166,25 @@ class UploadManagerTests(unittest.TestCase):
         self.assertEqual(tracker.unit_metadata, {})
         self.assertEqual(tracker.override_config, None)
 
+    def test_initialize_upload_declares_size(self):
+        self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1', {}, {})
+
+        self.mock_upload_bindings.initialize_upload.assert_called_once_with(
+            os.path.getsize(TEST_RPM_FILENAME))
+
+    def test_load_tracker_from_older_version(self):
+        os.makedirs(self.upload_working_dir)
+        filename = self.upload_manager._tracker_filename('old')
+        tracker = upload_util.UploadTracker(filename)
+        del tracker.completed_offsets
+        del tracker.chunk_size
+        tracker.save()
+
+        tracker = upload_util.UploadTracker.load(filename)
+
+        self.assertEqual(tracker.completed_offsets, set())
+        self.assertEqual(tracker.chunk_size, None)
+
     def test_initialize_upload_with_override_config(self):
         # Setup
         self.upload_manager.initialize()
@@ -289,6 +318,85 @@ class UploadManagerTests(unittest.TestCase):
         tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
         self.assertEqual(rpm_size, tracker.offset)
 
+    def test_upload_parallel(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 4
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+        mock_callback = mock.Mock()
+
+        # Test
+        self.upload_manager.upload(upload_id, mock_callback.update_status)
+
+        # Verify
+        rpm_size = os.path.getsize(TEST_RPM_FILENAME)
+        num_upload_calls = int(math.ceil(float(rpm_size) / float(self.upload_manager.chunk_size)))
+        self.assertEqual(num_upload_calls, mock_callback.update_status.call_count)
+        self.assertEqual(mock_callback.update_status.call_args[0], (rpm_size, rpm_size))
+
+        f = open(TEST_RPM_FILENAME, 'r')
+        contents = f.read()
+        f.close()
+        segments = sorted(c[0][1:] for c in self.mock_upload_bindings.upload_segment.call_args_list)
+        self.assertEqual([offset for offset, data in segments],
+                         range(0, rpm_size, self.upload_manager.chunk_size))
+        self.assertEqual(''.join(data for offset, data in segments), contents)
+
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        self.assertEqual(rpm_size, tracker.offset)
+        self.assertEqual(set(), tracker.completed_offsets)
+        self.assertEqual(True, tracker.is_finished_uploading)
+        self.assertEqual(False, tracker.is_running)
+
+    def test_upload_resume_out_of_order(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+        tracker = self.upload_manager._get_tracker_file_by_id(upload_id)
+        tracker.offset = 100
+        tracker.completed_offsets = set([300, 400])
+        tracker.chunk_size = 100
+
+        # a different chunk size is not used for an upload that is partly done
+        self.upload_manager.chunk_size = 1000
+        mock_callback = mock.Mock()
+
+        # Test
+        self.upload_manager.upload(upload_id, mock_callback.update_status)
+
+        # Verify
+        offsets = [c[0][1] for c in self.mock_upload_bindings.upload_segment.call_args_list]
+        self.assertEqual(offsets[:3], [100, 200, 500])
+        self.assertEqual(mock_callback.update_status.call_args_list[0][0][0], 400)
+        tracker = upload_util.UploadTracker.load(self.upload_manager._tracker_filename(upload_id))
+        self.assertEqual(os.path.getsize(TEST_RPM_FILENAME), tracker.offset)
+        self.assertEqual(set(), tracker.completed_offsets)
+
+    def test_upload_parallel_failure(self):
+        # Setup
+        self.upload_manager.chunk_size = 100
+        self.upload_manager.concurrency = 2
+        upload_id = self.upload_manager.initialize_upload(TEST_RPM_FILENAME, 'repo-1', 'type-1',
+                                                          {'k': 'v'}, 'm-1')
+
+        def upload_segment(upload_id, offset, data):
+            if offset == 0:
+                raise NotFoundException({})
+            return Response(200, {})
+        self.mock_upload_bindings.upload_segment.side_effect = upload_segment
+
+        # Test
+        self.assertRaises(NotFoundException, self.upload_manager.upload, upload_id)
+
+        # Verify the chunks that were uploaded are recorded for a later resume
+        tracker = upload_util.UploadTracker.load(self.upload_manager._tracker_filename(upload_id))
+        self.assertEqual(0, tracker.offset)
+        self.assertTrue(0 not in tracker.completed_offsets)
+        self.assertEqual(False, tracker.is_running)
+        self.assertEqual(False, tracker.is_finished_uploading)
+
     def test_upload_concurrent_upload(self):
         # Setup
         self.upload_manager.initialize()
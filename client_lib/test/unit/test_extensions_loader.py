@@ -1,5 +1,8 @@
+import json
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 import mock
@@ -192,3 +195,108 @@ class ExtensionLoaderTests(unittest.TestCase):
         def foo():
             pass
         self.assertEqual(getattr(foo, loader.PRIORITY_VAR), loader.DEFAULT_PRIORITY)
+
+
+# prevent entry points from being loaded
+@mock.patch('pkg_resources.iter_entry_points', return_value=())
+class LazyExtensionLoaderTests(unittest.TestCase):
+
+    def setUp(self):
+        super(LazyExtensionLoaderTests, self).setUp()
+
+        self.working_dir = tempfile.mkdtemp(prefix='extensions-manifest')
+        self.manifest_filename = os.path.join(self.working_dir, 'admin_extensions.json')
+
+    def tearDown(self):
+        super(LazyExtensionLoaderTests, self).tearDown()
+        shutil.rmtree(self.working_dir)
+
+    def _context(self):
+        prompt = PulpPrompt()
+        return ClientContext(None, None, None, prompt, None, cli=PulpCli(prompt))
+
+    def _load(self, section_name, extensions_dir=VALID_SET):
+        context = self._context()
+        loader.load_extensions_lazily(extensions_dir, context, 'admin', self.manifest_filename,
+                                      section_name)
+        return sorted(context.cli.root_section.subsections)
+
+    def test_builds_manifest(self, mock_entry):
+        sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(manifest['version'], loader.MANIFEST_VERSION)
+        self.assertEqual(manifest['extensions_dir'], VALID_SET)
+        self.assertEqual(sorted(manifest['stamps']),
+                         ['pack:ext1', 'pack:ext2', 'pack:ext3', 'pack:ext4'])
+        self.assertEqual(manifest['extensions'], [
+            {'id': 'pack:ext3', 'priority': 1, 'sections': ['section-3']},
+            {'id': 'pack:ext1', 'priority': 5, 'sections': ['section-1']},
+            {'id': 'pack:ext4', 'priority': 5, 'sections': []},
+            {'id': 'pack:ext2', 'priority': 7, 'sections': ['section-2']},
+        ])
+
+    @mock.patch('pulp.client.extensions.loader._import_pack', wraps=loader._import_pack)
+    def test_loads_section_from_manifest(self, mock_import, mock_entry):
+        self._load(None)
+        mock_import.reset_mock()
+
+        sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-2'])
+        mock_import.assert_called_once_with('ext2')
+
+    def test_unknown_section_loads_all(self, mock_entry):
+        self._load(None)
+
+        sections = self._load('unknown')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+
+    def test_stale_manifest_rebuilt(self, mock_entry):
+        self._load(None)
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest['stamps']['pack:ext2'] = [1, 0]
+        manifest['extensions'] = []
+        with open(self.manifest_filename, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        sections = self._load('section-2')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_filename) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(len(manifest['extensions']), 4)
+
+    def test_unreadable_manifest_rebuilt(self, mock_entry):
+        with open(self.manifest_filename, 'w') as manifest_file:
+            manifest_file.write('not json')
+
+        sections = self._load('section-1')
+
+        self.assertEqual(sections, ['section-1', 'section-2', 'section-3'])
+        with open(self.manifest_filename) as manifest_file:
+            self.assertEqual(len(json.load(manifest_file)['extensions']), 4)
+
+    def test_failed_load_not_recorded(self, mock_entry):
+        self.assertRaises(loader.LoadFailed, self._load, 'section-1', PARTIAL_FAIL_SET)
+
+        self.assertFalse(os.path.exists(self.manifest_filename))
+
+    def test_required_extensions(self, mock_entry):
+        extensions = [
+            {'id': 'base', 'priority': 1, 'sections': ['repo', 'consumer']},
+            {'id': 'other', 'priority': 5, 'sections': ['other']},
+            {'id': 'plugin', 'priority': 5, 'sections': ['consumer', 'plugin']},
+            {'id': 'later', 'priority': 7, 'sections': ['plugin']},
+        ]
+
+        self.assertEqual(loader._required_extensions(extensions, 'repo'), set(['base']))
+        self.assertEqual(loader._required_extensions(extensions, 'plugin'),
+                         set(['base', 'plugin', 'later']))
+        self.assertEqual(loader._required_extensions(extensions, 'other'), set(['other']))
+        self.assertEqual(loader._required_extensions(extensions, 'missing'), None)
+        self.assertEqual(loader._required_extensions(extensions, None), None)
@@ -0,0 +1,132 @@
+"""
+Functions shared by the consumer agent and the server to report unit profiles
+efficiently. The agent first sends the hash of a profile, and if the server's
+copy differs, sends only what changed since the profile the server last
+acknowledged, as a compressed delta.
+
+A delta can be made between two lists, in which case it records the slices of
+the old list replaced by items of the new one, or between two dicts, in which
+case it records the keys set and unset. Other profiles are always sent whole.
+"""
+
+import base64
+import difflib
+import hashlib
+import zlib
+
+from pulp.common.compat import json
+
+
+DELTA_LIST = 'list'
+DELTA_DICT = 'dict'
+
+
+def calculate_hash(profile):
+    """
+    Return a hash of profile. This hash is useful for
+    quickly comparing profiles to determine if they are the same.
+
+    :param profile: The profile structure you wish to hash
+    :type  profile: object
+    :return:        Hash of profile
+    :rtype:         basestring
+    """
+    # Don't use any whitespace in the json separators, and sort dictionary keys to be repeatable
+    serialized_profile = json.dumps(profile, separators=(',', ':'), sort_keys=True)
+    hasher = hashlib.sha256(serialized_profile)
+    return hasher.hexdigest()
+
+
+def make_delta(old_profile, new_profile):
+    """
+    Describe the changes made to old_profile that result in new_profile.
+
+    :param old_profile: the profile last acknowledged by the server
+    :type  old_profile: object
+    :param new_profile: the profile to report
+    :type  new_profile: object
+    :return:            the delta, or None if one cannot be made between the profiles
+    :rtype:             dict
+    """
+    if isinstance(old_profile, list) and isinstance(new_profile, list):
+        old_items = [_serialize(item) for item in old_profile]
+        new_items = [_serialize(item) for item in new_profile]
+        matcher = difflib.SequenceMatcher(None, old_items, new_items)
+        replaced = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                replaced.append([i1, i2, new_profile[j1:j2]])
+        return {'type': DELTA_LIST, 'replaced': replaced}
+    if isinstance(old_profile, dict) and isinstance(new_profile, dict):
+        changed = {}
+        for key, value in new_profile.items():
+            if key not in old_profile or _serialize(old_profile[key]) != _serialize(value):
+                changed[key] = value
+        removed = [key for key in old_profile if key not in new_profile]
+        return {'type': DELTA_DICT, 'set': changed, 'unset': removed}
+    return None
+
+
+def apply_delta(old_profile, delta):
+    """
+    Apply a delta made by make_delta() to the profile it was made against.
+
+    :param old_profile: the profile the delta was made against
+    :type  old_profile: object
+    :param delta:       the delta
+    :type  delta:       dict
+    :return:            the new profile
+    :rtype:             object
+    :raises ValueError: if the delta cannot be applied to the profile
+    """
+    delta_type = delta.get('type')
+    if delta_type == DELTA_LIST and isinstance(old_profile, list):
+        new_profile = list(old_profile)
+        # apply the last slice first, so the indexes of the earlier ones are not shifted
+        for i1, i2, items in reversed(delta['replaced']):
+            if not 0 <= i1 <= i2 <= len(old_profile):
+                raise ValueError('slice [%s:%s] is outside of the profile' % (i1, i2))
+            new_profile[i1:i2] = items
+        return new_profile
+    if delta_type == DELTA_DICT and isinstance(old_profile, dict):
+        new_profile = dict(old_profile)
+        new_profile.update(delta['set'])
+        for key in delta['unset']:
+            new_profile.pop(key, None)
+        return new_profile
+    raise ValueError('delta of type %s cannot be applied to the profile' % delta_type)
+
+
+def encode_delta(delta):
+    """
+    :param delta: a delta made by make_delta()
+    :type  delta: dict
+    :return:      the delta, serialized, compressed and base64 encoded
+    :rtype:       str
+    """
+    return base64.b64encode(zlib.compress(json.dumps(delta, separators=(',', ':'))))
+
+
+def decode_delta(encoded):
+    """
+    :param encoded: a delta encoded by encode_delta()
+    :type  encoded: basestring
+    :return:        the delta
+    :rtype:         dict
+    :raises ValueError: if the delta cannot be decoded
+    """
+    try:
+        delta = json.loads(zlib.decompress(base64.b64decode(encoded)))
+    except (TypeError, zlib.error), e:
+        raise ValueError(str(e))
+    if not isinstance(delta, dict):
+        raise ValueError('delta is not an object')
+    return delta
+
+
+def _serialize(item):
+    """
+    :return: a repeatable serialization of item, for comparing items
+    :rtype:  str
+    """
+    return json.dumps(item, separators=(',', ':'), sort_keys=True)
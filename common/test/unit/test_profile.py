@@ -0,0 +1,84 @@
+import unittest
+
+from pulp.common import profile
+
+
+RPM_1 = {'name': 'zsh', 'version': '1.0', 'arch': 'x86_64'}
+RPM_2 = {'name': 'kmod', 'version': '12', 'arch': 'x86_64'}
+RPM_3 = {'name': 'procps-ng', 'version': '3.3.3', 'arch': 'x86_64'}
+RPM_4 = {'name': 'libestr', 'version': '0.1.5', 'arch': 'x86_64'}
+
+
+class TestCalculateHash(unittest.TestCase):
+
+    def test_key_order(self):
+        self.assertEqual(profile.calculate_hash({'a': 1, 'b': [1, 2]}),
+                         profile.calculate_hash({'b': [1, 2], 'a': 1}))
+
+    def test_list_order(self):
+        self.assertNotEqual(profile.calculate_hash([RPM_1, RPM_2]),
+                            profile.calculate_hash([RPM_2, RPM_1]))
+
+
+class TestListDelta(unittest.TestCase):
+
+    def assert_round_trip(self, old, new):
+        delta = profile.make_delta(old, new)
+        encoded = profile.encode_delta(delta)
+        self.assertEqual(profile.apply_delta(old, profile.decode_delta(encoded)), new)
+        return delta
+
+    def test_unchanged(self):
+        delta = self.assert_round_trip([RPM_1, RPM_2], [RPM_1, RPM_2])
+        self.assertEqual(delta['replaced'], [])
+
+    def test_added(self):
+        delta = self.assert_round_trip([RPM_1, RPM_2], [RPM_1, RPM_3, RPM_2, RPM_4])
+        self.assertEqual(delta['replaced'], [[1, 1, [RPM_3]], [2, 2, [RPM_4]]])
+
+    def test_removed(self):
+        delta = self.assert_round_trip([RPM_1, RPM_2, RPM_3], [RPM_1, RPM_3])
+        self.assertEqual(delta['replaced'], [[1, 2, []]])
+
+    def test_replaced(self):
+        updated = dict(RPM_2, version='13')
+        self.assert_round_trip([RPM_1, RPM_2, RPM_3], [RPM_1, updated, RPM_3])
+
+    def test_reordered(self):
+        self.assert_round_trip([RPM_1, RPM_2, RPM_3, RPM_4], [RPM_4, RPM_3, RPM_2, RPM_1])
+
+    def test_from_empty(self):
+        self.assert_round_trip([], [RPM_1, RPM_2])
+
+    def test_bad_slice(self):
+        delta = {'type': profile.DELTA_LIST, 'replaced': [[1, 5, []]]}
+        self.assertRaises(ValueError, profile.apply_delta, [RPM_1, RPM_2], delta)
+
+
+class TestDictDelta(unittest.TestCase):
+
+    def test_round_trip(self):
+        old = {'zsh': RPM_1, 'kmod': RPM_2, 'procps-ng': RPM_3}
+        new = {'zsh': RPM_1, 'kmod': dict(RPM_2, version='13'), 'libestr': RPM_4}
+
+        delta = profile.make_delta(old, new)
+
+        self.assertEqual(delta['set'], {'kmod': new['kmod'], 'libestr': RPM_4})
+        self.assertEqual(delta['unset'], ['procps-ng'])
+        encoded = profile.encode_delta(delta)
+        self.assertEqual(profile.apply_delta(old, profile.decode_delta(encoded)), new)
+
+
+class TestUnsupportedDelta(unittest.TestCase):
+
+    def test_make_mismatched_types(self):
+        self.assertEqual(profile.make_delta([RPM_1], {'zsh': RPM_1}), None)
+        self.assertEqual(profile.make_delta('old', 'new'), None)
+
+    def test_apply_mismatched_type(self):
+        delta = profile.make_delta({'zsh': RPM_1}, {})
+        self.assertRaises(ValueError, profile.apply_delta, [RPM_1], delta)
+
+    def test_decode_invalid(self):
+        self.assertRaises(ValueError, profile.decode_delta, 'not a delta')
+        self.assertRaises(ValueError, profile.decode_delta, profile.encode_delta([1, 2]))
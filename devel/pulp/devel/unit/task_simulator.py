@@ -123,6 +123,30 @@ class TaskSimulator(object):
 
         return response
 
+    def get_tasks_status(self, task_ids, changed_since=None):
+        """
+        Returns the next state for each of the given tasks that has states left. Tasks that do
+        not have any states left are treated as unchanged and are not included.
+
+        This implementation does not use the changed_since parameter.
+
+        :return: response object as if the bindings had contacted the server
+        :rtype:  pulp.bindings.response.Response
+
+        :raises ValueError: if no states are defined for one of the given task IDs
+        """
+        task_list = []
+        for task_id in task_ids:
+            if task_id not in self.tasks_by_id:
+                raise ValueError('No task states configured for task ID [%s]' % task_id)
+            if self.tasks_by_id[task_id]:
+                task_list.append(self.tasks_by_id[task_id].pop())
+
+        body = {'timestamp': 0, 'tasks': task_list, 'missing': []}
+        response = responses.Response('200', body)
+
+        return response
+
     def get_all_tasks(self, tags=()):
         """
         Returns the next state for all tasks that match the given tags, if any. The index
@@ -92,6 +92,22 @@ class TaskSimulatorTests(unittest.TestCase):
             task = all_tasks[i]
             self.assertEqual(task.task_id, 'task-%s' % i)
 
+    def test_get_tasks_status(self):
+        # Setup
+        sim = TaskSimulator()
+        sim.add_task_states('task-1', ['waiting', 'running'])
+        sim.add_task_states('task-2', ['waiting'])
+
+        # Test & Verify
+        tasks = sim.get_tasks_status(['task-1', 'task-2']).response_body['tasks']
+        self.assertEqual([t.state for t in tasks], ['waiting', 'waiting'])
+
+        # task-2 has no states left and is treated as unchanged
+        tasks = sim.get_tasks_status(['task-1', 'task-2']).response_body['tasks']
+        self.assertEqual([(t.task_id, t.state) for t in tasks], [('task-1', 'running')])
+
+        self.assertRaises(ValueError, sim.get_tasks_status, ['task-3'])
+
     def test_create_fake_task(self):
         # Test
         response = task_simulator.create_fake_task_response()
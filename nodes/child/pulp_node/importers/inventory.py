@@ -9,9 +9,34 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import cPickle as pickle
+import hashlib
+import heapq
+import os
+import tempfile
+
+from pulp.server.compat import json
+
 from pulp_node import constants
 
 
+# The number of units sorted in memory at a time by the streaming inventory.
+SORT_CHUNK_SIZE = 10000
+
+
+def unit_digest(unit):
+    """
+    A stable digest of a unit's type_id & unit_key.
+    The unit key is encoded with sorted keys to ensure consistency.
+    :param unit: A content unit.
+    :type unit: dict
+    :return: The hex encoded digest.
+    :rtype: str
+    """
+    encoded = json.dumps([unit['type_id'], unit['unit_key']], sort_keys=True)
+    return hashlib.sha256(encoded).hexdigest()
+
+
 class UniqueKey(object):
     """
     A unique unit key consisting of a unit's type_id & unit_key.
@@ -109,4 +134,228 @@ class UnitInventory(object):
             child_last_updated = child_unit.get(constants.LAST_UPDATED, 0)
             if parent_last_updated > child_last_updated:
                 updated.append((unit, ref))
-        return updated
\ No newline at end of file
+        return updated
+
+    def close(self):
+        """
+        Release resources held by the inventory.
+        """
+        pass
+
+
+class SortedUnits(object):
+    """
+    Content units sorted by unit digest.
+    The units are sorted in chunks of SORT_CHUNK_SIZE which are written to
+    temporary files and merged while iterating, so memory use does not
+    depend on the number of units.  Units with the same digest are reported once.
+    :ivar paths: The paths of the sorted chunk files.
+    :type paths: list
+    """
+
+    def __init__(self, units, working_dir, chunk_size=None):
+        """
+        :param units: Iterable of (digest, item) to be sorted by digest.
+        :type units: iterable
+        :param working_dir: The directory in which the chunk files are written.
+        :type working_dir: str
+        :param chunk_size: The number of units sorted in memory at a time.
+            Defaults to SORT_CHUNK_SIZE.
+        :type chunk_size: int
+        """
+        chunk_size = chunk_size or SORT_CHUNK_SIZE
+        self.working_dir = working_dir
+        self.paths = []
+        chunk = []
+        for digest, item in units:
+            chunk.append((digest, len(chunk), item))
+            if len(chunk) >= chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+
+    def _write(self, chunk):
+        """
+        Sort and write a chunk of units to a temporary file.
+        :param chunk: List of (digest, sequence, item).
+        :type chunk: list
+        """
+        chunk.sort()
+        fd, path = tempfile.mkstemp(dir=self.working_dir, prefix='inventory-')
+        self.paths.append(path)
+        with os.fdopen(fd, 'wb') as fp:
+            for record in chunk:
+                pickle.dump(record, fp, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _read(path):
+        """
+        Read a sorted chunk file.
+        :param path: The path to a chunk file.
+        :type path: str
+        :return: Generator of (digest, sequence, item).
+        """
+        with open(path, 'rb') as fp:
+            while True:
+                try:
+                    yield pickle.load(fp)
+                except EOFError:
+                    break
+
+    def __iter__(self):
+        """
+        :return: Generator of (digest, item) in digest order.
+        """
+        last_digest = None
+        for digest, sequence, item in heapq.merge(*[self._read(p) for p in self.paths]):
+            if digest == last_digest:
+                continue
+            last_digest = digest
+            yield digest, item
+
+    def close(self):
+        """
+        Delete the chunk files.
+        """
+        for path in self.paths:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self.paths = []
+
+
+class Listing(object):
+    """
+    A lazily evaluated listing of units produced by the streaming inventory.
+    The listing may be iterated more than once and its length is counted on demand.
+    """
+
+    def __init__(self, generator):
+        """
+        :param generator: Called to produce an iterator of the units.
+        :type generator: callable
+        """
+        self.generator = generator
+        self.count = None
+
+    def __iter__(self):
+        return self.generator()
+
+    def __len__(self):
+        if self.count is None:
+            self.count = sum(1 for unit in self.generator())
+        return self.count
+
+
+class StreamingUnitInventory(object):
+    """
+    A memory bounded unit inventory.
+    The parent and child inventories are each sorted by unit digest using
+    temporary files in the working directory, then merge-joined to produce
+    the listings provided by UnitInventory.  The listings are lazy and are
+    computed each time they are iterated.  The inventory must be closed to
+    delete the temporary files.
+    """
+
+    @staticmethod
+    def _parent_units(units):
+        for unit, ref in units:
+            unit.pop('metadata', None)
+            yield unit_digest(unit), (unit, ref)
+
+    @staticmethod
+    def _child_units(units):
+        for unit in units:
+            unit.pop('metadata', None)
+            yield unit_digest(unit), unit
+
+    def __init__(self, base_URL, parent_units, child_units, working_dir):
+        """
+        :param base_URL: The base URL for downloading parent units.
+        :param parent_units: The content units in the parent node.
+        :type parent_units: iterable
+        :param child_units: The content units in the child node.
+        :type child_units: iterable
+        :param working_dir: The directory in which temporary files are written.
+        :type working_dir: str
+        """
+        self.base_URL = base_URL
+        self.parent_units = SortedUnits(self._parent_units(parent_units), working_dir)
+        self.child_units = SortedUnits(self._child_units(child_units), working_dir)
+
+    def _join(self):
+        """
+        Merge-join the sorted parent and child inventories.
+        :return: Generator of ((unit, ref), child_unit) where either may be None
+            when the unit is only contained in one of the inventories.
+        """
+        parent_units = iter(self.parent_units)
+        child_units = iter(self.child_units)
+        parent = next(parent_units, None)
+        child = next(child_units, None)
+        while parent is not None or child is not None:
+            if child is None or (parent is not None and parent[0] < child[0]):
+                yield parent[1], None
+                parent = next(parent_units, None)
+            elif parent is None or child[0] < parent[0]:
+                yield None, child[1]
+                child = next(child_units, None)
+            else:
+                yield parent[1], child[1]
+                parent = next(parent_units, None)
+                child = next(child_units, None)
+
+    def _parent_only(self):
+        for parent, child in self._join():
+            if child is None:
+                yield parent
+
+    def _child_only(self):
+        for parent, child in self._join():
+            if parent is None:
+                yield child
+
+    def _updated(self):
+        for parent, child in self._join():
+            if parent is None or child is None:
+                continue
+            unit, ref = parent
+            parent_last_updated = unit.get(constants.LAST_UPDATED, 0)
+            child_last_updated = child.get(constants.LAST_UPDATED, 0)
+            if parent_last_updated > child_last_updated:
+                yield unit, ref
+
+    def units_on_parent_only(self):
+        """
+        Listing of units contained in the parent inventory
+        but not contained in the child inventory.
+        :return: Listing of (unit, ref).
+        :rtype: Listing
+        """
+        return Listing(self._parent_only)
+
+    def units_on_child_only(self):
+        """
+        Listing of units contained in the child inventory
+        but not contained in the parent inventory.
+        :return: Listing of units that need to be purged.
+        :rtype: Listing
+        """
+        return Listing(self._child_only)
+
+    def updated_units(self):
+        """
+        Listing of units updated on the parent.
+        :return: Listing of (unit, ref).
+        :rtype: Listing
+        """
+        return Listing(self._updated)
+
+    def close(self):
+        """
+        Delete the temporary files.
+        """
+        self.parent_units.close()
+        self.child_units.close()
@@ -18,7 +18,7 @@ from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.conduit import NodesConduit
 from pulp_node.manifest import Manifest, RemoteManifest
-from pulp_node.importers.inventory import UnitInventory
+from pulp_node.importers.inventory import StreamingUnitInventory
 from pulp_node.importers.download import ContentDownloadListener
 from pulp_node.error import (NodeError, GetChildUnitsError, GetParentUnitsError, AddUnitError,
                              DeleteUnitError, InvalidManifestError, CaughtException)
@@ -155,8 +155,8 @@ class ImporterStrategy(object):
         Build the unit inventory.
         :param request: A synchronization request.
         :type request: SyncRequest
-        :return: The built inventory.
-        :rtype: UnitInventory
+        :return: The built inventory.  The caller must close() it.
+        :rtype: StreamingUnitInventory
         """
         # fetch child units
         try:
@@ -199,7 +199,8 @@ class ImporterStrategy(object):
         # build the inventory
         parent_units = manifest.get_units()
         base_URL = manifest.publishing_details[constants.BASE_URL]
-        inventory = UnitInventory(base_URL, parent_units, child_units)
+        inventory = StreamingUnitInventory(
+            base_URL, parent_units, child_units, request.working_dir)
         return inventory
 
     def _reset_storage_path(self, unit):
@@ -351,9 +352,12 @@ class Mirror(ImporterStrategy):
         :type request: SyncRequest
         """
         unit_inventory = self._unit_inventory(request)
-        self._add_units(request, unit_inventory)
-        self._update_units(request, unit_inventory)
-        self._delete_units(request, unit_inventory)
+        try:
+            self._add_units(request, unit_inventory)
+            self._update_units(request, unit_inventory)
+            self._delete_units(request, unit_inventory)
+        finally:
+            unit_inventory.close()
 
 
 class Additive(ImporterStrategy):
@@ -374,8 +378,11 @@ class Additive(ImporterStrategy):
         :type request: SyncRequest
         """
         unit_inventory = self._unit_inventory(request)
-        self._add_units(request, unit_inventory)
-        self._update_units(request, unit_inventory)
+        try:
+            self._add_units(request, unit_inventory)
+            self._update_units(request, unit_inventory)
+        finally:
+            unit_inventory.close()
 
 
 STRATEGIES = {
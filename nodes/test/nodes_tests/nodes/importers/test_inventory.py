@@ -0,0 +1,137 @@
+import os
+import shutil
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from mock import patch
+
+from pulp_node import constants
+from pulp_node.importers.inventory import (SortedUnits, StreamingUnitInventory, UnitInventory,
+                                           unit_digest)
+
+
+BASE_URL = 'http://redhat.com'
+
+
+def unit(type_id, key, last_updated=0):
+    return {
+        'type_id': type_id,
+        'unit_key': {'name': key, 'version': '1'},
+        'metadata': {'size': 10},
+        constants.LAST_UPDATED: last_updated,
+    }
+
+
+class Ref(object):
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TestUnitDigest(TestCase):
+
+    def test_key_order(self):
+        unit_1 = {'type_id': 'T', 'unit_key': {'a': 1, 'b': 2}}
+        unit_2 = {'type_id': 'T', 'unit_key': {'b': 2, 'a': 1}}
+        self.assertEqual(unit_digest(unit_1), unit_digest(unit_2))
+
+    def test_type_id(self):
+        unit_1 = {'type_id': 'T', 'unit_key': {'a': 1}}
+        unit_2 = {'type_id': 'X', 'unit_key': {'a': 1}}
+        self.assertNotEqual(unit_digest(unit_1), unit_digest(unit_2))
+
+
+class TestSortedUnits(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sorted(self):
+        units = [('c', 3), ('a', 1), ('d', 4), ('b', 2), ('e', 5)]
+        sorted_units = SortedUnits(units, self.tmp_dir, chunk_size=2)
+        self.assertEqual(len(sorted_units.paths), 3)
+        self.assertEqual(list(sorted_units), sorted(units))
+        # may be iterated again
+        self.assertEqual(list(sorted_units), sorted(units))
+
+    def test_duplicates(self):
+        units = [('b', 1), ('a', 2), ('b', 3)]
+        sorted_units = SortedUnits(units, self.tmp_dir, chunk_size=2)
+        self.assertEqual(list(sorted_units), [('a', 2), ('b', 1)])
+
+    def test_close(self):
+        sorted_units = SortedUnits([('a', 1), ('b', 2)], self.tmp_dir, chunk_size=1)
+        sorted_units.close()
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+        self.assertEqual(list(sorted_units), [])
+
+
+class TestStreamingUnitInventory(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def inventories(self):
+        parent = [
+            unit('T', 'common'),
+            unit('T', 'updated', last_updated=10),
+            unit('T', 'parent-only'),
+            unit('X', 'common'),
+        ]
+        child = [
+            unit('T', 'common'),
+            unit('T', 'updated', last_updated=5),
+            unit('T', 'child-only'),
+        ]
+        parent_units = [(u, Ref(u['unit_key']['name'])) for u in parent]
+        streaming = StreamingUnitInventory(
+            BASE_URL, [(dict(u), r) for u, r in parent_units], [dict(u) for u in child],
+            self.tmp_dir)
+        inventory = UnitInventory(BASE_URL, parent_units, child)
+        return streaming, inventory
+
+    @staticmethod
+    def parent_keys(units):
+        return sorted((u['type_id'], u['unit_key']['name'], r.name) for u, r in units)
+
+    def test_parent_only(self):
+        streaming, inventory = self.inventories()
+        units = streaming.units_on_parent_only()
+        self.assertEqual(len(units), 2)
+        self.assertEqual(self.parent_keys(units),
+                         self.parent_keys(inventory.units_on_parent_only()))
+
+    def test_child_only(self):
+        streaming, inventory = self.inventories()
+        units = list(streaming.units_on_child_only())
+        self.assertEqual(units, inventory.units_on_child_only())
+        self.assertEqual(units[0]['unit_key']['name'], 'child-only')
+
+    def test_updated(self):
+        streaming, inventory = self.inventories()
+        units = streaming.updated_units()
+        self.assertEqual(len(units), 1)
+        self.assertEqual(self.parent_keys(units), self.parent_keys(inventory.updated_units()))
+
+    def test_metadata_dropped(self):
+        streaming, inventory = self.inventories()
+        for u, r in streaming.units_on_parent_only():
+            self.assertFalse('metadata' in u)
+
+    @patch('pulp_node.importers.inventory.SORT_CHUNK_SIZE', 1)
+    def test_chunked(self):
+        streaming, inventory = self.inventories()
+        self.assertEqual(len(streaming.parent_units.paths), 4)
+        self.assertEqual(self.parent_keys(streaming.units_on_parent_only()),
+                         self.parent_keys(inventory.units_on_parent_only()))
+
+    def test_close(self):
+        streaming, inventory = self.inventories()
+        streaming.close()
+        self.assertEqual(os.listdir(self.tmp_dir), [])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#
+# Benchmark the time the client takes to load its extensions before running a
+# command, as the number of installed extension packs grows. Packs that each
+# add a section with a number of commands are generated in a temporary
+# directory, and each measurement runs in a new python process so that nothing
+# is already imported:
+#
+#   eager - every extension is loaded, as when lazy_extensions is false
+#   cold  - extensions are loaded lazily without a manifest, which loads every
+#           extension and writes the manifest
+#   warm  - extensions are loaded lazily with the manifest written by the cold
+#           run, which loads only the extension adding the section being run
+#
+# Extensions installed through entry points for the role are loaded as well.
+#
+# Usage: cli_startup.py -n 10,50,200 -c 20 -r 5
+#
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+
+PACK_INIT = """
+from pulp.client.extensions.extensions import PulpCliCommand, PulpCliOption, PulpCliSection
+
+
+def initialize(context):
+    section = PulpCliSection('section-%(pack)d', 'Section %(pack)d')
+    for i in range(%(commands)d):
+        command = PulpCliCommand('command-%%d' %% i, 'Command %%d' %% i, None)
+        for j in range(5):
+            command.add_option(PulpCliOption('--option-%%d' %% j, 'Option %%d' %% j))
+        section.add_command(command)
+    context.cli.add_section(section)
+"""
+
+
+def child(mode, extensions_dir, manifest_filename):
+    """
+    Loads the extensions in this process and prints the seconds it took,
+    including importing the client.
+    """
+    started = time.time()
+    from pulp.client.extensions import loader
+    from pulp.client.extensions.core import ClientContext, PulpCli, PulpPrompt
+
+    prompt = PulpPrompt(enable_color=False)
+    context = ClientContext(None, None, None, prompt, None, cli=PulpCli(prompt))
+    if mode == 'eager':
+        loader.load_extensions(extensions_dir, context, 'admin')
+    else:
+        loader.load_extensions_lazily(extensions_dir, context, 'admin', manifest_filename,
+                                      'section-0')
+    print time.time() - started
+
+
+def build(working_dir, count, commands):
+    extensions_dir = os.path.join(working_dir, 'extensions-%d' % count)
+    for pack in range(count):
+        pack_dir = os.path.join(extensions_dir, 'benchmark_pack_%d' % pack)
+        os.makedirs(pack_dir)
+        open(os.path.join(pack_dir, '__init__.py'), 'w').close()
+        with open(os.path.join(pack_dir, 'pulp_cli.py'), 'w') as init_file:
+            init_file.write(PACK_INIT % {'pack': pack, 'commands': commands})
+    return extensions_dir
+
+
+def run(mode, extensions_dir, manifest_filename):
+    output = subprocess.check_output(
+        [sys.executable, __file__, '--child', mode, extensions_dir, manifest_filename])
+    return float(output.strip().splitlines()[-1])
+
+
+def measure(mode, extensions_dir, manifest_filename, count, runs):
+    elapsed = 0
+    for i in range(runs):
+        if mode == 'cold' and os.path.exists(manifest_filename):
+            os.remove(manifest_filename)
+        elapsed += run(mode, extensions_dir, manifest_filename)
+    print '%-6s packs: %-6d runs: %-4d ms/startup: %.1f' % (
+        mode, count, runs, elapsed * 1000 / runs)
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        child(*sys.argv[2:])
+        return
+
+    parser = OptionParser()
+    parser.add_option('-n', '--packs', dest='packs', default='10,50,200',
+                      help='comma separated numbers of extension packs to load')
+    parser.add_option('-c', '--commands', dest='commands', type='int', default=20,
+                      help='number of commands in the section added by each pack')
+    parser.add_option('-r', '--runs', dest='runs', type='int', default=5,
+                      help='number of startups to time for each mode')
+    options, args = parser.parse_args()
+
+    working_dir = tempfile.mkdtemp(prefix='cli-startup-')
+    try:
+        for count in [int(n) for n in options.packs.split(',')]:
+            extensions_dir = build(working_dir, count, options.commands)
+            manifest_filename = os.path.join(working_dir, 'extensions-%d.json' % count)
+            # compile the packs once, as installing them would
+            run('eager', extensions_dir, manifest_filename)
+            for mode in ('eager', 'cold', 'warm'):
+                measure(mode, extensions_dir, manifest_filename, count, options.runs)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+# Benchmark comparing the number of API calls per second made through the
+# server wrapper that opens a new connection for each call with the pooled
+# wrapper that keeps connections open and resumes TLS sessions.
+#
+# The calls are made against the status API of a running Pulp server, from
+# one or more threads sharing the same connection object.
+#
+# Usage: connections.py -H pulp.example.com -n 500 -t 4 --no-verify-ssl
+#
+
+import threading
+from time import time
+from optparse import OptionParser
+
+from pulp.bindings.server import PulpConnection
+
+
+PATH = '/v2/status/'
+
+
+def run(connection, calls, threads):
+    remaining = [calls]
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            connection.GET(PATH)
+
+    workers = [threading.Thread(target=work) for i in range(threads)]
+    started = time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time() - started
+
+
+def measure(label, options, persistent_connections):
+    connection = PulpConnection(
+        options.host, options.port, username=options.username, password=options.password,
+        cert_filename=options.cert, verify_ssl=options.verify_ssl,
+        persistent_connections=persistent_connections)
+    # one call first, so both wrappers start out connected the same way
+    connection.GET(PATH)
+    elapsed = run(connection, options.calls, options.threads)
+    print '%-10s calls: %-6d threads: %-3d time (s): %-8.2f calls/s: %.1f' % (
+        label, options.calls, options.threads, elapsed, options.calls / elapsed)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-H', '--host', dest='host', default='localhost',
+                      help='host name of the Pulp server')
+    parser.add_option('-p', '--port', dest='port', type='int', default=443,
+                      help='port of the Pulp server')
+    parser.add_option('-u', '--username', dest='username', help='user to authenticate as')
+    parser.add_option('-P', '--password', dest='password', help='password of the user')
+    parser.add_option('-c', '--cert', dest='cert', help='client certificate to authenticate with')
+    parser.add_option('-n', '--calls', dest='calls', type='int', default=500,
+                      help='number of API calls to make')
+    parser.add_option('-t', '--threads', dest='threads', type='int', default=1,
+                      help='number of threads making the calls')
+    parser.add_option('--no-verify-ssl', dest='verify_ssl', action='store_false', default=True,
+                      help='do not verify the certificate of the server')
+    options, args = parser.parse_args()
+    measure('new', options, False)
+    measure('pooled', options, True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# Benchmark comparing the per-unit orphan query with the set based
+# orphan detection used by the OrphanManager.
+#
+# Usage: orphans.py -t rpm
+#
+
+from time import time
+from optparse import OptionParser
+
+from pulp.plugins.types import database as content_types_db
+from pulp.server.db import connection
+from pulp.server.db.model.repository import RepoContentUnit
+
+
+def per_unit_query(type_id):
+    units = content_types_db.type_units_collection(type_id)
+    associations = RepoContentUnit.get_collection()
+    count = 0
+    for unit in units.find({}, fields=['_id']):
+        if associations.find({'unit_id': unit['_id']}).count() > 0:
+            continue
+        count += 1
+    return count
+
+
+def set_based(type_id):
+    from pulp.server.managers.content.orphan import OrphanManager
+    count = 0
+    for unit in OrphanManager.generate_orphans_by_type(type_id):
+        count += 1
+    return count
+
+
+def measure(label, fn, type_id):
+    started = time()
+    count = fn(type_id)
+    elapsed = time() - started
+    print '%-16s orphans: %-10d seconds: %.2f' % (label, count, elapsed)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-t', '--type', dest='type_id', help='content type id')
+    parser.add_option('--skip-per-unit', action='store_true', default=False,
+                      help='only measure the set based detection')
+    options, args = parser.parse_args()
+    if not options.type_id:
+        parser.error('a content type id is required')
+    connection.initialize()
+    measure('set-based', set_based, options.type_id)
+    if not options.skip_per_unit:
+        measure('per-unit', per_unit_query, options.type_id)
+
+
+if __name__ == '__main__':
+    main()
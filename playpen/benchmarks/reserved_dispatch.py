@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+#
+# Benchmark the worker selection used when dispatching reserved tasks. A
+# number of fake workers are registered and reserved tasks are assigned and
+# released in a loop, reporting the number of tasks dispatched per second for
+# the legacy full scan and for the indexed find-and-modify selection.
+#
+# Usage: reserved_dispatch.py -w 32 -n 5000
+#
+# NOTE: this removes all workers and reservations from the database; do not
+# run it against a live deployment.
+#
+
+import uuid
+from time import time
+from optparse import OptionParser
+
+from pulp.server.async import tasks
+from pulp.server.db import connection
+from pulp.server.db.model import ReservedResource, Worker
+from pulp.server.exceptions import NoWorkers
+
+
+def full_scan():
+    workers = dict((w['name'], w) for w in Worker.objects())
+    reserved = set(r['worker_name'] for r in ReservedResource.objects.all())
+    unreserved = set(workers) - reserved
+    try:
+        return workers[unreserved.pop()]
+    except KeyError:
+        raise NoWorkers()
+
+
+def reset(worker_count):
+    Worker.objects().delete()
+    ReservedResource.objects.delete()
+    for i in range(worker_count):
+        Worker(name='benchmark-%d@localhost' % i).save()
+
+
+def dispatch(select, worker_count, task_count):
+    """
+    Keep every worker busy, releasing the oldest reservation whenever no worker is free.
+    """
+    reset(worker_count)
+    outstanding = []
+    started = time()
+    for i in range(task_count):
+        try:
+            worker = select()
+        except NoWorkers:
+            tasks._release_resource(outstanding.pop(0))
+            worker = select()
+        task_id = str(uuid.uuid4())
+        ReservedResource(task_id=task_id, worker_name=worker.name,
+                         resource_id='resource-%d' % i).save()
+        outstanding.append(task_id)
+    return time() - started
+
+
+def measure(label, select, worker_count, task_count):
+    elapsed = dispatch(select, worker_count, task_count)
+    print '%-16s tasks: %-8d seconds: %-8.2f tasks/second: %.1f' % (
+        label, task_count, elapsed, task_count / elapsed)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-w', '--workers', dest='workers', type='int', default=32,
+                      help='number of workers to register')
+    parser.add_option('-n', '--tasks', dest='tasks', type='int', default=5000,
+                      help='number of reserved tasks to dispatch')
+    options, args = parser.parse_args()
+    connection.initialize()
+    measure('full-scan', full_scan, options.workers, options.tasks)
+    measure('indexed', tasks._get_unreserved_worker, options.workers, options.tasks)
+    reset(0)
+
+
+if __name__ == '__main__':
+    main()
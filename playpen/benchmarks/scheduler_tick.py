@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# Benchmark the time celerybeat takes for one tick of the Pulp scheduler as
+# the number of schedules grows. Schedules with hourly and monthly intervals
+# that started long ago, none of which are due, are loaded in memory, and the
+# scheduler is ticked repeatedly, reporting the average time of a tick for the
+# superclass scan that asks every schedule whether it is due and for the heap
+# that only asks the schedules whose time has come.
+#
+# Nothing is read from or written to the database.
+#
+# Usage: scheduler_tick.py -n 100,1000,5000 -t 10
+#
+
+import time
+from optparse import OptionParser
+
+from celery import beat
+
+from pulp.common import dateutils
+from pulp.server.async import scheduler
+from pulp.server.db.model.dispatch import ScheduledCall
+from pulp.server.managers import factory
+
+
+INTERVALS = ('PT1H', 'P1M')
+
+
+class BenchmarkScheduler(scheduler.Scheduler):
+    """
+    Scheduler whose schedule is kept in memory instead of being loaded from the database.
+    """
+
+    def __init__(self, entries):
+        self._schedule = entries
+        self._heap = None
+        self.max_interval = scheduler.Scheduler.max_interval
+        # no schedule is due, so nothing is published
+        self.publisher = None
+
+    @property
+    def schedule(self):
+        return self._schedule
+
+
+def build(count):
+    now = time.time()
+    entries = {}
+    for i in range(count):
+        call = ScheduledCall('2010-01-01T00:00Z/%s' % INTERVALS[i % len(INTERVALS)],
+                             'pulp.tasks.dosomething', total_run_count=1)
+        # make the last run the most recent scheduled run, so the schedule is not due
+        call.last_run_at = dateutils.format_iso8601_utc_timestamp(call._calculate_times()[4])
+        entries['benchmark-%d' % i] = call.as_schedule_entry()
+    assert not any(e.is_due()[0] for e in entries.values()), 'a schedule is due at %s' % now
+    return BenchmarkScheduler(entries)
+
+
+def measure(label, tick, count, ticks):
+    # the first tick asks every schedule, like the superclass, so it is not counted
+    tick()
+    started = time.time()
+    for i in range(ticks):
+        tick()
+    elapsed = time.time() - started
+    print '%-8s schedules: %-8d ticks: %-6d ms/tick: %.3f' % (
+        label, count, ticks, elapsed * 1000 / ticks)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--schedules', dest='schedules', default='100,1000,5000',
+                      help='comma separated numbers of schedules to tick')
+    parser.add_option('-t', '--ticks', dest='ticks', type='int', default=10,
+                      help='number of ticks to time for each number of schedules')
+    options, args = parser.parse_args()
+    factory.initialize()
+    for count in [int(n) for n in options.schedules.split(',')]:
+        sched = build(count)
+        measure('scan', lambda: beat.Scheduler.tick(sched), count, options.ticks)
+        measure('heap', sched.heap_tick, count, options.ticks)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# Benchmark building JSON search responses. A number of fake content unit
+# documents are generated lazily, as a database cursor would return them, and
+# serialized once into a regular response and once into a streamed response,
+# reporting the time until the first byte of the body is available, the total
+# time to produce the body and the peak RSS of the process doing the work.
+#
+# Each measurement runs in its own child process so the peak RSS reported for
+# one does not include the memory used by the other.
+#
+# Usage: streaming_search.py -n 200000
+#
+
+import os
+import resource
+from datetime import datetime
+from time import time
+from optparse import OptionParser
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+
+from pulp.server.webservices.views import util
+
+
+def documents(count):
+    for i in xrange(count):
+        yield {
+            '_id': 'unit-%d' % i,
+            '_content_type_id': 'rpm',
+            '_last_updated': datetime.utcnow(),
+            'name': 'package-%d' % i,
+            'version': '1.0.%d' % i,
+            'release': '1',
+            'arch': 'noarch',
+            'checksum': '%064x' % i,
+            'children': {},
+        }
+
+
+def buffered(count):
+    return util.generate_json_response_with_pulp_encoder(list(documents(count)))
+
+
+def streamed(count):
+    return util.generate_streaming_json_response(documents(count))
+
+
+def run(build, count):
+    started = time()
+    response = build(count)
+    body = iter(response)
+    size = len(next(body))
+    first_byte = time() - started
+    for chunk in body:
+        size += len(chunk)
+    return first_byte, time() - started, size
+
+
+def measure(label, build, count):
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        os.write(write_end, '%f %f %d' % run(build, count))
+        os._exit(0)
+    os.close(write_end)
+    first_byte, total, size = os.read(read_end, 1024).split()
+    os.close(read_end)
+    rusage = os.wait4(pid, 0)[2]
+    print '%-10s units: %-8d first byte (s): %-8.3f total (s): %-8.2f bytes: %-10s ' \
+          'peak RSS (MB): %.1f' % (label, count, float(first_byte), float(total), size,
+                                   rusage.ru_maxrss / 1024.0)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--units', dest='units', type='int', default=200000,
+                      help='number of units returned by the search')
+    options, args = parser.parse_args()
+    print 'baseline RSS (MB): %.1f' % (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0)
+    measure('buffered', buffered, options.units)
+    measure('streamed', streamed, options.units)
+
+
+if __name__ == '__main__':
+    main()
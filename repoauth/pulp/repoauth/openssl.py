@@ -1,9 +1,44 @@
 """
 OpenSSL wrapper.
+
+Certificates are verified in process through the M2Crypto bindings to the OpenSSL library. M2Crypto
+does not expose X509_verify_cert(), so the chain of CAs is built and checked here the same way
+`openssl verify -purpose sslclient` checks it: every certificate in the chain must be within its
+validity period and usable for its role in SSL client authentication, none may have a critical
+extension that OpenSSL does not handle, each one must be signed by the next, no CA may have more
+CAs below it than its path length constraint allows, and the chain must end with a self-signed CA.
 """
-import shutil
-import subprocess
-import tempfile
+import re
+
+from M2Crypto import EVP, X509, m2
+
+from pulp.common import dateutils
+
+
+# Maximum number of CAs followed from a certificate to its root CA, the same as OpenSSL's default
+MAX_CHAIN_DEPTH = 100
+
+PATH_LENGTH = re.compile(r'pathlen:(\d+)')
+
+# Short names of the extensions OpenSSL handles when verifying; a certificate with any other
+# critical extension is rejected, as X509_supported_extension() has it
+SUPPORTED_EXTENSIONS = frozenset((
+    'nsCertType',
+    'keyUsage',
+    'subjectAltName',
+    'basicConstraints',
+    'certificatePolicies',
+    'crlDistributionPoints',
+    'extendedKeyUsage',
+    'sbgp-ipAddrBlock',
+    'sbgp-autonomousSysNum',
+    'noCheck',
+    'policyConstraints',
+    'proxyCertInfo',
+    'nameConstraints',
+    'policyMappings',
+    'inhibitAnyPolicy',
+))
 
 
 class Certificate(object):
@@ -17,7 +52,17 @@ class Certificate(object):
         :type  pem: str
         """
         self._cert = pem
-        self._tempdir = None
+        self._x509 = None
+
+    @property
+    def x509(self):
+        """
+        :return: The parsed certificate.
+        :rtype:  M2Crypto.X509.X509
+        """
+        if self._x509 is None:
+            self._x509 = X509.load_cert_string(self._cert)
+        return self._x509
 
     def verify(self, ca_chain):
         """
@@ -30,41 +75,136 @@ class Certificate(object):
         :return:         True if verified.
         :rtype:          bool
         """
-        # We must be sure to cleanup no matter what happens
-        try:
-            self._tempdir = tempfile.mkdtemp()
-
-            # Write the cert to a tempfile
-            cert = tempfile.NamedTemporaryFile(mode='w', dir=self._tempdir, delete=False)
-            cert.write(self._cert)
-            cert.close()
-
-            # Check to make sure the client cert is not expired
-            args = ['openssl', 'x509', '-in', cert.name, '-noout', '-checkend', '0']
-            try:
-                subprocess.check_call(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError:
-                # The certificate is expired
-                return False
-
-            # Write the CAs to a tempfile
-            ca = tempfile.NamedTemporaryFile(mode='w', dir=self._tempdir, delete=False)
-            ca_chain = [c._cert for c in ca_chain]
-            ca.write('\n'.join(ca_chain))
-            ca.close()
-
-            # Now let's check to make sure the certificate is signed by one of our trusted CAs
-            args = ['openssl', 'verify', '-CAfile', ca.name, '-purpose', 'sslclient', cert.name]
-            try:
-                subprocess.check_call(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError:
-                # The certificate is not signed by a trusted CA
-                return False
-
-            # If we've survived the above carnage, this cert is legit
+        return verify_chain(self.x509, [c.x509 for c in ca_chain]) is not None
+
+
+def verify_chain(cert, ca_certs, now=None):
+    """
+    Verify a certificate against a list of trusted CA certificates.
+
+    :param cert:     The certificate to verify.
+    :type  cert:     M2Crypto.X509.X509
+    :param ca_certs: The trusted CA certificates.
+    :type  ca_certs: list of M2Crypto.X509.X509
+    :param now:      The time the certificates must be valid at; defaults to the current time.
+    :type  now:      datetime.datetime
+    :return:         The certificates from cert to the root CA that signed it, or None if cert
+                     could not be verified.
+    :rtype:          list of M2Crypto.X509.X509 or None
+    """
+    if now is None:
+        now = dateutils.now_utc_datetime_with_tzinfo()
+
+    if not _is_current(cert, now) or cert.check_purpose(m2.X509_PURPOSE_SSL_CLIENT, 0) != 1:
+        return None
+    if _has_unhandled_critical_extension(cert):
+        return None
+
+    chain = [cert]
+    if _is_self_signed(cert):
+        # A self-signed certificate is only trusted when it is one of the CAs
+        trusted = cert.as_der() in [ca.as_der() for ca in ca_certs]
+        return chain if trusted else None
+
+    while len(chain) <= MAX_CHAIN_DEPTH:
+        # The CAs in the chain other than the first one are below the issuer
+        issuer = _find_issuer(chain[-1], ca_certs, now, len(chain) - 1)
+        if issuer is None:
+            return None
+        chain.append(issuer)
+        if _is_self_signed(issuer):
+            return chain
+    return None
+
+
+def expiration(chain):
+    """
+    :param chain: Certificates returned by verify_chain().
+    :type  chain: list of M2Crypto.X509.X509
+    :return:      The time at which the first of the certificates expires.
+    :rtype:       datetime.datetime
+    """
+    return min(c.get_not_after().get_datetime() for c in chain)
+
+
+def _find_issuer(cert, ca_certs, now, cas_below):
+    """
+    :param cas_below: The number of CAs that are below the issuer in the chain.
+    :type  cas_below: int
+    :return:          The first of the CAs that is currently valid, allows the given number of CAs
+                      below it and signed the certificate, or None.
+    :rtype:           M2Crypto.X509.X509 or None
+    """
+    issuer_name = cert.get_issuer().as_hash()
+    for ca in ca_certs:
+        # Names are matched by the hash of their canonical form, like OpenSSL looks up issuers
+        if ca.get_subject().as_hash() != issuer_name:
+            continue
+        if not _is_current(ca, now) or ca.check_purpose(m2.X509_PURPOSE_SSL_CLIENT, 1) != 1:
+            continue
+        if _has_unhandled_critical_extension(ca):
+            continue
+        path_length = _path_length(ca)
+        if path_length is not None and cas_below > path_length:
+            continue
+        if _is_signed_by(cert, ca):
+            return ca
+    return None
+
+
+def _is_current(cert, now):
+    """
+    :return: True if now is within the validity period of the certificate.
+    :rtype:  bool
+    """
+    not_before = cert.get_not_before().get_datetime()
+    not_after = cert.get_not_after().get_datetime()
+    return not_before <= now <= not_after
+
+
+def _has_unhandled_critical_extension(cert):
+    """
+    :return: True if the certificate has a critical extension that is not in SUPPORTED_EXTENSIONS.
+    :rtype:  bool
+    """
+    for index in range(cert.get_ext_count()):
+        extension = cert.get_ext_at(index)
+        # Extensions OpenSSL does not know are named UNDEF
+        if extension.get_critical() and extension.get_name() not in SUPPORTED_EXTENSIONS:
             return True
-        finally:
-            # Make sure we always clean up
-            if self._tempdir:
-                shutil.rmtree(self._tempdir)
-                self._tempdir = None
+    return False
+
+
+def _path_length(ca):
+    """
+    :return: The maximum number of CAs allowed below the CA, or None if it is not limited.
+    :rtype:  int or None
+    """
+    try:
+        constraints = ca.get_ext('basicConstraints').get_value()
+    except LookupError:
+        return None
+    match = PATH_LENGTH.search(constraints)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def _is_self_signed(cert):
+    """
+    :return: True if the certificate was issued to and signed by the same key.
+    :rtype:  bool
+    """
+    return (cert.get_subject().as_hash() == cert.get_issuer().as_hash() and
+            _is_signed_by(cert, cert))
+
+
+def _is_signed_by(cert, ca):
+    """
+    :return: True if the signature of the certificate verifies with the public key of the CA.
+    :rtype:  bool
+    """
+    try:
+        return cert.verify(ca.get_pubkey()) == 1
+    except (X509.X509Error, EVP.EVPError):
+        return False
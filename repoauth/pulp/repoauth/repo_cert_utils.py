@@ -30,15 +30,17 @@ The validate_cert_bundle method is used to ensure that only these keys are prese
 in a cert bundle dict.
 '''
 
+import calendar
+import hashlib
 import logging
 import shutil
 import time
-from threading import RLock
+from threading import Lock, RLock
 import os
 
 from M2Crypto import X509, BIO
 from pulp.common.util import encode_unicode
-from pulp.repoauth.openssl import Certificate
+from pulp.repoauth import openssl
 
 
 LOG = logging.getLogger(__name__)
@@ -55,6 +57,23 @@ WRITE_LOCK = RLock()
 
 GLOBAL_BUNDLE_PREFIX = 'pulp-global-repo'
 
+# Seconds the result of verifying a certificate against a CA bundle is kept for. The same client
+# certificates are presented with every request made by yum, so the results are kept for the life
+# of the process, keyed by digests of the certificate and bundle. A result is never kept past the
+# expiration of the certificates it was verified with.
+VERIFY_CACHE_TTL = 300
+
+# Maximum number of entries in each of the caches below; a full cache is emptied.
+MAX_CACHE_ENTRIES = 1000
+
+CACHE_LOCK = Lock()
+
+# Parsed CA certificates, keyed by a digest of the PEM encoded bundle they were read from
+_ca_cache = {}
+
+# (verified, expiration timestamp), keyed by digests of the certificate and the CA bundle
+_verify_cache = {}
+
 
 class RepoCertUtils:
     def __init__(self, config):
@@ -62,6 +81,7 @@ class RepoCertUtils:
         self.log_failed_cert = True
         self.log_failed_cert_verbose = False
         self.max_num_certs_in_chain = 100
+        self.verify_cache_ttl = VERIFY_CACHE_TTL
         try:
             self.log_failed_cert = self.config.getboolean('main', 'log_failed_cert')
         except:
@@ -74,6 +94,10 @@ class RepoCertUtils:
             self.max_num_certs_in_chain = self.config.getint('main', 'max_num_certs_in_chain')
         except:
             pass
+        try:
+            self.verify_cache_ttl = self.config.getint('main', 'verify_cache_ttl')
+        except:
+            pass
 
     def delete_for_repo(self, repo_id):
         '''
@@ -268,7 +292,8 @@ class RepoCertUtils:
     def validate_certificate_pem(self, cert_pem, ca_pem, log_func=None):
         '''
         Validates a certificate against a CA certificate.
-        Input expects PEM encoded strings.
+        Input expects PEM encoded strings. The result is remembered for verify_cache_ttl
+        seconds, see VERIFY_CACHE_TTL.
 
         @param cert_pem: PEM encoded certificate
         @type  cert_pem: str
@@ -285,9 +310,25 @@ class RepoCertUtils:
         '''
         if not log_func:
             log_func = LOG.info
+
+        key = (_digest(cert_pem), _digest(ca_pem))
+        cached = _verify_cache.get(key)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+
         cert = X509.load_cert_string(cert_pem)
-        ca_chain = self.get_certs_from_string(ca_pem, log_func)
-        return self.x509_verify_cert(cert, ca_chain, log_func=log_func)
+        ca_chain = _ca_cache.get(key[1])
+        if ca_chain is None:
+            ca_chain = self.get_certs_from_string(ca_pem, log_func)
+            _cache(_ca_cache, key[1], ca_chain)
+
+        chain = self._verify_chain(cert, ca_chain, log_func)
+        if self.verify_cache_ttl > 0:
+            expires = time.time() + self.verify_cache_ttl
+            if chain is not None:
+                expires = min(expires, calendar.timegm(openssl.expiration(chain).utctimetuple()))
+            _cache(_verify_cache, key, (chain is not None, expires))
+        return chain is not None
 
     def x509_verify_cert(self, cert, ca_certs, log_func=None):
         """
@@ -305,15 +346,22 @@ class RepoCertUtils:
         @return: true if the certificate is verified by OpenSSL APIs, false otherwise
         @rtype:  boolean
         """
-        certificate = Certificate(cert.as_pem())
-        ca_chain = [Certificate(c.as_pem()) for c in ca_certs]
-        retval = certificate.verify(ca_chain)
-        if retval != 1 and log_func:
+        return self._verify_chain(cert, ca_certs, log_func) is not None
+
+    def _verify_chain(self, cert, ca_certs, log_func=None):
+        """
+        Validates a Certificate against a CA Certificate, see x509_verify_cert.
+
+        @return: the certificates from cert to the root CA, or None if cert was not verified
+        @rtype:  [M2Crypto.X509.X509] or None
+        """
+        chain = openssl.verify_chain(cert, ca_certs)
+        if chain is None and log_func:
             msg = "Cert verification failed against %d ca cert(s)" % len(ca_certs)
             if self.log_failed_cert:
                 msg += "\n%s" % self.get_debug_info_certs(cert, ca_certs)
             log_func(msg)
-        return retval
+        return chain
 
     def validate_cert_bundle(self, bundle):
         '''
@@ -519,3 +567,24 @@ class RepoCertUtils:
         '''
         global_cert_location = self.config.get('repos', 'global_cert_location')
         return global_cert_location
+
+
+def _digest(pem):
+    '''
+    @param pem: PEM encoded certificate or bundle of certificates
+    @type  pem: str
+
+    @return: digest identifying the contents of pem
+    @rtype:  str
+    '''
+    return hashlib.sha256(encode_unicode(pem)).digest()
+
+
+def _cache(cache, key, value):
+    '''
+    Stores a value in one of the module level caches, emptying the cache first if it is full.
+    '''
+    with CACHE_LOCK:
+        if len(cache) >= MAX_CACHE_ENTRIES:
+            cache.clear()
+        cache[key] = value
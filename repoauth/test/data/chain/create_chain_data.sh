@@ -32,6 +32,8 @@ export TEST_KEY=${CERT_DIR}/test_key.pem
 export TEST_CSR=${CERT_DIR}/test.csr
 export TEST_COMMON_NAME="Test Common Name"
 
+export CRITICAL_EXT_CERT=${CERT_DIR}/critical_ext_cert.pem
+
 export REVOKED_CERT=${CERT_DIR}/revoked_cert.pem
 export REVOKED_KEY=${CERT_DIR}/revoked_key.pem
 export REVOKED_CSR=${CERT_DIR}/revoked.csr
@@ -139,6 +141,11 @@ openssl genrsa -out ${TEST_KEY} 2048
 openssl req -new -key ${TEST_KEY} -out ${TEST_CSR} -subj "/CN=${TEST_COMMON_NAME}"
 openssl x509 -req -days 1095 -CA ${SUB_CA_CERT} -CAkey ${SUB_CA_KEY} -in ${TEST_CSR} -out ${TEST_CERT} -CAserial ${SUB_CA_SERIAL}
 #
+# Create a certificate with a critical extension that OpenSSL does not handle
+#
+echo "Creating a cert with an unhandled critical extension: ${CRITICAL_EXT_CERT}"
+openssl x509 -req -days 1095 -extfile ${SUB_CA_SSL_CONF} -extensions unknown_critical -CA ${SUB_CA_CERT} -CAkey ${SUB_CA_KEY} -in ${TEST_CSR} -out ${CRITICAL_EXT_CERT} -CAserial ${SUB_CA_SERIAL}
+#
 # Create a certificate to revoke
 #
 echo "Creating a cert to intentionally revoke: ${REVOKED_CERT}"
@@ -1,14 +1,38 @@
 """
 This module contains tests for the pulp.repoauth.openssl module.
 """
-import subprocess
+from datetime import datetime
+import os
 import unittest
 
+from M2Crypto import X509
 import mock
 
+from pulp.common import dateutils
 from pulp.repoauth import openssl
 
 
+DATA_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
+CHAIN_DIR = os.path.join(DATA_DIR, 'chain', 'certs')
+
+# The certificates under CHAIN_DIR are valid from 2015-01-26 until 2018-01-25
+ROOT_CA = os.path.join(CHAIN_DIR, 'ROOT_CA', 'root_ca.pem')
+SUB_CA = os.path.join(CHAIN_DIR, 'SUB_CA', 'sub_ca.pem')
+TEST_CERT = os.path.join(CHAIN_DIR, 'test_cert.pem')
+# Signed by SUB_CA, valid from 2015-01-27 until 2018-01-24, with an unknown critical extension
+CRITICAL_EXT_CERT = os.path.join(CHAIN_DIR, 'critical_ext_cert.pem')
+VALID_AT = datetime(2016, 6, 1, tzinfo=dateutils.utc_tz())
+
+# Valid from 2012-03-28 until 2016-03-27, cert.crt is signed by valid_ca.crt
+CERT = os.path.join(DATA_DIR, 'cert.crt')
+VALID_CA = os.path.join(DATA_DIR, 'valid_ca.crt')
+INVALID_CA = os.path.join(DATA_DIR, 'invalid_ca.crt')
+
+
+def load(path):
+    return X509.load_cert(path)
+
+
 class TestCertificate(unittest.TestCase):
     """
     This class contains tests for the Certificate class.
@@ -23,197 +47,207 @@ class TestCertificate(unittest.TestCase):
         cert = openssl.Certificate(cert_data)
 
         self.assertEqual(cert._cert, cert_data)
-        self.assertEqual(cert._tempdir, None)
+        self.assertEqual(cert._x509, None)
 
-    @mock.patch('shutil.rmtree')
-    @mock.patch('pulp.repoauth.openssl.subprocess.check_call')
-    @mock.patch('pulp.repoauth.openssl.tempfile.mkdtemp')
-    @mock.patch('pulp.repoauth.openssl.tempfile.NamedTemporaryFile')
-    def test_verify_cert_expired(self, NamedTemporaryFile, mkdtemp, check_call, mock_rmtree):
+    def test_x509(self):
         """
-        Ensure that verify() returns False when the certificate is expired.
+        Ensure that the certificate is parsed once, when it is first needed.
         """
-        a_tempdir = '/some/dir/'
-        cert_filename = '%s%s' % (a_tempdir, 'a.file')
+        cert = openssl.Certificate(open(TEST_CERT).read())
 
-        NamedTemporaryFile.return_value = mock.MagicMock()
-        NamedTemporaryFile.return_value.name = cert_filename
+        x509 = cert.x509
 
-        mkdtemp.return_value = a_tempdir
+        self.assertEqual(x509.as_pem(), load(TEST_CERT).as_pem())
+        self.assertTrue(cert.x509 is x509)
 
-        # This will allow us to simulate the expiration check failing
-        check_call.side_effect = subprocess.CalledProcessError(mock.MagicMock(), mock.MagicMock())
+    @mock.patch('pulp.repoauth.openssl.verify_chain')
+    def test_verify_valid(self, verify_chain):
+        """
+        Ensure that verify() returns True when the client certificate is legitimate.
+        """
+        verify_chain.return_value = ['cert', 'ca']
+        cert = openssl.Certificate('cert')
+        cert._x509 = 'cert'
+        ca = openssl.Certificate('ca')
+        ca._x509 = 'ca'
 
-        cert_data = "I'm trying to trick you with an expired certificate!"
-        ca_chain = ['A CA', 'Another CA']
-        cert = openssl.Certificate(cert_data)
+        valid = cert.verify([ca])
 
-        valid = cert.verify(ca_chain)
+        self.assertEqual(valid, True)
+        verify_chain.assert_called_once_with('cert', ['ca'])
 
-        # The Certificate should show as invalid
-        self.assertEqual(valid, False)
-        # mkdtemp should have one call
-        mkdtemp.assert_called_once_with()
-        # A NamedTemporaryFile should have been created for the Certificate
-        NamedTemporaryFile.assert_called_once_with(mode='w', dir=a_tempdir, delete=False)
-        # The cert should have been written to the NamedTemporaryFile, and then it should have been
-        # closed.
-        NamedTemporaryFile.return_value.write.assert_called_once_with(cert_data)
-        NamedTemporaryFile.return_value.close.assert_called_once_with()
-        # Make sure openssl was called with all the correct args to check expiration
-        expected_args = ['openssl', 'x509', '-in', cert_filename, '-noout', '-checkend', '0']
-        check_call.assert_called_once_with(expected_args, stdout=subprocess.PIPE,
-                                           stderr=subprocess.PIPE)
-        # Cleanup should have happened
-        mock_rmtree.assert_called_once_with(a_tempdir)
-
-    @mock.patch('shutil.rmtree')
-    @mock.patch('pulp.repoauth.openssl.subprocess.check_call')
-    @mock.patch('pulp.repoauth.openssl.tempfile.mkdtemp')
-    @mock.patch('pulp.repoauth.openssl.tempfile.NamedTemporaryFile')
-    def test_verify_signature_invalid(self, NamedTemporaryFile, mkdtemp, check_call, mock_rmtree):
-        """
-        Ensure that verify() returns False when the signature is invalid.
-        """
-        a_tempdir = '/some/dir/'
-        cert_filename = '%s%s' % (a_tempdir, 'a.crt')
-        ca_filename = '%s%s' % (a_tempdir, 'ca.pack')
-
-        fake_filenames = [cert_filename, ca_filename]
-        fake_files = []
-
-        def fake_NamedTemporaryFile(mode, dir, delete):
-            fake_file = mock.MagicMock()
-            fake_file.name = fake_filenames.pop(0)
-            fake_files.append(fake_file)
-            return fake_file
-
-        NamedTemporaryFile.side_effect = fake_NamedTemporaryFile
-
-        mkdtemp.return_value = a_tempdir
-
-        # The first time should succeed, the second time should error (simulating openssl failing
-        # the signature check).
-        check_call_side_effects = [None, subprocess.CalledProcessError(mock.MagicMock(),
-                                                                       mock.MagicMock())]
-
-        def fake_check_call(*args, **kwargs):
-            """
-            Does nothing the first time it is called, and then raises CalledProcessError the second
-            time to simulate the certificate check failing.
-            """
-            what_to_do = check_call_side_effects.pop(0)
-            if what_to_do:
-                raise what_to_do
-
-        # This will allow us to simulate the expiration check failing
-        check_call.side_effect = fake_check_call
-
-        cert_data = "I'm trying to trick you with an expired certificate!"
-        ca_chain = [openssl.Certificate(c) for c in ['A CA', 'Another CA']]
-        cert = openssl.Certificate(cert_data)
+    @mock.patch('pulp.repoauth.openssl.verify_chain')
+    def test_verify_invalid(self, verify_chain):
+        """
+        Ensure that verify() returns False when the client certificate can not be verified.
+        """
+        verify_chain.return_value = None
+        cert = openssl.Certificate('cert')
+        cert._x509 = 'cert'
 
-        valid = cert.verify(ca_chain)
+        valid = cert.verify([])
 
-        # The Certificate should show as invalid
         self.assertEqual(valid, False)
-        # mkdtemp should have one call
-        mkdtemp.assert_called_once_with()
-        # Two NamedTemporaryFiles should have been created. One for the Certificate, and one for the
-        # CA pack.
-        self.assertEqual(NamedTemporaryFile.call_count, 2)
-        self.assertEqual(NamedTemporaryFile.mock_calls[0][2],
-                         {'mode': 'w', 'dir': a_tempdir, 'delete': False})
-        self.assertEqual(NamedTemporaryFile.mock_calls[1][2],
-                         {'mode': 'w', 'dir': a_tempdir, 'delete': False})
-        # The cert should have been written to the first NamedTemporaryFile, and then it should
-        # have been closed.
-        fake_files[0].write.assert_called_once_with(cert_data)
-        fake_files[0].close.assert_called_once_with()
-        # The CA pack should have been written to the second NamedTemporaryFile, and then it should
-        # have been closed.
-        fake_files[1].write.assert_called_once_with('A CA\nAnother CA')
-        fake_files[1].close.assert_called_once_with()
-        # check_call should have been called twice this time, once to check expiration and once to
-        # check signature.
-        self.assertEqual(check_call.call_count, 2)
-        # Make sure openssl was called with all the correct args to check expiration
-        expected_args = ['openssl', 'x509', '-in', cert_filename, '-noout', '-checkend', '0']
-        self.assertEqual(check_call.mock_calls[0][1], (expected_args,))
-        self.assertEqual(check_call.mock_calls[0][2],
-                         {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE})
-        # Make sure openssl was called with all the correct args to check signature
-        expected_args = ['openssl', 'verify', '-CAfile', ca_filename, '-purpose', 'sslclient',
-                         cert_filename]
-        self.assertEqual(check_call.mock_calls[1][1], (expected_args,))
-        self.assertEqual(check_call.mock_calls[1][2],
-                         {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE})
-        # Cleanup should have happened
-        mock_rmtree.assert_called_once_with(a_tempdir)
-
-    @mock.patch('shutil.rmtree')
-    @mock.patch('pulp.repoauth.openssl.subprocess.check_call')
-    @mock.patch('pulp.repoauth.openssl.tempfile.mkdtemp')
-    @mock.patch('pulp.repoauth.openssl.tempfile.NamedTemporaryFile')
-    def test_verify_valid(self, NamedTemporaryFile, mkdtemp, check_call, mock_rmtree):
+
+
+class TestVerifyChain(unittest.TestCase):
+    """
+    This class contains tests for the verify_chain() function.
+    """
+
+    def setUp(self):
+        self.root_ca = load(ROOT_CA)
+        self.sub_ca = load(SUB_CA)
+        self.cert = load(TEST_CERT)
+
+    def test_valid(self):
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=VALID_AT)
+
+        self.assertEqual([c.as_pem() for c in chain],
+                         [c.as_pem() for c in (self.cert, self.sub_ca, self.root_ca)])
+
+    def test_valid_single_ca(self):
+        chain = openssl.verify_chain(load(CERT), [load(INVALID_CA), load(VALID_CA)],
+                                     now=datetime(2013, 1, 1, tzinfo=dateutils.utc_tz()))
+
+        self.assertEqual(len(chain), 2)
+
+    def test_expired(self):
+        now = datetime(2018, 6, 1, tzinfo=dateutils.utc_tz())
+
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=now)
+
+        self.assertEqual(chain, None)
+
+    def test_not_yet_valid(self):
+        now = datetime(2014, 6, 1, tzinfo=dateutils.utc_tz())
+
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=now)
+
+        self.assertEqual(chain, None)
+
+    def test_incomplete_chain(self):
         """
-        Ensure that verify() returns True when the client certificate is legitimate.
+        Ensure that a chain must end with a self-signed CA, and that it must not skip a CA.
         """
-        a_tempdir = '/some/dir/'
-        cert_filename = '%s%s' % (a_tempdir, 'a.crt')
-        ca_filename = '%s%s' % (a_tempdir, 'ca.pack')
+        self.assertEqual(openssl.verify_chain(self.cert, [self.sub_ca], now=VALID_AT), None)
+        self.assertEqual(openssl.verify_chain(self.cert, [self.root_ca], now=VALID_AT), None)
 
-        fake_filenames = [cert_filename, ca_filename]
-        fake_files = []
+    def test_wrong_ca(self):
+        chain = openssl.verify_chain(load(CERT), [load(INVALID_CA)],
+                                     now=datetime(2013, 1, 1, tzinfo=dateutils.utc_tz()))
 
-        def fake_NamedTemporaryFile(mode, dir, delete):
-            fake_file = mock.MagicMock()
-            fake_file.name = fake_filenames.pop(0)
-            fake_files.append(fake_file)
-            return fake_file
+        self.assertEqual(chain, None)
 
-        NamedTemporaryFile.side_effect = fake_NamedTemporaryFile
+    def test_self_signed(self):
+        """
+        Ensure that a self-signed certificate is only trusted when it is one of the CAs.
+        """
+        chain = openssl.verify_chain(self.root_ca, [self.root_ca], now=VALID_AT)
 
-        mkdtemp.return_value = a_tempdir
+        self.assertEqual(len(chain), 1)
+        self.assertEqual(openssl.verify_chain(self.root_ca, [self.sub_ca], now=VALID_AT), None)
 
-        cert_data = "I am a real cert!"
-        ca_chain = [openssl.Certificate('A CA')]
-        cert = openssl.Certificate(cert_data)
+    @mock.patch('pulp.repoauth.openssl._path_length', return_value=0)
+    def test_path_length_exceeded(self, _path_length):
+        """
+        Ensure that a CA limited to having no CAs below it can not sign for a sub CA.
+        """
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=VALID_AT)
 
-        valid = cert.verify(ca_chain)
+        self.assertEqual(chain, None)
 
-        # The Certificate should show as valid
-        self.assertEqual(valid, True)
-        # mkdtemp should have one call
-        mkdtemp.assert_called_once_with()
-        # Two NamedTemporaryFiles should have been created. One for the Certificate, and one for the
-        # CA pack.
-        self.assertEqual(NamedTemporaryFile.call_count, 2)
-        self.assertEqual(NamedTemporaryFile.mock_calls[0][2],
-                         {'mode': 'w', 'dir': a_tempdir, 'delete': False})
-        self.assertEqual(NamedTemporaryFile.mock_calls[1][2],
-                         {'mode': 'w', 'dir': a_tempdir, 'delete': False})
-        # The cert should have been written to the first NamedTemporaryFile, and then it should
-        # have been closed.
-        fake_files[0].write.assert_called_once_with(cert_data)
-        fake_files[0].close.assert_called_once_with()
-        # The CA pack should have been written to the second NamedTemporaryFile, and then it should
-        # have been closed.
-        fake_files[1].write.assert_called_once_with('A CA')
-        fake_files[1].close.assert_called_once_with()
-        # check_call should have been called twice this time, once to check expiration and once to
-        # check signature.
-        self.assertEqual(check_call.call_count, 2)
-        # Make sure openssl was called with all the correct args to check expiration
-        expected_args = ['openssl', 'x509', '-in', cert_filename, '-noout', '-checkend', '0']
-        self.assertEqual(check_call.mock_calls[0][1], (expected_args,))
-        self.assertEqual(check_call.mock_calls[0][2],
-                         {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE})
-        # Make sure openssl was called with all the correct args to check signature
-        expected_args = ['openssl', 'verify', '-CAfile', ca_filename, '-purpose', 'sslclient',
-                         cert_filename]
-        self.assertEqual(check_call.mock_calls[1][1], (expected_args,))
-        self.assertEqual(check_call.mock_calls[1][2],
-                         {'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE})
-        # Cleanup should have happened
-        mock_rmtree.assert_called_once_with(a_tempdir)
+    @mock.patch('pulp.repoauth.openssl.m2')
+    def test_wrong_purpose(self, m2):
+        """
+        Ensure that a certificate that can not be used for SSL client authentication is rejected.
+        """
+        m2.X509_PURPOSE_SSL_CLIENT = 1
+        self.cert = mock.MagicMock(wraps=self.cert)
+        self.cert.check_purpose.return_value = 0
+
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=VALID_AT)
+
+        self.assertEqual(chain, None)
+        self.cert.check_purpose.assert_called_once_with(1, 0)
+
+    def test_unhandled_critical_extension(self):
+        """
+        Ensure that a certificate with a critical extension OpenSSL does not handle is rejected.
+        """
+        chain = openssl.verify_chain(load(CRITICAL_EXT_CERT), [self.root_ca, self.sub_ca],
+                                     now=VALID_AT)
+
+        self.assertEqual(chain, None)
+
+    @mock.patch('pulp.repoauth.openssl._has_unhandled_critical_extension')
+    def test_ca_unhandled_critical_extension(self, _has_unhandled_critical_extension):
+        """
+        Ensure that a CA with a critical extension OpenSSL does not handle can not sign.
+        """
+        _has_unhandled_critical_extension.side_effect = lambda cert: cert is self.sub_ca
+
+        chain = openssl.verify_chain(self.cert, [self.root_ca, self.sub_ca], now=VALID_AT)
+
+        self.assertEqual(chain, None)
+
+    def test_expiration(self):
+        chain = [self.cert, self.sub_ca, self.root_ca]
+
+        expiration = openssl.expiration(chain)
+
+        self.assertEqual(expiration, self.root_ca.get_not_after().get_datetime())
+
+
+class TestHasUnhandledCriticalExtension(unittest.TestCase):
+    """
+    This class contains tests for the _has_unhandled_critical_extension() function.
+    """
+
+    def test_unhandled(self):
+        self.assertTrue(openssl._has_unhandled_critical_extension(load(CRITICAL_EXT_CERT)))
+
+    def test_handled(self):
+        cert = mock.MagicMock()
+        cert.get_ext_count.return_value = 1
+        cert.get_ext_at.return_value.get_critical.return_value = 1
+        cert.get_ext_at.return_value.get_name.return_value = 'basicConstraints'
+
+        self.assertFalse(openssl._has_unhandled_critical_extension(cert))
+        cert.get_ext_at.assert_called_once_with(0)
+
+    def test_no_critical_extensions(self):
+        self.assertFalse(openssl._has_unhandled_critical_extension(load(TEST_CERT)))
+
+    def test_not_critical(self):
+        cert = mock.MagicMock()
+        cert.get_ext_count.return_value = 1
+        cert.get_ext_at.return_value.get_critical.return_value = 0
+        cert.get_ext_at.return_value.get_name.return_value = 'UNDEF'
+
+        self.assertFalse(openssl._has_unhandled_critical_extension(cert))
+
+
+class TestPathLength(unittest.TestCase):
+    """
+    This class contains tests for the _path_length() function.
+    """
+
+    def test_limited(self):
+        ca = mock.MagicMock()
+        ca.get_ext.return_value.get_value.return_value = 'CA:TRUE, pathlen:2'
+
+        self.assertEqual(openssl._path_length(ca), 2)
+        ca.get_ext.assert_called_once_with('basicConstraints')
+
+    def test_unlimited(self):
+        ca = mock.MagicMock()
+        ca.get_ext.return_value.get_value.return_value = 'CA:TRUE'
+
+        self.assertEqual(openssl._path_length(ca), None)
+
+    def test_no_constraints(self):
+        ca = mock.MagicMock()
+        ca.get_ext.side_effect = LookupError
+
+        self.assertEqual(openssl._path_length(ca), None)
@@ -1,9 +1,12 @@
 from ConfigParser import SafeConfigParser
+from datetime import datetime
+import calendar
 import shutil
 import os
 import unittest
 
 from M2Crypto import X509
+import mock
 
 from pulp.repoauth import repo_cert_utils
 
@@ -466,3 +469,92 @@ class TestCertVerify(unittest.TestCase):
         ca_chain_pems = open(ca_chain_path).read()
         test_cert_pem = open(test_cert_path).read()
         self.assertTrue(self.utils.validate_certificate_pem(test_cert_pem, ca_chain_pems))
+
+
+class TestVerifyCache(unittest.TestCase):
+    def setUp(self):
+        self.utils = repo_cert_utils.RepoCertUtils(CONFIG)
+        repo_cert_utils._ca_cache.clear()
+        repo_cert_utils._verify_cache.clear()
+
+        self.ca = open(os.path.join(CA_CHAIN_TEST_DATA, "certs/ca_chain")).read()
+        self.cert = open(os.path.join(CA_CHAIN_TEST_DATA, "certs/test_cert.pem")).read()
+        self.other_ca = open(VALID_CA).read()
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.expiration')
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain')
+    def test_cached(self, verify_chain, expiration):
+        verify_chain.return_value = ['cert', 'ca']
+        expiration.return_value = datetime(2100, 1, 1)
+
+        self.assertTrue(self.utils.validate_certificate_pem(self.cert, self.ca))
+        self.assertTrue(self.utils.validate_certificate_pem(self.cert, self.ca))
+
+        self.assertEqual(verify_chain.call_count, 1)
+        expiration.assert_called_once_with(['cert', 'ca'])
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain', return_value=None)
+    def test_failure_cached(self, verify_chain):
+        self.assertFalse(self.utils.validate_certificate_pem(self.cert, self.ca))
+        self.assertFalse(self.utils.validate_certificate_pem(self.cert, self.ca))
+
+        self.assertEqual(verify_chain.call_count, 1)
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain', return_value=None)
+    def test_ca_parsed_once(self, verify_chain):
+        other_cert = open(CERT).read()
+
+        with mock.patch.object(self.utils, 'get_certs_from_string',
+                               wraps=self.utils.get_certs_from_string) as get_certs:
+            self.utils.validate_certificate_pem(self.cert, self.ca)
+            self.utils.validate_certificate_pem(other_cert, self.ca)
+
+        get_certs.assert_called_once_with(self.ca, mock.ANY)
+        self.assertEqual(verify_chain.call_count, 2)
+        self.assertTrue(verify_chain.call_args_list[0][0][1] is
+                        verify_chain.call_args_list[1][0][1])
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain', return_value=None)
+    def test_different_ca(self, verify_chain):
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+        self.utils.validate_certificate_pem(self.cert, self.other_ca)
+
+        self.assertEqual(verify_chain.call_count, 2)
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.time.time')
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain', return_value=None)
+    def test_expired(self, verify_chain, mock_time):
+        mock_time.return_value = 1000
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+
+        mock_time.return_value = 1000 + self.utils.verify_cache_ttl
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+
+        self.assertEqual(verify_chain.call_count, 2)
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.time.time')
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.expiration')
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain')
+    def test_not_kept_past_expiration(self, verify_chain, expiration, mock_time):
+        """
+        Ensure that a certificate is verified again once it expires, even within the TTL.
+        """
+        verify_chain.return_value = ['cert', 'ca']
+        expiration.return_value = datetime(2030, 1, 1)
+        expires = calendar.timegm(expiration.return_value.utctimetuple())
+        mock_time.return_value = expires - 1
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+
+        mock_time.return_value = expires
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+
+        self.assertEqual(verify_chain.call_count, 2)
+
+    @mock.patch('pulp.repoauth.repo_cert_utils.openssl.verify_chain', return_value=None)
+    def test_disabled(self, verify_chain):
+        self.utils.verify_cache_ttl = 0
+
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+        self.utils.validate_certificate_pem(self.cert, self.ca)
+
+        self.assertEqual(verify_chain.call_count, 2)
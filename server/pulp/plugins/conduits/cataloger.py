@@ -33,6 +33,16 @@ class CatalogerConduit(object):
         manager.add_entry(self.source_id, self.expires, type_id, unit_key, url)
         self.added_count += 1
 
+    def add_entries(self, entries):
+        """
+        Add entries to the content catalog using bulk inserts.
+        Preferred over add_entry() when adding a large number of entries.
+        :param entries: An iterable of: (type_id, unit_key, url).
+        :type entries: iterable
+        """
+        manager = managers.content_catalog_manager()
+        self.added_count += manager.add_entries(self.source_id, self.expires, entries)
+
     def delete_entry(self, type_id, unit_key):
         """
         Delete an entry from the content catalog.
@@ -1,4 +1,5 @@
 from gettext import gettext as _
+import copy
 import logging
 import sys
 
@@ -6,9 +7,10 @@ from pymongo.errors import DuplicateKeyError
 
 from pulp.plugins.model import Unit, PublishReport
 from pulp.plugins.types import database as types_db
+from pulp.plugins.util import misc
+from pulp.server.async.status_writer import status_writer
 from pulp.server.async.tasks import get_current_task_id
 from pulp.server.db import model
-from pulp.server.db.model import TaskStatus
 from pulp.server import exceptions as pulp_exceptions
 import pulp.plugins.conduits._common as common_utils
 import pulp.server.managers.factory as manager_factory
@@ -16,6 +18,9 @@ import pulp.server.managers.factory as manager_factory
 
 _logger = logging.getLogger(__name__)
 
+# Number of units saved together by AddUnitMixin.save_units
+SAVE_UNITS_PAGE_SIZE = 1000
+
 
 class ImporterConduitException(Exception):
     """
@@ -515,6 +520,109 @@ class AddUnitMixin(object):
             _logger.exception(_('Content unit association failed [%s]' % str(unit)))
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
+    def save_units(self, units):
+        """
+        Batch version of save_unit, for importers that save many units at once.
+
+        Units are saved a page of SAVE_UNITS_PAGE_SIZE at a time. The units of a page that
+        already exist are found with one query per unit type and updated with one bulk
+        operation, and the others are added with one bulk insert. Once all of the units are
+        saved, they are associated to the repository with bulk operations, and the unit counts
+        and last unit added time of the repository are updated once.
+
+        Unlike save_unit, the updated timestamp of associations that already exist is refreshed.
+
+        :param units: unit objects returned from the init_unit call
+        :type  units: iterable of Unit
+
+        :return: the provided units, their state updated from the call
+        :rtype:  list of Unit
+        """
+        saved_units = []
+        try:
+            for page in misc.paginate(units, SAVE_UNITS_PAGE_SIZE):
+                units_by_type = {}
+                for unit in page:
+                    units_by_type.setdefault(unit.type_id, []).append(unit)
+                for type_id, type_units in units_by_type.iteritems():
+                    self._save_units_of_type(type_id, type_units)
+                saved_units.extend(page)
+
+            association_manager = manager_factory.repo_unit_association_manager()
+            association_manager.associate_units_by_ids(
+                self.repo_id, ((unit.type_id, unit.id) for unit in saved_units))
+
+            return saved_units
+        except Exception, e:
+            _logger.exception(_('Content unit save failed after %(n)d units') %
+                              {'n': len(saved_units)})
+            raise ImporterConduitException(e), None, sys.exc_info()[2]
+
+    def _save_units_of_type(self, type_id, units):
+        """
+        Add or update units of one type, and set their ids.
+
+        :param type_id: the type of all of the units
+        :type  type_id: str
+        :param units:   the units to save
+        :type  units:   list of pulp.plugins.model.Unit
+        """
+        content_manager = manager_factory.content_manager()
+        pulp_units = [(unit, common_utils.to_pulp_unit(unit)) for unit in units]
+
+        unit_ids = self._find_unit_ids(type_id, units)
+        to_update = []
+        to_add = []
+        for unit, pulp_unit in pulp_units:
+            unit.id = unit_ids.get(_unit_key_values(unit.unit_key, unit.unit_key))
+            if unit.id is None:
+                to_add.append((unit, pulp_unit))
+            else:
+                to_update.append((unit, pulp_unit))
+
+        added_ids = content_manager.add_content_units(type_id, [p for u, p in to_add])
+        raced = []
+        for (unit, pulp_unit), unit_id in zip(to_add, added_ids):
+            if unit_id is None:
+                # added by another workflow since the lookup, or earlier in this same page
+                raced.append((unit, pulp_unit))
+            else:
+                unit.id = unit_id
+                self._added_count += 1
+
+        if raced:
+            unit_ids = self._find_unit_ids(type_id, [u for u, p in raced])
+            for unit, pulp_unit in raced:
+                unit.id = unit_ids.get(_unit_key_values(unit.unit_key, unit.unit_key))
+                if unit.id is None:
+                    unit.id = self._update_unit(unit, pulp_unit)
+                else:
+                    to_update.append((unit, pulp_unit))
+
+        content_manager.update_content_units(type_id, [(u.id, p) for u, p in to_update])
+        self._updated_count += len(to_update)
+
+    @staticmethod
+    def _find_unit_ids(type_id, units):
+        """
+        Find the ids of the units that already exist, with a single query.
+
+        :param type_id: the type of all of the units
+        :type  type_id: str
+        :param units:   the units to look up
+        :type  units:   list of pulp.plugins.model.Unit
+
+        :return: unit id keyed by the values of the unit key fields of each unit that exists
+        :rtype:  dict
+        """
+        content_query_manager = manager_factory.content_query_manager()
+        key_fields = list(units[0].unit_key)
+        unit_docs = content_query_manager.get_multiple_units_by_keys_dicts(
+            type_id, [unit.unit_key for unit in units], ['_id'] + key_fields,
+            page_size=len(units))
+        return dict((_unit_key_values(unit_doc, key_fields), unit_doc['_id'])
+                    for unit_doc in unit_docs)
+
     def _update_unit(self, unit, pulp_unit):
         """
         Update a unit. If it is not found, add it.
@@ -601,6 +709,19 @@ class AddUnitMixin(object):
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
 
+def _unit_key_values(document, key_fields):
+    """
+    :param document:   a unit key, or a unit document that contains the unit key fields
+    :type  document:   dict
+    :param key_fields: names of the unit key fields
+    :type  key_fields: iterable of str
+
+    :return: the values of the unit key fields, in sorted order of their names
+    :rtype:  tuple
+    """
+    return tuple(document[field] for field in sorted(key_fields))
+
+
 class StatusMixin(object):
 
     def __init__(self, report_id, exception_class):
@@ -626,8 +747,8 @@ class StatusMixin(object):
 
         try:
             self.progress_report[self.report_id] = status
-            TaskStatus.objects(task_id=self.task_id).update_one(
-                set__progress_report=self.progress_report)
+            status_writer.update(self.task_id,
+                                 progress_report=copy.deepcopy(self.progress_report))
         except Exception, e:
             _logger.exception(
                 'Exception from server setting progress for report [%s]' % self.report_id)
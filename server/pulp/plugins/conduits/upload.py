@@ -5,7 +5,22 @@ from pulp.plugins.conduits.mixins import (
 
 class UploadConduit(AddUnitMixin, SingleRepoUnitsMixin, SearchUnitsMixin):
 
-    def __init__(self, repo_id, importer_id):
+    def __init__(self, repo_id, importer_id, checksums=None):
         AddUnitMixin.__init__(self, repo_id, importer_id)
         SingleRepoUnitsMixin.__init__(self, repo_id, ImporterConduitException)
         SearchUnitsMixin.__init__(self, ImporterConduitException)
+        self.checksums = checksums or {}
+
+    def get_checksum(self, checksum_type):
+        """
+        Returns a checksum of the uploaded file that the server calculated while the file
+        was uploaded. Importers can use it rather than reading the whole file again to
+        calculate it themselves.
+
+        :param checksum_type: name of the checksum algorithm, such as "sha256"
+        :type  checksum_type: str
+
+        :return: hex digest of the uploaded file, or None if it is not available
+        :rtype:  str
+        """
+        return self.checksums.get(checksum_type)
@@ -1098,11 +1098,13 @@ class GetLocalUnitsStep(SaveUnitsStep):
     which must be an iterable of unit model instances with the unit keys populated
     """
 
-    def __init__(self, importer_type, unit_pagination_size=50, **kwargs):
+    def __init__(self, importer_type, unit_pagination_size=10000, **kwargs):
         """
         :param importer_type: unique identifier for the type of importer
         :type  importer_type: basestring
-        :param unit_pagination_size: How many units should be queried at one time (default 50)
+        :param unit_pagination_size: How many units should be checked at one time (default 10000).
+                                     The units are queried in smaller pages whose size adapts to
+                                     the database response time.
         :type  importer_type: int
         """
         super(GetLocalUnitsStep, self).__init__(step_type=reporting_constants.SYNC_STEP_GET_LOCAL,
@@ -1124,6 +1126,7 @@ class GetLocalUnitsStep(SaveUnitsStep):
         """
         # any units that are already in pulp
         units_we_already_had = set()
+        units_to_associate = []
 
         for units_group in misc.paginate(self.parent.available_units, self.unit_pagination_size):
             # Get this group of units
@@ -1131,8 +1134,10 @@ class GetLocalUnitsStep(SaveUnitsStep):
 
             for found_unit in query:
                 units_we_already_had.add(hash(found_unit))
-                repo_controller.associate_single_unit(self.get_repo(), found_unit)
+                units_to_associate.append(found_unit)
 
             for unit in units_group:
                 if hash(unit) not in units_we_already_had:
                     self.units_to_download.append(unit)
+
+        repo_controller.associate_units_bulk(self.get_repo(), units_to_associate)
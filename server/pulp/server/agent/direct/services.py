@@ -8,6 +8,7 @@ from gofer.rmi.async import ReplyConsumer, Listener
 from pulp.common import constants, dateutils
 from pulp.server.agent.auth import Authenticator
 from pulp.server.agent.connector import add_connector, get_url
+from pulp.server.async.status_writer import status_writer
 from pulp.server.db.model import TaskStatus
 from pulp.server.managers import factory as managers
 
@@ -166,6 +167,7 @@ class ReplyHandler(Listener):
         if not finished:
             now = datetime.now(dateutils.utc_tz())
             finished = dateutils.format_iso8601_datetime(now)
+        status_writer.flush(task_id)
         TaskStatus.objects(task_id=task_id).update_one(set__finish_time=finished,
                                                        set__state=constants.CALL_ERROR_STATE)
 
@@ -194,6 +196,7 @@ class ReplyHandler(Listener):
             now = datetime.now(dateutils.utc_tz())
             finished = dateutils.format_iso8601_datetime(now)
 
+        status_writer.flush(task_id)
         TaskStatus.objects(task_id=task_id).update_one(set__finish_time=finished,
                                                        set__state=constants.CALL_FINISHED_STATE,
                                                        set__result=result)
@@ -228,6 +231,7 @@ class ReplyHandler(Listener):
             now = datetime.now(dateutils.utc_tz())
             finished = dateutils.format_iso8601_datetime(now)
 
+        status_writer.flush(task_id)
         TaskStatus.objects(task_id=task_id).update_one(set__finish_time=finished,
                                                        set__state=constants.CALL_ERROR_STATE,
                                                        set__traceback=traceback)
@@ -248,4 +252,4 @@ class ReplyHandler(Listener):
         """
         call_context = dict(reply.data)
         task_id = call_context['task_id']
-        TaskStatus.objects(task_id=task_id).update_one(set__progress_report=reply.details)
+        status_writer.update(task_id, progress_report=reply.details)
@@ -1,6 +1,7 @@
 from collections import namedtuple
 from datetime import datetime, timedelta
 from gettext import gettext as _
+import heapq
 import itertools
 import logging
 import platform
@@ -269,6 +270,15 @@ class Scheduler(beat.Scheduler):
     This object has two purposes: Implement a dynamic periodic task schedule, and start helper
     threads related to celery event monitoring.
 
+    Rather than asking every entry whether it is due on each tick, as the superclass does, the
+    time at which each entry is next due is kept in a heap. Each tick only asks the entries at the
+    head of the heap, whose time has come, and puts them back with the time at which they will be
+    due again. The heap is rebuilt whenever the schedule is loaded.
+
+    Every schedule is loaded from the database once. After that, each tick only reads the
+    schedules that were updated or deleted since the previous one, and patches the entries of those
+    schedules in place.
+
     Celery uses lazy instantiation, so this object may be created multiple times, with some objects
     being thrown away after being created. The spawning of threads needs to be done on the actual
     object, and not any intermediate objects, so __init__ conditionally spawns threads based on
@@ -287,6 +297,10 @@ class Scheduler(beat.Scheduler):
     # allows mongo initialization to occur exactly once during the first call to setup_schedule()
     _mongo_initialized = False
 
+    # Changes are read from this many seconds before the most recent change already read, so that
+    # changes written late, or by a host whose clock is slightly behind, are not missed.
+    update_overlap = 10
+
     def __init__(self, *args, **kwargs):
         """
         Initialize the Scheduler object.
@@ -296,8 +310,12 @@ class Scheduler(beat.Scheduler):
         and should create the necessary pulp helper threads using spawn_pulp_monitor_threads().
         """
         self._schedule = None
+        self._heap = None
+        self._next_due = {}
         self._failure_watcher = FailureWatcher()
-        self._loaded_from_db_count = 0
+        self._most_recent_timestamp = 0
+        self._most_recent_deletion = 0
+        self._updated_at = 0
 
         # Force the use of the Pulp celery_instance when this custom Scheduler is used.
         kwargs['app'] = app
@@ -333,7 +351,7 @@ class Scheduler(beat.Scheduler):
 
     @staticmethod
     def call_tick(self, celerybeat_name):
-        ret = super(Scheduler, self).tick()
+        ret = self.heap_tick()
         _logger.debug(_("%(celerybeat_name)s will tick again in %(ret)s secs")
                       % {'ret': ret, 'celerybeat_name': celerybeat_name})
         return ret
@@ -396,6 +414,68 @@ class Scheduler(beat.Scheduler):
                              % {'ret': ret})
         return ret
 
+    def populate_heap(self):
+        """
+        Builds the heap of (time due as seconds since the epoch, name) tuples for the entries of
+        the schedule. Every entry starts out due, so each one is asked once when it is first
+        ticked, and is then put back in the heap at the time it reported.
+        """
+        self._heap = []
+        self._next_due = {}
+        for name in self._schedule:
+            self._push(name, 0)
+
+    def _push(self, name, due):
+        """
+        Puts an entry in the heap. Tuples that were put in the heap for the entry before are left
+        there, and are skipped when they reach the head of the heap.
+
+        :param name:    name of the entry
+        :type  name:    basestring
+        :param due:     time at which the entry should next be asked whether it is due, as
+                        seconds since the epoch
+        :type  due:     float
+        """
+        self._next_due[name] = due
+        heapq.heappush(self._heap, (due, name))
+
+    def heap_tick(self):
+        """
+        Runs one iteration of the scheduler, executing the entries that are due. Only the entries
+        whose time has come, according to the heap, are asked whether they are due.
+
+        :return:    number of seconds before the next tick should run
+        :rtype:     float
+        """
+        self.update_schedule()
+        if self._heap is None:
+            self.populate_heap()
+
+        heap = self._heap
+        now = time.time()
+        while heap and heap[0][0] <= now:
+            due, name = heapq.heappop(heap)
+            if self._next_due.get(name) != due:
+                # the entry was replaced or removed after this tuple was put in the heap
+                continue
+            del self._next_due[name]
+            entry = self._schedule.get(name)
+            if entry is None:
+                continue
+            next_time_to_run = self.maybe_due(entry, self.publisher)
+            if name not in self._schedule:
+                # the entry was removed because it has no remaining runs
+                continue
+            # An entry that does not know when it will be due is asked again after max_interval
+            # seconds, which is how often the superclass would have asked it at most.
+            if not next_time_to_run or next_time_to_run <= 0:
+                next_time_to_run = self.max_interval
+            self._push(name, now + next_time_to_run)
+
+        if not heap:
+            return self.max_interval
+        return min(max(heap[0][0] - now, 0), self.max_interval)
+
     def setup_schedule(self):
         """
         This loads enabled schedules from the database and adds them to the
@@ -407,6 +487,8 @@ class Scheduler(beat.Scheduler):
             Scheduler._mongo_initialized = True
         _logger.debug(_('loading schedules from app'))
         self._schedule = {}
+        self._heap = None
+        self._updated_at = time.time()
         for key, value in self.app.conf.CELERYBEAT_SCHEDULE.iteritems():
             self._schedule[key] = beat.ScheduleEntry(**dict(value, name=key))
 
@@ -415,7 +497,7 @@ class Scheduler(beat.Scheduler):
 
         _logger.debug(_('loading schedules from DB'))
         ignored_db_count = 0
-        self._loaded_from_db_count = 0
+        loaded_from_db_count = 0
         for call in itertools.imap(ScheduledCall.from_db, utils.get_enabled()):
             if call.remaining_runs == 0:
                 _logger.debug(
@@ -424,34 +506,62 @@ class Scheduler(beat.Scheduler):
             else:
                 self._schedule[call.id] = call.as_schedule_entry()
                 update_timestamps.append(call.last_updated)
-                self._loaded_from_db_count += 1
+                loaded_from_db_count += 1
 
-        _logger.debug('loaded %(count)d schedules' % {'count': self._loaded_from_db_count})
+        _logger.debug('loaded %(count)d schedules' % {'count': loaded_from_db_count})
 
         self._most_recent_timestamp = max(update_timestamps)
+        # deletions recorded before the schedules were loaded are read once, and have no effect
+        self._most_recent_deletion = 0
 
-    @property
     @retry_decorator()
-    def schedule_changed(self):
+    def update_schedule(self):
         """
-        Looks at the update timestamps in the database to determine if there
-        are new or modified schedules.
-
-        Indexing should make this very fast.
-
-        :return:    True iff the set of enabled scheduled calls has changed
-                    in the database.
-        :rtype:     bool
+        Applies the changes made to schedules in the database since they were loaded to the
+        "_schedule" dictionary. Only the schedules that were updated or deleted since the most
+        recent change already applied are read. Every schedule is loaded again if changes were
+        last looked for longer ago than deletions are recorded for.
         """
-        if utils.get_enabled().count() != self._loaded_from_db_count:
-            logging.debug(_('number of enabled schedules has changed'))
-            return True
-
-        if utils.get_updated_since(self._most_recent_timestamp).count() > 0:
-            logging.debug(_('one or more enabled schedules has been updated'))
-            return True
-
-        return False
+        now = time.time()
+        if now - self._updated_at > utils.DELETED_RETENTION_SECONDS - self.update_overlap:
+            _logger.debug(_('loading every schedule, the schedule was last updated at %(time)s')
+                          % {'time': self._updated_at})
+            self.setup_schedule()
+            return
+
+        since = self._most_recent_timestamp - self.update_overlap
+        for call in itertools.imap(ScheduledCall.from_db, utils.get_changed_since(since)):
+            self._most_recent_timestamp = max(self._most_recent_timestamp, call.last_updated)
+            if not call.enabled or call.remaining_runs == 0:
+                self._remove_entry(call.id)
+                continue
+            entry = self._schedule.get(call.id)
+            if isinstance(entry, ScheduleEntry) and \
+                    entry._scheduled_call.last_updated == call.last_updated:
+                # this change was already applied
+                continue
+            _logger.debug(_('loading updated schedule %(id)s') % {'id': call.id})
+            self._schedule[call.id] = call.as_schedule_entry()
+            if self._heap is not None:
+                self._push(call.id, 0)
+
+        since = self._most_recent_deletion - self.update_overlap
+        for deleted in utils.get_deleted_since(since):
+            self._most_recent_deletion = max(self._most_recent_deletion, deleted['deleted'])
+            self._remove_entry(deleted['schedule_id'])
+
+        self._updated_at = now
+
+    def _remove_entry(self, name):
+        """
+        Removes an entry from the "_schedule" dictionary, if it is there.
+
+        :param name:    name of the entry, which is the ID of its schedule
+        :type  name:    basestring
+        """
+        if self._schedule.pop(name, None) is not None:
+            _logger.debug(_('removing schedule %(id)s') % {'id': name})
+        self._next_due.pop(name, None)
 
     @property
     def schedule(self):
@@ -464,11 +574,24 @@ class Scheduler(beat.Scheduler):
         if self._schedule is None:
             return self.get_schedule()
 
-        if self.schedule_changed:
-            self.setup_schedule()
-
         return self._schedule
 
+    def reserve(self, entry):
+        """
+        The superclass replaces the entry with the one that follows it, which records the run in
+        the database. This method also removes the entry if it has no remaining runs, and has
+        therefore been disabled.
+
+        :param entry:   schedule entry whose task is about to be queued
+        :type  entry:   celery.beat.ScheduleEntry
+        :return:        the entry that replaced it
+        :rtype:         celery.beat.ScheduleEntry
+        """
+        new_entry = super(Scheduler, self).reserve(entry)
+        if isinstance(new_entry, ScheduleEntry) and not new_entry._scheduled_call.enabled:
+            self._remove_entry(entry.name)
+        return new_entry
+
     def add(self, **kwargs):
         """
         This class does not support adding entries in-place. You must add new
@@ -0,0 +1,130 @@
+"""
+Coalescing writer for TaskStatus documents.
+
+State and progress transitions for running tasks are buffered per task and written to the
+database together with a single unordered bulk operation every status_flush_interval seconds.
+Only the most recent value of each field is kept, so a task that reports its progress many
+times between two flushes costs a single write. Terminal states are not buffered; callers flush
+the pending updates for a task before they record its final state.
+"""
+import logging
+import threading
+
+from pymongo.errors import BulkWriteError
+
+from pulp.common import constants, dateutils
+from pulp.server.config import config as pulp_config
+from pulp.server.db.model import TaskStatus
+
+
+_logger = logging.getLogger(__name__)
+
+# Mongo error code for a duplicate key on insert
+DUPLICATE_KEY_ERROR = 11000
+
+
+class TaskStatusWriter(object):
+    """
+    Buffers TaskStatus field updates per task and flushes them in bulk.
+
+    A state update is only applied while the task is not in a complete state, so a buffered
+    transition to running can never overwrite a cancellation that was written in the meantime.
+    """
+
+    def __init__(self, interval=None):
+        """
+        :param interval: seconds between flushes; read from the server configuration when None.
+                         A value of 0 disables buffering and every update is written immediately.
+        :type  interval: float
+        """
+        if interval is None:
+            interval = pulp_config.getfloat('tasks', 'status_flush_interval')
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def update(self, task_id, **fields):
+        """
+        Buffer an update of the given fields for a task. Values replace any value for the same
+        field that has not been flushed yet.
+
+        :param task_id: the id of the task to update
+        :type  task_id: basestring
+        :param fields:  field names and values to $set on the task's TaskStatus
+        :type  fields:  dict
+        """
+        with self._lock:
+            self._pending.setdefault(task_id, {}).update(fields)
+            if self.interval <= 0:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def discard(self, task_id):
+        """
+        Drop any updates for a task that have not been flushed yet.
+
+        :param task_id: the id of the task
+        :type  task_id: basestring
+        """
+        with self._lock:
+            self._pending.pop(task_id, None)
+
+    def flush(self, task_id=None):
+        """
+        Write buffered updates to the database.
+
+        :param task_id: when specified, only the updates for this task are written
+        :type  task_id: basestring
+        """
+        with self._lock:
+            if task_id is None:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            elif task_id in self._pending:
+                pending = {task_id: self._pending.pop(task_id)}
+            else:
+                return
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except Exception:
+                _logger.exception('Failed to write status for %d task(s)' % len(pending))
+
+    @staticmethod
+    def _write(pending):
+        """
+        Apply the updates for all pending tasks with one unordered bulk operation.
+
+        :param pending: mapping of task id to the fields to $set on its TaskStatus
+        :type  pending: dict
+        """
+        bulk = TaskStatus._get_collection().initialize_unordered_bulk_op()
+        last_updated = dateutils.now_utc_timestamp()
+        for task_id, fields in pending.iteritems():
+            fields = dict(fields, last_updated=last_updated)
+            if 'state' in fields:
+                # Upsert in case the document created by apply_async has not propagated yet. When
+                # the task already completed, the upsert collides with the existing document and
+                # is reported as a duplicate key error, which is ignored below.
+                spec = {'task_id': task_id, 'state': {'$nin': constants.CALL_COMPLETE_STATES}}
+                bulk.find(spec).upsert().update_one({'$set': fields})
+            else:
+                bulk.find({'task_id': task_id}).update_one({'$set': fields})
+        try:
+            bulk.execute()
+        except BulkWriteError, e:
+            errors = [error for error in e.details.get('writeErrors', [])
+                      if error.get('code') != DUPLICATE_KEY_ERROR]
+            if errors or e.details.get('writeConcernErrors'):
+                raise
+
+
+# Status writer shared by everything running in this process
+status_writer = TaskStatusWriter()
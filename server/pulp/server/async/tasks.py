@@ -1,6 +1,7 @@
 from datetime import datetime
 from gettext import gettext as _
 import logging
+import re
 import signal
 import time
 import traceback
@@ -15,9 +16,10 @@ from pulp.common.constants import SCHEDULER_WORKER_NAME
 from pulp.common import constants, dateutils, tags
 from pulp.server.async.celery_instance import celery, RESOURCE_MANAGER_QUEUE, \
     DEDICATED_QUEUE_EXCHANGE
+from pulp.server.async.status_writer import status_writer
 from pulp.server.exceptions import PulpException, MissingResource, \
     PulpCodedException
-from pulp.server.db.model import Worker, ReservedResource, TaskStatus
+from pulp.server.db.model import Worker, ReservedResource, ReservationRelease, TaskStatus
 from pulp.server.exceptions import NoWorkers
 from pulp.server.managers.repo import _common as common_utils
 from pulp.server.managers import factory as managers
@@ -26,6 +28,16 @@ from pulp.server.managers import factory as managers
 controller = control.Control(app=celery)
 _logger = logging.getLogger(__name__)
 
+# The longest time, in seconds, that a reserved task waits for a release before checking again
+RELEASE_WAIT_TIMEOUT = 5.0
+# How long to sleep when there is nothing yet to tail in the release collection
+RELEASE_POLL_INTERVAL = 0.25
+# The shortest time, in seconds, between corrections of the workers' reservation counts
+RESERVATION_COUNT_REPAIR_INTERVAL = 60.0
+
+# When the workers' reservation counts were last corrected
+_reservation_counts_repaired = 0.0
+
 
 @task(acks_late=True)
 def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
@@ -54,11 +66,16 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
     :return: None
     """
     while True:
+        # Remember the most recent release before looking for a worker, so that a release which
+        # happens between the lookup and the wait below still wakes us up.
+        last_release = _get_last_release()
+
         try:
             worker = get_worker_for_reservation(resource_id)
         except NoWorkers:
             pass
         else:
+            Worker.objects(name=worker.name).update_one(inc__reservation_count=1)
             break
 
         try:
@@ -68,8 +85,13 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
         else:
             break
 
-        # No worker is ready for this work, so we need to wait
-        time.sleep(0.25)
+        # Workers may only look reserved because a count was left behind by a crash, so correct
+        # the counts and look again before waiting
+        if _repair_reservation_counts():
+            continue
+
+        # No worker is ready for this work, so we need to wait for a reservation to be released
+        _wait_for_release(last_release)
 
     ReservedResource(task_id=task_id, worker_name=worker['name'], resource_id=resource_id).save()
 
@@ -84,18 +106,6 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
                                       exchange=DEDICATED_QUEUE_EXCHANGE)
 
 
-def _is_worker(worker_name):
-    """
-    Strip out workers that should never be assigned work. We need to check
-    via "startswith()" since we do not know which host the worker is running on.
-    """
-
-    if worker_name.startswith(SCHEDULER_WORKER_NAME) or \
-       worker_name.startswith(RESOURCE_MANAGER_QUEUE):
-        return False
-    return True
-
-
 def get_worker_for_reservation(resource_id):
     """
     Return the Worker instance that is associated with a reservation of type resource_id. If
@@ -124,28 +134,111 @@ def _get_unreserved_worker():
     associated with it. If there are no unreserved workers a
     pulp.server.exceptions.NoWorkers exception is raised.
 
+    The worker is selected and its reservation_count incremented in a single find-and-modify, so
+    the selection uses the reservation_count index instead of loading every Worker and
+    ReservedResource. Any of the unreserved workers may be picked.
+
     :raises NoWorkers: If all workers have reserved_resource entries associated with them.
 
     :returns:          The Worker instance that has no reserved_resource
                        entries associated with it.
     :rtype:            pulp.server.db.model.resources.Worker
     """
+    # Filter out workers that should not be assigned work. Workers that were registered before
+    # reservation_count existed do not have the field, and are treated as unreserved.
+    query = {'_id': {'$nin': [re.compile('^%s' % re.escape(SCHEDULER_WORKER_NAME)),
+                              re.compile('^%s' % re.escape(RESOURCE_MANAGER_QUEUE))]},
+             'reservation_count': {'$not': {'$gt': 0}}}
+    worker = Worker._get_collection().find_and_modify(
+        query=query, update={'$inc': {'reservation_count': 1}}, new=True)
+    if worker is None:
+        # All workers are reserved
+        raise NoWorkers()
+    return Worker._from_son(worker)
+
+
+def _repair_reservation_counts(interval=RESERVATION_COUNT_REPAIR_INTERVAL):
+    """
+    Set the reservation_count of each Worker to the number of ReservedResources it holds, at most
+    once every interval seconds. A count is left too high when the resource manager stops between
+    counting a reservation and saving it, which would keep the worker from being picked.
+
+    This runs in the resource manager, which is the only process that makes reservations. The
+    counts are read before the reservations, so a reservation released in between can only leave
+    a count too low, which lets the worker be picked early rather than never.
+
+    :param interval: the shortest time, in seconds, between corrections
+    :type  interval: float
+    :return:         the number of workers whose count was corrected
+    :rtype:          int
+    """
+    global _reservation_counts_repaired
+    now = time.time()
+    if now - _reservation_counts_repaired < interval:
+        return 0
+    _reservation_counts_repaired = now
+
+    collection = Worker._get_collection()
+    counts = dict((worker['_id'], worker.get('reservation_count'))
+                  for worker in collection.find(fields=['reservation_count']))
+    reserved = {}
+    for reservation in ReservedResource._get_collection().find(fields=['worker_name']):
+        worker_name = reservation['worker_name']
+        reserved[worker_name] = reserved.get(worker_name, 0) + 1
+
+    repaired = 0
+    for name, count in counts.items():
+        actual = reserved.get(name, 0)
+        if (count or 0) == actual:
+            continue
+        # only correct the count if it has not been changed since it was read
+        result = collection.update({'_id': name, 'reservation_count': count},
+                                   {'$set': {'reservation_count': actual}})
+        if result and result.get('n'):
+            _logger.info(_('Corrected the reservation count of worker %(name)s from %(count)s '
+                           'to %(actual)s') % {'name': name, 'count': count, 'actual': actual})
+            repaired += 1
+    return repaired
+
+
+def _get_last_release():
+    """
+    Return the id of the most recent ReservationRelease, or None if nothing has been released yet.
 
-    # Build a mapping of queue names to Worker objects
-    workers_dict = dict((worker['name'], worker) for worker in Worker.objects())
-    worker_names = workers_dict.keys()
-    reserved_names = [r['worker_name'] for r in ReservedResource.objects.all()]
+    :return: id of the most recent release
+    :rtype:  bson.objectid.ObjectId or None
+    """
+    collection = ReservationRelease._get_collection()
+    for release in collection.find(fields=['_id']).sort('$natural', -1).limit(1):
+        return release['_id']
 
-    # Find an unreserved worker using set differences of the names, and filter
-    # out workers that should not be assigned work.
-    # NB: this is a little messy but set comprehensions are in python 2.7+
-    unreserved_workers = set(filter(_is_worker, worker_names)) - set(reserved_names)
 
-    try:
-        return workers_dict[unreserved_workers.pop()]
-    except KeyError:
-        # All workers are reserved
-        raise NoWorkers()
+def _wait_for_release(last_release, timeout=RELEASE_WAIT_TIMEOUT):
+    """
+    Block until a reservation newer than last_release is released, or until timeout seconds have
+    passed. The capped reservation_releases collection is tailed, so the caller is woken up as
+    soon as _release_resource records a release.
+
+    :param last_release: id of the most recent release the caller has already seen
+    :type  last_release: bson.objectid.ObjectId or None
+    :param timeout:      the longest time to wait, in seconds
+    :type  timeout:      float
+    """
+    spec = {}
+    if last_release is not None:
+        spec = {'_id': {'$gt': last_release}}
+    deadline = time.time() + timeout
+    cursor = ReservationRelease._get_collection().find(spec, tailable=True, await_data=True)
+    while cursor.alive and time.time() < deadline:
+        try:
+            # With await_data the server holds this call open for a while when nothing is new
+            cursor.next()
+        except StopIteration:
+            continue
+        return
+    if not cursor.alive:
+        # A tailable cursor on an empty capped collection is closed by the server right away
+        time.sleep(RELEASE_POLL_INTERVAL)
 
 
 def _delete_worker(name, normal_shutdown=False):
@@ -173,8 +266,10 @@ def _delete_worker(name, normal_shutdown=False):
     # Delete the worker document
     Worker.objects(name=name).delete()
 
-    # Delete all reserved_resource documents for the worker
-    ReservedResource.objects(worker_name=name).delete()
+    # Delete all reserved_resource documents for the worker, and wake up the tasks waiting for them
+    released = ReservedResource.objects(worker_name=name).delete()
+    if released:
+        ReservationRelease(worker_name=name).save()
 
     # Cancel all of the tasks that were assigned to this worker's queue
     for task_status in TaskStatus.objects(worker_name=name,
@@ -197,7 +292,13 @@ def _release_resource(task_id):
     :param task_id: The UUID of the task that requested the reservation
     :type  task_id: basestring
     """
-    ReservedResource.objects(task_id=task_id).delete()
+    reservation = ReservedResource._get_collection().find_and_modify(
+        query={'_id': task_id}, remove=True)
+    if reservation is None:
+        return
+    worker_name = reservation['worker_name']
+    Worker.objects(name=worker_name).update_one(dec__reservation_count=1)
+    ReservationRelease(task_id=task_id, worker_name=worker_name).save()
 
 
 class TaskResult(object):
@@ -385,10 +486,10 @@ class Task(CeleryTask, ReservedTaskMixin):
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             start_time = dateutils.format_iso8601_datetime(now)
-            # Using 'upsert' to avoid a possible race condition described in the apply_async method
-            # above.
-            TaskStatus.objects(task_id=self.request.id).update_one(
-                set__state=constants.CALL_RUNNING_STATE, set__start_time=start_time, upsert=True)
+            # The status writer uses an 'upsert' to avoid a possible race condition described in
+            # the apply_async method above, and coalesces this write with other status updates.
+            status_writer.update(self.request.id, state=constants.CALL_RUNNING_STATE,
+                                 start_time=start_time)
         # Run the actual task
         _logger.debug("Running task : [%s]" % self.request.id)
         return super(Task, self).__call__(*args, **kwargs)
@@ -409,6 +510,8 @@ class Task(CeleryTask, ReservedTaskMixin):
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
+            # Write any buffered updates before recording the final state
+            status_writer.flush(task_id)
             task_status = TaskStatus.objects.get(task_id=task_id)
             task_status['finish_time'] = finish_time
             task_status['result'] = retval
@@ -459,6 +562,8 @@ class Task(CeleryTask, ReservedTaskMixin):
         if not self.request.called_directly:
             now = datetime.now(dateutils.utc_tz())
             finish_time = dateutils.format_iso8601_datetime(now)
+            # Write any buffered updates before recording the final state
+            status_writer.flush(task_id)
             task_status = TaskStatus.objects.get(task_id=task_id)
             task_status['state'] = constants.CALL_ERROR_STATE
             task_status['finish_time'] = finish_time
@@ -0,0 +1,200 @@
+"""
+Caches for the results of authenticating and authorizing REST API requests.
+
+Each process keeps the logins that verified credentials belong to and the operations granted to
+users on resources for [authentication] cache_ttl seconds. The caches are only used while a
+request is being authorized, between the calls to synchronize() and release() made for it.
+
+The auth managers call invalidate() whenever users, roles or permissions change. That clears the
+caches of the calling process and increments a generation counter stored in the database.
+synchronize() compares that counter with the one the caches of its process were filled under,
+so a change made by any process is honored by every other process on its next request. Entries
+are added with AuthCache.set(), which drops them if the caches were cleared since the calling
+thread synchronized, as they may have been read before the change that cleared the caches.
+"""
+from collections import OrderedDict
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from pulp.server.config import config as pulp_config
+from pulp.server.db import connection
+
+
+# Maximum number of entries kept by each cache; the least recently used entries are dropped first
+MAX_ENTRIES = 10000
+
+# Collection and id of the document holding the generation counter shared by all processes
+GENERATION_COLLECTION = 'auth_cache'
+GENERATION_ID = 'generation'
+
+
+class TTLCache(object):
+    """
+    Thread safe mapping of a bounded size whose entries expire a fixed time after they are set.
+    """
+
+    def __init__(self, ttl, max_entries=MAX_ENTRIES):
+        """
+        :param ttl: seconds an entry is kept for
+        :type  ttl: float
+        :param max_entries: maximum number of entries kept
+        :type  max_entries: int
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: key of the entry
+        :type  key: hashable
+
+        :return: the value of the entry, or None if there is no entry or it expired
+        """
+        with self._lock:
+            try:
+                value, expires = self._entries.pop(key)
+            except KeyError:
+                return None
+            if expires <= time.time():
+                return None
+            # inserted again to mark it as the most recently used entry
+            self._entries[key] = (value, expires)
+            return value
+
+    def set(self, key, value):
+        """
+        :param key: key of the entry
+        :type  key: hashable
+        :param value: value of the entry; None can not be told apart from a missing entry
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+class AuthCache(object):
+    """
+    Credential and permission caches of a process, kept consistent with the caches of the
+    other processes through the shared generation counter.
+
+    :ivar credentials: logins of users and ids of consumers, keyed by a digest of the
+                       credentials they were verified with
+    :type credentials: TTLCache
+    :ivar permissions: operations granted to users, keyed by (login, resource); whether users
+                       are super users, keyed by login
+    :type permissions: TTLCache
+    """
+
+    def __init__(self, ttl=None):
+        """
+        :param ttl: seconds entries are kept for; read from the server configuration when None.
+                    A value of 0 disables the caches.
+        :type  ttl: float
+        """
+        if ttl is None:
+            ttl = pulp_config.getfloat('authentication', 'cache_ttl')
+        self.ttl = ttl
+        self.credentials = TTLCache(ttl)
+        self.permissions = TTLCache(ttl)
+        self._generation = None
+        # incremented whenever the caches are cleared, so entries read before that are not added
+        self._epoch = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        # only kept in memory, so the digests of passwords can not be checked anywhere else
+        self._digest_key = os.urandom(32)
+
+    @property
+    def active(self):
+        """
+        :return: True if the caches may be used by the calling thread
+        :rtype:  bool
+        """
+        return getattr(self._local, 'active', False)
+
+    def synchronize(self):
+        """
+        Clear the caches if any process invalidated them since they were last synchronized, and
+        let the calling thread use them until release() is called.
+        """
+        if self.ttl <= 0:
+            return
+        document = connection.get_collection(GENERATION_COLLECTION).find_one(
+            {'_id': GENERATION_ID})
+        generation = document['value'] if document else 0
+        with self._lock:
+            if generation != self._generation:
+                self.clear()
+                self._generation = generation
+            self._local.epoch = self._epoch
+        self._local.active = True
+
+    def release(self):
+        """
+        Stop the calling thread from using the caches.
+        """
+        self._local.active = False
+
+    def invalidate(self):
+        """
+        Clear the caches of this and every other process. Called by the auth managers after
+        users, roles or permissions change.
+        """
+        self.clear()
+        if self.ttl <= 0:
+            return
+        connection.get_collection(GENERATION_COLLECTION).update(
+            {'_id': GENERATION_ID}, {'$inc': {'value': 1}}, upsert=True)
+
+    def set(self, cache, key, value):
+        """
+        Add an entry to one of the caches, unless the caches were cleared since the calling
+        thread synchronized them.
+
+        :param cache: the credentials or permissions cache
+        :type  cache: TTLCache
+        :param key: key of the entry
+        :type  key: hashable
+        :param value: value of the entry
+        """
+        with self._lock:
+            if self.active and self._local.epoch == self._epoch:
+                cache.set(key, value)
+
+    def clear(self):
+        """
+        Clear the caches of this process.
+        """
+        with self._lock:
+            self._epoch += 1
+            self.credentials.clear()
+            self.permissions.clear()
+
+    def credential_key(self, *credentials):
+        """
+        :param credentials: values identifying the credentials, such as their kind, a login and
+                            a password
+        :type  credentials: str or None
+
+        :return: a keyed digest of the credentials, so they are not kept in memory as they are
+        :rtype:  str
+        """
+        return hmac.new(self._digest_key, repr(credentials), hashlib.sha256).hexdigest()
+
+
+# Caches shared by everything running in this process
+auth_cache = AuthCache()
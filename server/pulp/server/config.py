@@ -7,9 +7,13 @@ config = None  # ConfigParser.SafeConfigParser instance
 
 # to guarantee that a section and/or setting exists, add a default value here
 _default_values = {
+    'applicability': {
+        'regeneration_shard_size': '0',
+    },
     'authentication': {
         'rsa_key': '/etc/pki/pulp/rsa.key',
         'rsa_pub': '/etc/pki/pulp/rsa_pub.key',
+        'cache_ttl': '30',
     },
     'consumer_history': {
         'lifetime': '180',  # in days
@@ -22,6 +26,8 @@ _default_values = {
         'repo_group_publish_history': '60',
         'task_status_history': '7',
         'task_result_history': '3',
+        'batch_size': '1000',
+        'documents_per_second': '5000',
     },
     'database': {
         'name': 'pulp_database',
@@ -87,6 +93,7 @@ _default_values = {
         'keyfile': '/etc/pki/pulp/qpid/client.crt',
         'certfile': '/etc/pki/pulp/qpid/client.crt',
         'login_method': '',
+        'status_flush_interval': '1',
     },
 }
 
@@ -7,6 +7,7 @@ from nectar.listener import DownloadEventListener
 from nectar.report import DownloadReport as NectarDownloadReport
 from nectar.request import DownloadRequest
 
+from pulp.plugins.util.misc import paginate
 from pulp.server.content.sources.model import ContentSource, PrimarySource, \
     DownloadReport, DownloadDetails, RefreshReport
 from pulp.server.managers import factory as managers
@@ -15,6 +16,10 @@ from pulp.server.managers import factory as managers
 log = getLogger(__name__)
 
 
+# The number of download requests resolved against the content catalog per query.
+CATALOG_PAGE_SIZE = 500
+
+
 class ContentContainer(object):
     """
     The content container represents a virtual collection of content that is
@@ -335,6 +340,27 @@ class Batch(object):
         queue.start()
         return queue
 
+    @staticmethod
+    def find_entries(requests):
+        """
+        Find the catalog entries for a page of requests.
+        The catalog is queried once for each content type in the page.
+        :param requests: A list of: pulp.server.content.sources.model.Request.
+        :type requests: list
+        :return: A list of: (request, entries) in the same order as requests.
+        :rtype: list
+        """
+        by_type = {}
+        for index, request in enumerate(requests):
+            by_type.setdefault(request.type_id, []).append(index)
+        entries = [None] * len(requests)
+        catalog = managers.content_catalog_manager()
+        for type_id, indexes in by_type.items():
+            unit_keys = [requests[index].unit_key for index in indexes]
+            for index, found in zip(indexes, catalog.find_many(type_id, unit_keys)):
+                entries[index] = found
+        return zip(requests, entries)
+
     def download(self):
         """
         Begin processing the batch of requests.
@@ -351,12 +377,15 @@ class Batch(object):
         report.total_sources = len(self.sources)
 
         try:
-            for request in self.requests:
+            for page in paginate(self.requests, CATALOG_PAGE_SIZE):
                 if self.is_canceled:
                     break
-                request.find_sources(self.primary, self.sources)
-                self.dispatch(request)
-                count += 1
+                for request, entries in self.find_entries(page):
+                    if self.is_canceled:
+                        break
+                    request.find_sources(self.primary, self.sources, entries)
+                    self.dispatch(request)
+                    count += 1
         except Exception:
             self.canceled.set()
             raise
@@ -1,9 +1,11 @@
+from collections import defaultdict
 from datetime import datetime
 from gettext import gettext as _
 import logging
 import sys
 
 from mongoengine import NotUniqueError, OperationError, ValidationError
+from pymongo.errors import BulkWriteError
 import celery
 
 from pulp.common import dateutils, error_codes, tags
@@ -28,6 +30,12 @@ from pulp.server.managers.repo import _common as common_utils
 
 _logger = logging.getLogger(__name__)
 
+# Number of associations written to the database with each bulk operation
+ASSOCIATE_BATCH_SIZE = 1000
+
+# Mongo error code for a duplicate key on insert
+DUPLICATE_KEY_ERROR = 11000
+
 
 def find_repo_content_units(
         repository, repo_content_unit_q=None,
@@ -147,6 +155,65 @@ def associate_single_unit(repository, unit):
         upsert=True)
 
 
+def associate_units_bulk(repository, units):
+    """
+    Associate many units to a repository.
+
+    Associations are upserted with unordered bulk operations of ASSOCIATE_BATCH_SIZE units, so
+    no per-unit existence checks are needed. The updated timestamp of associations that already
+    exist is refreshed, and the content unit counts of the repository are incremented once per
+    unit type by the number of associations that were created.
+
+    :param repository: The repository to update.
+    :type repository: pulp.server.db.model.Repository
+    :param units: The units to associate to the repository. Anything with "id" and
+                  "unit_type_id" attributes may be used.
+    :type units: iterable of pulp.server.db.model.ContentUnit
+
+    :return: number of associations that were created
+    :rtype:  int
+    """
+    collection = model.RepositoryContentUnit._get_collection()
+    added_counts = defaultdict(int)
+
+    for unit_group in misc.paginate(units, ASSOCIATE_BATCH_SIZE):
+        current_timestamp = dateutils.now_utc_timestamp()
+        formatted_datetime = dateutils.format_iso8601_utc_timestamp(current_timestamp)
+
+        # Duplicates within a batch would race each other to the insert
+        keys = []
+        seen = set()
+        for unit in unit_group:
+            key = (unit.unit_type_id, unit.id)
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+        bulk = collection.initialize_unordered_bulk_op()
+        for unit_type_id, unit_id in keys:
+            spec = {'repo_id': repository.repo_id, 'unit_id': unit_id,
+                    'unit_type_id': unit_type_id}
+            bulk.find(spec).upsert().update_one({
+                '$setOnInsert': {'created': formatted_datetime, '_ns': 'repo_content_units'},
+                '$set': {'updated': formatted_datetime}})
+        try:
+            result = bulk.execute()
+        except BulkWriteError, e:
+            # A concurrent association of the same unit is not an error
+            result = e.details
+            errors = [error for error in result.get('writeErrors', [])
+                      if error.get('code') != DUPLICATE_KEY_ERROR]
+            if errors or result.get('writeConcernErrors'):
+                raise
+
+        for upserted in result.get('upserted', []):
+            added_counts[keys[upserted['index']][0]] += 1
+
+    for unit_type_id, count in added_counts.iteritems():
+        update_unit_count(repository.repo_id, unit_type_id, count)
+    return sum(added_counts.itervalues())
+
+
 def disassociate_units(repository, unit_iterable):
     """
     Disassociate all units in the iterable from the repository
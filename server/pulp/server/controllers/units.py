@@ -1,39 +1,127 @@
-import mongoengine
+from collections import deque, OrderedDict
+from multiprocessing.pool import ThreadPool
+import itertools
+import time
 
-from pulp.plugins.util import misc
 
+# Number of units looked up by the first query of find_units
+FIND_UNITS_PAGE_SIZE = 500
+# Bounds for the page size as it adapts to the latency of the queries
+FIND_UNITS_MIN_PAGE_SIZE = 50
+FIND_UNITS_MAX_PAGE_SIZE = 10000
+# Queries that take less than half of this many seconds grow the page size; slower ones shrink it
+FIND_UNITS_TARGET_LATENCY = 0.5
+# Number of pages that are queried concurrently
+FIND_UNITS_PREFETCH = 2
 
-def find_units(units, pagination_size=50):
+
+def find_units(units, pagination_size=None):
     """
     Query for units matching the unit key fields of an iterable of ContentUnit objects.
 
     This requires that all the ContentUnit objects are of the same content type.
 
+    Each page of units is looked up with a single query that has an $in on every unit key field,
+    which the unit key index serves. When the unit key has more than one field, the query can also
+    match units that combine the values of different units, so the results are then matched
+    against the complete unit keys. While the units of one page are being yielded, the following
+    pages are already being queried.
+
     :param units: Iterable of content units with the unit key fields specified.
     :type units: iterable of pulp.server.db.model.ContentUnit
-    :param pagination_size: How large a page size to use when querying units.
-    :type pagination_size: int (default 50)
+    :param pagination_size: How large a page size to use when querying units. By default, the page
+                            size starts at FIND_UNITS_PAGE_SIZE and adapts to how long each query
+                            takes.
+    :type pagination_size: int
 
     :returns: unit models that pulp already knows about.
     :rtype: Generator of pulp.server.db.model.ContentUnit
     """
+    # this won't work properly if we give islice something that isn't a generator
+    generator = (unit for unit in units)
+    page_size = pagination_size or FIND_UNITS_PAGE_SIZE
+    pool = ThreadPool(FIND_UNITS_PREFETCH)
+    try:
+        pending = deque()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < FIND_UNITS_PREFETCH:
+                page = tuple(itertools.islice(generator, 0, page_size))
+                if not page:
+                    exhausted = True
+                    break
+                pending.append(pool.apply_async(_find_page, (page,)))
+
+            if not pending:
+                return
+
+            found_units, elapsed = pending.popleft().get()
+            if pagination_size is None:
+                page_size = _adapt_page_size(page_size, elapsed)
+
+            for found_unit in found_units:
+                yield found_unit
+    finally:
+        pool.terminate()
+
+
+def _find_page(units):
+    """
+    Query for the units matching the unit keys of one page of units.
+
+    :param units: content units with the unit key fields specified, all of the same type
+    :type units: tuple of pulp.server.db.model.ContentUnit
+
+    :returns: the units that were found, and how many seconds it took to find them
+    :rtype: tuple of (list of pulp.server.db.model.ContentUnit, float)
+    """
+    started = time.time()
+
     # get the class from the first unit
-    model_class = None
+    model_class = units[0].__class__
+    key_fields = model_class.unit_key_fields
+
+    # restrict every key field, so units that only share the value of one field are not loaded
+    spec = {}
+    for field in key_fields:
+        values = list(OrderedDict.fromkeys(getattr(unit, field) for unit in units))
+        spec['%s__in' % field] = values
+    query = model_class.objects(**spec)
+
+    if len(key_fields) == 1:
+        found_units = list(query)
+    else:
+        wanted = set(_unit_key_values(unit) for unit in units)
+        found_units = [unit for unit in query if _unit_key_values(unit) in wanted]
 
-    for units_group in misc.paginate(units, pagination_size):
-        q_object = mongoengine.Q()
-        # Build a query for the units in this group
-        for unit in units_group:
-            if model_class is None:
-                model_class = unit.__class__
+    return found_units, time.time() - started
 
-            # Build the query for all the units, the | operator here
-            # creates the equivalent of a mongo $or of all the unit keys
-            unit_q_obj = mongoengine.Q(**unit.unit_key)
-            q_object = q_object | unit_q_obj
 
-        # Get this group of units
-        query = model_class.objects(q_object)
+def _unit_key_values(unit):
+    """
+    :param unit: a content unit
+    :type unit: pulp.server.db.model.ContentUnit
+
+    :returns: the values of the unit key fields of the unit, in the order of unit_key_fields
+    :rtype: tuple
+    """
+    return tuple(getattr(unit, field) for field in unit.unit_key_fields)
 
-        for found_unit in query:
-            yield found_unit
+
+def _adapt_page_size(page_size, elapsed):
+    """
+    Pick the size of the next page from the time it took to query the previous one.
+
+    :param page_size: the current page size
+    :type page_size: int
+    :param elapsed: seconds it took to query a page of page_size units
+    :type elapsed: float
+
+    :returns: the page size to use for the next page
+    :rtype: int
+    """
+    if elapsed < FIND_UNITS_TARGET_LATENCY / 2:
+        return min(page_size * 2, FIND_UNITS_MAX_PAGE_SIZE)
+    if elapsed > FIND_UNITS_TARGET_LATENCY:
+        return max(page_size / 2, FIND_UNITS_MIN_PAGE_SIZE)
+    return page_size
@@ -4,7 +4,7 @@ import os
 import uuid
 from collections import namedtuple
 
-from mongoengine import (DateTimeField, DictField, Document, DynamicField, IntField,
+from mongoengine import (DateTimeField, DictField, Document, DynamicField, FloatField, IntField,
                          ListField, StringField)
 from mongoengine import signals
 
@@ -16,7 +16,7 @@ from pulp.plugins.model import Repository as plugin_repo
 from pulp.server.async.emit import send as send_taskstatus_message
 from pulp.server.db.fields import ISO8601StringField
 from pulp.server.db.model.reaper_base import ReaperMixin
-from pulp.server.db.querysets import CriteriaQuerySet, RepoQuerySet
+from pulp.server.db.querysets import CriteriaQuerySet, RepoQuerySet, TaskStatusQuerySet
 from pulp.server.webservices.views.serializers import Repository as RepoSerializer
 
 
@@ -193,6 +193,27 @@ class ReservedResource(Document):
             'allow_inheritance': False}
 
 
+class ReservationRelease(Document):
+    """
+    Instances of this class record that a ReservedResource has been released. They are stored in a
+    capped collection that the resource manager tails, so that tasks waiting on a busy resource are
+    woken up as soon as a reservation is released instead of polling for it.
+
+    :ivar task_id:     The uuid of the task whose reservation was released
+    :type task_id:     mongoengine.StringField
+    :ivar worker_name: The name of the worker that held the reservation
+    :type worker_name: mongoengine.StringField
+    """
+
+    task_id = StringField()
+    worker_name = StringField()
+
+    meta = {'collection': 'reservation_releases',
+            'max_documents': 1000,
+            'max_size': 1048576,
+            'allow_inheritance': False}
+
+
 class Worker(Document):
     """
     Represents a worker.
@@ -204,15 +225,19 @@ class Worker(Document):
     :type name:    mongoengine.StringField
     :ivar last_heartbeat:  A timestamp of the last heartbeat from the Worker
     :type last_heartbeat:  mongoengine.DateTimeField
+    :ivar reservation_count: The number of ReservedResources currently assigned to the Worker
+    :type reservation_count: mongoengine.IntField
     """
     name = StringField(primary_key=True)
     last_heartbeat = DateTimeField()
+    reservation_count = IntField(default=0)
 
     # For backward compatibility
     _ns = StringField(default='workers')
 
     meta = {'collection': 'workers',
-            'indexes': [],  # this is a small collection that does not need an index
+            # the resource manager looks up an unreserved worker on every reserved dispatch
+            'indexes': ['reservation_count'],
             'allow_inheritance': False,
             'queryset_class': CriteriaQuerySet}
 
@@ -285,6 +310,8 @@ class TaskStatus(Document, ReaperMixin):
     :type exception:   None
     :ivar traceback:   Deprecated. This is always None.
     :type traceback:   None
+    :ivar last_updated: UTC timestamp of the last time the status was written
+    :type last_updated: float
     """
 
     task_id = StringField(required=True)
@@ -298,6 +325,7 @@ class TaskStatus(Document, ReaperMixin):
     start_time = ISO8601StringField()
     finish_time = ISO8601StringField()
     result = DynamicField()
+    last_updated = FloatField()
 
     # These are deprecated, and will always be None
     exception = StringField()
@@ -309,7 +337,7 @@ class TaskStatus(Document, ReaperMixin):
     meta = {'collection': 'task_status',
             'indexes': ['-tags', '-state', {'fields': ['-task_id'], 'unique': True}],
             'allow_inheritance': False,
-            'queryset_class': CriteriaQuerySet}
+            'queryset_class': TaskStatusQuerySet}
 
     def save_with_set_on_insert(self, fields_to_set_on_insert):
         """
@@ -336,6 +364,7 @@ class TaskStatus(Document, ReaperMixin):
         # This will be used in place of superclass' save method, so we need to call validate()
         # explicitly.
         self.validate()
+        self.last_updated = dateutils.now_utc_timestamp()
 
         stuff_to_update = dict(copy.deepcopy(self._data))
 
@@ -350,6 +379,18 @@ class TaskStatus(Document, ReaperMixin):
                   '$setOnInsert': set_on_insert}
         TaskStatus._get_collection().update({'task_id': task_id}, update, upsert=True)
 
+    @classmethod
+    def pre_save(cls, sender, document, **kwargs):
+        """
+        Record the time of the save as the time the task status was last updated.
+
+        :param sender: class of sender (unused)
+        :type  sender: class
+        :param document: mongoengine document
+        :type  document: mongoengine.Document
+        """
+        document.last_updated = dateutils.now_utc_timestamp()
+
     @classmethod
     def post_save(cls, sender, document, **kwargs):
         """
@@ -364,6 +405,7 @@ class TaskStatus(Document, ReaperMixin):
         send_taskstatus_message(document, routing_key="tasks.%s" % document['task_id'])
 
 
+signals.pre_save.connect(TaskStatus.pre_save, sender=TaskStatus)
 signals.post_save.connect(TaskStatus.post_save, sender=TaskStatus)
 
 
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 
 from pulp.server.db.model.base import Model
-from pulp.server.db.model.reaper_base import ReaperMixin
+from pulp.server.db.model.reaper_base import BATCH_SIZE, ReaperMixin, remove_in_batches
 
 
 class CeleryResult(Model, ReaperMixin):
@@ -13,7 +13,8 @@ class CeleryResult(Model, ReaperMixin):
     unique_indices = tuple()
 
     @classmethod
-    def reap_old_documents(cls, config_days):
+    def reap_old_documents(cls, config_days, batch_size=BATCH_SIZE, documents_per_second=0,
+                           progress=None):
         """
         Delete old Celery task results from the celery_taskmeta collection.
 
@@ -23,8 +24,18 @@ class CeleryResult(Model, ReaperMixin):
 
         :param config_days: Remove all records older than the number of days set by config_days.
         :type config_days: float
+        :param batch_size: maximum number of documents removed by each batch
+        :type batch_size: int
+        :param documents_per_second: maximum average number of documents removed per second, or 0
+                                     to remove them as fast as possible
+        :type documents_per_second: float
+        :param progress: called with the number of documents removed so far after each batch
+        :type progress: callable
+        :return: number of documents removed
+        :rtype: int
         """
         # Remove all objects older than the epoch time encoded in last_valid_date_done
         last_valid_date_done = datetime.utcnow() - timedelta(days=config_days)
         collection = cls.get_collection()
-        collection.remove({'date_done': {'$lt': last_valid_date_done}})
+        return remove_in_batches(collection, {'date_done': {'$lt': last_valid_date_done}},
+                                 batch_size, documents_per_second, progress)
@@ -12,12 +12,10 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import datetime
-import hashlib
-import json
 
 from pulp.server.db.model.base import Model
 from pulp.server.db.model.reaper_base import ReaperMixin
-from pulp.common import dateutils
+from pulp.common import dateutils, profile as profile_utils
 
 
 # -- classes -----------------------------------------------------------------
@@ -265,6 +263,10 @@ class UnitProfile(Model):
     :type profile:      object
     :ivar  profile_hash: A hash of the profile, used for quick comparisons of profiles
     :type profile_hash: basestring
+    :ivar  reported_hash: A hash of the profile as the consumer reported it, before the profiler
+                          updated it. The consumer compares it with the hash of its current profile
+                          to skip reporting a profile that has not changed.
+    :type reported_hash: basestring
     """
 
     collection_name = 'consumer_unit_profiles'
@@ -272,7 +274,7 @@ class UnitProfile(Model):
         ('consumer_id', 'content_type'),
     )
 
-    def __init__(self, consumer_id, content_type, profile, profile_hash=None):
+    def __init__(self, consumer_id, content_type, profile, profile_hash=None, reported_hash=None):
         """
         :param consumer_id:  A consumer ID.
         :type  consumer_id:  str
@@ -284,6 +286,9 @@ class UnitProfile(Model):
                              None, the constructor will automatically calculate it based on the
                              profile.
         :type  profile_hash: basestring
+        :param reported_hash: A hash of the profile as the consumer reported it. If it is None, it
+                              is the same as profile_hash.
+        :type  reported_hash: basestring
         """
         super(UnitProfile, self).__init__()
         self.consumer_id = consumer_id
@@ -294,6 +299,8 @@ class UnitProfile(Model):
         if self.profile_hash is None:
             self.profile_hash = self.calculate_hash(self.profile)
 
+        self.reported_hash = reported_hash or self.profile_hash
+
     @staticmethod
     def calculate_hash(profile):
         """
@@ -305,10 +312,8 @@ class UnitProfile(Model):
         :return:        Hash of profile
         :rtype:         basestring
         """
-        # Don't use any whitespace in the json separators, and sort dictionary keys to be repeatable
-        serialized_profile = json.dumps(profile, separators=(',', ':'), sort_keys=True)
-        hasher = hashlib.sha256(serialized_profile)
-        return hasher.hexdigest()
+        # The consumer hashes the profiles it reports the same way
+        return profile_utils.calculate_hash(profile)
 
 
 class ConsumerHistoryEvent(Model, ReaperMixin):
@@ -138,6 +138,10 @@ class ScheduledCall(Model):
         self.schedule = schedule
         self.task = task
         self.total_run_count = total_run_count
+        # caches for _calculate_times(), see _get_run_every() and _walk_duration(). They are set
+        # as instance attributes rather than items, so they do not become fields of the document.
+        object.__setattr__(self, '_run_every', None)
+        object.__setattr__(self, '_duration_walk', None)
 
         if first_run is None:
             # get the date and time from the iso_schedule value, and if it does not have a date and
@@ -280,7 +284,7 @@ class ScheduledCall(Model):
         since_first_s = now_s - first_run_s
 
         # An interval could be an isodate.Duration or a datetime.timedelta
-        interval = self.as_schedule_entry().schedule.run_every
+        interval = self._get_run_every()
         if isinstance(interval, isodate.Duration):
             # Determine how long (in seconds) to wait between the last run and the next one. This
             # changes depending on the current time because a duration can be a month or a year.
@@ -292,22 +296,8 @@ class ScheduledCall(Model):
                 run_every_s = timedelta_seconds(interval.totimedelta(start=first_run_dt))
 
             # This discovers how many runs should have occurred based on the schedule
-            expected_runs = 0
-            current_run = first_run_dt
-            last_scheduled_run_s = first_run_s
-            duration = self.as_schedule_entry().schedule.run_every
-            while True:
-                # The interval is determined by the date of the previous run
-                current_interval = duration.totimedelta(start=current_run)
-                current_run += current_interval
-
-                # If time of this run is less than the current time, keep going
-                current_run_s = calendar.timegm(current_run.utctimetuple())
-                if current_run_s < now_s:
-                    expected_runs += 1
-                    last_scheduled_run_s += timedelta_seconds(current_interval)
-                else:
-                    break
+            last_scheduled_run_s, expected_runs = self._walk_duration(
+                interval, first_run_dt, first_run_s, now_s)
         else:
             run_every_s = timedelta_seconds(interval)
             # don't want this to be negative
@@ -316,6 +306,69 @@ class ScheduledCall(Model):
 
         return now_s, first_run_s, since_first_s, run_every_s, last_scheduled_run_s, expected_runs
 
+    def _get_run_every(self):
+        """
+        Returns the interval between runs of this schedule. The value is unpickled from
+        self.schedule once and kept for as long as self.schedule does not change.
+
+        :return:    interval between runs
+        :rtype:     isodate.Duration or datetime.timedelta
+        """
+        if self._run_every is None or self._run_every[0] != self.schedule:
+            #  self.schedule is cast to a string because python 2.6 sometimes fails to
+            #  deserialize json from unicode.
+            run_every = pickle.loads(str(self.schedule)).run_every
+            object.__setattr__(self, '_run_every', (self.schedule, run_every))
+        return self._run_every[1]
+
+    def _walk_duration(self, duration, first_run_dt, first_run_s, now_s):
+        """
+        Walks the runs of a schedule whose interval is an isodate.Duration, such as a month,
+        whose length depends on the date it starts at, to find the most recent run that should
+        have happened before now.
+
+        The run reached is kept, so the next call continues the walk from there instead of from
+        the first run. The walk starts over if the first run or the schedule changed, or if the
+        clock went back before the run reached.
+
+        :param duration:        interval between runs
+        :type  duration:        isodate.Duration
+        :param first_run_dt:    time of the first run
+        :type  first_run_dt:    datetime.datetime
+        :param first_run_s:     time of the first run as seconds since the epoch
+        :type  first_run_s:     int
+        :param now_s:           current time as seconds since the epoch
+        :type  now_s:           float
+
+        :return:    tuple of the time of the most recent run that should have happened, as
+                    seconds since the epoch, and the number of runs that should have happened
+        :rtype:     tuple
+        """
+        key = (self.first_run, self.schedule)
+        walk = self._duration_walk
+        if walk is not None and walk[0] == key and walk[2] < now_s:
+            current_run, last_scheduled_run_s, expected_runs = walk[1:]
+        else:
+            current_run, last_scheduled_run_s, expected_runs = first_run_dt, first_run_s, 0
+
+        while True:
+            # The interval is determined by the date of the previous run
+            current_interval = duration.totimedelta(start=current_run)
+            next_run = current_run + current_interval
+
+            # If time of this run is less than the current time, keep going
+            next_run_s = calendar.timegm(next_run.utctimetuple())
+            if next_run_s < now_s:
+                expected_runs += 1
+                last_scheduled_run_s += timedelta_seconds(current_interval)
+                current_run = next_run
+            else:
+                break
+
+        object.__setattr__(self, '_duration_walk',
+                           (key, current_run, last_scheduled_run_s, expected_runs))
+        return last_scheduled_run_s, expected_runs
+
     def calculate_next_run(self):
         """
         This algorithm starts by determining when the first call was or should
@@ -344,6 +397,27 @@ class ScheduledCall(Model):
         return dateutils.format_iso8601_utc_timestamp(next_run_s)
 
 
+class DeletedScheduledCall(Model):
+    """
+    Record of a deleted scheduled call. Schedulers read these records to learn which schedules
+    they should drop, without loading every schedule again.
+    """
+    collection_name = 'deleted_scheduled_calls'
+    unique_indices = ()
+    search_indices = ('deleted',)
+
+    def __init__(self, schedule_id, deleted=None):
+        """
+        :param schedule_id: unique ID of the deleted schedule
+        :type  schedule_id: basestring
+        :param deleted:     timestamp for when the schedule was deleted as seconds since the epoch
+        :type  deleted:     float
+        """
+        super(DeletedScheduledCall, self).__init__()
+        self.schedule_id = schedule_id
+        self.deleted = deleted or time.time()
+
+
 class ScheduleEntry(beat.ScheduleEntry):
     def __init__(self, *args, **kwargs):
         """
@@ -378,6 +452,8 @@ class ScheduleEntry(beat.ScheduleEntry):
         if self._scheduled_call.remaining_runs == 0:
             _logger.info('disabling schedule with 0 remaining runs: %s' % self._scheduled_call.id)
             self._scheduled_call.enabled = False
+            # lets schedulers that did not run it learn that it is disabled
+            self._scheduled_call.last_updated = time.time()
         self._scheduled_call.save()
         return self._scheduled_call.as_schedule_entry()
 
@@ -1,9 +1,19 @@
 from datetime import timedelta, datetime
+import logging
+import time
+
+from pymongo import ASCENDING
 
 from pulp.common import dateutils
 from pulp.server.compat import ObjectId
 
 
+# default number of documents removed by each batch of remove_in_batches()
+BATCH_SIZE = 1000
+
+_logger = logging.getLogger(__name__)
+
+
 class ReaperMixin(object):
     """
     A Mixin class providing default reaping functionality.
@@ -13,12 +23,23 @@ class ReaperMixin(object):
     """
 
     @classmethod
-    def reap_old_documents(cls, config_days):
+    def reap_old_documents(cls, config_days, batch_size=BATCH_SIZE, documents_per_second=0,
+                           progress=None):
         """
-        Remove documents from that are older than config_days.
+        Remove documents from that are older than config_days. They are removed in batches, see
+        remove_in_batches().
 
         :param config_days: Remove all records older than the number of days set by config_days.
         :type config_days: float
+        :param batch_size: maximum number of documents removed by each batch
+        :type batch_size: int
+        :param documents_per_second: maximum average number of documents removed per second, or 0
+                                     to remove them as fast as possible
+        :type documents_per_second: float
+        :param progress: called with the number of documents removed so far after each batch
+        :type progress: callable
+        :return: number of documents removed
+        :rtype: int
         """
         age = timedelta(days=config_days)
         # Generate an ObjectId that we can use to know which objects to remove
@@ -32,7 +53,55 @@ class ReaperMixin(object):
             # and just use mongoengine queryset to delete old documents.
             collection = cls._get_collection()
 
-        collection.remove({'_id': {'$lte': expired_object_id}})
+        return remove_in_batches(collection, {'_id': {'$lte': expired_object_id}}, batch_size,
+                                 documents_per_second, progress)
+
+
+def remove_in_batches(collection, spec, batch_size=BATCH_SIZE, documents_per_second=0,
+                      progress=None):
+    """
+    Remove the documents matching spec from a collection a batch at a time, so that a large
+    number of documents is never removed by a single operation.
+
+    Each batch removes at most batch_size documents, which are the range of _id values found by
+    the query for the next batch_size matching documents. The process sleeps between batches,
+    which lets other operations make progress, for long enough that no more than
+    documents_per_second documents are removed per second on average.
+
+    :param collection: collection to remove documents from
+    :type collection: pymongo.collection.Collection
+    :param spec: query matching the documents to remove
+    :type spec: dict
+    :param batch_size: maximum number of documents removed by each batch
+    :type batch_size: int
+    :param documents_per_second: maximum average number of documents removed per second, or 0
+                                 to remove them as fast as possible
+    :type documents_per_second: float
+    :param progress: called with the number of documents removed so far after each batch
+    :type progress: callable
+    :return: number of documents removed
+    :rtype: int
+    """
+    removed = 0
+    started = time.time()
+    while True:
+        cursor = collection.find(spec, fields=['_id']).sort('_id', ASCENDING).limit(batch_size)
+        ids = [document['_id'] for document in cursor]
+        if not ids:
+            break
+        collection.remove({'$and': [spec, {'_id': {'$gte': ids[0], '$lte': ids[-1]}}]})
+        removed += len(ids)
+        _logger.debug('removed %(count)d documents from %(collection)s' %
+                      {'count': removed, 'collection': collection.name})
+        if progress is not None:
+            progress(removed)
+        if len(ids) < batch_size:
+            break
+        delay = 0
+        if documents_per_second > 0:
+            delay = float(removed) / documents_per_second - (time.time() - started)
+        time.sleep(max(delay, 0))
+    return removed
 
 
 def _create_expired_object_id(age):
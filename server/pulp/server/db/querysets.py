@@ -1,6 +1,7 @@
 from mongoengine.queryset import DoesNotExist, QuerySet
 from pymongo import ASCENDING
 
+from pulp.common import dateutils
 from pulp.server import exceptions as pulp_exceptions
 
 
@@ -89,3 +90,19 @@ class RepoQuerySet(CriteriaQuerySet):
             return self.get(repo_id=repo_id)
         except DoesNotExist:
             raise pulp_exceptions.MissingResource(repository=repo_id)
+
+
+class TaskStatusQuerySet(CriteriaQuerySet):
+    """
+    Custom queryset for task statuses.
+    """
+
+    def update(self, *args, **kwargs):
+        """
+        Update the matching task statuses, recording the time of the update as the time they
+        were last updated unless the caller sets it explicitly.
+
+        :return: the result of QuerySet.update
+        """
+        kwargs.setdefault('set__last_updated', dateutils.now_utc_timestamp())
+        return super(TaskStatusQuerySet, self).update(*args, **kwargs)
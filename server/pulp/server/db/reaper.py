@@ -5,7 +5,8 @@ from celery import task
 
 from pulp.common.tags import action_tag
 from pulp.server import config as pulp_config
-from pulp.server.async.tasks import Task
+from pulp.server.async.status_writer import status_writer
+from pulp.server.async.tasks import get_current_task_id, Task
 from pulp.server.db import model
 from pulp.server.db.model import celery_result, consumer, repo_group, repository
 
@@ -42,11 +43,33 @@ def reap_expired_documents():
     For each collection in _COLLECTION_TIMEDELTAS, call the class method reap_old_documents().
 
     This method gets the number of days from the pulp_config, and calls reap_old_documents with the
-    number of days as the argument.
+    number of days as the argument. Documents are removed in batches of batch_size documents, at
+    no more than documents_per_second documents per second, both also read from the pulp_config.
+    The number of documents removed from each collection so far is reported as the progress of
+    the task.
+
+    :return: number of documents removed, keyed by the config keyname of each collection
+    :rtype:  dict
     """
     _logger.info(_('The reaper task is cleaning out old documents from the database.'))
+    batch_size = pulp_config.config.getint('data_reaping', 'batch_size')
+    documents_per_second = pulp_config.config.getfloat('data_reaping', 'documents_per_second')
+    task_id = get_current_task_id()
+    report = {}
+
     for model_class, config_name in _COLLECTION_TIMEDELTAS.items():
         # Get the config for how old documents should be before they are reaped.
         config_days = pulp_config.config.getfloat('data_reaping', config_name)
-        model_class.reap_old_documents(config_days)
+
+        def progress(removed, config_name=config_name):
+            report[config_name] = removed
+            if task_id:
+                status_writer.update(task_id, progress_report={'reaper': dict(report)})
+
+        report[config_name] = model_class.reap_old_documents(
+            config_days, batch_size=batch_size, documents_per_second=documents_per_second,
+            progress=progress)
+        _logger.info(_('The reaper task removed %(count)d documents for %(name)s.') %
+                     {'count': report[config_name], 'name': config_name})
     _logger.info(_('The reaper task has completed.'))
+    return report
@@ -4,6 +4,7 @@ import logging
 import oauth2
 
 from pulp.server.auth import ldap_connection
+from pulp.server.auth.cache import auth_cache
 from pulp.server.config import config
 from pulp.server.db.model.consumer import Consumer
 from pulp.server.exceptions import PulpException
@@ -16,7 +17,33 @@ _logger = logging.getLogger(__name__)
 class AuthenticationManager(object):
     """
     Manages user and consumer authentication in pulp.
+
+    While a request is being authorized, successful verifications of passwords and certificates
+    are kept in the auth cache, so the same credentials are not verified again on every request.
     """
+    def _cached(self, verify, *credentials):
+        """
+        Return the result of an earlier successful verification of the given credentials that
+        is still in the auth cache, or verify them.
+
+        :type verify: callable
+        :param verify: verifies the credentials, returning None if they are not valid
+
+        :type credentials: str or None
+        :param credentials: values identifying the credentials
+
+        :return: the value returned by verify
+        """
+        if not auth_cache.active:
+            return verify()
+        key = auth_cache.credential_key(*credentials)
+        result = auth_cache.credentials.get(key)
+        if result is None:
+            result = verify()
+            if result is not None:
+                auth_cache.set(auth_cache.credentials, key, result)
+        return result
+
     def _check_username_password_local(self, username, password=None):
         """
         Check a username and password against the local database.
@@ -92,12 +119,15 @@ class AuthenticationManager(object):
         :rtype: str or None
         :return: user login corresponding to the credentials
         """
-        user = self._check_username_password_local(username, password)
-        if user is None and config.getboolean('ldap', 'enabled'):
-            user = self._check_username_password_ldap(username, password)
-        if user is not None:
-            return user['login']
-        return None
+        def verify():
+            user = self._check_username_password_local(username, password)
+            if user is None and config.getboolean('ldap', 'enabled'):
+                user = self._check_username_password_ldap(username, password)
+            if user is not None:
+                return user['login']
+            return None
+
+        return self._cached(verify, 'password', username, password)
 
     def check_user_cert(self, cert_pem):
         """
@@ -107,6 +137,18 @@ class AuthenticationManager(object):
         :type cert_pem: str
         :param cert_pem: pem encoded ssl certificate
 
+        :rtype: str or None
+        :return: user login corresponding to the credentials
+        """
+        return self._cached(lambda: self._check_user_cert(cert_pem), 'user_cert', cert_pem)
+
+    def _check_user_cert(self, cert_pem):
+        """
+        Check a client ssl certificate without using the auth cache.
+
+        :type cert_pem: str
+        :param cert_pem: pem encoded ssl certificate
+
         :rtype: str or None
         :return: user login corresponding to the credentials
         """
@@ -138,6 +180,19 @@ class AuthenticationManager(object):
         :type cert_pem: str
         :param cert_pem: pem encoded ssl certificate
 
+        :rtype: str or None
+        :return: id of a consumer corresponding to the credentials
+        """
+        return self._cached(lambda: self._check_consumer_cert(cert_pem), 'consumer_cert',
+                            cert_pem)
+
+    def _check_consumer_cert(self, cert_pem):
+        """
+        Check a consumer ssl certificate without using the auth cache.
+
+        :type cert_pem: str
+        :param cert_pem: pem encoded ssl certificate
+
         :rtype: str or None
         :return: id of a consumer corresponding to the credentials
         """
@@ -8,6 +8,7 @@ from gettext import gettext as _
 from celery import task
 
 from pulp.server.async.tasks import Task
+from pulp.server.auth.cache import auth_cache
 from pulp.server.auth.authorization import CREATE, READ, UPDATE, DELETE, EXECUTE, \
     _operations_not_granted_by_roles
 from pulp.server.db.model.auth import Role, User
@@ -261,6 +262,7 @@ class RoleManager(object):
 
         user['roles'].append(role_id)
         User.get_collection().save(user, safe=True)
+        auth_cache.invalidate()
 
         for item in role['permissions']:
             factory.permission_manager().grant(item['resource'], login,
@@ -297,6 +299,7 @@ class RoleManager(object):
 
         user['roles'].remove(role_id)
         User.get_collection().save(user, safe=True)
+        auth_cache.invalidate()
 
         for item in role['permissions']:
             other_roles = factory.role_query_manager().get_other_roles(role, user['roles'])
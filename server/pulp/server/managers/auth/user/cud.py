@@ -10,6 +10,7 @@ from celery import task
 
 from pulp.server import config
 from pulp.server.async.tasks import Task
+from pulp.server.auth.cache import auth_cache
 from pulp.server.db.model.auth import User
 from pulp.server.exceptions import (PulpDataException, DuplicateResource, InvalidValue,
                                     MissingResource)
@@ -74,6 +75,7 @@ class UserManager(object):
         # Creation
         create_me = User(login=login, password=hashed_password, name=name, roles=roles)
         User.get_collection().save(create_me, safe=True)
+        auth_cache.invalidate()
 
         # Grant permissions
         permission_manager = factory.permission_manager()
@@ -147,6 +149,7 @@ class UserManager(object):
             raise InvalidValue(delta.keys())
 
         User.get_collection().save(user, safe=True)
+        auth_cache.invalidate()
 
         # Retrieve the user to return the SON object
         updated = User.get_collection().find_one({'login': login})
@@ -184,6 +187,7 @@ class UserManager(object):
         permission_manager.revoke_all_permissions_from_user(login)
 
         User.get_collection().remove({'login': login}, safe=True)
+        auth_cache.invalidate()
 
     def ensure_admin(self):
         """
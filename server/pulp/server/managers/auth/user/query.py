@@ -4,7 +4,8 @@ Contains users query classes
 
 from gettext import gettext as _
 
-from pulp.server.db.model.auth import User, Permission, Role
+from pulp.server.auth.cache import auth_cache
+from pulp.server.db.model.auth import User, Role
 from pulp.server.exceptions import PulpDataException, MissingResource
 from pulp.server.managers import factory
 from pulp.server.managers.auth.role.cud import SUPER_USER_ROLE
@@ -87,11 +88,18 @@ class UserQueryManager(object):
         @rtype: bool
         @return: True if the user is a super user, False otherwise
         """
+        if auth_cache.active:
+            is_superuser = auth_cache.permissions.get(login)
+            if is_superuser is not None:
+                return is_superuser
+
         user = User.get_collection().find_one({'login': login})
         if user is None:
             raise MissingResource(login)
 
-        return SUPER_USER_ROLE in user['roles']
+        is_superuser = SUPER_USER_ROLE in user['roles']
+        auth_cache.set(auth_cache.permissions, login, is_superuser)
+        return is_superuser
 
     def is_authorized(self, resource, login, operation):
         """
@@ -113,20 +121,42 @@ class UserQueryManager(object):
         if self.is_superuser(login):
             return True
 
-        permission_query_manager = factory.permission_query_manager()
-
         parts = [p for p in resource.split('/') if p]
         while parts:
             current_resource = '/%s/' % '/'.join(parts)
-            permission = permission_query_manager.find_by_resource(current_resource)
-            if permission is not None:
-                if operation in permission_query_manager.find_user_permission(permission, login):
-                    return True
+            if operation in self._granted_operations(current_resource, login):
+                return True
             parts = parts[:-1]
 
-        permission = Permission.get_collection().find_one({'resource': '/'})
-        return (permission is not None and
-                operation in permission_query_manager.find_user_permission(permission, login))
+        return operation in self._granted_operations('/', login)
+
+    def _granted_operations(self, resource, login):
+        """
+        Return the operations a user was granted on a resource. While a request is being
+        authorized, the operations are kept in the auth cache.
+
+        @type resource: str
+        @param resource: pulp resource path
+
+        @type login: str
+        @param login: login of the user
+
+        @rtype: list of int
+        @return: operations granted on exactly the given resource
+        """
+        if auth_cache.active:
+            operations = auth_cache.permissions.get((login, resource))
+            if operations is not None:
+                return operations
+
+        permission_query_manager = factory.permission_query_manager()
+        permission = permission_query_manager.find_by_resource(resource)
+        operations = []
+        if permission is not None:
+            operations = list(permission_query_manager.find_user_permission(permission, login))
+
+        auth_cache.set(auth_cache.permissions, (login, resource), operations)
+        return operations
 
     def is_last_super_user(self, login):
         """
@@ -7,11 +7,14 @@ from logging import getLogger
 
 from celery import task
 
+from pulp.common import tags
 from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler
-from pulp.server.async.tasks import Task
+from pulp.plugins.util import misc as plugin_misc
+from pulp.server import config as pulp_config
+from pulp.server.async.tasks import Task, TaskResult
 from pulp.server.db import model
 from pulp.server.db.model.consumer import Bind, RepoProfileApplicability, UnitProfile
 from pulp.server.db.model.criteria import Criteria
@@ -21,6 +24,9 @@ from pulp.server.managers.consumer.query import ConsumerQueryManager
 
 _logger = getLogger(__name__)
 
+# Number of RepoProfileApplicability documents regenerated and written back per bulk operation
+REGENERATION_BATCH_SIZE = 100
+
 
 class ApplicabilityRegenerationManager(object):
     @staticmethod
@@ -118,29 +124,187 @@ class ApplicabilityRegenerationManager(object):
         repo_criteria.fields = ['id']
         repo_ids = [r.repo_id for r in model.Repository.objects.find_by_criteria(repo_criteria)]
 
+        shard_size = pulp_config.config.getint('applicability', 'regeneration_shard_size')
+        if shard_size > 0:
+            return ApplicabilityRegenerationManager._dispatch_regeneration_shards(repo_ids,
+                                                                                 shard_size)
+
+        # Profilers and their call configurations are shared by every repository
+        profilers = {}
         for repo_id in repo_ids:
-            # Find all existing applicabilities for given repo_id. Setting batch size of 5 ensures
-            # the MongoDB cursor does not time out. See https://pulp.plan.io/issues/998#note-6 for
-            # more details.
-            existing_applicabilities = RepoProfileApplicability.get_collection().find(
-                {'repo_id': repo_id}).batch_size(5)
+            ApplicabilityRegenerationManager._regenerate_repo_applicability(repo_id, profilers)
+
+    @staticmethod
+    def regenerate_applicability_for_shard(shard):
+        """
+        Regenerate and save applicability data for a shard of the (repo_id, profile_hash) work
+        set. Shards are created and dispatched by regenerate_applicability_for_repos when a
+        regeneration_shard_size is configured.
+
+        :param shard: list of [repo_id, profile_hash] pairs to regenerate
+        :type  shard: list
+        """
+        profile_hashes_by_repo = {}
+        for repo_id, profile_hash in shard:
+            profile_hashes_by_repo.setdefault(repo_id, []).append(profile_hash)
+
+        profilers = {}
+        for repo_id, profile_hashes in profile_hashes_by_repo.items():
+            ApplicabilityRegenerationManager._regenerate_repo_applicability(
+                repo_id, profilers, profile_hashes)
+
+    @staticmethod
+    def _dispatch_regeneration_shards(repo_ids, shard_size):
+        """
+        Split the (repo_id, profile_hash) pairs of the existing applicability data for the given
+        repositories into shards and dispatch a regenerate_applicability_for_shard task for each
+        of them, so that the work is spread across all available workers.
+
+        :param repo_ids:   ids of the repositories whose applicability data should be regenerated
+        :type  repo_ids:   list
+        :param shard_size: maximum number of (repo_id, profile_hash) pairs in each shard
+        :type  shard_size: int
+        :return: result whose spawned_tasks reference every dispatched shard
+        :rtype:  pulp.server.async.tasks.TaskResult
+        """
+        cursor = RepoProfileApplicability.get_collection().find(
+            {'repo_id': {'$in': repo_ids}}, fields=['repo_id', 'profile_hash'])
+        cursor.batch_size(REGENERATION_BATCH_SIZE)
+        work_set = ([a['repo_id'], a['profile_hash']] for a in cursor)
+
+        task_tags = [tags.action_tag('content_applicability_regeneration')]
+        spawned_tasks = []
+        for shard in plugin_misc.paginate(work_set, shard_size):
+            async_result = regenerate_applicability_for_shard.apply_async((list(shard),),
+                                                                          tags=task_tags)
+            spawned_tasks.append(async_result)
+        return TaskResult(spawned_tasks=spawned_tasks)
+
+    @staticmethod
+    def _regenerate_repo_applicability(repo_id, profilers, profile_hashes=None):
+        """
+        Regenerate and save existing applicability data for a single repository.
+
+        The existing applicability documents are processed in batches of REGENERATION_BATCH_SIZE.
+        For each batch the unit profiles are looked up with a single query, the profiles are
+        grouped by content type so each profiler is driven with one configuration, and the
+        results are written back with a single unordered bulk operation.
+
+        :param repo_id:        id of the repository whose applicability data should be
+                               regenerated
+        :type  repo_id:        basestring
+        :param profilers:      cache of profilers keyed by content type, as populated by
+                               _applicability_profiler
+        :type  profilers:      dict
+        :param profile_hashes: if specified, only the applicability data of these profile hashes
+                               is regenerated
+        :type  profile_hashes: list or None
+        """
+        repo_content_types = set(
+            ApplicabilityRegenerationManager._get_existing_repo_content_types(repo_id))
+        if not repo_content_types:
+            return
+
+        collection = RepoProfileApplicability.get_collection()
+        # Only the ids are read up front so that no cursor is held open while the profilers run.
+        # See https://pulp.plan.io/issues/998#note-6 for more details on cursor timeouts.
+        query = {'repo_id': repo_id}
+        if profile_hashes is not None:
+            query['profile_hash'] = {'$in': profile_hashes}
+        cursor = collection.find(query, fields=['_id'])
+        cursor.batch_size(REGENERATION_BATCH_SIZE)
+        applicability_ids = [applicability['_id'] for applicability in cursor]
+
+        profiler_conduit = ProfilerConduit()
+        for id_batch in plugin_misc.paginate(applicability_ids, REGENERATION_BATCH_SIZE):
+            existing_applicabilities = [
+                RepoProfileApplicability(**dict(applicability))
+                for applicability in collection.find({'_id': {'$in': list(id_batch)}})]
+
+            # Resolve the content type of every profile hash in the batch with one query
+            profile_hashes = [a.profile_hash for a in existing_applicabilities]
+            profile_content_types = {}
+            unit_profiles = UnitProfile.get_collection().find(
+                {'profile_hash': {'$in': profile_hashes}}, fields=['profile_hash', 'content_type'])
+            for unit_profile in unit_profiles:
+                profile_content_types[unit_profile['profile_hash']] = unit_profile['content_type']
+
+            # Group the profiles by content type so each profiler is driven with one
+            # configuration for the whole group
+            profiles_by_type = {}
             for existing_applicability in existing_applicabilities:
-                # Convert cursor to RepoProfileApplicability object
-                existing_applicability = RepoProfileApplicability(**dict(existing_applicability))
-                profile_hash = existing_applicability['profile_hash']
-                unit_profile = UnitProfile.get_collection().find_one({'profile_hash': profile_hash},
-                                                                     fields=['id', 'content_type'])
-                if unit_profile is None:
-                    # Unit profiles change whenever packages are installed or removed on consumers,
-                    # and it is possible that existing_applicability references a UnitProfile
-                    # that no longer exists. This is harmless, as Pulp has a monthly cleanup task
-                    # that will identify these dangling references and remove them.
+                content_type = profile_content_types.get(existing_applicability.profile_hash)
+                if content_type is None:
+                    # Unit profiles change whenever packages are installed or removed on
+                    # consumers, and it is possible that existing_applicability references a
+                    # UnitProfile that no longer exists. This is harmless, as Pulp has a monthly
+                    # cleanup task that will identify these dangling references and remove them.
                     continue
+                profiles_by_type.setdefault(content_type, []).append(existing_applicability)
+
+            bulk_operation = collection.initialize_unordered_bulk_op()
+            update_count = 0
+            for content_type, applicabilities in profiles_by_type.items():
+                profiler = ApplicabilityRegenerationManager._applicability_profiler(
+                    content_type, repo_content_types, profilers)
+                if profiler is None:
+                    continue
+                profiler_instance, call_config = profiler
+                for existing_applicability in applicabilities:
+                    try:
+                        applicability = profiler_instance.calculate_applicable_units(
+                            existing_applicability.profile, repo_id, call_config,
+                            profiler_conduit)
+                    except NotImplementedError:
+                        msg = "Profiler for content type [%s] does not support applicability"
+                        _logger.debug(msg % content_type)
+                        profilers[content_type] = None
+                        break
+                    bulk_operation.find({'_id': existing_applicability._id}).update_one(
+                        {'$set': {'applicability': applicability}})
+                    update_count += 1
+
+            if update_count:
+                bulk_operation.execute()
 
-                # Regenerate applicability data for given unit_profile and repo id
-                ApplicabilityRegenerationManager.regenerate_applicability(
-                    profile_hash, unit_profile['content_type'], unit_profile['id'], repo_id,
-                    existing_applicability)
+    @staticmethod
+    def _applicability_profiler(content_type, repo_content_types, profilers):
+        """
+        Return the profiler and call configuration used to calculate applicability of profiles
+        of the given content type, loading them into the profilers cache on first use.
+
+        :param content_type:       profile (unit) type ID
+        :type  content_type:       str
+        :param repo_content_types: content type ids with a unit count greater than zero in the
+                                   repository being regenerated
+        :type  repo_content_types: set
+        :param profilers:          cache of (profiler, call config, handled types) keyed by
+                                   content type; None marks a profiler that does not support
+                                   applicability
+        :type  profilers:          dict
+        :return: (profiler, call config), or None if applicability should not be calculated
+        :rtype:  tuple or None
+        """
+        if content_type not in profilers:
+            profiler, profiler_cfg = ApplicabilityRegenerationManager._profiler(content_type)
+            if profiler.calculate_applicable_units == Profiler.calculate_applicable_units:
+                # If base class calculate_applicable_units method is called,
+                # skip applicability regeneration
+                profilers[content_type] = None
+            else:
+                call_config = PluginCallConfiguration(plugin_config=profiler_cfg,
+                                                      repo_plugin_config=None)
+                profilers[content_type] = (profiler, call_config,
+                                           set(profiler.metadata()['types']))
+
+        cached = profilers[content_type]
+        if cached is None:
+            return None
+        profiler, call_config, profiler_types = cached
+        # Applicability is only regenerated when the repo contains a type the profiler handles
+        if not repo_content_types & profiler_types:
+            return None
+        return profiler, call_config
 
     @staticmethod
     def regenerate_applicability(profile_hash, content_type, profile_id,
@@ -276,6 +440,9 @@ regenerate_applicability_for_consumers = task(
 regenerate_applicability_for_repos = task(
     ApplicabilityRegenerationManager.regenerate_applicability_for_repos, base=Task,
     ignore_result=True)
+regenerate_applicability_for_shard = task(
+    ApplicabilityRegenerationManager.regenerate_applicability_for_shard, base=Task,
+    ignore_result=True)
 
 
 class DoesNotExist(Exception):
@@ -10,6 +10,7 @@ import pymongo
 from pulp.common import dateutils
 from pulp.server import config
 from pulp.server.db.model.consumer import Consumer, ConsumerHistoryEvent
+from pulp.server.db.model.reaper_base import remove_in_batches
 from pulp.server.exceptions import InvalidValue, MissingResource
 from pulp.server.managers import factory as managers_factory
 
@@ -186,15 +187,21 @@ class ConsumerHistoryManager(object):
     def cull_history(self, lifetime):
         '''
         Deletes all consumer history entries that are older than the given lifetime.
+        Entries are deleted in batches, at the rate configured for the reaper.
 
         @param lifetime: length in days; history entries older than this many days old
                          are deleted in this call
         @type  lifetime: L{datetime.timedelta}
+
+        @return: number of entries deleted
+        @rtype:  int
         '''
         now = datetime.datetime.now(dateutils.local_tz())
         limit = dateutils.format_iso8601_datetime(now - lifetime)
         spec = {'timestamp': {'$lt': limit}}
-        self.collection.remove(spec, safe=False)
+        return remove_in_batches(ConsumerHistoryEvent.get_collection(), spec,
+                                 config.config.getint('data_reaping', 'batch_size'),
+                                 config.config.getfloat('data_reaping', 'documents_per_second'))
 
     def _get_lifetime(self):
         '''
@@ -3,11 +3,12 @@ Contains profile management classes
 """
 from celery import task
 
+from pulp.common import profile as profile_utils
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler
 from pulp.server.async.tasks import Task
 from pulp.server.db.model.consumer import UnitProfile
-from pulp.server.exceptions import MissingResource, MissingValue
+from pulp.server.exceptions import ConflictingOperation, InvalidValue, MissingResource, MissingValue
 from pulp.server.managers import factory
 
 
@@ -33,7 +34,8 @@ class ProfileManager(object):
     def update(consumer_id, content_type, profile):
         """
         Update a unit profile.
-        Created if not already exists.
+        Created if not already exists. If the profile has not changed, neither
+        it nor the consumer's history is written.
 
         :param consumer_id:  uniquely identifies the consumer.
         :type  consumer_id:  str
@@ -52,15 +54,26 @@ class ProfileManager(object):
         # Allow the profiler a chance to update the profile before we save it
         if profile is None:
             raise MissingValue('profile')
+        reported_hash = UnitProfile.calculate_hash(profile)
         profile = profiler.update_profile(consumer, content_type, profile, config)
+        profile_hash = UnitProfile.calculate_hash(profile)
+        collection = UnitProfile.get_collection()
         try:
             p = ProfileManager.get_profile(consumer_id, content_type)
+        except MissingResource:
+            p = UnitProfile(consumer_id, content_type, profile, profile_hash, reported_hash)
+        else:
+            if p['profile_hash'] == profile_hash:
+                # The profile is unchanged, though the consumer may have reported it differently
+                if p.get('reported_hash') != reported_hash:
+                    p['reported_hash'] = reported_hash
+                    collection.update({'_id': p['_id']},
+                                      {'$set': {'reported_hash': reported_hash}}, safe=True)
+                return p
             p['profile'] = profile
             # We store the profile's hash anytime the profile gets altered
-            p['profile_hash'] = UnitProfile.calculate_hash(profile)
-        except MissingResource:
-            p = UnitProfile(consumer_id, content_type, profile)
-        collection = UnitProfile.get_collection()
+            p['profile_hash'] = profile_hash
+            p['reported_hash'] = reported_hash
         collection.save(p, safe=True)
         history_manager = factory.consumer_history_manager()
         history_manager.record_event(
@@ -68,6 +81,58 @@ class ProfileManager(object):
             'unit_profile_changed', {'profile_content_type': content_type})
         return p
 
+    @staticmethod
+    def is_unchanged(consumer_id, content_type, reported_hash):
+        """
+        Determine whether the profile a consumer last reported has the given
+        hash, in which case the consumer does not need to report it again.
+
+        :param consumer_id:   uniquely identifies the consumer.
+        :type  consumer_id:   str
+        :param content_type:  The profile (content) type ID.
+        :type  content_type:  str
+        :param reported_hash: The hash of the consumer's current profile.
+        :type  reported_hash: str
+        :return:              True if the profile is unchanged
+        :rtype:               bool
+        :raise MissingResource: when the consumer does not exist.
+        """
+        factory.consumer_manager().get_consumer(consumer_id)
+        try:
+            p = ProfileManager.get_profile(consumer_id, content_type)
+        except MissingResource:
+            return False
+        return p.get('reported_hash', p['profile_hash']) == reported_hash
+
+    @staticmethod
+    def update_from_delta(consumer_id, content_type, base_hash, delta):
+        """
+        Update a unit profile with the changes made to the profile the
+        consumer last reported. The delta can only be applied if the profile
+        was stored as reported, without being altered by the profiler.
+
+        :param consumer_id:  uniquely identifies the consumer.
+        :type  consumer_id:  str
+        :param content_type: The profile (content) type ID.
+        :type  content_type: str
+        :param base_hash:    The hash of the profile the delta was made against.
+        :type  base_hash:    str
+        :param delta:        The delta, as encoded by pulp.common.profile.encode_delta().
+        :type  delta:        str
+        :raise MissingResource: when the profile does not exist.
+        :raise ConflictingOperation: when the stored profile is not the one the delta was made
+                                     against; the whole profile must be reported instead.
+        :raise InvalidValue: when the delta cannot be decoded or applied.
+        """
+        p = ProfileManager.get_profile(consumer_id, content_type)
+        if p.get('reported_hash') != base_hash or p['profile_hash'] != base_hash:
+            raise ConflictingOperation([{'content_type': content_type, 'base_hash': base_hash}])
+        try:
+            profile = profile_utils.apply_delta(p['profile'], profile_utils.decode_delta(delta))
+        except (KeyError, TypeError, ValueError):
+            raise InvalidValue('delta')
+        return ProfileManager.update(consumer_id, content_type, profile)
+
     @staticmethod
     def delete(consumer_id, content_type):
         """
@@ -9,10 +9,13 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from collections import OrderedDict
 from logging import getLogger
+from threading import RLock
 
 from pymongo import ASCENDING
 
+from pulp.plugins.util.misc import paginate
 from pulp.server.db.model.content import ContentCatalog
 
 
@@ -24,6 +27,108 @@ log = getLogger(__name__)
 # in the catalog after it has expired.
 GRACE_PERIOD = 3600  # 1 hour.
 
+# The maximum number of entries written by a single bulk insert.
+BULK_INSERT_SIZE = 1000
+
+# The maximum number of locators held in the locator cache.
+LOCATOR_CACHE_SIZE = 100000
+
+# The maximum time in seconds a find() result is held in the locator cache.
+# Bounds how long entries added by other processes can go unnoticed.
+LOCATOR_CACHE_MAX_AGE = 300  # 5 minutes.
+
+
+class LocatorCache(object):
+    """
+    A bounded, least recently used cache of catalog find() results keyed by locator.
+    Each result is held until the earliest expiration of the entries it contains
+    or the cache max_age, whichever comes first.
+    The cache is shared by all threads in the process.
+    :ivar capacity: The maximum number of cached locators.
+    :type capacity: int
+    :ivar max_age: The maximum time in seconds a result is cached.
+    :type max_age: int
+    :ivar hits: The number of lookups satisfied by the cache.
+    :type hits: int
+    :ivar misses: The number of lookups not satisfied by the cache.
+    :type misses: int
+    """
+
+    def __init__(self, capacity=LOCATOR_CACHE_SIZE, max_age=LOCATOR_CACHE_MAX_AGE):
+        """
+        :param capacity: The maximum number of cached locators.
+        :type capacity: int
+        :param max_age: The maximum time in seconds a result is cached.
+        :type max_age: int
+        """
+        self.capacity = capacity
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._mutex = RLock()
+
+    def get(self, locator):
+        """
+        Get the cached find() result for the specified locator.
+        :param locator: A catalog locator.
+        :type locator: str
+        :return: The list of entries or None when not cached.
+        :rtype: list
+        """
+        now = ContentCatalog.get_expiration(0)
+        with self._mutex:
+            try:
+                valid_until, entries = self._entries.pop(locator)
+            except KeyError:
+                self.misses += 1
+                return None
+            if valid_until < now:
+                self.misses += 1
+                return None
+            # re-inserted as the most recently used
+            self._entries[locator] = (valid_until, entries)
+            self.hits += 1
+            return list(entries)
+
+    def put(self, locator, entries):
+        """
+        Cache the find() result for the specified locator.
+        The least recently used locators are evicted when the capacity is exceeded.
+        :param locator: A catalog locator.
+        :type locator: str
+        :param entries: The list of matching entries.
+        :type entries: list
+        """
+        valid_until = ContentCatalog.get_expiration(self.max_age)
+        for entry in entries:
+            valid_until = min(valid_until, entry['expiration'])
+        with self._mutex:
+            self._entries.pop(locator, None)
+            self._entries[locator] = (valid_until, list(entries))
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Invalidate all cached results.
+        """
+        with self._mutex:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache statistics.
+        :return: A dictionary of: hits, misses and size.
+        :rtype: dict
+        """
+        with self._mutex:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+
+# The locator cache used by the ContentCatalogManager.
+locator_cache = LocatorCache()
+
 
 class ContentCatalogManager(object):
     """
@@ -40,6 +145,8 @@ class ContentCatalogManager(object):
        - supporting find() operations on a catalog containing multiple entries
          matching the same locator.  In these cases, only the newest entry is
          included for each source in the result set.
+     - find() results are cached in-process by locator.  The cache is invalidated
+       whenever this process adds, deletes or purges entries.
     """
 
     def add_entry(self, source_id, expires, type_id, unit_key, url):
@@ -59,6 +166,32 @@ class ContentCatalogManager(object):
         collection = ContentCatalog.get_collection()
         entry = ContentCatalog(source_id, expires, type_id, unit_key, url)
         collection.insert(entry, safe=True)
+        locator_cache.clear()
+
+    def add_entries(self, source_id, expires, entries):
+        """
+        Add entries to the content catalog.
+        The entries are written using unordered bulk inserts of
+        up to BULK_INSERT_SIZE entries each.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param expires: The entry expiration in seconds.
+        :type expires: int
+        :param entries: An iterable of: (type_id, unit_key, url).
+        :type entries: iterable
+        :return: The number of entries added.
+        :rtype: int
+        """
+        added = 0
+        collection = ContentCatalog.get_collection()
+        for page in paginate(entries, BULK_INSERT_SIZE):
+            bulk = collection.initialize_unordered_bulk_op()
+            for type_id, unit_key, url in page:
+                bulk.insert(ContentCatalog(source_id, expires, type_id, unit_key, url))
+            bulk.execute()
+            added += len(page)
+        locator_cache.clear()
+        return added
 
     def delete_entry(self, source_id, type_id, unit_key):
         """
@@ -74,6 +207,7 @@ class ContentCatalogManager(object):
         locator = ContentCatalog.get_locator(type_id, unit_key)
         query = {'source_id': source_id, 'locator': locator}
         collection.remove(query, safe=True)
+        locator_cache.clear()
 
     def purge(self, source_id):
         """
@@ -87,6 +221,7 @@ class ContentCatalogManager(object):
         collection = ContentCatalog.get_collection()
         query = {'source_id': source_id}
         result = collection.remove(query, safe=True)
+        locator_cache.clear()
         return result['n']
 
     def purge_expired(self, grace_period=GRACE_PERIOD):
@@ -105,6 +240,7 @@ class ContentCatalogManager(object):
         timestamp = now - grace_period
         query = {'expiration': {'$lt': timestamp}}
         result = collection.remove(query, safe=True)
+        locator_cache.clear()
         return result['n']
 
     def purge_orphans(self, valid_ids):
@@ -137,8 +273,11 @@ class ContentCatalogManager(object):
         :return: A list of matching entries.
         :rtype: list
         """
-        collection = ContentCatalog.get_collection()
         locator = ContentCatalog.get_locator(type_id, unit_key)
+        entries = locator_cache.get(locator)
+        if entries is not None:
+            return entries
+        collection = ContentCatalog.get_collection()
         query = {
             'locator': locator,
             'expiration': {'$gte': ContentCatalog.get_expiration(0)}
@@ -146,7 +285,52 @@ class ContentCatalogManager(object):
         newest_by_source = {}
         for entry in collection.find(query, sort=[('_id', ASCENDING)]):
             newest_by_source[entry['source_id']] = entry
-        return newest_by_source.values()
+        entries = newest_by_source.values()
+        locator_cache.put(locator, entries)
+        return entries
+
+    def find_many(self, type_id, unit_keys):
+        """
+        Find entries in the content catalog for each of the specified unit keys
+        using a single query.  As with find(), only the newest entry for each
+        source is included for each unit key.
+        :param type_id: The unit type ID.
+        :type type_id: str
+        :param unit_keys: A list of unit keys.
+        :type unit_keys: list
+        :return: A list of matching entry lists, in the same order as unit_keys.
+        :rtype: list
+        """
+        locators = [ContentCatalog.get_locator(type_id, unit_key) for unit_key in unit_keys]
+        found = {}
+        for locator in locators:
+            entries = locator_cache.get(locator)
+            if entries is not None:
+                found[locator] = entries
+        missing = list(set(locators) - set(found))
+        if missing:
+            collection = ContentCatalog.get_collection()
+            query = {
+                'locator': {'$in': missing},
+                'expiration': {'$gte': ContentCatalog.get_expiration(0)}
+            }
+            newest_by_locator = dict((locator, {}) for locator in missing)
+            for entry in collection.find(query, sort=[('_id', ASCENDING)]):
+                newest_by_locator[entry['locator']][entry['source_id']] = entry
+            for locator, newest_by_source in newest_by_locator.items():
+                entries = newest_by_source.values()
+                locator_cache.put(locator, entries)
+                found[locator] = entries
+        return [list(found[locator]) for locator in locators]
+
+    @staticmethod
+    def cache_stats():
+        """
+        Get the locator cache statistics.
+        :return: A dictionary of: hits, misses and size.
+        :rtype: dict
+        """
+        return locator_cache.stats()
 
     def has_entries(self, source_id):
         """
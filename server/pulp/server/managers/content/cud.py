@@ -1,10 +1,16 @@
 import uuid
 
+from pymongo.errors import BulkWriteError
+
 from pulp.common import dateutils
 from pulp.plugins.types import database as content_types_db
 from pulp.server.exceptions import InvalidValue
 
 
+# Mongo error code for a duplicate key on insert
+DUPLICATE_KEY_ERROR = 11000
+
+
 class ContentManager(object):
     """
     Create, update and delete operations for content in pulp.
@@ -49,6 +55,67 @@ class ContentManager(object):
         collection = content_types_db.type_units_collection(content_type)
         collection.update({'_id': unit_id}, {'$set': unit_metadata_delta}, safe=True)
 
+    def add_content_units(self, content_type, units_metadata):
+        """
+        Add many content units of one type with a single unordered bulk insert.
+
+        A unit that can not be added because a unit with the same unit key already
+        exists is reported as such rather than failing the whole operation.
+        :param content_type: unique id of content collection
+        :type content_type: str
+        :param units_metadata: content unit metadata of each unit
+        :type units_metadata: list of dict
+        :return: the generated unit ids, in the order of units_metadata, with None in
+                 place of each unit that already exists
+        :rtype: list
+        """
+        collection = content_types_db.type_units_collection(content_type)
+        last_updated = dateutils.now_utc_timestamp()
+        bulk = collection.initialize_unordered_bulk_op()
+        unit_ids = []
+        for unit_metadata in units_metadata:
+            unit_doc = {
+                '_id': str(uuid.uuid4()),
+                '_content_type_id': content_type,
+                '_last_updated': last_updated
+            }
+            unit_doc.update(unit_metadata)
+            bulk.insert(unit_doc)
+            unit_ids.append(unit_doc['_id'])
+        if not unit_ids:
+            return unit_ids
+        try:
+            bulk.execute()
+        except BulkWriteError, e:
+            duplicates = [error for error in e.details.get('writeErrors', [])
+                          if error.get('code') == DUPLICATE_KEY_ERROR]
+            if len(duplicates) != len(e.details.get('writeErrors', [])) or \
+                    e.details.get('writeConcernErrors'):
+                raise
+            for error in duplicates:
+                unit_ids[error['index']] = None
+        return unit_ids
+
+    def update_content_units(self, content_type, units_metadata_deltas):
+        """
+        Update the stored metadata of many content units of one type with a single
+        unordered bulk update.
+        :param content_type: unique id of content collection
+        :type content_type: str
+        :param units_metadata_deltas: unit id and the metadata fields that have changed
+                                      of each unit
+        :type units_metadata_deltas: list of (str, dict)
+        """
+        if not units_metadata_deltas:
+            return
+        collection = content_types_db.type_units_collection(content_type)
+        last_updated = dateutils.now_utc_timestamp()
+        bulk = collection.initialize_unordered_bulk_op()
+        for unit_id, unit_metadata_delta in units_metadata_deltas:
+            unit_metadata_delta['_last_updated'] = last_updated
+            bulk.find({'_id': unit_id}).update_one({'$set': unit_metadata_delta})
+        bulk.execute()
+
     def remove_content_unit(self, content_type, unit_id):
         """
         Remove a content unit and its metadata from the corresponding pulp db
@@ -17,6 +17,9 @@ from pulp.server.db import model
 
 _logger = logging.getLogger(__name__)
 
+# Number of documents fetched per round trip when streaming unit ids and content units
+ORPHAN_BATCH_SIZE = 1000
+
 
 class OrphanManager(object):
 
@@ -115,18 +118,38 @@ class OrphanManager(object):
 
         fields = fields if fields is not None else ['_id']
         content_units_collection = content_types_db.type_units_collection(content_type_id)
-        repo_content_units_collection = RepoContentUnit.get_collection()
+        referenced_unit_ids = OrphanManager.get_referenced_unit_ids(content_type_id)
 
-        for content_unit in content_units_collection.find({}, fields=fields):
+        cursor = content_units_collection.find({}, fields=fields)
+        cursor.batch_size(ORPHAN_BATCH_SIZE)
 
-            repo_content_units_cursor = repo_content_units_collection.find(
-                {'unit_id': content_unit['_id']})
+        for content_unit in cursor:
 
-            if repo_content_units_cursor.count() > 0:
+            if content_unit['_id'] in referenced_unit_ids:
                 continue
 
             yield content_unit
 
+    @staticmethod
+    def get_referenced_unit_ids(content_type_id):
+        """
+        Build the set of ids of all content units of the given type that are
+        associated with at least one repository.
+
+        The repo_content_units collection is streamed once, using the
+        (unit_type_id, created) index, instead of being queried once per unit.
+
+        :param content_type_id: id of the content type
+        :type content_type_id: basestring
+        :return: ids of the referenced content units
+        :rtype: set
+        """
+        repo_content_units_collection = RepoContentUnit.get_collection()
+        cursor = repo_content_units_collection.find({'unit_type_id': content_type_id},
+                                                    fields={'unit_id': True, '_id': False})
+        cursor.batch_size(ORPHAN_BATCH_SIZE)
+        return set(repo_content_unit['unit_id'] for repo_content_unit in cursor)
+
     @staticmethod
     def generate_orphans_by_type_with_unit_keys(content_type_id):
         """
@@ -225,18 +248,33 @@ class OrphanManager(object):
         """
 
         content_units_collection = content_types_db.type_units_collection(content_type_id)
+        repo_content_units_collection = RepoContentUnit.get_collection()
+
+        orphans = OrphanManager.generate_orphans_by_type(content_type_id,
+                                                         fields=['_id', '_storage_path'])
+        if content_unit_ids is not None:
+            content_unit_ids = set(content_unit_ids)
+            orphans = (unit for unit in orphans if unit['_id'] in content_unit_ids)
+
+        for orphans_group in plugin_misc.paginate(orphans, ORPHAN_BATCH_SIZE):
+            orphans_by_id = dict((unit['_id'], unit) for unit in orphans_group)
 
-        for content_unit in OrphanManager.generate_orphans_by_type(content_type_id,
-                                                                   fields=['_id', '_storage_path']):
+            # The referenced unit ids are a snapshot, so make sure that none of the units in
+            # this group have been associated with a repository since it was taken
+            associated_ids = repo_content_units_collection.find(
+                {'unit_id': {'$in': orphans_by_id.keys()}}).distinct('unit_id')
+            for unit_id in associated_ids:
+                orphans_by_id.pop(unit_id, None)
 
-            if content_unit_ids is not None and content_unit['_id'] not in content_unit_ids:
+            if not orphans_by_id:
                 continue
 
-            content_units_collection.remove(content_unit['_id'], safe=False)
+            content_units_collection.remove({'_id': {'$in': orphans_by_id.keys()}}, safe=False)
 
-            storage_path = content_unit.get('_storage_path', None)
-            if storage_path is not None:
-                OrphanManager.delete_orphaned_file(storage_path)
+            for content_unit in orphans_by_id.itervalues():
+                storage_path = content_unit.get('_storage_path', None)
+                if storage_path is not None:
+                    OrphanManager.delete_orphaned_file(storage_path)
 
     @staticmethod
     def delete_orphan_content_units_by_type(type_id):
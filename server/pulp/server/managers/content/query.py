@@ -149,7 +149,8 @@ class ContentQueryManager(object):
                                   {'i': unit_id})
         return units[0]
 
-    def get_multiple_units_by_keys_dicts(self, content_type, unit_keys_dicts, model_fields=None):
+    def get_multiple_units_by_keys_dicts(self, content_type, unit_keys_dicts, model_fields=None,
+                                         page_size=50):
         """
         Look up multiple content units in the collection for the given content
         type collection that match the list of keys dictionaries.
@@ -161,13 +162,15 @@ class ContentQueryManager(object):
         :param model_fields: fields of each content unit to report,
                              None means all fields
         :type model_fields: None or list of str's
+        :param page_size: number of keys dictionaries looked up by each query
+        :type page_size: int
         :return: tuple of content units found in the content type collection
                  that match the given unit keys dictionaries
         :rtype: (possibly empty) tuple of dict's
         :raises ValueError: if any of the keys dictionaries are invalid
         """
         collection = content_types_db.type_units_collection(content_type)
-        for segment in paginate(unit_keys_dicts, page_size=50):
+        for segment in paginate(unit_keys_dicts, page_size=page_size):
             spec = _build_multi_keys_spec(content_type, segment)
             cursor = collection.find(spec, fields=model_fields)
             for unit_dict in cursor:
@@ -1,8 +1,12 @@
 from errno import ENOENT
 from gettext import gettext as _
+import fcntl
+import hashlib
+import json
 import logging
 import os
 import sys
+import threading
 from uuid import uuid4
 
 from celery import task
@@ -20,9 +24,19 @@ import pulp.server.managers.factory as manager_factory
 
 logger = logging.getLogger(__name__)
 
+# Number of bytes read from a request body, or from an upload file, at a time
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Suffix of the file next to each upload file that tracks the state of the upload
+UPLOAD_STATE_SUFFIX = '.state'
+
+# Running sha256 of the uploads initialized by this process, keyed by upload ID. Each value is
+# the hash object and the number of bytes from the start of the upload that it was fed.
+_running_hashes = {}
+_running_hashes_lock = threading.Lock()
+
 
 class ContentUploadManager(object):
-    def initialize_upload(self):
+    def initialize_upload(self, size=None):
         """
         Informs the Pulp server that a new file is about to be uploaded, allowing
         it to do any preparation it needs to do to store or track the upload.
@@ -30,6 +44,13 @@ class ContentUploadManager(object):
         The ID returned from this call is used to track this specific uploaded
         file for the remainder of its life.
 
+        When the size of the file is declared, the upload file is allocated to that
+        size up front and the upload is known to be complete once every byte of it
+        has been received.
+
+        @param size: size of the file about to be uploaded, if known
+        @type  size: int
+
         @return: unique ID to refer to this upload request in the future
         @rtype:  str
         """
@@ -46,7 +67,24 @@ class ContentUploadManager(object):
         # before attempting to write bits.
         file_path = ContentUploadManager._upload_file_path(upload_id)
         f = open(file_path, 'w')
+        if size:
+            f.truncate(size)
+        f.close()
+
+        # The checksum of the upload is calculated as the segments are saved, by the
+        # process that initialized it.
+        running_hash = hashlib.sha256()
+        state = {
+            'size': size,
+            'received': [],
+            'sha256_offset': 0,
+            'sha256': running_hash.hexdigest(),
+        }
+        f = open(ContentUploadManager._upload_state_path(upload_id), 'w')
+        json.dump(state, f)
         f.close()
+        with _running_hashes_lock:
+            _running_hashes[upload_id] = (running_hash, 0)
 
         return upload_id
 
@@ -66,6 +104,43 @@ class ContentUploadManager(object):
         @param data: content to write to the file
         @type  data: str
         """
+        self._save_segment(upload_id, offset, [data])
+
+    def save_data_stream(self, upload_id, offset, stream, length):
+        """
+        Saves bits read from a stream into the given upload request starting at an
+        offset value. The stream is copied to the upload file UPLOAD_CHUNK_SIZE bytes
+        at a time, so the segment is never held in memory in full.
+
+        @param upload_id: upload request ID
+        @type  upload_id: str
+
+        @param offset: area in the uploaded file to start writing at
+        @type  offset: int
+
+        @param stream: file-like object the content is read from
+        @type  stream: file
+
+        @param length: number of bytes to read from the stream
+        @type  length: int
+        """
+        self._save_segment(upload_id, offset, _read_chunks(stream, length))
+
+    def _save_segment(self, upload_id, offset, chunks):
+        """
+        Writes a segment of an upload and records that it was received. When the
+        segment starts where the running checksum of the upload left off, and this
+        process holds that checksum, the segment is fed to it as it is written.
+
+        @param upload_id: upload request ID
+        @type  upload_id: str
+
+        @param offset: area in the uploaded file to start writing at
+        @type  offset: int
+
+        @param chunks: content to write to the file
+        @type  chunks: iterable of str
+        """
 
         file_path = ContentUploadManager._upload_file_path(upload_id)
 
@@ -73,10 +148,115 @@ class ContentUploadManager(object):
         if not os.path.exists(file_path):
             raise MissingResource(upload_request=upload_id)
 
+        running_hash = _claim_running_hash(upload_id, offset)
+        length = 0
         f = open(file_path, 'r+')
-        f.seek(offset)
-        f.write(data)
-        f.close()
+        try:
+            f.seek(offset)
+            for chunk in chunks:
+                f.write(chunk)
+                if running_hash is not None:
+                    running_hash.update(chunk)
+                length += len(chunk)
+        finally:
+            f.close()
+
+        ContentUploadManager._record_segment(upload_id, offset, length, running_hash)
+
+    @staticmethod
+    def _record_segment(upload_id, offset, length, running_hash):
+        """
+        Adds a segment to the state of an upload and advances its running checksum.
+
+        The checksum is advanced over the segment if it was fed while being written,
+        and over any segments that follow it which were received out of order, or by
+        another process, by reading them back from the upload file.
+
+        @param upload_id: upload request ID
+        @type  upload_id: str
+
+        @param offset: where in the uploaded file the segment starts
+        @type  offset: int
+
+        @param length: size of the segment
+        @type  length: int
+
+        @param running_hash: the running checksum, if it was fed the segment
+        @type  running_hash: hashlib.sha256
+        """
+        try:
+            state_file = open(ContentUploadManager._upload_state_path(upload_id), 'r+')
+        except IOError as e:
+            # uploads initialized before their state was tracked have no state file
+            if e.errno != ENOENT:
+                raise
+            return
+
+        try:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            state = json.load(state_file)
+            received = state['received'] = _add_range(state['received'], offset, offset + length)
+            hashed = state['sha256_offset']
+
+            if running_hash is not None:
+                hashed = offset + length
+            elif hashed is not None and offset < hashed:
+                # a segment that was already checksummed was written again
+                hashed = None
+                _discard_running_hash(upload_id)
+            elif hashed is not None:
+                running_hash = _claim_running_hash(upload_id, hashed)
+
+            if running_hash is not None:
+                received_end = received[0][1] if received and received[0][0] == 0 else 0
+                if received_end > hashed:
+                    _update_hash(running_hash, ContentUploadManager._upload_file_path(upload_id),
+                                 hashed, received_end)
+                    hashed = received_end
+                state['sha256'] = running_hash.hexdigest()
+                if state['size'] is None or hashed < state['size']:
+                    with _running_hashes_lock:
+                        _running_hashes[upload_id] = (running_hash, hashed)
+            elif hashed is None:
+                state['sha256'] = None
+            state['sha256_offset'] = hashed
+
+            state_file.seek(0)
+            state_file.truncate()
+            json.dump(state, state_file)
+        finally:
+            state_file.close()
+
+    @staticmethod
+    def uploaded_sha256(upload_id):
+        """
+        Returns the sha256 checksum of an upload that was calculated while its segments
+        were saved. It is only available once the checksum covers the whole upload
+        file, which is the case when the segments were received in order, or when the
+        process that initialized the upload saw all of the others saved.
+
+        @param upload_id: upload request ID
+        @type  upload_id: str
+
+        @return: hex digest of the upload file, or None if it was not calculated
+        @rtype:  str
+        """
+        try:
+            f = open(ContentUploadManager._upload_state_path(upload_id))
+        except IOError as e:
+            if e.errno != ENOENT:
+                raise
+            return None
+        try:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            state = json.load(f)
+        finally:
+            f.close()
+
+        size = os.path.getsize(ContentUploadManager._upload_file_path(upload_id))
+        if state['sha256_offset'] != size:
+            return None
+        return state['sha256']
 
     def delete_upload(self, upload_id):
         """
@@ -90,12 +270,15 @@ class ContentUploadManager(object):
         @raise MissingResource: if the upload request ID does not exist
         """
 
+        _discard_running_hash(upload_id)
         file_path = ContentUploadManager._upload_file_path(upload_id)
-        try:
-            os.remove(file_path)
-        except OSError as e:
-            if e.errno != ENOENT:
-                raise
+        state_path = ContentUploadManager._upload_state_path(upload_id)
+        for path in (file_path, state_path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                if e.errno != ENOENT:
+                    raise
 
     def read_upload(self, upload_id):
         """
@@ -129,7 +312,8 @@ class ContentUploadManager(object):
         @rtype:  list
         """
         upload_dir = ContentUploadManager._upload_storage_dir()
-        upload_ids = os.listdir(upload_dir)
+        upload_ids = [name for name in os.listdir(upload_dir)
+                      if not name.endswith(UPLOAD_STATE_SUFFIX)]
         return upload_ids
 
     @staticmethod
@@ -198,8 +382,13 @@ class ContentUploadManager(object):
         except plugin_exceptions.PluginNotFound:
             raise MissingResource(repo_id), None, sys.exc_info()[2]
 
-        # Assemble the data needed for the import
-        conduit = UploadConduit(repo_id, repo_importer['id'])
+        # Assemble the data needed for the import, including the checksum calculated while
+        # the file was uploaded so the importer does not need to read the file again for it
+        checksums = {}
+        sha256 = ContentUploadManager.uploaded_sha256(upload_id)
+        if sha256 is not None:
+            checksums['sha256'] = sha256
+        conduit = UploadConduit(repo_id, repo_importer['id'], checksums)
 
         call_config = PluginCallConfiguration(plugin_config, repo_importer['config'],
                                               override_config)
@@ -238,6 +427,18 @@ class ContentUploadManager(object):
         path = os.path.join(upload_storage_dir, upload_id)
         return path
 
+    @staticmethod
+    def _upload_state_path(upload_id):
+        """
+        Returns the full path to the file that tracks the state of the given upload.
+
+        :param upload_id: identifies the upload in question
+        :type  upload_id: str
+        :return:          full path on the server's filesystem
+        :rtype:           str
+        """
+        return ContentUploadManager._upload_file_path(upload_id) + UPLOAD_STATE_SUFFIX
+
     @staticmethod
     def _upload_storage_dir():
         """
@@ -258,4 +459,102 @@ class ContentUploadManager(object):
         return upload_storage_dir
 
 
+def _read_chunks(stream, length):
+    """
+    Reads a number of bytes from a stream, UPLOAD_CHUNK_SIZE bytes at a time.
+
+    :param stream: file-like object to read from
+    :type  stream: file
+    :param length: number of bytes to read
+    :type  length: int
+    :return:       the chunks read, until the length is read or the stream ends
+    :rtype:        generator of str
+    """
+    remaining = length
+    while remaining > 0:
+        chunk = stream.read(min(remaining, UPLOAD_CHUNK_SIZE))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _add_range(ranges, start, end):
+    """
+    Adds a range of bytes to a list of the ranges received so far, merging it with the
+    ranges it overlaps or touches.
+
+    :param ranges: sorted, non-overlapping [start, end) ranges
+    :type  ranges: list of list
+    :param start:  first byte of the range
+    :type  start:  int
+    :param end:    byte following the range
+    :type  end:    int
+    :return:       sorted, non-overlapping ranges that include the new range
+    :rtype:        list of list
+    """
+    merged = []
+    for range_start, range_end in ranges:
+        if range_end < start or range_start > end:
+            merged.append([range_start, range_end])
+        else:
+            start = min(start, range_start)
+            end = max(end, range_end)
+    merged.append([start, end])
+    merged.sort()
+    return merged
+
+
+def _claim_running_hash(upload_id, offset):
+    """
+    Takes the running checksum of an upload from this process, if this process holds
+    it and it was fed the upload up to the given offset. It is put back by the caller
+    once it has been fed more of the upload, so only one request feeds it at a time.
+
+    :param upload_id: upload request ID
+    :type  upload_id: str
+    :param offset:    number of bytes the checksum must have been fed
+    :type  offset:    int
+    :return:          the running checksum, or None
+    :rtype:           hashlib.sha256
+    """
+    with _running_hashes_lock:
+        running_hash, hashed = _running_hashes.get(upload_id, (None, None))
+        if running_hash is None or hashed != offset:
+            return None
+        del _running_hashes[upload_id]
+        return running_hash
+
+
+def _discard_running_hash(upload_id):
+    """
+    :param upload_id: upload request ID
+    :type  upload_id: str
+    """
+    with _running_hashes_lock:
+        _running_hashes.pop(upload_id, None)
+
+
+def _update_hash(running_hash, file_path, start, end):
+    """
+    Feeds a range of bytes of a file to a checksum.
+
+    :param running_hash: the checksum
+    :type  running_hash: hashlib.sha256
+    :param file_path:    path to the file
+    :type  file_path:    str
+    :param start:        first byte of the range
+    :type  start:        int
+    :param end:          byte following the range
+    :type  end:          int
+    """
+    f = open(file_path)
+    try:
+        f.seek(start)
+        for chunk in _read_chunks(f, end - start):
+            running_hash.update(chunk)
+    finally:
+        f.close()
+
+
 import_uploaded_unit = task(ContentUploadManager.import_uploaded_unit, base=Task)
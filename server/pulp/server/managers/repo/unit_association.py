@@ -2,6 +2,7 @@
 Contains the manager class and exceptions for handling the mappings between
 repositories and content units.
 """
+from collections import namedtuple
 from gettext import gettext as _
 import logging
 import sys
@@ -35,6 +36,9 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Minimal stand-in for a content unit, for associating units that are only known by their ids
+_UnitReference = namedtuple('_UnitReference', ['id', 'unit_type_id'])
+
 logger = logging.getLogger(__name__)
 
 
@@ -120,19 +124,31 @@ class RepoUnitAssociationManager(object):
         @raise InvalidType: if the given owner type is not of the valid enumeration
         """
 
-        # There may be a way to batch this in mongo which would be ideal for a
-        # bulk operation like this. But for deadline purposes, this call will
-        # simply loop and call the single method.
+        unit_ids = ((unit_type_id, unit_id) for unit_id in unit_id_list)
+        return self.associate_units_by_ids(repo_id, unit_ids)
+
+    @staticmethod
+    def associate_units_by_ids(repo_id, unit_ids):
+        """
+        Creates associations between the given repo and content units of any type, with bulk
+        operations. The count of associated units and the last unit added time of the repo are
+        updated once at the end.
+
+        :param repo_id: identifies the repo
+        :type  repo_id: str
+        :param unit_ids: unit type id and unit id of each unit to associate
+        :type  unit_ids: iterable of (str, str)
 
-        unique_count = 0
-        for unit_id in unit_id_list:
-            if not RepoUnitAssociationManager.association_exists(repo_id, unit_id, unit_type_id):
-                unique_count += 1
-            self.associate_unit_by_id(repo_id, unit_type_id, unit_id, False)
+        :return:    number of new units added to the repo
+        :rtype:     int
+        """
+        # Only the repo_id of the repository is needed, so avoid loading it from the database
+        repository = model.Repository(repo_id=repo_id)
+        units = (_UnitReference(unit_id, unit_type_id) for unit_type_id, unit_id in unit_ids)
 
-        # update the count of associated units on the repo object
+        # the bulk association updates the count of associated units on the repo object
+        unique_count = repo_controller.associate_units_bulk(repository, units)
         if unique_count:
-            repo_controller.update_unit_count(repo_id, unit_type_id, unique_count)
             repo_controller.update_last_unit_added(repo_id)
         return unique_count
 
@@ -2,9 +2,14 @@
 Contains the manager class for performing queries for repo-unit associations.
 """
 
+import heapq
+import itertools
+
 import pymongo
 
 from pulp.plugins.types import database as types_db
+from pulp.plugins.util import misc
+from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit
 
@@ -21,6 +26,15 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Number of associations read at a time by get_units_page when the criteria has no limit
+UNITS_PAGE_BATCH_SIZE = 1000
+
+# Number of associations, and of units, held in memory at a time by get_units as a generator
+GET_UNITS_CHUNK_SIZE = 1000
+
+# Smallest number of units read at a time from each window merged by get_units as a generator
+GET_UNITS_MIN_BATCH_SIZE = 100
+
 
 class RepoUnitAssociationQueryManager(object):
 
@@ -94,6 +108,9 @@ class RepoUnitAssociationQueryManager(object):
         Get the units associated with the repository based on the provided unit
         association criteria.
 
+        As a generator, the query is run a chunk of GET_UNITS_CHUNK_SIZE associations or units at
+        a time, so memory use does not grow with the size of the repository.
+
         :param repo_id: identifies the repository
         :type  repo_id: str
 
@@ -109,6 +126,9 @@ class RepoUnitAssociationQueryManager(object):
 
         criteria = criteria or UnitAssociationCriteria()
 
+        if as_generator:
+            return self._chunked_units(repo_id, criteria)
+
         unit_associations_generator = self._unit_associations_cursor(repo_id, criteria)
 
         if criteria.remove_duplicates:
@@ -271,6 +291,45 @@ class RepoUnitAssociationQueryManager(object):
 
         return self.get_units(repo_id, criteria, as_generator)
 
+    def get_units_page(self, repo_id, criteria=None, after=None):
+        """
+        Get one page of the units associated with the repository, ordered by unit type id and
+        unit id.
+
+        Rather than skipping over the units of the preceding pages, the page starts right after
+        the given unit and is read from the repo_id, unit_type_id, unit_id index, so the cost of
+        a page does not depend on how deep into the results it is. The page holds up to
+        criteria.limit units; all of the remaining units are returned when there is no limit.
+
+        :param repo_id: identifies the repository
+        :type  repo_id: str
+
+        :param criteria: if specified will drive the query; it may not specify a sort or a skip
+        :type  criteria: UnitAssociationCriteria
+
+        :param after: the unit type id and unit id of the last unit of the previous page; the
+                      first page is returned when None
+        :type  after: (str, str)
+
+        :return: units associated with the repo, in the same format as get_units
+        :rtype: list
+
+        :raises InvalidValue: if the criteria specify a sort or a skip
+        """
+
+        criteria = criteria or UnitAssociationCriteria()
+
+        invalid_values = []
+        if criteria.association_sort or criteria.unit_sort:
+            invalid_values.append('sort')
+        if criteria.skip:
+            invalid_values.append('skip')
+        if invalid_values:
+            raise pulp_exceptions.InvalidValue(invalid_values)
+
+        units_generator = self._units_after(repo_id, criteria, after)
+        return list(itertools.islice(units_generator, criteria.limit))
+
     @staticmethod
     def unit_type_ids_for_repo(repo_id):
         """
@@ -380,24 +439,365 @@ class RepoUnitAssociationQueryManager(object):
 
             generated_elements += 1
 
-    # -- associated units methods ----------------------------------------------
+    # -- chunked query methods --------------------------------------------------
+
+    def _chunked_units(self, repo_id, criteria):
+        """
+        Generate the same units as get_units while holding at most GET_UNITS_CHUNK_SIZE
+        associations or units in memory at a time.
+
+        When sorting by association fields, the associations are read in that order a chunk at a
+        time, and the units of each chunk are looked up before the next chunk is read. Otherwise
+        each unit type is handled in turn, with its units in unit sort order.
+
+        :type repo_id: str
+        :type criteria: UnitAssociationCriteria
+        :rtype: generator
+        """
+        if criteria.association_sort:
+            associations = self._unit_associations_cursor(repo_id, criteria)
+            if criteria.remove_duplicates:
+                associations = self._unit_associations_no_duplicates(criteria, associations)
+            if not criteria.unit_filters:
+                associations = self._with_skip_and_limit(associations, criteria.skip,
+                                                         criteria.limit)
+            units_generator = self._merged_association_chunks(criteria, associations)
+            if criteria.unit_filters:
+                # skip and limit must come after the units have been filtered
+                units_generator = self._with_skip_and_limit(units_generator, criteria.skip,
+                                                            criteria.limit)
+            return units_generator
+
+        unit_types = sorted(criteria.type_ids or self.unit_type_ids_for_repo(repo_id))
+        units_generator = itertools.chain.from_iterable(
+            self._chunked_units_of_type(repo_id, unit_type_id, criteria)
+            for unit_type_id in unit_types)
+        return self._with_skip_and_limit(units_generator, criteria.skip, criteria.limit)
+
+    @classmethod
+    def _merged_association_chunks(cls, criteria, associations):
+        """
+        Look up the units of the associations a chunk at a time, and generate the associations in
+        order with their unit as metadata. Associations whose unit does not match the unit
+        filters are left out.
+
+        :type criteria: UnitAssociationCriteria
+        :type associations: iterator
+        :rtype: generator
+        """
+        for chunk in misc.paginate(associations, GET_UNITS_CHUNK_SIZE):
+            unit_ids_by_type = {}
+            for association in chunk:
+                unit_ids = unit_ids_by_type.setdefault(association['unit_type_id'], [])
+                unit_ids.append(association['unit_id'])
+
+            units_by_id = {}
+            for unit_type_id, unit_ids in unit_ids_by_type.items():
+                cursor = cls._associated_units_by_type_cursor(unit_type_id, criteria, unit_ids)
+                for unit in cursor:
+                    units_by_id[(unit_type_id, unit['_id'])] = unit
+
+            for association in chunk:
+                unit = units_by_id.get((association['unit_type_id'], association['unit_id']))
+                if unit is not None:
+                    association['metadata'] = unit
+                    yield association
+
+    @classmethod
+    def _chunked_units_of_type(cls, repo_id, unit_type_id, criteria):
+        """
+        Generate the associations of one unit type with their unit as metadata, in unit sort
+        order.
+
+        When the type has no more than GET_UNITS_CHUNK_SIZE associations, they are all loaded and
+        their units looked up at once. Otherwise the repository's unit ids are read in windows of
+        GET_UNITS_CHUNK_SIZE, the units of each window are read in sort order, and the windows are
+        merged. The associations of each chunk of merged units are then looked up.
+
+        :type repo_id: str
+        :type unit_type_id: str
+        :type criteria: UnitAssociationCriteria
+        :rtype: generator
+        """
+        spec = criteria.association_filters.copy()
+        spec['repo_id'] = repo_id
+        spec['unit_type_id'] = unit_type_id
+
+        cursor = cls._type_associations_cursor(spec, criteria)
+        associations = list(cursor.limit(GET_UNITS_CHUNK_SIZE + 1))
+
+        if len(associations) <= GET_UNITS_CHUNK_SIZE:
+            lookup = cls._associations_by_unit_id(associations, criteria.remove_duplicates)
+            units = cls._associated_units_by_type_cursor(unit_type_id, criteria, lookup.keys())
+            for association in cls._merged_units_chunk(lookup, units):
+                yield association
+            return
+
+        # too many to hold at once; drop them and go through the units a window at a time
+        associations = None
+        windows = list(cls._association_unit_id_windows(spec))
+        merged_units = cls._merged_unit_windows(unit_type_id, criteria, windows)
+        for units in misc.paginate(merged_units, GET_UNITS_CHUNK_SIZE):
+            unit_ids_spec = {'unit_id': {'$in': [unit['_id'] for unit in units]}}
+            if 'unit_id' in spec:
+                chunk_spec = {'$and': [spec, unit_ids_spec]}
+            else:
+                chunk_spec = dict(spec, **unit_ids_spec)
+            cursor = cls._type_associations_cursor(chunk_spec, criteria)
+            lookup = cls._associations_by_unit_id(cursor, criteria.remove_duplicates)
+            for association in cls._merged_units_chunk(lookup, units):
+                yield association
+
+    @staticmethod
+    def _association_unit_id_windows(spec):
+        """
+        Generate, in order, lists of up to GET_UNITS_CHUNK_SIZE distinct unit ids of the
+        associations that match the spec. Each window starts after the last unit id of the
+        previous one.
+
+        :type spec: dict
+        :rtype: generator
+        """
+        collection = RepoContentUnit.get_collection()
+        lower_bound = None
+        while True:
+            if lower_bound is None:
+                window_spec = spec
+            elif 'unit_id' in spec:
+                window_spec = {'$and': [spec, {'unit_id': {'$gt': lower_bound}}]}
+            else:
+                window_spec = dict(spec, unit_id={'$gt': lower_bound})
+
+            cursor = collection.find(window_spec, fields=['unit_id'])
+            cursor.sort('unit_id', SORT_ASCENDING).limit(GET_UNITS_CHUNK_SIZE)
+            unit_ids = []
+            count = 0
+            for association in cursor:
+                count += 1
+                # a unit associated more than once has its associations next to each other
+                if not unit_ids or unit_ids[-1] != association['unit_id']:
+                    unit_ids.append(association['unit_id'])
+
+            if unit_ids:
+                yield unit_ids
+            if count < GET_UNITS_CHUNK_SIZE:
+                return
+            lower_bound = unit_ids[-1]
+
+    @classmethod
+    def _merged_unit_windows(cls, unit_type_id, criteria, windows):
+        """
+        Generate the units of each window of unit ids merged in unit sort order. Only the ids are
+        held for every window; the units are read from each window a batch at a time.
+
+        :type unit_type_id: str
+        :type criteria: UnitAssociationCriteria
+        :param windows: lists of the unit ids to read
+        :type windows: list
+        :rtype: generator
+        """
+        sort = cls._unit_sort(unit_type_id, criteria) or []
+        sort_fields = [field.split('.', 1)[0] for field, direction in sort]
+
+        # the sort values are compared here, so they are read even when other fields are asked for
+        extra_fields = []
+        if criteria.unit_fields is not None:
+            fields = set(field.split('.', 1)[0] for field in criteria.unit_fields)
+            fields.update(('_id', '_content_type_id'))
+            extra_fields = [field for field in set(sort_fields) if field not in fields]
+
+        batch_size = max(GET_UNITS_MIN_BATCH_SIZE, GET_UNITS_CHUNK_SIZE // max(len(windows), 1))
+
+        def keyed_units(index, unit_ids):
+            cursor = cls._associated_units_by_type_cursor(unit_type_id, criteria, unit_ids,
+                                                          extra_fields)
+            cursor.batch_size(batch_size)
+            for unit in cursor:
+                key = _UnitSortKey(unit, sort)
+                for field in extra_fields:
+                    unit.pop(field, None)
+                # the window index breaks ties, so units are never compared
+                yield key, index, unit
+
+        merged = heapq.merge(*[keyed_units(index, unit_ids)
+                               for index, unit_ids in enumerate(windows)])
+        for key, index, unit in merged:
+            yield unit
 
     @staticmethod
-    def _associated_units_by_type_cursor(unit_type_id, criteria, associated_unit_ids):
+    def _type_associations_cursor(spec, criteria):
+        """
+        Retrieve a pymongo cursor for the unit associations that match the spec. When duplicates
+        are removed, the associations are sorted so the earliest association comes first.
+
+        :type spec: dict
+        :type criteria: UnitAssociationCriteria
+        :rtype: pymongo.cursor.Cursor
+        """
+        collection = RepoContentUnit.get_collection()
+        cursor = collection.find(spec, fields=criteria.association_fields)
+        if criteria.remove_duplicates:
+            cursor.sort('created', SORT_ASCENDING)
+        return cursor
+
+    @staticmethod
+    def _associations_by_unit_id(associations, remove_duplicates):
+        """
+        Build a lookup of unit id to the list of associations of the unit.
+
+        :type associations: iterable
+        :type remove_duplicates: bool
+        :rtype: dict
+        """
+        lookup = {}
+        for association in associations:
+            unit_associations = lookup.setdefault(association['unit_id'], [])
+            if not (remove_duplicates and unit_associations):
+                unit_associations.append(association)
+        return lookup
+
+    @staticmethod
+    def _merged_units_chunk(lookup, units):
+        """
+        Generate, for each unit in order, its associations with the unit as metadata.
+
+        :type lookup: dict
+        :type units: iterable
+        :rtype: generator
+        """
+        for unit in units:
+            for association in lookup.get(unit['_id'], ()):
+                association['metadata'] = unit
+                yield association
+
+    # -- keyset pagination methods ----------------------------------------------
+
+    @classmethod
+    def _units_after(cls, repo_id, criteria, after):
+        """
+        Generate the units associated with the repository that follow the given unit, ordered by
+        unit type id and unit id. Associations are read a batch at a time, each batch starting
+        after the last association of the previous one.
+
+        :type repo_id: str
+        :type criteria: UnitAssociationCriteria
+        :type after: (str, str) or None
+        :rtype: generator
+        """
+        if after is None:
+            after_type_id = after_unit_id = None
+        else:
+            after_type_id, after_unit_id = after
+
+        batch_size = criteria.limit or UNITS_PAGE_BATCH_SIZE
+        collection = RepoContentUnit.get_collection()
+
+        for unit_type_id in cls._unit_type_ids_from(repo_id, criteria.type_ids, after_type_id):
+
+            lower_bound = after_unit_id if unit_type_id == after_type_id else None
+
+            while True:
+                spec = {'repo_id': repo_id, 'unit_type_id': unit_type_id}
+                if lower_bound is not None:
+                    spec['unit_id'] = {'$gt': lower_bound}
+                if criteria.association_filters:
+                    spec = {'$and': [spec, criteria.association_filters]}
+
+                cursor = collection.find(spec, fields=criteria.association_fields)
+                associations = list(cursor.sort('unit_id', SORT_ASCENDING).limit(batch_size))
+
+                for association in cls._merged_units_batch(unit_type_id, criteria,
+                                                           associations):
+                    yield association
+
+                if len(associations) < batch_size:
+                    break
+                lower_bound = associations[-1]['unit_id']
+
+    @staticmethod
+    def _unit_type_ids_from(repo_id, type_ids, first_type_id):
+        """
+        Generate, in order, the unit type ids to search that are not before the given one.
+
+        When no type ids are specified, the types associated with the repository are found one at
+        a time from the repo_id, unit_type_id index, rather than with a distinct over all of the
+        repository's associations.
+
+        :type repo_id: str
+        :type type_ids: list or None
+        :type first_type_id: str or None
+        :rtype: generator
+        """
+        if type_ids:
+            for unit_type_id in sorted(type_ids):
+                if first_type_id is None or unit_type_id >= first_type_id:
+                    yield unit_type_id
+            return
+
+        collection = RepoContentUnit.get_collection()
+        spec = {'repo_id': repo_id}
+        if first_type_id is not None:
+            spec['unit_type_id'] = {'$gte': first_type_id}
+
+        while True:
+            cursor = collection.find(spec, fields=['unit_type_id'])
+            found = list(cursor.sort('unit_type_id', SORT_ASCENDING).limit(1))
+            if not found:
+                return
+            unit_type_id = found[0]['unit_type_id']
+            yield unit_type_id
+            spec['unit_type_id'] = {'$gt': unit_type_id}
+
+    @classmethod
+    def _merged_units_batch(cls, unit_type_id, criteria, associations):
+        """
+        Look up the units of a batch of associations and generate the associations, in order,
+        with their unit as metadata. Associations whose unit does not match the unit filters are
+        left out.
+
+        :type unit_type_id: str
+        :type criteria: UnitAssociationCriteria
+        :type associations: list
+        :rtype: generator
+        """
+        if not associations:
+            return
+
+        unit_ids = [association['unit_id'] for association in associations]
+        cursor = cls._associated_units_by_type_cursor(unit_type_id, criteria, unit_ids)
+        units_by_id = dict((unit['_id'], unit) for unit in cursor)
+
+        for association in associations:
+            unit = units_by_id.get(association['unit_id'])
+            if unit is None:
+                continue
+            association['metadata'] = unit
+            yield association
+
+    # -- associated units methods ----------------------------------------------
+
+    @classmethod
+    def _associated_units_by_type_cursor(cls, unit_type_id, criteria, associated_unit_ids=None,
+                                         extra_fields=None):
         """
         Retrieve a pymongo cursor for units associated with a repository of a
         give unit type that meet to the provided criteria.
 
         :type unit_type_id: str
         :type criteria: UnitAssociationCriteria
+        :param associated_unit_ids: ids of the units to retrieve; all units of the type
+                                    that meet the criteria are retrieved when None
         :type associated_unit_ids: list
+        :param extra_fields: fields to retrieve in addition to the criteria's unit fields
+        :type extra_fields: list
         :rtype: pymongo.cursor.Cursor
         """
 
         collection = types_db.type_units_collection(unit_type_id)
 
         spec = criteria.unit_filters.copy()
-        spec['_id'] = {'$in': associated_unit_ids}
+        if associated_unit_ids is not None:
+            spec['_id'] = {'$in': associated_unit_ids}
 
         fields = criteria.unit_fields
 
@@ -406,8 +806,28 @@ class RepoUnitAssociationQueryManager(object):
             fields = list(fields)
             fields.append('_content_type_id')
 
+        if fields is not None and extra_fields:
+            fields = list(fields) + list(extra_fields)
+
         cursor = collection.find(spec, fields=fields)
 
+        sort = cls._unit_sort(unit_type_id, criteria)
+
+        if sort is not None:
+            cursor.sort(sort)
+
+        return cursor
+
+    @staticmethod
+    def _unit_sort(unit_type_id, criteria):
+        """
+        Determine the sort of the units of a type; by default, the fields of the unit key.
+
+        :type unit_type_id: str
+        :type criteria: UnitAssociationCriteria
+        :return: list of (field, direction) tuples, or None if the units are not sorted
+        :rtype: list
+        """
         sort = criteria.unit_sort
 
         if sort is None:
@@ -416,10 +836,7 @@ class RepoUnitAssociationQueryManager(object):
             if unit_key is not None:
                 sort = [(u, SORT_ASCENDING) for u in unit_key]
 
-        if sort is not None:
-            cursor.sort(sort)
-
-        return cursor
+        return sort
 
     @staticmethod
     def _associated_units_cursors_with_skip(units_cursors, skip):
@@ -579,3 +996,39 @@ class RepoUnitAssociationQueryManager(object):
                 association = association.copy()
                 association['metadata'] = unit
                 yield association
+
+
+class _UnitSortKey(object):
+    """
+    Orders units by the values of a unit sort, as the database does for the scalar values unit
+    keys hold. Missing values sort first, as null does in the database.
+    """
+
+    def __init__(self, unit, sort):
+        """
+        :param unit: unit to be ordered
+        :type  unit: dict
+        :param sort: list of (field, direction) tuples
+        :type  sort: list
+        """
+        self.values = []
+        for field, direction in sort:
+            value = unit
+            for name in field.split('.'):
+                value = value.get(name) if isinstance(value, dict) else None
+            self.values.append((value, direction))
+
+    def __eq__(self, other):
+        return self.values == other.values
+
+    def __ne__(self, other):
+        return self.values != other.values
+
+    def __lt__(self, other):
+        for (value, direction), (other_value, other_direction) in zip(self.values, other.values):
+            if value == other_value:
+                continue
+            if direction == SORT_DESCENDING:
+                return value > other_value
+            return value < other_value
+        return False
@@ -14,12 +14,15 @@ import isodate
 from pulp.common import dateutils
 from pulp.server import exceptions
 from pulp.server.db.model.criteria import Criteria
-from pulp.server.db.model.dispatch import ScheduledCall
+from pulp.server.db.model.dispatch import DeletedScheduledCall, ScheduledCall
 
 
 SCHEDULE_OPTIONS_FIELDS = ('failure_threshold', 'last_run', 'enabled')
 SCHEDULE_MUTABLE_FIELDS = ('call_request', 'schedule', 'failure_threshold', 'remaining_runs',
                            'enabled')
+# number of seconds deletions of schedules are recorded for. A scheduler that has not looked for
+# changes for longer than this must load every schedule again.
+DELETED_RETENTION_SECONDS = 86400
 
 _logger = logging.getLogger(__name__)
 
@@ -87,6 +90,36 @@ def get_updated_since(seconds):
     return ScheduledCall.get_collection().query(criteria)
 
 
+def get_changed_since(seconds):
+    """
+    Get schedules, whether they are enabled or not, that have been updated since
+    the timestamp represented by "seconds".
+
+    :param seconds: seconds since the epoch
+    :param seconds: float
+
+    :return:    pymongo cursor of ScheduledCall database objects
+    :rtype:     pymongo.cursor.Cursor
+    """
+    criteria = Criteria(filters={'last_updated': {'$gt': seconds}})
+    return ScheduledCall.get_collection().query(criteria)
+
+
+def get_deleted_since(seconds):
+    """
+    Get the records of schedules that have been deleted since the timestamp
+    represented by "seconds".
+
+    :param seconds: seconds since the epoch
+    :param seconds: float
+
+    :return:    pymongo cursor of DeletedScheduledCall database objects
+    :rtype:     pymongo.cursor.Cursor
+    """
+    criteria = Criteria(filters={'deleted': {'$gt': seconds}})
+    return DeletedScheduledCall.get_collection().query(criteria)
+
+
 def delete(schedule_id):
     """
     Deletes the schedule with unique ID schedule_id
@@ -106,6 +139,7 @@ def delete(schedule_id):
         query=spec, remove=True, safe=True)
     if schedule is None:
         raise exceptions.MissingResource(schedule_id=schedule_id)
+    _record_deleted([schedule_id])
 
 
 def delete_by_resource(resource):
@@ -115,7 +149,29 @@ def delete_by_resource(resource):
     :param resource:    string indicating a unique resource
     :type  resource:    basestring
     """
-    ScheduledCall.get_collection().remove({'resource': resource}, safe=True)
+    collection = ScheduledCall.get_collection()
+    # only the schedules found here are removed, so every removed schedule is recorded
+    object_ids = [schedule['_id'] for schedule in
+                  collection.find({'resource': resource}, fields=['_id'])]
+    if not object_ids:
+        return
+    collection.remove({'_id': {'$in': object_ids}}, safe=True)
+    _record_deleted(map(str, object_ids))
+
+
+def _record_deleted(schedule_ids):
+    """
+    Records that schedules were deleted, so schedulers drop them, and removes the
+    records that are older than DELETED_RETENTION_SECONDS.
+
+    :param schedule_ids:    unique IDs of the deleted schedules
+    :type  schedule_ids:    list
+    """
+    collection = DeletedScheduledCall.get_collection()
+    now = time.time()
+    collection.insert([DeletedScheduledCall(schedule_id, now) for schedule_id in schedule_ids],
+                      safe=True)
+    collection.remove({'deleted': {'$lt': now - DELETED_RETENTION_SECONDS}}, safe=True)
 
 
 def update(schedule_id, delta):
@@ -9,6 +9,7 @@ from pulp.server.webservices.views.consumers import (ConsumerBindingsView,
                                                      ConsumerHistoryView,
                                                      ConsumerProfilesView,
                                                      ConsumerProfileResourceView,
+                                                     ConsumerProfileHashView,
                                                      ConsumerProfileSearchView,
                                                      ConsumerResourceContentApplicRegenerationView,
                                                      ConsumerResourceView,
@@ -103,6 +104,8 @@ urlpatterns = patterns('',
         ConsumerProfilesView.as_view(), name='consumer_profiles'),
     url(r'^v2/consumers/(?P<consumer_id>[^/]+)/profiles/(?P<content_type>[^/]+)/$',
         ConsumerProfileResourceView.as_view(), name='consumer_profile_resource'),
+    url(r'^v2/consumers/(?P<consumer_id>[^/]+)/profiles/(?P<content_type>[^/]+)/hash/$',
+        ConsumerProfileHashView.as_view(), name='consumer_profile_hash'),
     url(r'^v2/consumers/actions/content/regenerate_applicability/$',
         ConsumerContentApplicRegenerationView.as_view(), name='appl_regen'),
     url(r'^v2/consumers/content/applicability/$',
@@ -243,6 +246,7 @@ urlpatterns = patterns('',
     url(r'^v2/status/$', StatusView.as_view(), name='status'),
     url(r'^v2/tasks/$', tasks.TaskCollectionView.as_view(), name='task_collection'),
     url(r'^v2/tasks/search/$', tasks.TaskSearchView.as_view(), name='task_search'),
+    url(r'^v2/tasks/status/$', tasks.TaskBulkStatusView.as_view(), name='task_bulk_status'),
     url(r'^v2/tasks/(?P<task_id>[^/]+)/$', tasks.TaskResourceView.as_view(), name='task_resource'),
     url(r'^v2/users/$', users.UsersView.as_view(), name='users'),
     url(r'^v2/users/search/$', users.UserSearchView.as_view(),
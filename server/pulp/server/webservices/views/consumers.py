@@ -329,6 +329,7 @@ class ConsumerProfileSearchView(search.SearchView):
     """
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     manager = profile.ProfileManager()
+    stream_results = True
 
 
 class ConsumerBindingsView(View):
@@ -749,6 +750,8 @@ class ConsumerProfileResourceView(View):
     def put(self, request, consumer_id, content_type):
         """
         Update the association of a profile with a consumer by content type ID.
+        The body contains either the whole profile, or a delta against the
+        profile last reported by the consumer and the hash of that profile.
 
         :param request: WSGI request object
         :type request: django.core.handlers.wsgi.WSGIRequest
@@ -762,10 +765,17 @@ class ConsumerProfileResourceView(View):
         """
 
         body = request.body_as_json
-        profile = body.get('profile')
-
         manager = factory.consumer_profile_manager()
-        consumer = manager.update(consumer_id, content_type, profile)
+        if 'delta' in body:
+            # Only the changes to the profile last reported by the consumer are sent
+            base_hash = body.get('base_hash')
+            if base_hash is None:
+                raise MissingValue('base_hash')
+            consumer = manager.update_from_delta(consumer_id, content_type, base_hash,
+                                                 body['delta'])
+        else:
+            profile = body.get('profile')
+            consumer = manager.update(consumer_id, content_type, profile)
 
         add_link_profile(consumer)
 
@@ -793,6 +803,40 @@ class ConsumerProfileResourceView(View):
         return generate_json_response(response)
 
 
+class ConsumerProfileHashView(View):
+    """
+    View used by consumers to determine whether their profile has changed
+    since they last reported it.
+    """
+
+    @auth_required(authorization.READ)
+    @json_body_required
+    def post(self, request, consumer_id, content_type):
+        """
+        Compare the hash of a consumer's current profile with the hash of the
+        profile it last reported.
+
+        :param request: WSGI request object
+        :type request: django.core.handlers.wsgi.WSGIRequest
+        :param consumer_id: A consumer ID.
+        :type consumer_id: str
+        :param content_type: A content unit type ID.
+        :type content_type: str
+
+        :raises MissingValue: if the profile hash is not provided
+
+        :return: Response whose "unchanged" value is true if the profile need not be reported
+        :rtype: django.http.HttpResponse
+        """
+        profile_hash = request.body_as_json.get('profile_hash')
+        if profile_hash is None:
+            raise MissingValue('profile_hash')
+
+        manager = factory.consumer_profile_manager()
+        unchanged = manager.is_unchanged(consumer_id, content_type, profile_hash)
+        return generate_json_response({'unchanged': unchanged})
+
+
 class ConsumerContentApplicabilityView(View):
     """
     View for query content applicability.
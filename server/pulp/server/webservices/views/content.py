@@ -3,11 +3,13 @@ from gettext import gettext as _
 from django.core.urlresolvers import reverse
 from django.http import HttpResponseNotFound, HttpResponseBadRequest
 from django.views.generic import View
+import pymongo
 
 from pulp.common import tags
 from pulp.common.tags import (ACTION_REFRESH_ALL_CONTENT_SOURCES,
                               ACTION_REFRESH_CONTENT_SOURCE,
                               RESOURCE_CONTENT_SOURCE)
+from pulp.plugins.util import misc
 from pulp.server import constants
 from pulp.server.auth import authorization
 from pulp.server.content.sources.container import ContentContainer
@@ -20,11 +22,19 @@ from pulp.server.managers.content import orphan as content_orphan
 from pulp.server.webservices.views import search
 from pulp.server.webservices.views.decorators import auth_required
 from pulp.server.webservices.views.serializers import content as serial_content
-from pulp.server.webservices.views.util import (generate_json_response,
+from pulp.server.webservices.views.util import (CONTINUATION,
+                                                decode_continuation,
+                                                generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
                                                 generate_redirect_response,
+                                                generate_streaming_json_response,
                                                 json_body_allow_empty,
-                                                json_body_required)
+                                                json_body_required,
+                                                set_continuation)
+
+
+# Number of streamed content units whose repository memberships are looked up with one query
+REPO_MEMBERSHIP_PAGE_SIZE = 1000
 
 
 def _process_content_unit(content_unit, content_type):
@@ -237,9 +247,15 @@ class CatalogResourceView(View):
 class ContentUnitSearch(search.SearchView):
     """
     Adds GET and POST searching for content units.
+
+    When the continuation option is given, even empty, units are returned a page at a time in
+    unit id order. A full page comes with a Pulp-Continuation header, whose value is the
+    continuation option that requests the next page.
     """
     optional_bool_fields = ('include_repos',)
+    optional_string_fields = (CONTINUATION,)
     manager = content_query.ContentQueryManager()
+    stream_results = True
 
     @staticmethod
     def _add_repo_memberships(units, type_id):
@@ -275,6 +291,46 @@ class ContentUnitSearch(search.SearchView):
             unit['repository_memberships'] = list(association_map.get(unit['_id'], []))
         return units
 
+    @classmethod
+    def _generate_response(cls, query, options, *args, **kwargs):
+        """
+        Overrides the base class to return a page of units that follows the unit in the
+        continuation token, when one is given.
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param options: Extra options that individual views can use to optionally modify the data.
+        :type  options: dict
+        :return:      The serialized search results in an HttpReponse
+        :rtype:       django.http.HttpResponse
+
+        :raises InvalidValue: if the continuation token is not valid, or is combined with a sort
+                              or a skip
+        """
+        if CONTINUATION not in options:
+            return super(ContentUnitSearch, cls)._generate_response(query, options, *args,
+                                                                    **kwargs)
+
+        criteria = Criteria.from_client_input(query)
+        invalid_values = [name for name in ('sort', 'skip') if getattr(criteria, name)]
+        if invalid_values:
+            raise InvalidValue(invalid_values)
+
+        after = decode_continuation(options[CONTINUATION])
+        if after is not None:
+            if len(after) != 1:
+                raise InvalidValue([CONTINUATION])
+            keyset_filter = {'_id': {'$gt': after[0]}}
+            if criteria.filters:
+                criteria.filters = {'$and': [criteria.filters, keyset_filter]}
+            else:
+                criteria.filters = keyset_filter
+        criteria.sort = [('_id', pymongo.ASCENDING)]
+
+        units = cls.get_results(criteria, cls.manager.find_by_criteria, options, *args, **kwargs)
+        response = generate_json_response_with_pulp_encoder(units)
+        return set_continuation(response, criteria.limit, units, lambda unit: [unit['_id']])
+
     @classmethod
     def get_results(cls, query, search_method, options, *args, **kwargs):
         """
@@ -287,6 +343,34 @@ class ContentUnitSearch(search.SearchView):
             cls._add_repo_memberships(units, type_id)
         return units
 
+    @classmethod
+    def iter_results(cls, query, search_method, options, *args, **kwargs):
+        """
+        Overrides the base class so additional information can optionally be added. Repository
+        memberships are looked up for one page of units at a time.
+        """
+        type_id = kwargs['type_id']
+        units = (_process_content_unit(unit, type_id) for unit in search_method(type_id, query))
+        if options.get('include_repos') is not True:
+            return units
+        return cls._iter_repo_memberships(units, type_id)
+
+    @classmethod
+    def _iter_repo_memberships(cls, units, type_id):
+        """
+        Add the list of repo_ids each unit is a member of, one page of units at a time.
+
+        :param units:   unit documents
+        :type  units:   iterable of dicts
+        :param type_id: content type id
+        :type  type_id: str
+        :return:    the units, with their repository memberships added
+        :rtype:     generator of dicts
+        """
+        for page in misc.paginate(units, REPO_MEMBERSHIP_PAGE_SIZE):
+            for unit in cls._add_repo_memberships(list(page), type_id):
+                yield unit
+
 
 class ContentUnitResourceView(View):
     """
@@ -340,8 +424,8 @@ class ContentUnitsCollectionView(View):
         """
         cqm = factory.content_query_manager()
         all_units = cqm.find_by_criteria(type_id, Criteria())
-        all_processed_units = [_process_content_unit(unit, type_id) for unit in all_units]
-        return generate_json_response_with_pulp_encoder(all_processed_units)
+        all_processed_units = (_process_content_unit(unit, type_id) for unit in all_units)
+        return generate_streaming_json_response(all_processed_units)
 
 
 class ContentUnitUserMetadataResourceView(View):
@@ -424,13 +508,18 @@ class UploadsCollectionView(View):
         """
         Initialize an upload and return a serialized dict containing the upload data.
 
-        :param request: WSGI request object
+        :param request: WSGI request object, body may contain the size of the file to upload
         :type request: django.core.handlers.wsgi.WSGIRequest
         :return : Serialized response containing a url to delete an upload and a unique id.
         :rtype : django.http.HttpResponse
+
+        :raises InvalidValue: if the size is not a non-negative integer
         """
+        size = request.body_as_json.get('size')
+        if size is not None and (not isinstance(size, (int, long)) or size < 0):
+            raise InvalidValue(['size'])
         upload_manager = factory.content_upload_manager()
-        upload_id = upload_manager.initialize_upload()
+        upload_id = upload_manager.initialize_upload(size)
         href = reverse('content_upload_resource', kwargs={'upload_id': upload_id})
         response = generate_json_response({'_href': href, 'upload_id': upload_id})
         response_redirect = generate_redirect_response(response, href)
@@ -465,11 +554,17 @@ class UploadSegmentResourceView(View):
         except ValueError:
             raise InvalidValue(['offset'])
 
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            raise InvalidValue(['Content-Length'])
+
         upload_manager = factory.content_upload_manager()
 
         # If the upload ID doesn't exists, either because it was not initialized
-        # or was deleted, the call to the manager will raise missing resource
-        upload_manager.save_data(upload_id, offset, request.body)
+        # or was deleted, the call to the manager will raise missing resource.
+        # The body is streamed to the upload file rather than read into memory.
+        upload_manager.save_data_stream(upload_id, offset, request, length)
         return generate_json_response(None)
 
 
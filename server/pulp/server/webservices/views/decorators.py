@@ -6,6 +6,7 @@ import logging
 
 from pulp.common import error_codes
 from pulp.server.auth.authorization import CREATE, READ, UPDATE, DELETE, EXECUTE, OPERATION_NAMES
+from pulp.server.auth.cache import auth_cache
 from pulp.server.config import config
 from pulp.server.compat import wraps
 from pulp.server.exceptions import PulpCodedAuthenticationException
@@ -135,6 +136,34 @@ def _verify_auth(self, operation, super_user_only, method, *args, **kwargs):
     :type super_user_only: bool
     :param super_user_only: Only authorize a user if they are a super user.
     """
+    # The auth cache is only used while the request is authorized, not by the view itself
+    auth_cache.synchronize()
+    try:
+        _check_auth(operation, super_user_only)
+    finally:
+        auth_cache.release()
+
+    # Authentication and authorization succeeded. Call method and then clear principal.
+    principal_manager = factory.principal_manager()
+    value = method(self, *args, **kwargs)
+    principal_manager.clear_principal()
+    return value
+
+
+def _check_auth(operation, super_user_only):
+    """
+    Authenticate the request and check the authorization of the user or consumer making it,
+    setting the principal for the request.
+
+    :type operation: int or None
+    :param operation: The operation a user needs permission for, or None to
+                      skip authorization.
+
+    :type super_user_only: bool
+    :param super_user_only: Only authorize a user if they are a super user.
+
+    :raises PulpCodedAuthenticationException: if authentication or authorization fails
+    """
     # Check Authentication
 
     # Run through each registered and enabled auth function
@@ -187,11 +216,6 @@ def _verify_auth(self, operation, super_user_only, method, *args, **kwargs):
                                                    user=userid,
                                                    operation=OPERATION_NAMES[operation])
 
-    # Authentication and authorization succeeded. Call method and then clear principal.
-    value = method(self, *args, **kwargs)
-    principal_manager.clear_principal()
-    return value
-
 
 def auth_required(operation=None, super_user_only=False):
     """
@@ -19,11 +19,14 @@ from pulp.server.managers.repo.unit_association import associate_from_repo, unas
 from pulp.server.webservices.views import search, serializers
 from pulp.server.webservices.views.decorators import auth_required
 from pulp.server.webservices.views.schedule import ScheduleResource
-from pulp.server.webservices.views.util import (generate_json_response,
+from pulp.server.webservices.views.util import (CONTINUATION,
+                                                decode_continuation,
+                                                generate_json_response,
                                                 generate_json_response_with_pulp_encoder,
                                                 generate_redirect_response,
                                                 json_body_allow_empty,
-                                                json_body_required)
+                                                json_body_required,
+                                                set_continuation)
 
 
 def _merge_related_objects(name, manager, repos):
@@ -292,7 +295,12 @@ class RepoSearch(search.SearchView):
 class RepoUnitSearch(search.SearchView):
     """
     Adds GET and POST searching for units within a repository.
+
+    When the continuation option is given, even empty, units are returned a page at a time in
+    unit type id and unit id order. A full page comes with a Pulp-Continuation header, whose value
+    is the continuation option that requests the next page.
     """
+    optional_string_fields = (CONTINUATION,)
 
     @classmethod
     def _generate_response(cls, query, options, *args, **kwargs):
@@ -315,6 +323,14 @@ class RepoUnitSearch(search.SearchView):
         model.Repository.objects.get_repo_or_missing_resource(repo_id)
         criteria = UnitAssociationCriteria.from_client_input(query)
         manager = manager_factory.repo_unit_association_query_manager()
+        if CONTINUATION in options:
+            after = decode_continuation(options[CONTINUATION])
+            if after is not None and len(after) != 2:
+                raise pulp_exceptions.InvalidValue([CONTINUATION])
+            units = manager.get_units_page(repo_id, criteria=criteria, after=after)
+            response = generate_json_response_with_pulp_encoder(units)
+            return set_continuation(response, criteria.limit, units,
+                                    lambda unit: [unit['unit_type_id'], unit['unit_id']])
         if criteria.type_ids is not None and len(criteria.type_ids) == 1:
             type_id = criteria.type_ids[0]
             units = manager.get_units_by_type(repo_id, type_id, criteria=criteria)
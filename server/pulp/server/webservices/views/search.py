@@ -2,9 +2,11 @@
 This module contains the SearchView superclass. Your view code should subclass this to create a
 search view for a specific model.
 """
+import itertools
 import json
 
 from django.views import generic
+from mongoengine.queryset import QuerySet
 
 from pulp.server import exceptions
 from pulp.server.auth import authorization
@@ -43,9 +45,16 @@ class SearchView(generic.View):
                                should be set to a function that accepts a single object, and
                                returns a single object.
     :vartype serializer:       staticmethod
+    :cvar    stream_results:   Set this to True to encode the results while they are sent to the
+                               caller, rather than loading all of them in memory first. The
+                               results are then produced by iter_results() and serialized by
+                               util.generate_streaming_json_response, and response_builder is
+                               not used.
+    :vartype stream_results:   bool
     """
 
     response_builder = staticmethod(util.generate_json_response)
+    stream_results = False
     optional_string_fields = tuple()
     optional_bool_fields = tuple()
 
@@ -156,6 +165,9 @@ class SearchView(generic.View):
             search_method = cls.model.objects.find_by_criteria
         else:
             search_method = cls.manager.find_by_criteria
+        if cls.stream_results:
+            return util.generate_streaming_json_response(
+                cls.iter_results(query, search_method, options, *args, **kwargs))
         return cls.response_builder(cls.get_results(query, search_method, options, *args, **kwargs))
 
     @classmethod
@@ -178,3 +190,28 @@ class SearchView(generic.View):
         if hasattr(cls, 'serializer'):
             results = [cls.serializer(r) for r in results]
         return results
+
+    @classmethod
+    def iter_results(cls, query, search_method, options, *args, **kwargs):
+        """
+        Lazily search using the class's search method and serialize each result as it is read.
+        This is used instead of get_results() when stream_results is True, and must be overridden
+        by views that override get_results().
+
+        :param query: The criteria that should be used to search for objects
+        :type  query: dict
+        :param search_method: function that should be used to search
+        :type  search_method: func
+        :param options: additional options for including extra data
+        :type  options: dict
+
+        :return: search results
+        :rtype:  iterator
+        """
+        results = search_method(query)
+        if isinstance(results, QuerySet):
+            # don't let mongoengine keep every document that has been read
+            results = results.no_cache()
+        if hasattr(cls, 'serializer'):
+            return itertools.imap(cls.serializer, results)
+        return iter(results)
@@ -5,9 +5,10 @@ from datetime import datetime
 
 from django.views.generic import View
 from django.http import HttpResponse
+from mongoengine import Q
 from mongoengine.queryset import DoesNotExist
 
-from pulp.common import error_codes
+from pulp.common import dateutils, error_codes
 from pulp.common.constants import CALL_CANCELED_STATE, CALL_COMPLETE_STATES
 from pulp.server import exceptions as pulp_exceptions
 from pulp.server.async import tasks
@@ -18,12 +19,17 @@ from pulp.server.webservices.views import search
 from pulp.server.webservices.views.decorators import auth_required
 from pulp.server.webservices.views.serializers import dispatch as serial_dispatch
 from pulp.server.webservices.views.util import (generate_json_response,
-                                                generate_json_response_with_pulp_encoder)
+                                                generate_json_response_with_pulp_encoder,
+                                                json_body_required)
 
 
 # This constant set is used for deleting the completed tasks from the collection.
 VALID_STATES = set(filter(lambda state: state != CALL_CANCELED_STATE, CALL_COMPLETE_STATES))
 
+# Seconds subtracted from the changed_since value of a bulk status request, so updates written by
+# hosts whose clocks are slightly behind the one answering the request are not missed
+CHANGED_SINCE_CLOCK_SKEW = 5
+
 
 def task_serializer(task):
     """
@@ -48,6 +54,7 @@ class TaskSearchView(search.SearchView):
     response_builder = staticmethod(generate_json_response_with_pulp_encoder)
     model = TaskStatus
     serializer = staticmethod(task_serializer)
+    stream_results = True
 
 
 class TaskCollectionView(View):
@@ -100,6 +107,58 @@ class TaskCollectionView(View):
         return HttpResponse(status=204)
 
 
+class TaskBulkStatusView(View):
+    """
+    View for the status of many tasks at once.
+    """
+
+    @auth_required(authorization.READ)
+    @json_body_required
+    def post(self, request):
+        """
+        Return the status of each of the given tasks. When changed_since is specified, only the
+        tasks whose status was updated since then are returned. The timestamp in the response
+        should be passed as changed_since on the next call.
+
+        :param request: WSGI request object, body contains the task_ids list and optionally
+                        changed_since, a timestamp returned by a previous call
+        :type  request: django.core.handlers.wsgi.WSGIRequest
+
+        :return: Response containing the server time at which the statuses were read, a list
+                 of serialized tasks and a list of the requested task ids that do not exist
+        :rtype:  django.http.HttpResponse
+        :raises InvalidValue: if task_ids is not a list of strings or changed_since is not a
+                              number
+        """
+        task_ids = request.body_as_json.get('task_ids')
+        changed_since = request.body_as_json.get('changed_since')
+        if not isinstance(task_ids, list) or \
+                not all(isinstance(task_id, basestring) for task_id in task_ids):
+            raise pulp_exceptions.InvalidValue(['task_ids'])
+        if changed_since is not None and (isinstance(changed_since, bool) or
+                                          not isinstance(changed_since, (int, long, float))):
+            raise pulp_exceptions.InvalidValue(['changed_since'])
+
+        timestamp = dateutils.now_utc_timestamp()
+        raw_tasks = TaskStatus.objects(task_id__in=task_ids)
+        if changed_since is None:
+            raw_tasks = list(raw_tasks)
+            found = set(task.task_id for task in raw_tasks)
+        else:
+            found = set(raw_tasks.distinct('task_id'))
+            # statuses written before last_updated was recorded are always returned
+            raw_tasks = raw_tasks.filter(
+                Q(last_updated__gte=changed_since - CHANGED_SINCE_CLOCK_SKEW) |
+                Q(last_updated__exists=False))
+
+        response = {
+            'timestamp': timestamp,
+            'tasks': [task_serializer(task) for task in raw_tasks],
+            'missing': [task_id for task_id in task_ids if task_id not in found],
+        }
+        return generate_json_response_with_pulp_encoder(response)
+
+
 class TaskResourceView(View):
     """
     View for a single task.
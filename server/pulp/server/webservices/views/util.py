@@ -1,8 +1,10 @@
 from datetime import datetime
 from functools import wraps
 
+import base64
 import functools
 import httplib
+import itertools
 import json
 import sys
 
@@ -12,7 +14,24 @@ from django.utils.encoding import iri_to_uri
 from pulp.common import dateutils, error_codes
 from pulp.common.util import decode_unicode, encode_unicode
 from pulp.server.compat import json_util
-from pulp.server.exceptions import PulpCodedValidationException, InputEncodingError
+from pulp.server.exceptions import (InputEncodingError, InvalidValue,
+                                    PulpCodedValidationException)
+
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:
+    # Django < 1.5 has no streaming response. Its ConditionalGetMiddleware reads the content of
+    # any response to set Content-Length, which would consume an iterator, so the body is built
+    # before it is returned instead.
+    StreamingHttpResponse = None
+
+
+# Number of items encoded into each chunk of a streamed JSON array
+STREAMING_CHUNK_SIZE = 100
+
+# Search option and response header used to page through search results by continuation token
+CONTINUATION = 'continuation'
+CONTINUATION_HEADER = 'Pulp-Continuation'
 
 
 def pulp_json_encoder(obj):
@@ -65,6 +84,129 @@ generate_json_response_with_pulp_encoder = functools.partial(
 )
 
 
+def generate_streaming_json_response(iterable, response_class=None,
+                                     default=pulp_json_encoder,
+                                     content_type='application/json; charset=utf-8',
+                                     chunk_size=None):
+    """
+    Serialize the items of an iterable as a JSON array that is encoded while it is sent, so the
+    whole result set never has to be held in memory. The body is identical to the one
+    generate_json_response produces for a list of the same items.
+
+    The first chunk is encoded before the response is returned, so errors raised by the query
+    behind the iterable are still handled by the exception middleware. If this version of Django
+    cannot stream responses, the whole body is encoded and returned in an HttpResponse.
+
+    :param iterable       : items to be serialized, such as a database cursor
+    :type  iterable       : iterable of anything that is serializable by json.dumps
+    :param response_class : Django response class; defaults to StreamingHttpResponse
+    :type  response_class : StreamingHttpResponse class or subclass
+    :param default        : function used by json.dumps to serialize content (also called default)
+    :type  default        : function or None
+    :param content_type   : type of returned content
+    :type  content_type   : str
+    :param chunk_size     : number of items encoded into each chunk; defaults to
+                            STREAMING_CHUNK_SIZE
+    :type  chunk_size     : int
+
+    :return               : response that streams the serialized items
+    :rtype                : StreamingHttpResponse or subclass, or HttpResponse
+    """
+    chunks = _json_array_chunks(iterable, default, chunk_size or STREAMING_CHUNK_SIZE)
+    if response_class is None:
+        response_class = StreamingHttpResponse
+    if response_class is None:
+        return HttpResponse(''.join(chunks), content_type=content_type)
+    first_chunk = next(chunks)
+    return response_class(itertools.chain([first_chunk], chunks), content_type=content_type)
+
+
+def _json_array_chunks(iterable, default, chunk_size):
+    """
+    Encode the items of an iterable as the pieces of a JSON array.
+
+    :param iterable  : items to be serialized
+    :type  iterable  : iterable
+    :param default   : function used by the JSON encoder to serialize unknown types
+    :type  default   : function or None
+    :param chunk_size: number of items encoded into each chunk
+    :type  chunk_size: int
+
+    :return: generator of strings that make up the JSON array when joined
+    :rtype:  generator
+    """
+    encoder = json.JSONEncoder(default=default)
+    pieces = ['[']
+    for count, item in enumerate(iterable, 1):
+        if count > 1:
+            pieces.append(', ')
+        pieces.append(encoder.encode(item))
+        if count % chunk_size == 0:
+            yield ''.join(pieces)
+            pieces = []
+    pieces.append(']')
+    yield ''.join(pieces)
+
+
+def encode_continuation(values):
+    """
+    Build the opaque token a client passes back to get the page of search results that follows
+    the result it was built from.
+
+    :param values: the sort key of the last result of a page
+    :type  values: list
+
+    :return: continuation token
+    :rtype:  str
+    """
+    return base64.urlsafe_b64encode(json.dumps(values))
+
+
+def decode_continuation(token):
+    """
+    Decode a token built by encode_continuation. An empty token requests the first page.
+
+    :param token: continuation token provided by the client
+    :type  token: basestring or None
+
+    :return: the sort key of the last result of the previous page, or None for the first page
+    :rtype:  list or None
+
+    :raises InvalidValue: if the token is not valid
+    """
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(str(token)))
+    except (TypeError, ValueError):
+        raise InvalidValue([CONTINUATION]), None, sys.exc_info()[2]
+    if not isinstance(values, list):
+        raise InvalidValue([CONTINUATION])
+    return values
+
+
+def set_continuation(response, limit, results, key):
+    """
+    Add the continuation token for the page that follows the given results to a response, if a
+    full page of results was returned.
+
+    :param response: response containing the results
+    :type  response: django.http.HttpResponse
+    :param limit:    maximum number of results in a page
+    :type  limit:    int or None
+    :param results:  the results of the page
+    :type  results:  list
+    :param key:      function that returns the sort key of a result as a list
+    :type  key:      callable
+
+    :return: the response
+    :rtype:  django.http.HttpResponse
+    """
+    if limit and len(results) == limit:
+        response[CONTINUATION_HEADER] = encode_continuation(key(results[-1]))
+    return response
+
+
 def generate_redirect_response(response, href):
     response['Location'] = iri_to_uri(href)
     response.status_code = httplib.CREATED
@@ -4,7 +4,7 @@ import mock
 
 from pulp.common.compat import unittest
 from pulp.server.async import celery_instance
-from pulp.server.db.model import TaskStatus, ReservedResource, Worker
+from pulp.server.db.model import TaskStatus, ReservedResource, ReservationRelease, Worker
 from pulp.server.managers import factory as manager_factory
 from pulp.server.managers.auth.cert.cert_generator import SerialNumber
 
@@ -116,4 +116,6 @@ class ResourceReservationTests(PulpServerTests):
     def tearDown(self):
         Worker.objects().delete()
         ReservedResource.objects.delete()
+        # reservation_releases is capped, so it can be dropped but not deleted from
+        ReservationRelease.drop_collection()
         TaskStatus.objects().delete()
@@ -51,6 +51,20 @@ class TestCatalogerConduit(base.PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    def test_add_entries(self):
+        units = self.units(0, 10)
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
+        conduit.add_entries((TYPE_ID, unit_key, url) for unit_key, url in units)
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(len(units), collection.find().count())
+        self.assertEqual(conduit.added_count, len(units))
+        self.assertEqual(conduit.deleted_count, 0)
+        for unit_key, url in units:
+            locator = ContentCatalog.get_locator(TYPE_ID, unit_key)
+            entry = collection.find_one({'locator': locator})
+            self.assertEqual(entry['unit_key'], unit_key)
+            self.assertEqual(entry['url'], url)
+
     def test_delete(self):
         units = self.units(0, 10)
         conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
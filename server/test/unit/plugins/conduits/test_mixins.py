@@ -757,6 +757,80 @@ class AddUnitMixinTests(unittest.TestCase):
         # Test
         self.assertRaises(mixins.ImporterConduitException, self.mixin.save_unit, None)
 
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'request_content_unit_file_path')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.update_content_units')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_units_by_ids')
+    def test_save_units(self, mock_associate, mock_add, mock_update, mock_get, mock_path):
+        # Setup
+        new_unit = self.mixin.init_unit('t', {'k': 'a'}, {'m': 'm1'}, '/bar')
+        existing_unit = self.mixin.init_unit('t', {'k': 'b'}, {'m': 'm2'}, '/bar')
+        mock_get.return_value = [{'_id': 'existing', 'k': 'b'}]
+        mock_add.return_value = ['new']
+        associated = []
+        mock_associate.side_effect = lambda repo_id, unit_ids: associated.extend(unit_ids)
+
+        # Test
+        saved = self.mixin.save_units([new_unit, existing_unit])
+
+        # Verify
+        self.assertEqual(saved, [new_unit, existing_unit])
+        self.assertEqual(new_unit.id, 'new')
+        self.assertEqual(existing_unit.id, 'existing')
+        self.assertEqual(1, mock_get.call_count)
+        self.assertEqual(1, mock_add.call_count)
+        self.assertEqual(len(mock_add.call_args[0][1]), 1)
+        self.assertEqual(1, mock_update.call_count)
+        self.assertEqual([unit_id for unit_id, delta in mock_update.call_args[0][1]],
+                         ['existing'])
+        self.assertEqual(associated, [('t', 'new'), ('t', 'existing')])
+        self.assertEqual(1, self.mixin._added_count)
+        self.assertEqual(1, self.mixin._updated_count)
+
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'request_content_unit_file_path')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.update_content_units')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_units_by_ids')
+    def test_save_units_added_concurrently(self, mock_associate, mock_add, mock_update,
+                                           mock_get, mock_path):
+        # Setup
+        unit = self.mixin.init_unit('t', {'k': 'a'}, {'m': 'm1'}, '/bar')
+        mock_get.side_effect = [[], [{'_id': 'raced', 'k': 'a'}]]
+        mock_add.return_value = [None]
+
+        # Test
+        self.mixin.save_units([unit])
+
+        # Verify
+        self.assertEqual(unit.id, 'raced')
+        self.assertEqual(2, mock_get.call_count)
+        self.assertEqual([unit_id for unit_id, delta in mock_update.call_args[0][1]], ['raced'])
+        self.assertEqual(0, self.mixin._added_count)
+        self.assertEqual(1, self.mixin._updated_count)
+
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'request_content_unit_file_path')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_units_by_ids')
+    def test_save_units_with_error(self, mock_associate, mock_get, mock_path):
+        # Setup
+        unit = self.mixin.init_unit('t', {'k': 'a'}, {'m': 'm1'}, '/bar')
+        mock_get.side_effect = Exception()
+
+        # Test
+        self.assertRaises(mixins.ImporterConduitException, self.mixin.save_units, [unit])
+        self.assertEqual(0, mock_associate.call_count)
+
     @mock.patch('pulp.server.managers.content.cud.ContentManager.link_referenced_content_units')
     def test_link_unit(self, mock_link):
         # Setup
@@ -815,15 +889,13 @@ class StatusMixinTests(unittest.TestCase):
     def setUp(self):
         manager_factory.initialize()
 
-    @mock.patch('pulp.server.db.model.TaskStatus.objects')
+    @mock.patch('pulp.plugins.conduits.mixins.status_writer')
     @mock.patch('pulp.plugins.conduits.mixins.get_current_task_id')
-    def test_set_progress(self, mock_get_task_id, mock_task_status_objects):
+    def test_set_progress(self, mock_get_task_id, mock_status_writer):
         # Setup
         self.report_id = 'test-report'
         task_id = 'test-id'
         mock_get_task_id.return_value = task_id
-        test_task_documents = mock.Mock()
-        mock_task_status_objects.return_value = test_task_documents
         self.mixin = mixins.StatusMixin(self.report_id, mixins.ImporterConduitException)
 
         # Test
@@ -831,14 +903,12 @@ class StatusMixinTests(unittest.TestCase):
         self.mixin.set_progress(status)
 
         # Verify
-        mock_task_status_objects.assert_called_with(task_id=task_id)
-        self.assertEqual(1, test_task_documents.update_one.call_count)
-        test_task_documents.update_one.assert_called_with(
-            set__progress_report={'test-report': 'status'})
+        mock_status_writer.update.assert_called_once_with(
+            task_id, progress_report={'test-report': 'status'})
 
-    @mock.patch('pulp.server.db.model.TaskStatus.objects')
+    @mock.patch('pulp.plugins.conduits.mixins.status_writer')
     @mock.patch('pulp.plugins.conduits.mixins.get_current_task_id')
-    def test_set_progress_no_task(self, mock_get_task_id, mock_task_status_objects):
+    def test_set_progress_no_task(self, mock_get_task_id, mock_status_writer):
         # Setup
         mock_get_task_id.return_value = None
         self.mixin = mixins.StatusMixin('', mixins.ImporterConduitException)
@@ -848,15 +918,15 @@ class StatusMixinTests(unittest.TestCase):
         self.mixin.set_progress(status)
 
         # Verify
-        self.assertFalse(mock_task_status_objects.called)
+        self.assertFalse(mock_status_writer.update.called)
 
-    @mock.patch('pulp.server.db.model.TaskStatus.objects')
-    def test_set_progress_with_exception(self, mock_call):
+    @mock.patch('pulp.plugins.conduits.mixins.status_writer')
+    def test_set_progress_with_exception(self, mock_status_writer):
         # Setup
         self.report_id = 'test-report'
         self.mixin = mixins.StatusMixin(self.report_id, mixins.ImporterConduitException)
         self.mixin.task_id = 'test_id'
-        mock_call.side_effect = Exception()
+        mock_status_writer.update.side_effect = Exception()
 
         # Test
         self.assertRaises(mixins.ImporterConduitException, self.mixin.set_progress, 'foo')
@@ -1040,7 +1040,7 @@ class DownloadStepTests(unittest.TestCase):
         self.assertTrue(dlstep.downloader.is_canceled)
 
 
-@patch('pulp.plugins.util.publish_step.repo_controller.associate_single_unit')
+@patch('pulp.plugins.util.publish_step.repo_controller.associate_units_bulk')
 @patch('pulp.plugins.util.publish_step.units_controller.find_units')
 class TestGetLocalUnitsStep(unittest.TestCase):
 
@@ -1076,7 +1076,7 @@ class TestGetLocalUnitsStep(unittest.TestCase):
 
         self.step.process_main()
 
-        mock_paginate.assert_called_once_with(self.step.parent.available_units, 50)
+        mock_paginate.assert_called_once_with(self.step.parent.available_units, 10000)
 
     def test_saves_unit(self, mock_find_units, mock_associate):
         """
@@ -1090,12 +1090,30 @@ class TestGetLocalUnitsStep(unittest.TestCase):
         mock_find_units.return_value = [existing_demo]
 
         self.step.process_main()
-        mock_associate.assert_called_once_with('fake_repo', existing_demo)
+        mock_associate.assert_called_once_with('fake_repo', [existing_demo])
         mock_find_units.assert_called_once_with((demo, ))
 
         # Ensure that the unit was not marked for download
         self.assertEqual(self.step.units_to_download, [])
 
+    def test_associates_all_pages_at_once(self, mock_find_units, mock_associate):
+        """
+        Test that the units found in every page are associated with a single bulk call
+        """
+        self.step.unit_pagination_size = 1
+        demo_1 = self.DemoModel(key_field='a')
+        demo_2 = self.DemoModel(key_field='b')
+        self.parent.available_units = [demo_1, demo_2]
+        existing_1 = self.DemoModel(key_field='a', id='foo')
+        existing_2 = self.DemoModel(key_field='b', id='bar')
+        mock_find_units.side_effect = [[existing_1], [existing_2]]
+
+        self.step.process_main()
+
+        self.assertEqual(mock_find_units.call_count, 2)
+        mock_associate.assert_called_once_with('fake_repo', [existing_1, existing_2])
+        self.assertEqual(self.step.units_to_download, [])
+
     def test_populates_units_to_download(self, mock_find_units, mock_associate):
         """
         Test that if a unit does not exist in the database it is added to the
@@ -1111,7 +1129,7 @@ class TestGetLocalUnitsStep(unittest.TestCase):
         mock_find_units.assert_called_once_with((demo_1, demo_2))
 
         # The one that exists is associated
-        mock_associate.assert_called_once_with('fake_repo', existing_demo)
+        mock_associate.assert_called_once_with('fake_repo', [existing_demo])
         # The one that does not exist yet is added to the download list
         self.assertEqual(self.step.units_to_download, [demo_1])
 
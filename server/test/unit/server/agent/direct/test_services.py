@@ -156,21 +156,19 @@ class TestReplyHandler(TestCase):
                                                         constants.CALL_ACCEPTED_STATE])
         mock_returned_tasks.update_one.assert_called_with(set__state=constants.CALL_RUNNING_STATE)
 
-    @patch('pulp.server.db.model.TaskStatus.objects')
-    def test_progress_reported(self, mock_task_objects):
+    @patch('pulp.server.agent.direct.services.status_writer')
+    def test_progress_reported(self, mock_status_writer):
         task_id = 'task_1'
         call_context = {'task_id': task_id}
         progress_report = {'step': 'step-1'}
-        test_task_documents = Mock()
-        mock_task_objects.return_value = test_task_documents
         document = Document(routing=['A', 'B'], data=call_context, details=progress_report)
         reply = Progress(document)
         handler = self.reply_handler()
         handler.progress(reply)
 
-        # validate task updated
-        mock_task_objects.assert_called_with(task_id=task_id)
-        test_task_documents.update_one.assert_called_with(set__progress_report=progress_report)
+        # validate task update buffered
+        mock_status_writer.update.assert_called_once_with(task_id,
+                                                          progress_report=progress_report)
 
     @patch('pulp.common.dateutils.format_iso8601_datetime')
     @patch('pulp.server.db.model.TaskStatus.objects')
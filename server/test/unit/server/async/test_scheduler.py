@@ -12,6 +12,7 @@ from pulp.server.async import scheduler
 from pulp.server.async.celery_instance import celery as app
 from pulp.server.db.model import dispatch, Worker
 from pulp.server.managers.factory import initialize
+from pulp.server.managers.schedule import utils
 
 
 initialize()
@@ -214,7 +215,8 @@ class TestSchedulerInit(unittest.TestCase):
 
         self.assertTrue(my_scheduler._schedule is None)
         self.assertTrue(isinstance(my_scheduler._failure_watcher, scheduler.FailureWatcher))
-        self.assertTrue(my_scheduler._loaded_from_db_count == 0)
+        self.assertTrue(my_scheduler._most_recent_timestamp == 0)
+        self.assertTrue(my_scheduler._most_recent_deletion == 0)
         self.assertTrue(not mock_spawn_pulp_monitor_threads.called)
         self.assertTrue(scheduler.Scheduler._mongo_initialized is False)
         mock_base_init.assert_called_once_with(arg1, arg2, app=app, kwarg1=kwarg1, kwarg2=kwarg2)
@@ -257,10 +259,10 @@ class TestSchedulerSpawnPulpMonitorThreads(unittest.TestCase):
 
 class TestSchedulerTick(unittest.TestCase):
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
-    def test_calls_superclass(self, mock_celerybeatlock, mock_worker_watcher, mock_tick):
+    def test_calls_heap_tick(self, mock_celerybeatlock, mock_worker_watcher, mock_tick):
         sched_instance = scheduler.Scheduler()
 
         sched_instance.tick()
@@ -269,7 +271,7 @@ class TestSchedulerTick(unittest.TestCase):
 
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
     @mock.patch.object(scheduler.FailureWatcher, 'trim')
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
     def test_calls_trim(self, mock_celerybeatlock, mock_worker_watcher, mock_tick, mock_trim):
@@ -280,7 +282,7 @@ class TestSchedulerTick(unittest.TestCase):
         mock_trim.assert_called_once_with()
 
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
     def test_calls_handle_heartbeat(self, mock_celerybeatlock, mock_worker_watcher, mock_tick):
@@ -294,7 +296,7 @@ class TestSchedulerTick(unittest.TestCase):
     @mock.patch('pulp.server.async.scheduler.datetime')
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     def test_heartbeat_lock_insert_success(self, mock_tick, mock_celerybeatlock,
                                            mock_worker_watcher, mock_timestamp):
 
@@ -311,7 +313,7 @@ class TestSchedulerTick(unittest.TestCase):
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     def test_heartbeat_lock_update(self, mock_tick, mock_celerybeatlock, mock_worker_watcher):
 
         mock_celerybeatlock.objects.return_value.update.return_value = 1
@@ -324,7 +326,7 @@ class TestSchedulerTick(unittest.TestCase):
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     def test_heartbeat_lock_delete(self, mock_tick, mock_celerybeatlock, mock_worker_watcher):
 
         mock_celerybeatlock.objects.return_value.update.return_value = 0
@@ -339,7 +341,7 @@ class TestSchedulerTick(unittest.TestCase):
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
     @mock.patch('pulp.server.async.scheduler.worker_watcher')
     @mock.patch('pulp.server.async.scheduler.CeleryBeatLock')
-    @mock.patch('celery.beat.Scheduler.tick')
+    @mock.patch('pulp.server.async.scheduler.Scheduler.heap_tick')
     def test_heartbeat_lock_exception(self, mock_tick, mock_celerybeatlock, mock_worker_watcher):
 
         mock_celerybeatlock.objects.return_value.update.return_value = 0
@@ -351,6 +353,146 @@ class TestSchedulerTick(unittest.TestCase):
         self.assertFalse(mock_tick.called)
 
 
+@mock.patch.object(scheduler.Scheduler, 'update_schedule')
+@mock.patch.object(scheduler.Scheduler, 'maybe_due')
+@mock.patch('pulp.server.async.scheduler.time')
+class TestSchedulerHeapTick(unittest.TestCase):
+    def setUp(self):
+        with mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock()):
+            self.sched_instance = scheduler.Scheduler()
+        self.sched_instance.publisher = mock.Mock()
+        self.entries = {'a': mock.Mock(), 'b': mock.Mock()}
+        self.sched_instance._schedule = dict(self.entries)
+
+    def test_first_tick_asks_all(self, mock_time, mock_maybe_due, mock_update):
+        mock_time.time.return_value = 1000
+        mock_maybe_due.side_effect = lambda entry, publisher: {
+            self.entries['a']: 10, self.entries['b']: 20}[entry]
+
+        ret = self.sched_instance.heap_tick()
+
+        self.assertEqual(ret, 10)
+        self.assertEqual(mock_maybe_due.call_count, 2)
+        self.assertEqual(sorted(self.sched_instance._heap), [(1010, 'a'), (1020, 'b')])
+
+    def test_asks_due_entries_only(self, mock_time, mock_maybe_due, mock_update):
+        mock_time.time.return_value = 1000
+        mock_maybe_due.side_effect = lambda entry, publisher: {
+            self.entries['a']: 10, self.entries['b']: 20}[entry]
+        self.sched_instance.heap_tick()
+        mock_maybe_due.reset_mock()
+        mock_time.time.return_value = 1015
+
+        ret = self.sched_instance.heap_tick()
+
+        mock_maybe_due.assert_called_once_with(self.entries['a'], self.sched_instance.publisher)
+        self.assertEqual(ret, 5)
+        self.assertEqual(sorted(self.sched_instance._heap), [(1020, 'b'), (1025, 'a')])
+
+    def test_asks_replaced_entry(self, mock_time, mock_maybe_due, mock_update):
+        """
+        Make sure the entry that replaced the one that ran is the one asked next time.
+        """
+        mock_time.time.return_value = 1000
+        mock_maybe_due.return_value = 10
+        self.sched_instance._schedule = {'a': self.entries['a']}
+        self.sched_instance.heap_tick()
+        new_entry = mock.Mock()
+        self.sched_instance._schedule['a'] = new_entry
+        mock_time.time.return_value = 1010
+
+        self.sched_instance.heap_tick()
+
+        mock_maybe_due.assert_called_with(new_entry, self.sched_instance.publisher)
+
+    def test_not_due_again(self, mock_time, mock_maybe_due, mock_update):
+        """
+        Make sure an entry that does not report when it will be due is asked after max_interval.
+        """
+        mock_time.time.return_value = 1000
+        mock_maybe_due.return_value = 0
+
+        ret = self.sched_instance.heap_tick()
+
+        self.assertEqual(ret, self.sched_instance.max_interval)
+        self.assertEqual(self.sched_instance._heap[0][0], 1000 + self.sched_instance.max_interval)
+
+    def test_removed_entry(self, mock_time, mock_maybe_due, mock_update):
+        mock_time.time.return_value = 1000
+        mock_maybe_due.return_value = 10
+        self.sched_instance.heap_tick()
+        del self.sched_instance._schedule['a']
+        mock_time.time.return_value = 1010
+
+        self.sched_instance.heap_tick()
+
+        self.assertEqual([name for t, name in self.sched_instance._heap], ['b'])
+
+    def test_updates_schedule(self, mock_time, mock_maybe_due, mock_update):
+        mock_time.time.return_value = 1000
+        mock_maybe_due.return_value = 10
+
+        self.sched_instance.heap_tick()
+
+        mock_update.assert_called_once_with()
+
+    def test_updated_entry_asked_now(self, mock_time, mock_maybe_due, mock_update):
+        """
+        Make sure an entry that was updated in the database is asked on the tick that loaded it,
+        and only once.
+        """
+        mock_time.time.return_value = 1000
+        mock_maybe_due.return_value = 10
+        self.sched_instance.heap_tick()
+        mock_maybe_due.reset_mock()
+        new_entry = mock.Mock()
+
+        def update_schedule():
+            self.sched_instance._schedule['a'] = new_entry
+            self.sched_instance._push('a', 0)
+        mock_update.side_effect = update_schedule
+        mock_time.time.return_value = 1005
+
+        self.sched_instance.heap_tick()
+
+        mock_maybe_due.assert_called_once_with(new_entry, self.sched_instance.publisher)
+        mock_update.side_effect = None
+        mock_maybe_due.reset_mock()
+        mock_time.time.return_value = 1012
+
+        self.sched_instance.heap_tick()
+
+        # the tuple pushed for "a" before it was updated is skipped
+        mock_maybe_due.assert_called_once_with(self.entries['b'], self.sched_instance.publisher)
+
+    def test_entry_removed_when_applied(self, mock_time, mock_maybe_due, mock_update):
+        """
+        Make sure an entry that was removed because it ran for the last time is not put back.
+        """
+        mock_time.time.return_value = 1000
+
+        def maybe_due(entry, publisher):
+            self.sched_instance._remove_entry('a')
+            return 10
+        mock_maybe_due.side_effect = maybe_due
+        self.sched_instance._schedule = {'a': self.entries['a']}
+
+        ret = self.sched_instance.heap_tick()
+
+        self.assertEqual(ret, self.sched_instance.max_interval)
+        self.assertEqual(self.sched_instance._heap, [])
+        self.assertEqual(self.sched_instance._next_due, {})
+
+    def test_empty(self, mock_time, mock_maybe_due, mock_update):
+        mock_time.time.return_value = 1000
+        self.sched_instance._schedule = {}
+
+        ret = self.sched_instance.heap_tick()
+
+        self.assertEqual(ret, self.sched_instance.max_interval)
+        self.assertFalse(mock_maybe_due.called)
+
+
 class TestSchedulerSetupSchedule(unittest.TestCase):
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
@@ -407,57 +549,100 @@ class TestSchedulerSetupSchedule(unittest.TestCase):
 
         # make sure it chose the maximum enabled timestamp
         self.assertEqual(sched_instance._most_recent_timestamp, 1387218569.811224)
+        self.assertEqual(sched_instance._most_recent_deletion, 0)
         # make sure the entry with no remaining runs does not go into the schedule
         self.assertTrue('529f4bd93de3a31d0ec77340' not in sched_instance._schedule)
 
-
-class TestSchedulerScheduleChanged(unittest.TestCase):
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
-    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_count_changed(self, mock_updated_since, mock_get_enabled):
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled', return_value=[])
+    def test_resets_heap(self, mock_get_enabled):
+        sched_instance = scheduler.Scheduler()
+        sched_instance._heap = [(0, 'a')]
+
+        sched_instance.setup_schedule()
+
+        self.assertTrue(sched_instance._heap is None)
+
+
+@mock.patch('pulp.server.managers.schedule.utils.get_deleted_since', return_value=[])
+@mock.patch('pulp.server.managers.schedule.utils.get_changed_since', return_value=[])
+class TestSchedulerUpdateSchedule(unittest.TestCase):
+    def setUp(self):
+        with mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock()):
+            self.sched_instance = scheduler.Scheduler()
+        self.sched_instance._schedule = {}
+        self.sched_instance._most_recent_timestamp = 1000
+        self.sched_instance._most_recent_deletion = 2000
+        self.sched_instance._updated_at = time.time()
+
+    def test_queries_since_most_recent(self, mock_changed_since, mock_deleted_since):
+        self.sched_instance.update_schedule()
+
+        mock_changed_since.assert_called_once_with(1000 - self.sched_instance.update_overlap)
+        mock_deleted_since.assert_called_once_with(2000 - self.sched_instance.update_overlap)
+
+    def test_adds_changed(self, mock_changed_since, mock_deleted_since):
+        mock_changed_since.return_value = [dict(SCHEDULES[0])]
+        self.sched_instance.populate_heap()
+
+        self.sched_instance.update_schedule()
+
+        entry = self.sched_instance._schedule['529f4bd93de3a31d0ec77338']
+        self.assertTrue(isinstance(entry, dispatch.ScheduleEntry))
+        self.assertEqual(self.sched_instance._most_recent_timestamp, 1387218569.811224)
+        # it is asked on the next tick
+        self.assertEqual(self.sched_instance._heap, [(0, '529f4bd93de3a31d0ec77338')])
+
+    def test_keeps_applied(self, mock_changed_since, mock_deleted_since):
         """
-        This test ensures that if the number of enabled schedules changes, the schedule_changed
-        property returns True.
+        Make sure a change read again, because of the overlap, does not replace the entry.
         """
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+        mock_changed_since.return_value = [dict(SCHEDULES[0])]
+        self.sched_instance.update_schedule()
+        entry = self.sched_instance._schedule['529f4bd93de3a31d0ec77338']
+        mock_changed_since.return_value = [dict(SCHEDULES[0])]
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count + 1
+        self.sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is True)
+        self.assertTrue(self.sched_instance._schedule['529f4bd93de3a31d0ec77338'] is entry)
 
-    @mock.patch('threading.Thread', new=mock.MagicMock())
-    @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
-    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_new_updated(self, mock_updated_since, mock_get_enabled):
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+    def test_removes_disabled(self, mock_changed_since, mock_deleted_since):
+        self.sched_instance._schedule['529f4bd93de3a31d0ec77338'] = mock.Mock()
+        mock_changed_since.return_value = [dict(SCHEDULES[0], enabled=False)]
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count
-        mock_updated_since.return_value.count.return_value = 1
+        self.sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is True)
+        self.assertEqual(self.sched_instance._schedule, {})
 
-    @mock.patch('threading.Thread', new=mock.MagicMock())
-    @mock.patch('pulp.server.async.scheduler.Scheduler._mongo_initialized', True)
-    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
-    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_no_changes(self, mock_updated_since, mock_get_enabled):
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+    def test_removes_no_remaining_runs(self, mock_changed_since, mock_deleted_since):
+        self.sched_instance._schedule['529f4bd93de3a31d0ec77340'] = mock.Mock()
+        mock_changed_since.return_value = [dict(SCHEDULES[2])]
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        # -1 because there is an ignored schedule that has 0 remaining runs
-        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) - 1
+        self.sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is False)
+        self.assertEqual(self.sched_instance._schedule, {})
+
+    def test_removes_deleted(self, mock_changed_since, mock_deleted_since):
+        self.sched_instance._schedule = {'a': mock.Mock(), 'b': mock.Mock()}
+        self.sched_instance.populate_heap()
+        mock_deleted_since.return_value = [{'schedule_id': 'a', 'deleted': 2500}]
+
+        self.sched_instance.update_schedule()
+
+        self.assertEqual(self.sched_instance._schedule.keys(), ['b'])
+        self.assertEqual(self.sched_instance._next_due, {'b': 0})
+        self.assertEqual(self.sched_instance._most_recent_deletion, 2500)
+
+    @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
+    def test_reloads_after_retention(self, mock_setup_schedule, mock_changed_since,
+                                     mock_deleted_since):
+        self.sched_instance._updated_at = time.time() - utils.DELETED_RETENTION_SECONDS
+
+        self.sched_instance.update_schedule()
+
+        mock_setup_schedule.assert_called_once_with()
+        self.assertFalse(mock_changed_since.called)
 
 
 class TestSchedulerSchedule(unittest.TestCase):
@@ -474,26 +659,44 @@ class TestSchedulerSchedule(unittest.TestCase):
         mock_get_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'update_schedule')
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
-    @mock.patch.object(scheduler.Scheduler, 'schedule_changed', new=True)
-    def test_schedule_changed(self, mock_setup_schedule):
-        sched_instance = scheduler.Scheduler()
-
-        sched_instance.schedule
-
-        # make sure it called the setup_schedule() method
-        mock_setup_schedule.assert_called_once_with()
-
-    @mock.patch('threading.Thread', new=mock.MagicMock())
-    @mock.patch.object(scheduler.Scheduler, 'schedule_changed', return_value=False)
-    @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
-    def test_schedule_returns_value(self, mock_setup_schedule, mock_schedule_changed):
+    def test_schedule_returns_value(self, mock_setup_schedule, mock_update_schedule):
         sched_instance = scheduler.Scheduler()
         sched_instance._schedule = mock.Mock()
 
         ret = sched_instance.schedule
 
         self.assertTrue(ret is sched_instance._schedule)
+        # changes are only read once per tick
+        self.assertFalse(mock_update_schedule.called)
+
+
+class TestSchedulerReserve(unittest.TestCase):
+    def setUp(self):
+        with mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock()):
+            self.sched_instance = scheduler.Scheduler()
+        self.sched_instance._schedule = {}
+
+    def test_replaces_entry(self):
+        call = dispatch.ScheduledCall('PT1H', 'pulp.tasks.dosomething')
+        entry = call.as_schedule_entry()
+        self.sched_instance._schedule[entry.name] = entry
+
+        with mock.patch.object(dispatch.ScheduledCall, 'save'):
+            new_entry = self.sched_instance.reserve(entry)
+
+        self.assertTrue(self.sched_instance._schedule[entry.name] is new_entry)
+
+    def test_removes_last_run(self):
+        call = dispatch.ScheduledCall('PT1H', 'pulp.tasks.dosomething', remaining_runs=1)
+        entry = call.as_schedule_entry()
+        self.sched_instance._schedule[entry.name] = entry
+
+        with mock.patch.object(dispatch.ScheduledCall, 'save'):
+            self.sched_instance.reserve(entry)
+
+        self.assertFalse(entry.name in self.sched_instance._schedule)
 
 
 class TestSchedulerAdd(unittest.TestCase):
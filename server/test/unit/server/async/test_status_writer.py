@@ -0,0 +1,106 @@
+"""
+This module contains tests for the pulp.server.async.status_writer module.
+"""
+import mock
+
+from ...base import ResourceReservationTests
+from pulp.common import constants
+from pulp.server.async.status_writer import TaskStatusWriter
+from pulp.server.db.model import TaskStatus
+
+
+class TestTaskStatusWriter(ResourceReservationTests):
+
+    def setUp(self):
+        super(TestTaskStatusWriter, self).setUp()
+        # A long interval keeps the timer from flushing while a test runs
+        self.writer = TaskStatusWriter(interval=3600)
+
+    def tearDown(self):
+        self.writer.discard('task_1')
+        self.writer.discard('task_2')
+        self.writer.flush()
+        super(TestTaskStatusWriter, self).tearDown()
+
+    def test_update_is_buffered(self):
+        TaskStatus(task_id='task_1').save()
+
+        self.writer.update('task_1', progress_report={'step': 1})
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').progress_report, {})
+
+    def test_updates_coalesced(self):
+        TaskStatus(task_id='task_1').save()
+        TaskStatus(task_id='task_2').save()
+        self.writer.update('task_1', state=constants.CALL_RUNNING_STATE, start_time='now')
+        self.writer.update('task_1', progress_report={'step': 1})
+        self.writer.update('task_1', progress_report={'step': 2})
+        self.writer.update('task_2', progress_report={'step': 3})
+
+        with mock.patch.object(TaskStatus, '_get_collection',
+                               wraps=TaskStatus._get_collection) as get_collection:
+            self.writer.flush()
+
+        # everything is written with a single bulk operation
+        self.assertEqual(get_collection.call_count, 1)
+        task_1 = TaskStatus.objects.get(task_id='task_1')
+        self.assertEqual(task_1.state, constants.CALL_RUNNING_STATE)
+        self.assertEqual(task_1.start_time, 'now')
+        self.assertEqual(task_1.progress_report, {'step': 2})
+        self.assertEqual(TaskStatus.objects.get(task_id='task_2').progress_report, {'step': 3})
+
+    def test_flush_single_task(self):
+        TaskStatus(task_id='task_1').save()
+        TaskStatus(task_id='task_2').save()
+        self.writer.update('task_1', progress_report={'step': 1})
+        self.writer.update('task_2', progress_report={'step': 2})
+
+        self.writer.flush('task_1')
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').progress_report, {'step': 1})
+        self.assertEqual(TaskStatus.objects.get(task_id='task_2').progress_report, {})
+
+    def test_state_does_not_overwrite_complete_state(self):
+        TaskStatus(task_id='task_1', state=constants.CALL_CANCELED_STATE).save()
+        self.writer.update('task_1', state=constants.CALL_RUNNING_STATE, start_time='now')
+
+        self.writer.flush()
+
+        task_status = TaskStatus.objects.get(task_id='task_1')
+        self.assertEqual(task_status.state, constants.CALL_CANCELED_STATE)
+        self.assertEqual(TaskStatus.objects(task_id='task_1').count(), 1)
+
+    def test_state_upserted(self):
+        self.writer.update('task_1', state=constants.CALL_RUNNING_STATE, start_time='now')
+
+        self.writer.flush()
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').state,
+                         constants.CALL_RUNNING_STATE)
+
+    @mock.patch('pulp.server.async.status_writer.dateutils.now_utc_timestamp')
+    def test_flush_sets_last_updated(self, mock_now):
+        TaskStatus(task_id='task_1').save()
+        self.writer.update('task_1', progress_report={'step': 1})
+        mock_now.return_value = 1000.0
+
+        self.writer.flush()
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').last_updated, 1000.0)
+
+    def test_discard(self):
+        TaskStatus(task_id='task_1').save()
+        self.writer.update('task_1', progress_report={'step': 1})
+
+        self.writer.discard('task_1')
+        self.writer.flush()
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').progress_report, {})
+
+    def test_no_interval_writes_immediately(self):
+        writer = TaskStatusWriter(interval=0)
+        TaskStatus(task_id='task_1').save()
+
+        writer.update('task_1', progress_report={'step': 1})
+
+        self.assertEqual(TaskStatus.objects.get(task_id='task_1').progress_report, {'step': 1})
@@ -13,11 +13,11 @@ import mock
 
 from ...base import PulpServerTests, ResourceReservationTests
 from pulp.common import dateutils
-from pulp.common.constants import CALL_CANCELED_STATE, CALL_FINISHED_STATE
+from pulp.common.constants import CALL_CANCELED_STATE, CALL_FINISHED_STATE, CALL_RUNNING_STATE
 from pulp.common.tags import action_tag, resource_tag, RESOURCE_CONSUMER_TYPE
 from pulp.devel.unit.util import compare_dict
 from pulp.server.async import tasks
-from pulp.server.db.model import Worker, ReservedResource, TaskStatus
+from pulp.server.db.model import Worker, ReservedResource, ReservationRelease, TaskStatus
 from pulp.server.db.reaper import queue_reap_expired_documents
 from pulp.server.exceptions import NoWorkers, PulpException, PulpCodedException
 from pulp.server.maintenance.monthly import queue_monthly_maintenance
@@ -51,6 +51,16 @@ class TestQueueReservedTask(ResourceReservationTests):
         self.patch_f = mock.patch('pulp.server.async.tasks._release_resource', autospec=True)
         self.mock__release_resource = self.patch_f.start()
 
+        self.patch_g = mock.patch('pulp.server.async.tasks._get_last_release')
+        self.mock_get_last_release = self.patch_g.start()
+
+        self.patch_h = mock.patch('pulp.server.async.tasks._wait_for_release')
+        self.mock_wait_for_release = self.patch_h.start()
+
+        self.patch_i = mock.patch('pulp.server.async.tasks._repair_reservation_counts',
+                                  return_value=0)
+        self.mock_repair_reservation_counts = self.patch_i.start()
+
         super(TestQueueReservedTask, self).setUp()
 
     def tearDown(self):
@@ -60,6 +70,9 @@ class TestQueueReservedTask(ResourceReservationTests):
         self.patch_d.stop()
         self.patch_e.stop()
         self.patch_f.stop()
+        self.patch_g.stop()
+        self.patch_h.stop()
+        self.patch_i.stop()
         super(TestQueueReservedTask, self).tearDown()
 
     def test_creates_and_saves_reserved_resource(self):
@@ -92,16 +105,23 @@ class TestQueueReservedTask(ResourceReservationTests):
             name='worker1', last_heartbeat=datetime.utcnow())
         tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
         self.assertTrue(not self.mock_get_unreserved_worker.called)
-        self.assertTrue(not self.mock_time.sleep.called)
+        self.assertTrue(not self.mock_wait_for_release.called)
+
+    def test_get_worker_for_reservation_counts_reservation(self):
+        worker = Worker(name='worker1', last_heartbeat=datetime.utcnow())
+        worker.save()
+        self.mock_get_worker_for_reservation.return_value = worker
+        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+        self.assertEqual(Worker.objects.get(name='worker1').reservation_count, 1)
 
     def test_get_unreserved_worker_breaks_out_of_loop(self):
         self.mock_get_worker_for_reservation.side_effect = NoWorkers()
         self.mock_get_unreserved_worker.return_value = Worker(name='worker1',
                                                               last_heartbeat=datetime.utcnow())
         tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.assertTrue(not self.mock_time.sleep.called)
+        self.assertTrue(not self.mock_wait_for_release.called)
 
-    def test_loops_and_sleeps_waiting_for_available_worker(self):
+    def test_loops_and_waits_for_release(self):
         self.mock_get_worker_for_reservation.side_effect = NoWorkers()
         self.mock_get_unreserved_worker.side_effect = NoWorkers()
 
@@ -111,10 +131,10 @@ class TestQueueReservedTask(ResourceReservationTests):
         def side_effect(*args):
             def second_call(*args):
                 raise BreakOutException()
-            self.mock_time.sleep.side_effect = second_call
+            self.mock_wait_for_release.side_effect = second_call
             return None
 
-        self.mock_time.sleep.side_effect = side_effect
+        self.mock_wait_for_release.side_effect = side_effect
 
         try:
             tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2],
@@ -124,7 +144,24 @@ class TestQueueReservedTask(ResourceReservationTests):
         else:
             self.fail('_queue_reserved_task should have raised a BreakOutException')
 
-        self.mock_time.sleep.assert_has_calls([mock.call(0.25), mock.call(0.25)])
+        last_release = self.mock_get_last_release.return_value
+        self.mock_wait_for_release.assert_has_calls([mock.call(last_release),
+                                                     mock.call(last_release)])
+        self.assertTrue(not self.mock_time.sleep.called)
+
+    def test_repaired_counts_looks_again(self):
+        worker = Worker(name='worker1', last_heartbeat=datetime.utcnow())
+        self.mock_get_worker_for_reservation.side_effect = NoWorkers()
+        self.mock_get_unreserved_worker.side_effect = [NoWorkers(), worker]
+        self.mock_repair_reservation_counts.return_value = 1
+
+        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+
+        self.assertEqual(self.mock_get_unreserved_worker.call_count, 2)
+        self.assertTrue(not self.mock_wait_for_release.called)
+        self.mock_reserved_resource.assert_called_once_with(task_id='my_task_id',
+                                                            worker_name='worker1',
+                                                            resource_id='my_resource_id')
 
 
 class TestDeleteWorker(ResourceReservationTests):
@@ -181,6 +218,23 @@ class TestDeleteWorker(ResourceReservationTests):
         remove = self.mock_reserved_resource.objects.return_value.delete
         remove.assert_called_once_with()
 
+    @mock.patch('pulp.server.async.tasks.ReservationRelease', autospec=True)
+    def test_records_release(self, mock_reservation_release):
+        self.mock_reserved_resource.objects.return_value.delete.return_value = 2
+
+        tasks._delete_worker('worker1')
+
+        mock_reservation_release.assert_called_once_with(worker_name='worker1')
+        mock_reservation_release.return_value.save.assert_called_once_with()
+
+    @mock.patch('pulp.server.async.tasks.ReservationRelease', autospec=True)
+    def test_no_reservations_no_release(self, mock_reservation_release):
+        self.mock_reserved_resource.objects.return_value.delete.return_value = 0
+
+        tasks._delete_worker('worker1')
+
+        self.assertTrue(not mock_reservation_release.called)
+
     @mock.patch('pulp.server.async.tasks.Worker.objects')
     def test_removes_the_worker(self, mock_worker_objects):
         mock_document = mock.Mock()
@@ -280,6 +334,101 @@ class TestReleaseResource(ResourceReservationTests):
         self.assertEqual(rr_1['worker_name'], reserved_resource_1.worker_name)
         self.assertEqual(rr_1['resource_id'], 'resource_1')
 
+    def test_release_updates_worker_and_records_release(self):
+        """
+        Test that _release_resource() decrements the worker's reservation_count and records the
+        release so that waiting tasks are woken up.
+        """
+        Worker(name=WORKER_1, last_heartbeat=datetime.utcnow(), reservation_count=2).save()
+        ReservedResource(task_id='task_1', worker_name=WORKER_1, resource_id='resource_1').save()
+
+        tasks._release_resource('task_1')
+
+        self.assertEqual(Worker.objects.get(name=WORKER_1).reservation_count, 1)
+        releases = list(ReservationRelease.objects())
+        self.assertEqual(len(releases), 1)
+        self.assertEqual(releases[0].task_id, 'task_1')
+        self.assertEqual(releases[0].worker_name, WORKER_1)
+
+    def test_release_unknown_task_records_nothing(self):
+        """
+        Test that _release_resource() does not record a release for an unknown task.
+        """
+        tasks._release_resource('made_up_task_id')
+
+        self.assertEqual(ReservationRelease.objects.count(), 0)
+
+
+class TestRepairReservationCounts(ResourceReservationTests):
+    """
+    Test the _repair_reservation_counts() function.
+    """
+    def test_leaked_count_corrected(self):
+        Worker(name=WORKER_1, last_heartbeat=datetime.utcnow(), reservation_count=1).save()
+        Worker(name=WORKER_2, last_heartbeat=datetime.utcnow(), reservation_count=1).save()
+        ReservedResource(task_id='task_1', worker_name=WORKER_2, resource_id='resource_1').save()
+
+        repaired = tasks._repair_reservation_counts(interval=0)
+
+        self.assertEqual(repaired, 1)
+        self.assertEqual(Worker.objects.get(name=WORKER_1).reservation_count, 0)
+        self.assertEqual(Worker.objects.get(name=WORKER_2).reservation_count, 1)
+        self.assertEqual(tasks._get_unreserved_worker().name, WORKER_1)
+
+    def test_missing_count_corrected(self):
+        Worker(name=WORKER_1, last_heartbeat=datetime.utcnow(), reservation_count=0).save()
+        ReservedResource(task_id='task_1', worker_name=WORKER_1, resource_id='resource_1').save()
+        ReservedResource(task_id='task_2', worker_name=WORKER_1, resource_id='resource_2').save()
+
+        self.assertEqual(tasks._repair_reservation_counts(interval=0), 1)
+
+        self.assertEqual(Worker.objects.get(name=WORKER_1).reservation_count, 2)
+
+    def test_correct_counts_unchanged(self):
+        Worker(name=WORKER_1, last_heartbeat=datetime.utcnow()).save()
+
+        self.assertEqual(tasks._repair_reservation_counts(interval=0), 0)
+
+    @mock.patch('pulp.server.async.tasks.time')
+    def test_interval(self, mock_time):
+        Worker(name=WORKER_1, last_heartbeat=datetime.utcnow(), reservation_count=1).save()
+        mock_time.time.return_value = tasks._reservation_counts_repaired + 1
+
+        self.assertEqual(tasks._repair_reservation_counts(interval=10), 0)
+
+        self.assertEqual(Worker.objects.get(name=WORKER_1).reservation_count, 1)
+
+
+class TestWaitForRelease(ResourceReservationTests):
+    """
+    Test the _get_last_release() and _wait_for_release() functions.
+    """
+    def test_get_last_release_none(self):
+        self.assertTrue(tasks._get_last_release() is None)
+
+    def test_get_last_release(self):
+        ReservationRelease(task_id='task_1', worker_name=WORKER_1).save()
+        release = ReservationRelease(task_id='task_2', worker_name=WORKER_1)
+        release.save()
+
+        self.assertEqual(tasks._get_last_release(), release.id)
+
+    def test_wakes_on_release(self):
+        ReservationRelease(task_id='task_1', worker_name=WORKER_1).save()
+        last_release = tasks._get_last_release()
+        ReservationRelease(task_id='task_2', worker_name=WORKER_1).save()
+
+        start = datetime.utcnow()
+        tasks._wait_for_release(last_release, timeout=30)
+
+        self.assertTrue((datetime.utcnow() - start).seconds < 30)
+
+    @mock.patch('pulp.server.async.tasks.time.sleep')
+    def test_sleeps_when_nothing_released(self, mock_sleep):
+        tasks._wait_for_release(None)
+
+        mock_sleep.assert_called_once_with(tasks.RELEASE_POLL_INTERVAL)
+
 
 class TestTaskResult(unittest.TestCase):
 
@@ -355,8 +504,40 @@ class TestReservedTaskMixinApplyAsyncWithReservation(ResourceReservationTests):
         self.assertEqual(self.result, str(self.mock_uuid.uuid4.return_value))
 
 
+class TestTaskCall(ResourceReservationTests):
+
+    @mock.patch('celery.Task.__call__')
+    @mock.patch('pulp.server.async.tasks.status_writer')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_running_state_buffered(self, mock_request, mock_status_writer, mock_call):
+        mock_request.called_directly = False
+        mock_request.id = 'test_task_id'
+        TaskStatus('test_task_id').save()
+
+        task = tasks.Task()
+        task(1, 2)
+
+        update = mock_status_writer.update
+        self.assertEqual(update.call_count, 1)
+        self.assertEqual(update.call_args[0], ('test_task_id',))
+        self.assertEqual(update.call_args[1]['state'], CALL_RUNNING_STATE)
+        self.assertTrue(update.call_args[1]['start_time'] is not None)
+        mock_call.assert_called_once_with(1, 2)
+
+
 class TestTaskOnSuccessHandler(ResourceReservationTests):
 
+    @mock.patch('pulp.server.async.tasks.status_writer')
+    @mock.patch('pulp.server.async.tasks.Task.request')
+    def test_flushes_buffered_status(self, mock_request, mock_status_writer):
+        mock_request.called_directly = False
+        task_id = str(uuid.uuid4())
+        TaskStatus(task_id).save()
+
+        tasks.Task().on_success('retval', task_id, [], {})
+
+        mock_status_writer.flush.assert_called_once_with(task_id)
+
     @mock.patch('pulp.server.async.tasks.Task.request')
     def test_updates_task_status_correctly(self, mock_request):
         retval = 'random_return_value'
@@ -874,58 +1055,38 @@ class TestGetWorkerForReservation(ResourceReservationTests):
 
 class TestGetUnreservedWorker(ResourceReservationTests):
 
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_reserved_resources_queried_correctly(self, mock_reserved_resource):
-        find = mock_reserved_resource.objects.all
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
-        find.assert_called_once_with()
+    def test_worker_returned_when_one_worker_is_not_reserved(self):
+        Worker(name='a', last_heartbeat=datetime.utcnow(), reservation_count=1).save()
+        Worker(name='b', last_heartbeat=datetime.utcnow()).save()
 
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_worker_returned_when_one_worker_is_not_reserved(self, mock_reserved_resource,
-                                                             mock_worker_objects):
-        mock_worker_objects.return_value = [{'name': 'a'}, {'name': 'b'}]
-        mock_reserved_resource.objects.all.return_value = [{'worker_name': 'a'}]
         result = tasks._get_unreserved_worker()
-        self.assertEqual(result, {'name': 'b'})
 
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_no_workers_raised_when_all_workers_reserved(self, mock_reserved_resource, mock_worker):
-        mock_worker.objects.return_value = [{'name': 'a'}, {'name': 'b'}]
-        find = mock_reserved_resource.objects
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
+        self.assertEqual(result.name, 'b')
+        self.assertEqual(Worker.objects.get(name='b').reservation_count, 1)
+        self.assertEqual(Worker.objects.get(name='a').reservation_count, 1)
 
-    @mock.patch('pulp.server.async.tasks.Worker.objects')
-    @mock.patch('pulp.server.async.tasks.ReservedResource')
-    def test_no_workers_raised_when_there_are_no_workers(self, mock_reserved_resource, mock_worker):
-        mock_worker.objects.return_value = []
-        find = mock_reserved_resource.objects
-        find.return_value = [{'worker_name': 'a'}, {'worker_name': 'b'}]
-        try:
-            tasks._get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            self.fail("NoWorkers() Exception should have been raised.")
+    def test_worker_reserved_by_selection(self):
+        Worker(name='a', last_heartbeat=datetime.utcnow()).save()
+
+        tasks._get_unreserved_worker()
+
+        self.assertRaises(NoWorkers, tasks._get_unreserved_worker)
+
+    def test_no_workers_raised_when_all_workers_reserved(self):
+        Worker(name='a', last_heartbeat=datetime.utcnow(), reservation_count=1).save()
+        Worker(name='b', last_heartbeat=datetime.utcnow(), reservation_count=3).save()
+
+        self.assertRaises(NoWorkers, tasks._get_unreserved_worker)
+
+    def test_no_workers_raised_when_there_are_no_workers(self):
+        self.assertRaises(NoWorkers, tasks._get_unreserved_worker)
+
+    def test_scheduler_not_selected(self):
+        Worker(name='scheduler@some.hostname', last_heartbeat=datetime.utcnow()).save()
 
-    def test_is_worker(self):
-        self.assertTrue(tasks._is_worker("a_worker@some.hostname"))
+        self.assertRaises(NoWorkers, tasks._get_unreserved_worker)
 
-    def test_is_not_worker_is_scheduler(self):
-        self.assertEquals(tasks._is_worker("scheduler@some.hostname"), False)
+    def test_resource_manager_not_selected(self):
+        Worker(name='resource_manager@some.hostname', last_heartbeat=datetime.utcnow()).save()
 
-    def test_is_not_worker_is_resource_mgr(self):
-        self.assertEquals(tasks._is_worker("resource_manager@some.hostname"), False)
+        self.assertRaises(NoWorkers, tasks._get_unreserved_worker)
@@ -0,0 +1,156 @@
+import threading
+import unittest
+
+import mock
+
+from pulp.server.auth import cache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    @mock.patch('pulp.server.auth.cache.time.time')
+    def test_get(self, mock_time):
+        mock_time.return_value = 100
+        ttl_cache = cache.TTLCache(10)
+        ttl_cache.set('a', 1)
+
+        self.assertEqual(ttl_cache.get('a'), 1)
+        self.assertEqual(ttl_cache.get('b'), None)
+
+    @mock.patch('pulp.server.auth.cache.time.time')
+    def test_expired(self, mock_time):
+        mock_time.return_value = 100
+        ttl_cache = cache.TTLCache(10)
+        ttl_cache.set('a', 1)
+
+        mock_time.return_value = 110
+        self.assertEqual(ttl_cache.get('a'), None)
+
+    def test_least_recently_used_dropped(self):
+        ttl_cache = cache.TTLCache(10, max_entries=2)
+        ttl_cache.set('a', 1)
+        ttl_cache.set('b', 2)
+        ttl_cache.get('a')
+
+        ttl_cache.set('c', 3)
+
+        self.assertEqual(ttl_cache.get('a'), 1)
+        self.assertEqual(ttl_cache.get('b'), None)
+        self.assertEqual(ttl_cache.get('c'), 3)
+
+    def test_clear(self):
+        ttl_cache = cache.TTLCache(10)
+        ttl_cache.set('a', 1)
+
+        ttl_cache.clear()
+
+        self.assertEqual(ttl_cache.get('a'), None)
+
+
+@mock.patch('pulp.server.auth.cache.connection')
+class TestAuthCache(unittest.TestCase):
+
+    def setUp(self):
+        self.auth_cache = cache.AuthCache(ttl=10)
+
+    def test_inactive(self, mock_connection):
+        self.assertFalse(self.auth_cache.active)
+
+    def test_synchronize(self, mock_connection):
+        collection = mock_connection.get_collection.return_value
+        collection.find_one.return_value = {'_id': cache.GENERATION_ID, 'value': 3}
+        self.auth_cache.credentials.set('a', 'user')
+
+        self.auth_cache.synchronize()
+
+        mock_connection.get_collection.assert_called_once_with(cache.GENERATION_COLLECTION)
+        collection.find_one.assert_called_once_with({'_id': cache.GENERATION_ID})
+        self.assertTrue(self.auth_cache.active)
+        # the caches were filled under an unknown generation
+        self.assertEqual(self.auth_cache.credentials.get('a'), None)
+
+    def test_synchronize_same_generation(self, mock_connection):
+        collection = mock_connection.get_collection.return_value
+        collection.find_one.return_value = None
+        self.auth_cache.synchronize()
+        self.auth_cache.credentials.set('a', 'user')
+        self.auth_cache.permissions.set('user', True)
+
+        self.auth_cache.synchronize()
+
+        self.assertEqual(self.auth_cache.credentials.get('a'), 'user')
+        self.assertEqual(self.auth_cache.permissions.get('user'), True)
+
+    def test_release(self, mock_connection):
+        mock_connection.get_collection.return_value.find_one.return_value = None
+        self.auth_cache.synchronize()
+
+        self.auth_cache.release()
+
+        self.assertFalse(self.auth_cache.active)
+
+    def test_disabled(self, mock_connection):
+        auth_cache = cache.AuthCache(ttl=0)
+
+        auth_cache.synchronize()
+        auth_cache.invalidate()
+
+        self.assertFalse(auth_cache.active)
+        self.assertFalse(mock_connection.get_collection.called)
+
+    def test_invalidate(self, mock_connection):
+        self.auth_cache.credentials.set('a', 'user')
+        self.auth_cache.permissions.set('user', True)
+
+        self.auth_cache.invalidate()
+
+        self.assertEqual(self.auth_cache.credentials.get('a'), None)
+        self.assertEqual(self.auth_cache.permissions.get('user'), None)
+        mock_connection.get_collection.return_value.update.assert_called_once_with(
+            {'_id': cache.GENERATION_ID}, {'$inc': {'value': 1}}, upsert=True)
+
+    def test_set(self, mock_connection):
+        mock_connection.get_collection.return_value.find_one.return_value = None
+        self.auth_cache.synchronize()
+
+        self.auth_cache.set(self.auth_cache.permissions, 'user', True)
+
+        self.assertEqual(self.auth_cache.permissions.get('user'), True)
+
+    def test_set_inactive(self, mock_connection):
+        self.auth_cache.set(self.auth_cache.permissions, 'user', True)
+
+        self.assertEqual(self.auth_cache.permissions.get('user'), None)
+
+    def test_set_after_invalidate(self, mock_connection):
+        mock_connection.get_collection.return_value.find_one.return_value = None
+        self.auth_cache.synchronize()
+        self.auth_cache.invalidate()
+
+        self.auth_cache.set(self.auth_cache.permissions, 'user', True)
+
+        self.assertEqual(self.auth_cache.permissions.get('user'), None)
+
+    def test_set_after_generation_changed(self, mock_connection):
+        collection = mock_connection.get_collection.return_value
+        collection.find_one.return_value = {'_id': cache.GENERATION_ID, 'value': 3}
+        self.auth_cache.synchronize()
+        # another thread finds that another process invalidated the caches
+        collection.find_one.return_value = {'_id': cache.GENERATION_ID, 'value': 4}
+        thread = threading.Thread(target=self.auth_cache.synchronize)
+        thread.start()
+        thread.join()
+
+        self.auth_cache.set(self.auth_cache.permissions, 'user', True)
+
+        self.assertEqual(self.auth_cache.permissions.get('user'), None)
+
+    def test_credential_key(self, mock_connection):
+        key = self.auth_cache.credential_key('password', 'user', 'secret')
+
+        self.assertEqual(key, self.auth_cache.credential_key('password', 'user', 'secret'))
+        self.assertFalse('secret' in key)
+        self.assertNotEqual(key, self.auth_cache.credential_key('password', 'user', 'other'))
+        # a missing password is not the same as an empty one
+        self.assertNotEqual(self.auth_cache.credential_key('password', 'user', None),
+                            self.auth_cache.credential_key('password', 'user', ''))
@@ -539,12 +539,33 @@ class TestBatch(TestCase):
         self.assertEqual(batch.queues[fake_source.id], fake_queue())
         self.assertEqual(queue, fake_queue())
 
+    @patch('pulp.server.content.sources.container.managers.content_catalog_manager')
+    def test_find_entries(self, fake_manager):
+        requests = [Mock(type_id='a', unit_key=1),
+                    Mock(type_id='b', unit_key=2),
+                    Mock(type_id='a', unit_key=3)]
+        found = {'a': [['e-1'], ['e-3']], 'b': [['e-2']]}
+        fake_manager().find_many.side_effect = lambda type_id, keys: found[type_id]
+
+        # test
+        entries = Batch.find_entries(requests)
+
+        # validation
+        self.assertEqual(entries, [(requests[0], ['e-1']),
+                                   (requests[1], ['e-2']),
+                                   (requests[2], ['e-3'])])
+        self.assertEqual(fake_manager().find_many.call_count, 2)
+        fake_manager().find_many.assert_any_call('a', [1, 3])
+        fake_manager().find_many.assert_any_call('b', [2])
+
+    @patch('pulp.server.content.sources.container.Batch.find_entries')
     @patch('pulp.server.content.sources.container.Tracker.wait')
     @patch('pulp.server.content.sources.container.Batch.dispatch')
-    def test_download(self, fake_dispatch, fake_wait):
+    def test_download(self, fake_dispatch, fake_wait, fake_find):
         primary = Mock()
         sources = [Mock(), Mock()]
         requests = [Mock(), Mock(), Mock()]
+        fake_find.side_effect = lambda page: [(r, []) for r in page]
 
         queue_1 = Mock()
         queue_1.downloader = Mock()
@@ -566,8 +587,9 @@ class TestBatch(TestCase):
 
         # validation
         # initial dispatch
+        fake_find.assert_called_once_with(tuple(requests))
         for request in requests:
-            request.find_sources.assert_called_with(primary, sources)
+            request.find_sources.assert_called_with(primary, sources, [])
         calls = fake_dispatch.call_args_list
         self.assertEqual(len(calls), len(requests))
         for i, request in enumerate(requests):
@@ -646,10 +668,12 @@ class TestBatch(TestCase):
         self.assertEqual(report.downloads['source-2'].total_succeeded, 200)
         self.assertEqual(report.downloads['source-2'].total_failed, 10)
 
+    @patch('pulp.server.content.sources.container.Batch.find_entries')
     @patch('pulp.server.content.sources.container.Tracker.wait')
     @patch('pulp.server.content.sources.container.Batch.dispatch')
-    def test_download_with_exception(self, fake_dispatch, fake_wait):
+    def test_download_with_exception(self, fake_dispatch, fake_wait, fake_find):
         primary = Mock()
+        fake_find.side_effect = lambda page: [(r, []) for r in page]
         fake_dispatch.side_effect = ValueError()
         sources = [Mock(), Mock()]
         requests = [Mock(), Mock(), Mock()]
@@ -147,6 +147,29 @@ class TestRequest(TestCase):
         self.assertEqual(request.sources[4][0].id, primary.id)
         self.assertEqual(request.sources[4][1], url)
 
+    @patch('pulp.server.content.sources.container.managers.content_catalog_manager')
+    def test_find_sources_with_entries(self, fake_manager):
+        type_id = 'test_1'
+        unit_key = 1
+        destination = '/tmp/123'
+        url = 'http://redhat.com/repository'
+
+        primary = PrimarySource(None)
+        alternatives = dict([(s, ContentSource(s, d)) for s, d in DESCRIPTOR])
+
+        # test
+
+        request = Request(type_id, unit_key, url, destination)
+        request.find_sources(primary, alternatives, CATALOG)
+
+        # validation
+
+        self.assertFalse(fake_manager.called)
+        request.sources = list(request.sources)
+        self.assertEqual(len(request.sources), 5)
+        self.assertEqual(request.sources[0][0].id, 's-3')
+        self.assertEqual(request.sources[4][0].id, primary.id)
+
     def test_next_source(self):
         sources = [1, 2, 3]
         request = Request('', {}, '', '')
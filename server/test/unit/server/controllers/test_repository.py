@@ -190,6 +190,67 @@ class AssociateSingleUnitTests(unittest.TestCase):
             upsert=True)
 
 
+@patch('pulp.server.controllers.repository.update_unit_count')
+@patch('pulp.server.controllers.repository.dateutils.format_iso8601_utc_timestamp')
+@patch('pulp.server.controllers.repository.model.RepositoryContentUnit._get_collection')
+class AssociateUnitsBulkTests(unittest.TestCase):
+
+    def test_bulk_upserts(self, mock_get_collection, mock_get_timestamp, mock_update_count):
+        mock_get_timestamp.return_value = 'foo_tstamp'
+        bulk = mock_get_collection.return_value.initialize_unordered_bulk_op.return_value
+        bulk.execute.return_value = {'upserted': [{'index': 0, '_id': 'a'}]}
+        repo = MagicMock(repo_id='foo')
+        units = [DemoModel(id='bar', key_field='baz'), DemoModel(id='qux', key_field='quux')]
+
+        added = repo_controller.associate_units_bulk(repo, units)
+
+        self.assertEqual(added, 1)
+        bulk.find.assert_has_calls([
+            mock.call({'repo_id': 'foo', 'unit_id': 'bar', 'unit_type_id': 'demo_model'}),
+            mock.call().upsert(),
+            mock.call().upsert().update_one({
+                '$setOnInsert': {'created': 'foo_tstamp', '_ns': 'repo_content_units'},
+                '$set': {'updated': 'foo_tstamp'}}),
+            mock.call({'repo_id': 'foo', 'unit_id': 'qux', 'unit_type_id': 'demo_model'}),
+        ], any_order=True)
+        self.assertEqual(bulk.find.call_count, 2)
+        bulk.execute.assert_called_once_with()
+        mock_update_count.assert_called_once_with('foo', 'demo_model', 1)
+
+    @patch('pulp.server.controllers.repository.ASSOCIATE_BATCH_SIZE', 1)
+    def test_batches(self, mock_get_collection, mock_get_timestamp, mock_update_count):
+        bulk = mock_get_collection.return_value.initialize_unordered_bulk_op.return_value
+        bulk.execute.return_value = {'upserted': [{'index': 0, '_id': 'a'}]}
+        repo = MagicMock(repo_id='foo')
+        units = [DemoModel(id='bar', key_field='baz'), DemoModel(id='qux', key_field='quux')]
+
+        added = repo_controller.associate_units_bulk(repo, units)
+
+        self.assertEqual(added, 2)
+        self.assertEqual(bulk.execute.call_count, 2)
+        # the unit count is updated once per type, not once per batch
+        mock_update_count.assert_called_once_with('foo', 'demo_model', 2)
+
+    def test_duplicates_in_batch(self, mock_get_collection, mock_get_timestamp,
+                                 mock_update_count):
+        bulk = mock_get_collection.return_value.initialize_unordered_bulk_op.return_value
+        bulk.execute.return_value = {'upserted': []}
+        repo = MagicMock(repo_id='foo')
+        units = [DemoModel(id='bar', key_field='baz'), DemoModel(id='bar', key_field='baz')]
+
+        added = repo_controller.associate_units_bulk(repo, units)
+
+        self.assertEqual(added, 0)
+        self.assertEqual(bulk.find.call_count, 1)
+        self.assertFalse(mock_update_count.called)
+
+    def test_no_units(self, mock_get_collection, mock_get_timestamp, mock_update_count):
+        added = repo_controller.associate_units_bulk(MagicMock(repo_id='foo'), [])
+
+        self.assertEqual(added, 0)
+        self.assertFalse(mock_get_collection.return_value.initialize_unordered_bulk_op.called)
+
+
 class TestDisassociateUnits(unittest.TestCase):
 
     @patch('pulp.server.controllers.repository.model.RepositoryContentUnit.objects')
@@ -14,21 +14,22 @@ class DemoModel(model.ContentUnit):
     save = MagicMock()
 
 
-class FindUnitsTests(unittest.TestCase):
+class MultiKeyDemoModel(model.ContentUnit):
+    key_field = mongoengine.StringField()
+    other_field = mongoengine.StringField()
+    unit_key_fields = ['key_field', 'other_field']
+    unit_type_id = 'multi_key_demo_model'
+    objects = MagicMock()
+    save = MagicMock()
 
-    @patch('pulp.server.controllers.units.misc.paginate')
-    def test_paginate(self, mock_paginate):
-        """
-        ensure that paginate is used
-        """
-        model_1 = DemoModel(key_field='a')
-        model_2 = DemoModel(key_field='B')
-        units_iterable = (model_1, model_2)
 
-        # turn into list so the generator will be evaluated
-        list(units_controller.find_units(units_iterable))
+class FindUnitsTests(unittest.TestCase):
 
-        mock_paginate.assert_called_once_with(units_iterable, 50)
+    def setUp(self):
+        DemoModel.objects.reset_mock()
+        DemoModel.objects.side_effect = None
+        DemoModel.objects.return_value = []
+        MultiKeyDemoModel.objects.reset_mock()
 
     def test_query(self):
         """
@@ -40,13 +41,12 @@ class FindUnitsTests(unittest.TestCase):
 
         # turn into list so the generator will be evaluated
         list(units_controller.find_units(units_iterable))
-        query_dict = DemoModel.objects.call_args[0][0].to_query(DemoModel)
-        expected_result = {'$or': [{'key_field': u'a'}, {'key_field': u'B'}]}
-        self.assertDictEqual(query_dict, expected_result)
+
+        DemoModel.objects.assert_called_once_with(key_field__in=['a', 'B'])
 
     def test_results(self):
         """
-        Test that the mongo query generated is the one we expect
+        Test that the units found by the query are returned
         """
         model_1 = DemoModel(key_field='a')
         model_2 = DemoModel(key_field='B')
@@ -57,3 +57,71 @@ class FindUnitsTests(unittest.TestCase):
         # turn into list so the generator will be evaluated
         result = list(units_controller.find_units(units_iterable))
         self.assertEqual(result, [model_2_defined])
+
+    def test_multiple_key_fields(self):
+        """
+        Test that units are looked up by every unit key field and matched on the full key
+        """
+        units_iterable = (MultiKeyDemoModel(key_field='a', other_field='1'),
+                          MultiKeyDemoModel(key_field='b', other_field='2'))
+        found = MultiKeyDemoModel(key_field='b', other_field='2', id='foo')
+        MultiKeyDemoModel.objects.return_value = [
+            MultiKeyDemoModel(key_field='a', other_field='2', id='bar'), found]
+
+        result = list(units_controller.find_units(units_iterable))
+
+        MultiKeyDemoModel.objects.assert_called_once_with(key_field__in=['a', 'b'],
+                                                          other_field__in=['1', '2'])
+        self.assertEqual(result, [found])
+
+    def test_pagination_size(self):
+        """
+        Test that a fixed page size is used when one is specified
+        """
+        units_iterable = [DemoModel(key_field=str(i)) for i in range(5)]
+
+        list(units_controller.find_units(units_iterable, pagination_size=2))
+
+        self.assertEqual(DemoModel.objects.call_count, 3)
+
+    @patch('pulp.server.controllers.units.FIND_UNITS_PAGE_SIZE', 1)
+    def test_results_in_order(self):
+        """
+        Test that pages queried concurrently are returned in order
+        """
+        units_iterable = [DemoModel(key_field=str(i)) for i in range(5)]
+        DemoModel.objects.side_effect = lambda key_field__in: [
+            DemoModel(key_field=value, id=value) for value in key_field__in]
+
+        result = list(units_controller.find_units(units_iterable))
+
+        self.assertEqual([unit.key_field for unit in result], ['0', '1', '2', '3', '4'])
+
+    def test_no_units(self):
+        result = list(units_controller.find_units([]))
+
+        self.assertEqual(result, [])
+        self.assertFalse(DemoModel.objects.called)
+
+
+class AdaptPageSizeTests(unittest.TestCase):
+
+    def test_fast_query_grows(self):
+        self.assertEqual(units_controller._adapt_page_size(100, 0), 200)
+
+    def test_grow_is_bounded(self):
+        size = units_controller.FIND_UNITS_MAX_PAGE_SIZE
+        self.assertEqual(units_controller._adapt_page_size(size, 0), size)
+
+    def test_slow_query_shrinks(self):
+        elapsed = units_controller.FIND_UNITS_TARGET_LATENCY * 2
+        self.assertEqual(units_controller._adapt_page_size(100, elapsed), 50)
+
+    def test_shrink_is_bounded(self):
+        size = units_controller.FIND_UNITS_MIN_PAGE_SIZE
+        elapsed = units_controller.FIND_UNITS_TARGET_LATENCY * 2
+        self.assertEqual(units_controller._adapt_page_size(size, elapsed), size)
+
+    def test_on_target_unchanged(self):
+        elapsed = units_controller.FIND_UNITS_TARGET_LATENCY * 0.75
+        self.assertEqual(units_controller._adapt_page_size(100, elapsed), 100)
@@ -164,6 +164,7 @@ class TestUnitProfile(unittest.TestCase):
         self.assertEqual(profile.content_type, 'content_type')
         self.assertEqual(profile.profile, 'profile')
         self.assertEqual(profile.profile_hash, profile.calculate_hash(profile.profile))
+        self.assertEqual(profile.reported_hash, profile.profile_hash)
 
         # The superclass __init__ should have been called
         __init__.assert_called_once_with(profile)
@@ -184,6 +185,16 @@ class TestUnitProfile(unittest.TestCase):
         # The superclass __init__ should have been called
         __init__.assert_called_once_with(profile)
 
+    def test___init___with_reported_hash(self):
+        """
+        Test the constructor, passing the optional reported_hash
+        """
+        profile = consumer.UnitProfile('consumer_id', 'content_type', 'profile', 'profile_hash',
+                                       'reported_hash')
+
+        self.assertEqual(profile.profile_hash, 'profile_hash')
+        self.assertEqual(profile.reported_hash, 'reported_hash')
+
     def test_calculate_hash_different_profiles(self):
         """
         Test that two different profiles have different hashes.
@@ -13,6 +13,7 @@ from mongoengine import ValidationError
 from pymongo import DESCENDING
 import bson
 import celery
+import isodate
 import mock
 
 from .... import base
@@ -447,6 +448,37 @@ class TestTaskStatus(unittest.TestCase):
         self.assertEqual(ts['traceback'], None)
         self.assertEqual(ts['exception'], None)
 
+    @mock.patch('pulp.server.db.model.dateutils.now_utc_timestamp')
+    def test_save_sets_last_updated(self, mock_now):
+        """
+        Test that saving a TaskStatus records the time it was last updated.
+        """
+        mock_now.return_value = 1000.0
+        TaskStatus(str(uuid4())).save()
+        self.assertEqual(TaskStatus.objects()[0]['last_updated'], 1000.0)
+
+        mock_now.return_value = 2000.0
+        ts = TaskStatus.objects()[0]
+        ts.state = constants.CALL_RUNNING_STATE
+        ts.save_with_set_on_insert(fields_to_set_on_insert=['start_time'])
+        self.assertEqual(TaskStatus.objects()[0]['last_updated'], 2000.0)
+
+    @mock.patch('pulp.server.db.querysets.dateutils.now_utc_timestamp')
+    def test_update_sets_last_updated(self, mock_now):
+        """
+        Test that updating a TaskStatus through its queryset records the time it was last
+        updated.
+        """
+        task_id = str(uuid4())
+        TaskStatus(task_id).save()
+        mock_now.return_value = 3000.0
+
+        TaskStatus.objects(task_id=task_id).update_one(set__state=constants.CALL_RUNNING_STATE)
+
+        ts = TaskStatus.objects()[0]
+        self.assertEqual(ts['state'], constants.CALL_RUNNING_STATE)
+        self.assertEqual(ts['last_updated'], 3000.0)
+
 
 class TestScheduledCallInit(unittest.TestCase):
     def test_new(self):
@@ -769,6 +801,47 @@ class TestScheduledCallCalculateTimes(unittest.TestCase):
 
         self.assertEqual(expected_runs, 0)
 
+    @mock.patch('time.time')
+    def test_duration_walk_resumed(self, mock_time):
+        # the runs at 2014-02-28T10:15Z and 2014-03-28T10:15Z have passed
+        mock_time.return_value = 1396100000
+        call = ScheduledCall('2014-01-31T10:15Z/P1M', 'pulp.tasks.dosomething')
+        call._calculate_times()
+
+        # the run at 2014-04-28T10:15Z has passed too
+        mock_time.return_value = 1398700000
+        with mock.patch.object(isodate.Duration, 'totimedelta',
+                               autospec=True, side_effect=isodate.Duration.totimedelta) as walk:
+            last_scheduled_run_s, expected_runs = call._calculate_times()[4:]
+
+        # the walk continued from 2014-03-28T10:15Z instead of starting over
+        self.assertEqual(walk.call_count, 3)
+        self.assertEqual(expected_runs, 3)
+        self.assertEqual(last_scheduled_run_s, 1398680100)
+
+    @mock.patch('time.time')
+    def test_duration_walk_clock_back(self, mock_time):
+        mock_time.return_value = 1398700000
+        call = ScheduledCall('2014-01-31T10:15Z/P1M', 'pulp.tasks.dosomething')
+        call._calculate_times()
+
+        # only the run at 2014-02-28T10:15Z has passed
+        mock_time.return_value = 1396000000
+        last_scheduled_run_s, expected_runs = call._calculate_times()[4:]
+
+        self.assertEqual(expected_runs, 1)
+        self.assertEqual(last_scheduled_run_s, 1393582500)
+
+    def test_run_every_cached(self):
+        call = ScheduledCall('PT1H', 'pulp.tasks.dosomething')
+        call._calculate_times()
+
+        with mock.patch('pulp.server.db.model.dispatch.pickle.loads') as mock_loads:
+            run_every_s = call._calculate_times()[3]
+
+        self.assertFalse(mock_loads.called)
+        self.assertEqual(run_every_s, 3600)
+
 
 class TestScheduledCallCalculateNextRun(unittest.TestCase):
     @mock.patch('time.time')
@@ -902,6 +975,21 @@ class TestScheduleEntryNextInstance(unittest.TestCase):
         # call should have been disabled because the remaining_runs hit 0
         self.assertFalse(self.call.enabled)
 
+    def test_disabled_updates_last_updated(self, mock_save):
+        self.call.remaining_runs = 1
+        self.call.last_updated = 1000
+
+        next(self.entry)
+
+        self.assertTrue(time.time() - self.call.last_updated < 1)
+
+    def test_keeps_last_updated(self, mock_save):
+        self.call.last_updated = 1000
+
+        next(self.entry)
+
+        self.assertEqual(self.call.last_updated, 1000)
+
     def test_calls_save(self, mock_save):
         next(self.entry)
 
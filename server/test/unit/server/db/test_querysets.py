@@ -102,3 +102,30 @@ class TestReqoQuerySet(unittest.TestCase):
         qs.get = mock_get
         self.assertRaises(pulp_exceptions.MissingResource, qs.get_repo_or_missing_resource, 'repo')
         mock_get.assert_called_once_with(repo_id='repo')
+
+
+class TestTaskStatusQuerySet(unittest.TestCase):
+    """
+    Tests for the task status custom query set.
+    """
+
+    @mock.patch('pulp.server.db.querysets.CriteriaQuerySet.update')
+    @mock.patch('pulp.server.db.querysets.dateutils.now_utc_timestamp')
+    def test_update(self, mock_now, mock_update):
+        """
+        update should set last_updated and return the result of the update.
+        """
+        qs = querysets.TaskStatusQuerySet(mock.MagicMock(), mock.MagicMock())
+        result = qs.update(set__state='running')
+        mock_update.assert_called_once_with(set__state='running',
+                                            set__last_updated=mock_now.return_value)
+        self.assertTrue(result is mock_update.return_value)
+
+    @mock.patch('pulp.server.db.querysets.CriteriaQuerySet.update')
+    def test_update_last_updated(self, mock_update):
+        """
+        update should not replace a last_updated set by the caller.
+        """
+        qs = querysets.TaskStatusQuerySet(mock.MagicMock(), mock.MagicMock())
+        qs.update(set__last_updated=1)
+        mock_update.assert_called_once_with(set__last_updated=1)
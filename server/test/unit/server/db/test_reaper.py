@@ -12,6 +12,7 @@ from pulp.server.db import model
 from pulp.server.db import reaper
 from pulp.server.db.model import celery_result, consumer, repo_group, repository
 from pulp.server.db.model.consumer import ConsumerHistoryEvent
+from pulp.server.db.model import reaper_base
 from pulp.server.db.model.reaper_base import _create_expired_object_id, ReaperMixin
 
 
@@ -70,6 +71,83 @@ class TestCreateExpiredObjectId(unittest.TestCase):
         self.assertTrue(isinstance(expired_oid, ObjectId))
 
 
+class FakeCollection(object):
+    """
+    Collection of documents whose _id values are the integers that were given, all of which
+    match any query.
+    """
+    name = 'fake'
+
+    def __init__(self, ids):
+        self.ids = sorted(ids)
+        self.removed = []
+
+    def find(self, spec, fields):
+        cursor = mock.MagicMock()
+        cursor.sort.return_value.limit.side_effect = \
+            lambda limit: [{'_id': i} for i in self.ids[:limit]]
+        return cursor
+
+    def remove(self, spec):
+        id_range = spec['$and'][1]['_id']
+        batch = [i for i in self.ids if id_range['$gte'] <= i <= id_range['$lte']]
+        self.ids = [i for i in self.ids if i not in batch]
+        self.removed.append(batch)
+
+
+@mock.patch('pulp.server.db.model.reaper_base.time')
+class TestRemoveInBatches(unittest.TestCase):
+    """
+    Assert correct behavior from remove_in_batches().
+    """
+
+    def test_batches(self, mock_time):
+        mock_time.time.return_value = 100
+        collection = FakeCollection(range(25))
+        progress = mock.Mock()
+
+        removed = reaper_base.remove_in_batches(collection, {'a': 1}, batch_size=10,
+                                                progress=progress)
+
+        self.assertEqual(removed, 25)
+        self.assertEqual(collection.removed, [range(10), range(10, 20), range(20, 25)])
+        self.assertEqual(progress.call_args_list, [((10,),), ((20,),), ((25,),)])
+        # yields between batches, but not after the last one
+        self.assertEqual(mock_time.sleep.call_args_list, [((0,),), ((0,),)])
+
+    def test_query(self, mock_time):
+        mock_time.time.return_value = 100
+        collection = mock.MagicMock()
+        ids = [ObjectId(), ObjectId()]
+        collection.find.return_value.sort.return_value.limit.return_value = [
+            {'_id': i} for i in ids]
+
+        reaper_base.remove_in_batches(collection, {'a': 1}, batch_size=10)
+
+        collection.find.assert_called_once_with({'a': 1}, fields=['_id'])
+        collection.remove.assert_called_once_with(
+            {'$and': [{'a': 1}, {'_id': {'$gte': ids[0], '$lte': ids[1]}}]})
+
+    def test_nothing_to_remove(self, mock_time):
+        collection = FakeCollection([])
+
+        removed = reaper_base.remove_in_batches(collection, {'a': 1}, batch_size=10)
+
+        self.assertEqual(removed, 0)
+        self.assertEqual(collection.removed, [])
+
+    def test_rate_limited(self, mock_time):
+        # each batch takes a second
+        mock_time.time.side_effect = [100, 101, 102]
+        collection = FakeCollection(range(25))
+
+        reaper_base.remove_in_batches(collection, {'a': 1}, batch_size=10,
+                                      documents_per_second=5)
+
+        # 10 documents are allowed every 2 seconds
+        self.assertEqual(mock_time.sleep.call_args_list, [((1.0,),), ((2.0,),)])
+
+
 class TestReapInheritance(unittest.TestCase):
     """
     Check class inheritance related to ReaperMixin
@@ -116,6 +194,23 @@ class TestReapExpiredDocuments(base.PulpServerTests):
         # The event should still exist
         self.assertTrue(chec.find({'_id': event['_id']}).count() == 1)
 
+    @mock.patch('pulp.server.db.reaper.status_writer')
+    @mock.patch('pulp.server.db.reaper.get_current_task_id', return_value='task')
+    @mock.patch('pulp.server.db.reaper._COLLECTION_TIMEDELTAS', {ConsumerHistoryEvent: 'history'})
+    @mock.patch('pulp.server.db.reaper.pulp_config.config.getfloat')
+    def test_reports_progress(self, getfloat, get_current_task_id, status_writer):
+        chec = ConsumerHistoryEvent.get_collection()
+        for i in range(3):
+            chec.insert(ConsumerHistoryEvent('consumer', 'originator', 'consumer_registered', {}),
+                        safe=True)
+        getfloat.return_value = -1.0
+
+        report = reaper.reap_expired_documents()
+
+        self.assertEqual(report, {'history': 3})
+        status_writer.update.assert_called_once_with(
+            'task', progress_report={'reaper': {'history': 3}})
+
     @mock.patch('pulp.server.db.reaper.pulp_config.config.getfloat')
     def test_remove_expired_entries(self, getfloat):
         chec = ConsumerHistoryEvent.get_collection()
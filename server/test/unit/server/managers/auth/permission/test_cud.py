@@ -3,6 +3,7 @@ import string
 
 from ..... import base
 from pulp.server.auth import authorization
+from pulp.server.auth.cache import auth_cache
 from pulp.server.db.model.auth import Role
 from pulp.server.managers import factory as manager_factory
 import pulp.server.exceptions as exceptions
@@ -119,6 +120,19 @@ class PermissionManagerTests(base.PulpServerTests):
         self.permission_manager.revoke(r, u['login'], [o])
         self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
 
+    def test_user_permission_revoke_cached(self):
+        u = self._create_user()
+        r = self._create_resource()
+        o = authorization.READ
+        self.permission_manager.grant(r, u['login'], [o])
+        auth_cache.synchronize()
+        try:
+            self.assertTrue(self.user_query_manager.is_authorized(r, u['login'], o))
+            self.permission_manager.revoke(r, u['login'], [o])
+            self.assertFalse(self.user_query_manager.is_authorized(r, u['login'], o))
+        finally:
+            auth_cache.release()
+
     def test_non_existing_user_permission_revoke(self):
         login = 'non-existing-user-login'
         r = self._create_resource()
@@ -13,7 +13,7 @@ from pulp.server.managers.consumer.applicability import (
     _add_consumers_to_applicability_map, _add_profiles_to_consumer_map_and_get_hashes,
     _add_repo_ids_to_consumer_map, _format_report, _get_applicability_map,
     _get_consumer_applicability_map, DoesNotExist, MultipleObjectsReturned,
-    retrieve_consumer_applicability, ApplicabilityRegenerationManager)
+    retrieve_consumer_applicability, ApplicabilityRegenerationManager, REGENERATION_BATCH_SIZE)
 from pulp.server.managers.consumer.bind import BindManager
 from pulp.server.managers.consumer.cud import ConsumerManager
 from pulp.server.managers.consumer.profile import ProfileManager
@@ -294,9 +294,81 @@ class ApplicabilityRegenerationManagerTests(base.PulpServerTests):
 
         applicability_manager.regenerate_applicability_for_repos(repo_criteria)
 
-        # validate that batch size of 5 is used
+        # validate that only the ids are loaded up front, in batches
+        mock_get_collection.return_value.find.assert_called_once_with(
+            {'repo_id': 'fake-repo'}, fields=['_id'])
+        mock_get_collection.return_value.find.return_value.batch_size.assert_called_with(
+            REGENERATION_BATCH_SIZE)
 
-        mock_get_collection.return_value.find.return_value.batch_size.assert_called_with(5)
+    @mock.patch('pulp.server.managers.consumer.bind.model.Repository.objects')
+    def test_regenerate_applicability_for_repos_batches(self, mock_repo_qs):
+        """
+        Test that each batch uses a single unit profile query and a single bulk write, and
+        that the profiler is only looked up once per content type.
+        """
+        self.populate_consumers_different_profiles()
+        self.populate_bindings()
+        manager = factory.applicability_regeneration_manager()
+        manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        RepoProfileApplicability.get_collection().update(
+            {}, {'$set': {'applicability': {}}}, multi=True)
+
+        with mock.patch.object(ApplicabilityRegenerationManager, '_profiler',
+                               wraps=ApplicabilityRegenerationManager._profiler) as mock_profiler:
+            manager.regenerate_applicability_for_repos(self.REPO_CRITERIA)
+
+        mock_profiler.assert_called_once_with('rpm')
+        applicability_list = list(RepoProfileApplicability.get_collection().find())
+        self.assertEqual(len(applicability_list), 4)
+        expected_applicability = {'rpm': ['rpm-1', 'rpm-2'], 'erratum': ['errata-1', 'errata-2']}
+        for applicability_document in applicability_list:
+            self.assertEqual(applicability_document['applicability'], expected_applicability)
+
+    @mock.patch('pulp.server.managers.consumer.bind.model.Repository.objects')
+    @mock.patch('pulp.server.managers.consumer.applicability.regenerate_applicability_for_shard')
+    @mock.patch('pulp.server.managers.consumer.applicability.pulp_config.config')
+    def test_regenerate_applicability_for_repos_sharded(self, mock_config, mock_shard_task,
+                                                        mock_repo_qs):
+        """
+        Test that a configured shard size splits the work set into child tasks that are
+        reported as spawned tasks.
+        """
+        self.populate_consumers_different_profiles()
+        self.populate_bindings()
+        manager = factory.applicability_regeneration_manager()
+        manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        mock_config.getint.return_value = 3
+        mock_shard_task.apply_async.side_effect = ['task-1', 'task-2']
+
+        result = manager.regenerate_applicability_for_repos(self.REPO_CRITERIA)
+
+        mock_config.getint.assert_called_once_with('applicability', 'regeneration_shard_size')
+        self.assertEqual(mock_shard_task.apply_async.call_count, 2)
+        shards = [c[0][0][0] for c in mock_shard_task.apply_async.call_args_list]
+        self.assertEqual([len(shard) for shard in shards], [3, 1])
+        work_set = set((repo_id, profile_hash) for shard in shards
+                       for repo_id, profile_hash in shard)
+        self.assertEqual(len(work_set), 4)
+        self.assertEqual(result.spawned_tasks, [{'task_id': 'task-1'}, {'task_id': 'task-2'}])
+
+    @mock.patch('pulp.server.managers.consumer.bind.model.Repository.objects')
+    def test_regenerate_applicability_for_shard(self, mock_repo_qs):
+        self.populate_consumers_different_profiles()
+        self.populate_bindings()
+        manager = factory.applicability_regeneration_manager()
+        manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        RepoProfileApplicability.get_collection().update(
+            {}, {'$set': {'applicability': {}}}, multi=True)
+        selected = RepoProfileApplicability.get_collection().find_one({'repo_id': 'repo-1'})
+
+        manager.regenerate_applicability_for_shard([['repo-1', selected['profile_hash']]])
+
+        expected_applicability = {'rpm': ['rpm-1', 'rpm-2'], 'erratum': ['errata-1', 'errata-2']}
+        for applicability_document in RepoProfileApplicability.get_collection().find():
+            if applicability_document['_id'] == selected['_id']:
+                self.assertEqual(applicability_document['applicability'], expected_applicability)
+            else:
+                self.assertEqual(applicability_document['applicability'], {})
 
     @mock.patch('pulp.server.managers.consumer.applicability.model.Repository.objects')
     def test_get_existing_repo_content_types_no_repo(self, mock_repo_qs):
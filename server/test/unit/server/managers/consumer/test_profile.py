@@ -2,10 +2,11 @@ import mock
 import pymongo
 
 from .... import base
+from pulp.common import profile as profile_utils
 from pulp.devel import mock_plugins
 from pulp.plugins.profiler import Profiler
 from pulp.server.db.model.consumer import Consumer, ConsumerHistoryEvent, UnitProfile
-from pulp.server.exceptions import MissingResource
+from pulp.server.exceptions import ConflictingOperation, InvalidValue, MissingResource
 from pulp.server.managers import factory
 from pulp.server.managers.consumer.cud import ConsumerManager
 from pulp.server.managers.consumer.profile import ProfileManager
@@ -146,6 +147,88 @@ class ProfileManagerTests(base.PulpServerTests):
         self.assertEqual(history['originator'], 'SYSTEM')
         self.assertEqual(history['details'], {'profile_content_type': self.TYPE_1})
 
+    def test_update_unchanged(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_1, self.PROFILE_1)
+        # Test
+        manager.update(self.CONSUMER_ID, self.TYPE_1, dict(self.PROFILE_1))
+        # Verify
+        collection = ConsumerHistoryEvent.get_collection()
+        history = collection.find({'consumer_id': self.CONSUMER_ID,
+                                   'type': 'unit_profile_changed'})
+        self.assertEqual(history.count(), 1)
+
+    def test_update_records_reported_hash(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        # Test
+        manager.update(self.CONSUMER_ID, self.TYPE_2, self.PROFILE_2)
+        # Verify
+        profile = manager.get_profile(self.CONSUMER_ID, self.TYPE_2)
+        expected_hash = UnitProfile.calculate_hash(self.PROFILE_2)
+        self.assertEqual(profile['reported_hash'], expected_hash)
+
+    def test_is_unchanged(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_2, self.PROFILE_2)
+        # Test & Verify
+        reported_hash = UnitProfile.calculate_hash(self.PROFILE_2)
+        self.assertTrue(manager.is_unchanged(self.CONSUMER_ID, self.TYPE_2, reported_hash))
+        other_hash = UnitProfile.calculate_hash(self.PROFILE_3)
+        self.assertFalse(manager.is_unchanged(self.CONSUMER_ID, self.TYPE_2, other_hash))
+        self.assertFalse(manager.is_unchanged(self.CONSUMER_ID, self.TYPE_1, reported_hash))
+
+    def test_is_unchanged_missing_consumer(self):
+        manager = factory.consumer_profile_manager()
+        self.assertRaises(MissingResource, manager.is_unchanged, self.CONSUMER_ID, self.TYPE_1,
+                          'abc')
+
+    def test_update_from_delta(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_2, self.PROFILE_2)
+        base_hash = UnitProfile.calculate_hash(self.PROFILE_2)
+        delta = profile_utils.make_delta(self.PROFILE_2, self.PROFILE_3)
+        # Test
+        manager.update_from_delta(self.CONSUMER_ID, self.TYPE_2, base_hash,
+                                  profile_utils.encode_delta(delta))
+        # Verify
+        profile = manager.get_profile(self.CONSUMER_ID, self.TYPE_2)
+        self.assertEqual(profile['profile'], self.PROFILE_3)
+        expected_hash = UnitProfile.calculate_hash(self.PROFILE_3)
+        self.assertEqual(profile['profile_hash'], expected_hash)
+        self.assertEqual(profile['reported_hash'], expected_hash)
+
+    def test_update_from_delta_conflict(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_2, self.PROFILE_2)
+        base_hash = UnitProfile.calculate_hash(self.PROFILE_1)
+        delta = profile_utils.make_delta(self.PROFILE_1, self.PROFILE_3)
+        # Test
+        self.assertRaises(ConflictingOperation, manager.update_from_delta, self.CONSUMER_ID,
+                          self.TYPE_2, base_hash, profile_utils.encode_delta(delta))
+        # Verify
+        profile = manager.get_profile(self.CONSUMER_ID, self.TYPE_2)
+        self.assertEqual(profile['profile'], self.PROFILE_2)
+
+    def test_update_from_delta_invalid(self):
+        # Setup
+        self.populate()
+        manager = factory.consumer_profile_manager()
+        manager.update(self.CONSUMER_ID, self.TYPE_2, self.PROFILE_2)
+        base_hash = UnitProfile.calculate_hash(self.PROFILE_2)
+        # Test
+        self.assertRaises(InvalidValue, manager.update_from_delta, self.CONSUMER_ID,
+                          self.TYPE_2, base_hash, 'not a delta')
+
     def test_update_calls_profiler_update_profile(self):
         """
         Assert that the update() method calls the profiler update_profile() method.
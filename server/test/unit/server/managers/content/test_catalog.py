@@ -1,9 +1,13 @@
+from unittest import TestCase
 from uuid import uuid4
 
+from mock import patch
+
 from ....base import PulpServerTests
 from pulp.server.db.model.content import ContentCatalog
 from pulp.server.managers import factory
-from pulp.server.managers.content.catalog import ContentCatalogManager
+from pulp.server.managers.content import catalog
+from pulp.server.managers.content.catalog import ContentCatalogManager, LocatorCache
 
 
 TYPE_ID = 'type_a'
@@ -16,6 +20,7 @@ class TestCatalogManager(PulpServerTests):
     def setUp(self):
         super(TestCatalogManager, self).setUp()
         ContentCatalog.get_collection().remove()
+        catalog.locator_cache.clear()
 
     def tearDown(self):
         super(TestCatalogManager, self).tearDown()
@@ -62,6 +67,28 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    def test_add_entries(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        entries = [(TYPE_ID, unit_key, url) for unit_key, url in units]
+        added = manager.add_entries(SOURCE_ID, EXPIRATION, iter(entries))
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(added, len(units))
+        self.assertEqual(len(units), collection.find().count())
+        for unit_key, url in units:
+            locator = ContentCatalog.get_locator(TYPE_ID, unit_key)
+            entry = collection.find_one({'locator': locator})
+            self.assertEqual(entry['source_id'], SOURCE_ID)
+            self.assertEqual(entry['type_id'], TYPE_ID)
+            self.assertEqual(entry['unit_key'], unit_key)
+            self.assertEqual(entry['url'], url)
+
+    def test_add_entries_nothing(self):
+        manager = ContentCatalogManager()
+        added = manager.add_entries(SOURCE_ID, EXPIRATION, [])
+        self.assertEqual(added, 0)
+        self.assertEqual(ContentCatalog.get_collection().find().count(), 0)
+
     def test_delete(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
@@ -171,6 +198,55 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    def test_find_many(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        for unit_key, url in units:
+            manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, unit_key, url)
+            manager.add_entry('other', EXPIRATION, TYPE_ID, unit_key, url)
+        # newest entry for the same source wins
+        manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, units[0][0], 'http://newest')
+        unit_keys = [unit_key for unit_key, url in units]
+        unit_keys.append({'name': 'not-cataloged'})
+        found = manager.find_many(TYPE_ID, unit_keys)
+        self.assertEqual(len(found), len(unit_keys))
+        self.assertEqual(found[-1], [])
+        for (unit_key, url), entries in zip(units, found):
+            self.assertEqual(len(entries), 2)
+            self.assertEqual(sorted(e['source_id'] for e in entries), ['other', SOURCE_ID])
+            for entry in entries:
+                self.assertEqual(entry['unit_key'], unit_key)
+        newest = [e for e in found[0] if e['source_id'] == SOURCE_ID][0]
+        self.assertEqual(newest['url'], 'http://newest')
+
+    def test_find_cached(self):
+        units = self.units(0, 2)
+        manager = ContentCatalogManager()
+        for unit_key, url in units:
+            manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, unit_key, url)
+        unit_key, url = units[0]
+        entries = manager.find(TYPE_ID, unit_key)
+        hits = manager.cache_stats()['hits']
+        with patch.object(ContentCatalog, 'get_collection') as fake_collection:
+            cached = manager.find(TYPE_ID, unit_key)
+            found = manager.find_many(TYPE_ID, [unit_key])
+            self.assertFalse(fake_collection.called)
+        self.assertEqual(cached, entries)
+        self.assertEqual(found, [entries])
+        stats = manager.cache_stats()
+        self.assertEqual(stats['hits'], hits + 2)
+        self.assertEqual(stats['size'], 1)
+
+    def test_find_cache_invalidated(self):
+        units = self.units(0, 1)
+        manager = ContentCatalogManager()
+        unit_key, url = units[0]
+        self.assertEqual(manager.find(TYPE_ID, unit_key), [])
+        manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, unit_key, url)
+        self.assertEqual(len(manager.find(TYPE_ID, unit_key)), 1)
+        manager.purge(SOURCE_ID)
+        self.assertEqual(manager.find(TYPE_ID, unit_key), [])
+
     def test_expired(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
@@ -191,3 +267,45 @@ class TestCatalogManager(PulpServerTests):
     def test_factory(self):
         manager = factory.content_catalog_manager()
         self.assertTrue(isinstance(manager, ContentCatalogManager))
+
+
+class TestLocatorCache(TestCase):
+
+    def test_get_miss(self):
+        cache = LocatorCache()
+        self.assertEqual(cache.get('locator'), None)
+        self.assertEqual(cache.stats(), dict(hits=0, misses=1, size=0))
+
+    def test_get_hit(self):
+        cache = LocatorCache()
+        entries = [{'expiration': ContentCatalog.get_expiration(EXPIRATION)}]
+        cache.put('locator', entries)
+        self.assertEqual(cache.get('locator'), entries)
+        self.assertEqual(cache.stats(), dict(hits=1, misses=0, size=1))
+
+    def test_entry_expired(self):
+        cache = LocatorCache()
+        cache.put('locator', [{'expiration': ContentCatalog.get_expiration(-1)}])
+        self.assertEqual(cache.get('locator'), None)
+        self.assertEqual(cache.stats(), dict(hits=0, misses=1, size=0))
+
+    def test_max_age(self):
+        cache = LocatorCache(max_age=-1)
+        cache.put('locator', [])
+        self.assertEqual(cache.get('locator'), None)
+
+    def test_evict_least_recently_used(self):
+        cache = LocatorCache(capacity=2)
+        cache.put('a', [])
+        cache.put('b', [])
+        cache.get('a')
+        cache.put('c', [])
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), [])
+        self.assertEqual(cache.get('c'), [])
+
+    def test_clear(self):
+        cache = LocatorCache()
+        cache.put('locator', [])
+        cache.clear()
+        self.assertEqual(cache.get('locator'), None)
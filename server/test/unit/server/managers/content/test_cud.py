@@ -62,6 +62,32 @@ class PulpContentCUDTests(PulpContentTests):
         self.assertTrue(unit['search-1'] == 'two')
         self.assertTrue('_last_updated' in unit)
 
+    def test_add_content_units(self):
+        unit_ids = self.cud_manager.add_content_units(TYPE_1_DEF.id, TYPE_1_UNITS[:2])
+        self.assertEqual(len(unit_ids), 2)
+        self.assertFalse(None in unit_ids)
+        units = self.query_manager.list_content_units(TYPE_1_DEF.id)
+        self.assertEqual(sorted(u['_id'] for u in units), sorted(unit_ids))
+        self.assertTrue('_last_updated' in units[0])
+
+    def test_add_content_units_duplicates(self):
+        self.cud_manager.add_content_unit(TYPE_1_DEF.id, None, dict(TYPE_1_UNITS[1]))
+        unit_ids = self.cud_manager.add_content_units(
+            TYPE_1_DEF.id, [dict(u) for u in TYPE_1_UNITS])
+        self.assertNotEqual(unit_ids[0], None)
+        self.assertEqual(unit_ids[1], None)
+        self.assertNotEqual(unit_ids[2], None)
+        units = self.query_manager.list_content_units(TYPE_1_DEF.id)
+        self.assertEqual(len(units), 3)
+
+    def test_update_content_units(self):
+        unit_ids = self.cud_manager.add_content_units(TYPE_1_DEF.id, TYPE_1_UNITS[:2])
+        self.cud_manager.update_content_units(
+            TYPE_1_DEF.id, [(unit_id, {'search-1': 'three'}) for unit_id in unit_ids])
+        for unit_id in unit_ids:
+            unit = self.query_manager.get_content_unit_by_id(TYPE_1_DEF.id, unit_id)
+            self.assertEqual(unit['search-1'], 'three')
+
     def test_delete_content_unit(self):
         unit_id = self.cud_manager.add_content_unit(TYPE_1_DEF.id, None, TYPE_1_UNITS[0])
         units = self.query_manager.list_content_units(TYPE_1_DEF.id)
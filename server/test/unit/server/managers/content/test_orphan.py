@@ -260,6 +260,38 @@ class OrphanManagerGeneratorTests(OrphanManagerTests):
         self.assertFalse(os.path.exists(unit_1['_storage_path']))
         self.assertTrue(os.path.exists(unit_2['_storage_path']))
 
+    def test_get_referenced_unit_ids(self):
+        unit_1 = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        unit_3 = gen_content_unit(PHONY_TYPE_2.id, self.content_root)
+        associate_content_unit_with_repo(unit_1)
+        associate_content_unit_with_repo(unit_3)
+
+        referenced = self.orphan_manager.get_referenced_unit_ids(PHONY_TYPE_1.id)
+
+        self.assertEqual(referenced, set([unit_1['_id']]))
+
+    def test_count_by_type(self):
+        unit_1 = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        associate_content_unit_with_repo(unit_1)
+
+        self.assertEqual(self.orphan_manager.orphans_count_by_type(PHONY_TYPE_1.id), 2)
+
+    @patch('pulp.server.managers.content.orphan.OrphanManager.get_referenced_unit_ids')
+    def test_delete_by_type_skips_newly_associated(self, mock_referenced):
+        # simulate an association created after the referenced ids were collected
+        mock_referenced.return_value = set()
+        unit_1 = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        unit_2 = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
+        associate_content_unit_with_repo(unit_1)
+
+        self.orphan_manager.delete_orphans_by_type(PHONY_TYPE_1.id)
+
+        self.assertTrue(os.path.exists(unit_1['_storage_path']))
+        self.assertFalse(os.path.exists(unit_2['_storage_path']))
+
     def test_delete_by_id_using_generators(self):
         unit = gen_content_unit(PHONY_TYPE_1.id, self.content_root)
 
@@ -1,6 +1,8 @@
 import errno
+import hashlib
 import os
 import shutil
+from StringIO import StringIO
 
 import unittest
 import mock
@@ -88,6 +90,69 @@ class ContentUploadManagerTests(base.PulpServerTests):
 
         self.assertEqual(expected_size, found_size)
 
+    def test_initialize_upload_size(self):
+        upload_id = self.upload_manager.initialize_upload(1024)
+
+        uploaded_filename = self.upload_manager._upload_file_path(upload_id)
+        self.assertEqual(os.path.getsize(uploaded_filename), 1024)
+
+    def test_save_data_stream(self):
+        upload_id = self.upload_manager.initialize_upload()
+        stream = StringIO('abcdefghij')
+
+        with mock.patch('pulp.server.managers.content.upload.UPLOAD_CHUNK_SIZE', 3):
+            self.upload_manager.save_data_stream(upload_id, 2, stream, 8)
+
+        self.assertEqual(self.upload_manager.read_upload(upload_id), '\x00\x00abcdefgh')
+        self.assertEqual(stream.read(), 'ij')
+
+    def test_uploaded_sha256_in_order(self):
+        upload_id = self.upload_manager.initialize_upload(9)
+        for offset, data in ((0, 'abc'), (3, 'def'), (6, 'ghi')):
+            self.upload_manager.save_data(upload_id, offset, data)
+
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id),
+                         hashlib.sha256('abcdefghi').hexdigest())
+
+    def test_uploaded_sha256_out_of_order(self):
+        upload_id = self.upload_manager.initialize_upload()
+        for offset, data in ((3, 'def'), (6, 'ghi')):
+            self.upload_manager.save_data(upload_id, offset, data)
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id), None)
+
+        # the segments received out of order are read back once the gap is filled
+        self.upload_manager.save_data(upload_id, 0, 'abc')
+
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id),
+                         hashlib.sha256('abcdefghi').hexdigest())
+
+    def test_uploaded_sha256_incomplete(self):
+        upload_id = self.upload_manager.initialize_upload(9)
+        self.upload_manager.save_data(upload_id, 0, 'abc')
+
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id), None)
+
+    def test_uploaded_sha256_other_process(self):
+        upload_id = self.upload_manager.initialize_upload()
+
+        # the running checksum only exists in the process that initialized the upload
+        with mock.patch.dict('pulp.server.managers.content.upload._running_hashes', clear=True):
+            self.upload_manager.save_data(upload_id, 0, 'abc')
+            self.upload_manager.save_data(upload_id, 3, 'def')
+            self.assertEqual(self.upload_manager.uploaded_sha256(upload_id), None)
+
+        self.upload_manager.save_data(upload_id, 6, 'ghi')
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id),
+                         hashlib.sha256('abcdefghi').hexdigest())
+
+    def test_uploaded_sha256_segment_rewritten(self):
+        upload_id = self.upload_manager.initialize_upload()
+        self.upload_manager.save_data(upload_id, 0, 'abc')
+        self.upload_manager.save_data(upload_id, 0, 'xyz')
+        self.upload_manager.save_data(upload_id, 3, 'def')
+
+        self.assertEqual(self.upload_manager.uploaded_sha256(upload_id), None)
+
     def test_save_no_init(self):
 
         # Test
@@ -111,6 +176,8 @@ class ContentUploadManagerTests(base.PulpServerTests):
 
         # Verify
         self.assertTrue(not os.path.exists(uploaded_filename))
+        state_filename = self.upload_manager._upload_state_path(upload_id)
+        self.assertTrue(not os.path.exists(state_filename))
 
     def test_delete_non_existent_upload(self):
 
@@ -179,6 +246,8 @@ class ContentUploadManagerTests(base.PulpServerTests):
         fake_user = User('import-user', '')
         manager_factory.principal_manager().set_principal(principal=fake_user)
 
+        self.upload_manager.save_data(upload_id, 0, 'abc')
+
         response = self.upload_manager.import_uploaded_unit('repo-u', 'mock-type', key, metadata,
                                                             upload_id)
 
@@ -195,6 +264,7 @@ class ContentUploadManagerTests(base.PulpServerTests):
         conduit = call_args[5]
         self.assertTrue(isinstance(conduit, UploadConduit))
         self.assertEqual(call_args[5].repo_id, 'repo-u')
+        self.assertEqual(conduit.get_checksum('sha256'), hashlib.sha256('abc').hexdigest())
 
         # Clean up
         mock_plugins.MOCK_IMPORTER.upload_unit.return_value = None
@@ -241,9 +311,12 @@ class TestContentUploadManager(unittest.TestCase):
     @mock.patch('pulp.server.managers.content.upload.os')
     def test_delete_upload_removes_file(self, mock_os, mock__upload_file_path):
         my_upload_id = 'asdf'
+        mock__upload_file_path.return_value = '/uploads/asdf'
         ContentUploadManager().delete_upload(my_upload_id)
-        mock__upload_file_path.assert_called_once_with(my_upload_id)
-        mock_os.remove.assert_called_once_with(mock__upload_file_path.return_value)
+        self.assertEqual(mock__upload_file_path.call_args_list,
+                         [mock.call(my_upload_id), mock.call(my_upload_id)])
+        self.assertEqual(mock_os.remove.call_args_list,
+                         [mock.call('/uploads/asdf'), mock.call('/uploads/asdf.state')])
 
     @mock.patch.object(ContentUploadManager, '_upload_file_path')
     @mock.patch('pulp.server.managers.content.upload.os')
@@ -11,6 +11,7 @@ import mock
 from .... import base
 from pulp.common import dateutils
 from pulp.plugins.types import database, model
+from pulp.server import exceptions
 from pulp.server.db.model.criteria import Criteria, UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit
 import pulp.server.managers.content.cud as content_cud_manager
@@ -598,6 +599,121 @@ class UnitAssociationQueryTests(base.PulpServerTests):
         for u in units:
             self.assertTrue(u['metadata']['key_1'] != 'aardvark')
 
+    def _assert_chunked_units(self, repo_id, **criteria_kwargs):
+        """
+        Asserts that get_units returns the same units in the same order as a generator, which
+        queries a chunk at a time, as it does as a list.
+        """
+        expected = self.manager.get_units(repo_id, UnitAssociationCriteria(**criteria_kwargs))
+        for chunk_size in (1, 2, 1000):
+            with mock.patch.object(association_query_manager, 'GET_UNITS_CHUNK_SIZE', chunk_size):
+                units = self.manager.get_units(repo_id, UnitAssociationCriteria(**criteria_kwargs),
+                                               as_generator=True)
+                self.assertEqual(list(units), expected)
+        return expected
+
+    def test_get_units_chunked(self):
+        units = self._assert_chunked_units('repo-1')
+        self.assertEqual(self.repo_1_count, len(units))
+
+    def test_get_units_chunked_skip_limit(self):
+        units = self._assert_chunked_units('repo-1', skip=2, limit=4)
+        self.assertEqual(4, len(units))
+
+    def test_get_units_chunked_unit_filters(self):
+        units = self._assert_chunked_units(
+            'repo-1', type_ids=['beta'], unit_filters={'md_2': 1},
+            unit_sort=[('md_1', association_manager.SORT_DESCENDING)])
+        self.assertEqual([u['unit_id'] for u in units], ['boardwalk', 'balloon'])
+
+    def test_get_units_chunked_association_sort(self):
+        units = self._assert_chunked_units(
+            'repo-1', association_sort=[('created', association_manager.SORT_DESCENDING)], skip=1,
+            limit=5)
+        self.assertEqual(5, len(units))
+
+    def test_get_units_chunked_association_sort_unit_filters(self):
+        units = self._assert_chunked_units(
+            'repo-1', type_ids=['alpha', 'beta'],
+            association_sort=[('created', association_manager.SORT_ASCENDING)],
+            unit_filters={'md_2': 0}, skip=1)
+        for u in units:
+            self.assertEqual(u['metadata']['md_2'], 0)
+
+    def test_get_units_chunked_remove_duplicates(self):
+        self._assert_chunked_units('repo-1', remove_duplicates=True)
+
+    def test_get_units_chunked_fields(self):
+        units = self._assert_chunked_units('repo-2', association_fields=['created'],
+                                           unit_fields=['md_1'])
+        self.assertEqual(self.repo_2_count, len(units))
+
+    def test_get_units_page(self):
+        # Test
+        criteria = UnitAssociationCriteria(limit=4)
+        pages = []
+        after = None
+        while True:
+            units = self.manager.get_units_page('repo-1', criteria, after)
+            if not units:
+                break
+            pages.append(units)
+            after = (units[-1]['unit_type_id'], units[-1]['unit_id'])
+
+        # Verify
+        self.assertEqual([len(page) for page in pages], [4, 4, 1])
+        ids = [(u['unit_type_id'], u['unit_id']) for page in pages for u in page]
+        expected = [(t, i) for t in ('alpha', 'beta', 'gamma') for i in sorted(self.units[t])]
+        self.assertEqual(ids, expected)
+        for page in pages:
+            for u in page:
+                self._assert_unit_integrity(u)
+
+    def test_get_units_page_no_limit(self):
+        # Test
+        units = self.manager.get_units_page('repo-1', after=('beta', 'bat'))
+
+        # Verify
+        ids = [(u['unit_type_id'], u['unit_id']) for u in units]
+        self.assertEqual(ids, [('beta', 'boardwalk'), ('gamma', 'garden'), ('gamma', 'gnome')])
+
+    def test_get_units_page_type_ids(self):
+        # Test
+        criteria = UnitAssociationCriteria(type_ids=['gamma', 'alpha'], limit=2)
+        units = self.manager.get_units_page('repo-1', criteria, ('alpha', 'anthill'))
+
+        # Verify
+        ids = [(u['unit_type_id'], u['unit_id']) for u in units]
+        self.assertEqual(ids, [('alpha', 'apple'), ('gamma', 'garden')])
+
+    @mock.patch.object(association_query_manager, 'UNITS_PAGE_BATCH_SIZE', 1)
+    def test_get_units_page_unit_filters(self):
+        # Test
+        criteria = UnitAssociationCriteria(type_ids=['beta'], unit_filters={'md_2': 1})
+        units = self.manager.get_units_page('repo-1', criteria)
+
+        # Verify
+        self.assertEqual([u['unit_id'] for u in units], ['balloon', 'boardwalk'])
+        for u in units:
+            self.assertEqual(u['metadata']['md_2'], 1)
+
+    def test_get_units_page_association_filters(self):
+        # Test
+        criteria = UnitAssociationCriteria(
+            association_filters={'unit_id': {'$in': ['apple', 'ball']}})
+        units = self.manager.get_units_page('repo-1', criteria)
+
+        # Verify
+        self.assertEqual([u['unit_id'] for u in units], ['apple', 'ball'])
+
+    def test_get_units_page_sort(self):
+        criteria = UnitAssociationCriteria(unit_sort=[('key_1', 1)], skip=1)
+        try:
+            self.manager.get_units_page('repo-1', criteria)
+            self.fail('InvalidValue expected')
+        except exceptions.InvalidValue, e:
+            self.assertEqual(e.property_names, ['sort', 'skip'])
+
     def test_criteria_str(self):
         # Setup
         c1 = UnitAssociationCriteria()
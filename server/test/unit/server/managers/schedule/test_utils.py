@@ -8,7 +8,7 @@ import mock
 
 from pulp.server import exceptions
 from pulp.server.db.model.criteria import Criteria
-from pulp.server.db.model.dispatch import ScheduledCall
+from pulp.server.db.model.dispatch import DeletedScheduledCall, ScheduledCall
 from pulp.server.managers.schedule import utils
 
 
@@ -178,11 +178,39 @@ class TestGetEnabled(unittest.TestCase):
         mock_get_collection.assert_called_once_with()
 
 
+class TestGetChangedSince(unittest.TestCase):
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_query(self, mock_get_collection):
+        mock_query = mock_get_collection.return_value.query
+
+        ret = utils.get_changed_since(100)
+
+        self.assertTrue(ret is mock_query.return_value)
+        criteria = mock_query.call_args[0][0]
+        self.assertTrue(isinstance(criteria, Criteria))
+        # disabled schedules are included, so schedulers learn they were disabled
+        self.assertEqual(criteria.filters, {'last_updated': {'$gt': 100}})
+
+
+class TestGetDeletedSince(unittest.TestCase):
+    @mock.patch('pulp.server.db.model.dispatch.DeletedScheduledCall.get_collection')
+    def test_query(self, mock_get_collection):
+        mock_query = mock_get_collection.return_value.query
+
+        ret = utils.get_deleted_since(100)
+
+        self.assertTrue(ret is mock_query.return_value)
+        criteria = mock_query.call_args[0][0]
+        self.assertTrue(isinstance(criteria, Criteria))
+        self.assertEqual(criteria.filters, {'deleted': {'$gt': 100}})
+
+
+@mock.patch('pulp.server.db.model.dispatch.DeletedScheduledCall.get_collection')
 class TestDelete(unittest.TestCase):
     schedule_id = str(ObjectId())
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
-    def test_delete(self, mock_get_collection):
+    def test_delete(self, mock_get_collection, mock_get_deleted_collection):
         mock_remove = mock_get_collection.return_value.find_and_modify
         mock_remove.return_value = 'not none'
 
@@ -195,16 +223,39 @@ class TestDelete(unittest.TestCase):
         self.assertEqual(mock_remove.call_args[1]['remove'], True)
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
-    def test_delete_missing(self, mock_get_collection):
+    def test_records_deleted(self, mock_get_collection, mock_get_deleted_collection):
+        mock_get_collection.return_value.find_and_modify.return_value = 'not none'
+        mock_insert = mock_get_deleted_collection.return_value.insert
+
+        utils.delete(self.schedule_id)
+
+        records = mock_insert.call_args[0][0]
+        self.assertEqual(len(records), 1)
+        self.assertTrue(isinstance(records[0], DeletedScheduledCall))
+        self.assertEqual(records[0]['schedule_id'], self.schedule_id)
+
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_removes_old_records(self, mock_get_collection, mock_get_deleted_collection):
+        mock_get_collection.return_value.find_and_modify.return_value = 'not none'
+        mock_remove = mock_get_deleted_collection.return_value.remove
+
+        utils.delete(self.schedule_id)
+
+        spec = mock_remove.call_args[0][0]
+        self.assertTrue(time.time() - spec['deleted']['$lt'] >= utils.DELETED_RETENTION_SECONDS)
+
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
+    def test_delete_missing(self, mock_get_collection, mock_get_deleted_collection):
         # this should cause the exception to be raised
         mock_find = mock_get_collection.return_value.find_and_modify
         mock_find.return_value = None
 
         self.assertRaises(exceptions.MissingResource, utils.delete, self.schedule_id)
         self.assertEqual(mock_find.call_count, 1)
+        self.assertFalse(mock_get_deleted_collection.called)
 
     @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
-    def test_gets_correct_collection(self, mock_get_collection):
+    def test_gets_correct_collection(self, mock_get_collection, mock_get_deleted_collection):
         """
         make sure this operation uses the correct collection
         """
@@ -212,7 +263,7 @@ class TestDelete(unittest.TestCase):
 
         mock_get_collection.assert_called_once_with()
 
-    def test_invalid_schedule_id(self):
+    def test_invalid_schedule_id(self, mock_get_deleted_collection):
         """
         make sure that during deletion of schedule MissingResource is raised
         even if the schedule_id is not a valid object_id
@@ -220,15 +271,30 @@ class TestDelete(unittest.TestCase):
         self.assertRaises(exceptions.MissingResource, utils.delete, 'notavalidid')
 
 
+@mock.patch('pulp.server.db.model.dispatch.DeletedScheduledCall.get_collection')
+@mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
 class TestDeleteByResource(unittest.TestCase):
-    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.get_collection')
-    def test_calls_remove(self, mock_get_collection):
+    def test_calls_remove(self, mock_get_collection, mock_get_deleted_collection):
+        object_ids = [ObjectId(), ObjectId()]
+        mock_get_collection.return_value.find.return_value = [{'_id': i} for i in object_ids]
         mock_remove = mock_get_collection.return_value.remove
         mock_remove.return_value = None
 
         utils.delete_by_resource('resource1')
 
-        mock_remove.assert_called_once_with({'resource': 'resource1'}, safe=True)
+        mock_get_collection.return_value.find.assert_called_once_with(
+            {'resource': 'resource1'}, fields=['_id'])
+        mock_remove.assert_called_once_with({'_id': {'$in': object_ids}}, safe=True)
+        records = mock_get_deleted_collection.return_value.insert.call_args[0][0]
+        self.assertEqual([r['schedule_id'] for r in records], map(str, object_ids))
+
+    def test_no_schedules(self, mock_get_collection, mock_get_deleted_collection):
+        mock_get_collection.return_value.find.return_value = []
+
+        utils.delete_by_resource('resource1')
+
+        self.assertFalse(mock_get_collection.return_value.remove.called)
+        self.assertFalse(mock_get_deleted_collection.called)
 
 
 class TestUpdate(unittest.TestCase):
@@ -559,6 +559,14 @@ class TestDjangoTasksUrls(unittest.TestCase):
         url_name = 'task_search'
         assert_url_match(url, url_name)
 
+    def test_match_task_bulk_status(self):
+        """
+        Test the matching for task_bulk_status.
+        """
+        url = '/v2/tasks/status/'
+        url_name = 'task_bulk_status'
+        assert_url_match(url, url_name)
+
 
 class TestDjangoRolesUrls(unittest.TestCase):
     """
@@ -779,6 +787,14 @@ class TestDjangoConsumersUrls(unittest.TestCase):
         url_name = 'consumer_profile_resource'
         assert_url_match(url, url_name, consumer_id='test-consumer', content_type='some-profile')
 
+    def test_match_consumer_profile_hash_view(self):
+        """
+        Test url matching for consumer profile hash
+        """
+        url = '/v2/consumers/test-consumer/profiles/some-profile/hash/'
+        url_name = 'consumer_profile_hash'
+        assert_url_match(url, url_name, consumer_id='test-consumer', content_type='some-profile')
+
     def test_match_consumer_bindings_view(self):
         """
         Test url matching for consumer bindings
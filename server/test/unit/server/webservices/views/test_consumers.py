@@ -19,6 +19,7 @@ from pulp.server.webservices.views.consumers import (ConsumersView, ConsumerBind
                                                      ConsumerContentApplicabilityView,
                                                      ConsumerContentApplicRegenerationView,
                                                      ConsumerHistoryView, ConsumerProfilesView,
+                                                     ConsumerProfileHashView,
                                                      ConsumerProfileResourceView,
                                                      ConsumerProfileSearchView,
                                                      ConsumerResourceView,
@@ -1055,6 +1056,7 @@ class TestConsumerProfileSearchView(unittest.TestCase):
         self.assertEqual(ConsumerProfileSearchView.response_builder,
                          util.generate_json_response_with_pulp_encoder)
         self.assertTrue(isinstance(ConsumerProfileSearchView.manager, profile.ProfileManager))
+        self.assertTrue(ConsumerProfileSearchView.stream_results)
 
 
 class TestConsumerProfileResourceView(unittest.TestCase):
@@ -1108,6 +1110,52 @@ class TestConsumerProfileResourceView(unittest.TestCase):
         mock_resp.assert_called_once_with(expected_cont)
         self.assertTrue(response is mock_resp.return_value)
 
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_UPDATE())
+    @mock.patch(
+        'pulp.server.webservices.views.consumers.generate_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.consumers.factory.consumer_profile_manager')
+    def test_update_consumer_profile_delta(self, mock_profile, mock_resp):
+        """
+        Test update consumer profile with a delta
+        """
+        resp = {'some_profile': ['new_info'], 'consumer_id': 'test-consumer', 'content_type': 'rpm'}
+        mock_profile.return_value.update_from_delta.return_value = resp
+
+        request = mock.MagicMock()
+        request.body = json.dumps({'delta': 'encoded', 'base_hash': 'abc'})
+        consumer_profile = ConsumerProfileResourceView()
+        response = consumer_profile.put(request, 'test-consumer', 'rpm')
+
+        mock_profile.return_value.update_from_delta.assert_called_once_with(
+            'test-consumer', 'rpm', 'abc', 'encoded')
+        self.assertFalse(mock_profile.return_value.update.called)
+        expected_cont = {'consumer_id': 'test-consumer', 'some_profile': ['new_info'],
+                         '_href': '/v2/consumers/test-consumer/profiles/rpm/',
+                         'content_type': 'rpm'}
+        mock_resp.assert_called_once_with(expected_cont)
+        self.assertTrue(response is mock_resp.return_value)
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_UPDATE())
+    @mock.patch('pulp.server.webservices.views.consumers.factory.consumer_profile_manager')
+    def test_update_consumer_profile_delta_missing_base_hash(self, mock_profile):
+        """
+        Test update consumer profile with a delta but no base hash
+        """
+        request = mock.MagicMock()
+        request.body = json.dumps({'delta': 'encoded'})
+        consumer_profile = ConsumerProfileResourceView()
+        try:
+            consumer_profile.put(request, 'test-consumer', 'rpm')
+        except MissingValue, response:
+            pass
+        else:
+            raise AssertionError("MissingValue should be raised with missing base_hash")
+        self.assertEqual(response.http_status_code, 400)
+        self.assertEqual(response.error_data['property_names'], ['base_hash'])
+        self.assertFalse(mock_profile.return_value.update_from_delta.called)
+
     @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
                 new=assert_auth_DELETE())
     @mock.patch(
@@ -1128,6 +1176,51 @@ class TestConsumerProfileResourceView(unittest.TestCase):
         self.assertTrue(response is mock_resp.return_value)
 
 
+class TestConsumerProfileHashView(unittest.TestCase):
+    """
+    Represents the comparison of consumer profile hashes
+    """
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.consumers.generate_json_response')
+    @mock.patch('pulp.server.webservices.views.consumers.factory.consumer_profile_manager')
+    def test_compare_hash(self, mock_profile, mock_resp):
+        """
+        Test comparing the hash of a consumer profile
+        """
+        mock_profile.return_value.is_unchanged.return_value = True
+
+        request = mock.MagicMock()
+        request.body = json.dumps({'profile_hash': 'abc'})
+        profile_hash = ConsumerProfileHashView()
+        response = profile_hash.post(request, 'test-consumer', 'rpm')
+
+        mock_profile.return_value.is_unchanged.assert_called_once_with(
+            'test-consumer', 'rpm', 'abc')
+        mock_resp.assert_called_once_with({'unchanged': True})
+        self.assertTrue(response is mock_resp.return_value)
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.consumers.factory.consumer_profile_manager')
+    def test_compare_hash_missing_param(self, mock_profile):
+        """
+        Test comparing the hash of a consumer profile without the hash
+        """
+        request = mock.MagicMock()
+        request.body = json.dumps({})
+        profile_hash = ConsumerProfileHashView()
+        try:
+            profile_hash.post(request, 'test-consumer', 'rpm')
+        except MissingValue, response:
+            pass
+        else:
+            raise AssertionError("MissingValue should be raised with missing profile_hash")
+        self.assertEqual(response.http_status_code, 400)
+        self.assertEqual(response.error_data['property_names'], ['profile_hash'])
+
+
 class TestConsumerQueryContentApplicabilityView(unittest.TestCase):
     """
     Represents consumers content applicability
@@ -8,6 +8,7 @@ from django.http import HttpResponseBadRequest, HttpResponseNotFound
 from base import assert_auth_CREATE, assert_auth_DELETE, assert_auth_READ, assert_auth_UPDATE
 from pulp.server import constants
 from pulp.server.exceptions import InvalidValue, MissingResource, OperationPostponed
+from pulp.server.webservices.views import util
 from pulp.server.webservices.views.content import (
     CatalogResourceView,
     ContentSourceCollectionActionView,
@@ -341,6 +342,80 @@ class TestContentUnitSearch(unittest.TestCase):
         self.assertEqual(serialized_results, [mock_process.return_value, mock_process.return_value])
         mock_add_repo.assert_called_once_with([mock_process(), mock_process()], 'mock_type')
 
+    @mock.patch('pulp.server.webservices.views.content.ContentUnitSearch.get_results')
+    def test__generate_response_continuation(self, mock_get_results):
+        """
+        Test that a page of units following the continuation token is returned.
+        """
+        mock_get_results.return_value = [{'_id': 'unit_2'}, {'_id': 'unit_3'}]
+        token = util.encode_continuation(['unit_1'])
+
+        response = ContentUnitSearch._generate_response(
+            {'filters': {'name': 'foo'}, 'limit': 2}, {'continuation': token}, type_id='rpm')
+
+        criteria = mock_get_results.call_args[0][0]
+        self.assertEqual(criteria.filters, {'$and': [{'name': 'foo'},
+                                                     {'_id': {'$gt': 'unit_1'}}]})
+        self.assertEqual(criteria.sort, [('_id', 1)])
+        self.assertEqual(mock_get_results.call_args[1], {'type_id': 'rpm'})
+        self.assertEqual(json.loads(response.content), mock_get_results.return_value)
+        self.assertEqual(util.decode_continuation(response[util.CONTINUATION_HEADER]),
+                         ['unit_3'])
+
+    @mock.patch('pulp.server.webservices.views.content.ContentUnitSearch.get_results')
+    def test__generate_response_first_page(self, mock_get_results):
+        """
+        Test that an empty continuation token requests the first page in unit id order.
+        """
+        mock_get_results.return_value = [{'_id': 'unit_1'}]
+
+        response = ContentUnitSearch._generate_response({'limit': 2}, {'continuation': ''},
+                                                        type_id='rpm')
+
+        criteria = mock_get_results.call_args[0][0]
+        self.assertEqual(criteria.filters, None)
+        self.assertEqual(criteria.sort, [('_id', 1)])
+        self.assertFalse(response.has_header(util.CONTINUATION_HEADER))
+
+    @mock.patch('pulp.server.webservices.views.content.ContentUnitSearch.get_results')
+    def test__generate_response_continuation_with_skip(self, mock_get_results):
+        """
+        Test that a continuation token can not be combined with a skip.
+        """
+        self.assertRaises(InvalidValue, ContentUnitSearch._generate_response,
+                          {'skip': 2}, {'continuation': ''}, type_id='rpm')
+        self.assertFalse(mock_get_results.called)
+
+    @mock.patch('pulp.server.webservices.views.content.ContentUnitSearch._add_repo_memberships')
+    @mock.patch('pulp.server.webservices.views.content._process_content_unit')
+    def test_iter_results_without_repos(self, mock_process, mock_add_repo):
+        """
+        Stream results without the optional `include_repos`.
+        """
+        mock_search = mock.MagicMock(return_value=['result_1', 'result_2'])
+        results = ContentUnitSearch.iter_results('query', mock_search, {}, type_id='mock_type')
+        self.assertEqual(mock_process.call_count, 0)
+        self.assertEqual(list(results), [mock_process.return_value, mock_process.return_value])
+        mock_search.assert_called_once_with('mock_type', 'query')
+        self.assertEqual(mock_add_repo.call_count, 0)
+
+    @mock.patch('pulp.server.webservices.views.content.REPO_MEMBERSHIP_PAGE_SIZE', 2)
+    @mock.patch('pulp.server.webservices.views.content.ContentUnitSearch._add_repo_memberships')
+    @mock.patch('pulp.server.webservices.views.content._process_content_unit')
+    def test_iter_results_with_repos(self, mock_process, mock_add_repo):
+        """
+        Stream results with the optional `include_repos`, one page of units at a time.
+        """
+        mock_process.side_effect = lambda unit, type_id: unit
+        mock_add_repo.side_effect = lambda units, type_id: units
+        mock_search = mock.MagicMock(return_value=['result_1', 'result_2', 'result_3'])
+        results = ContentUnitSearch.iter_results('query', mock_search, {'include_repos': True},
+                                                 type_id='mock_type')
+        self.assertEqual(list(results), ['result_1', 'result_2', 'result_3'])
+        self.assertEqual(mock_add_repo.mock_calls,
+                         [mock.call(['result_1', 'result_2'], 'mock_type'),
+                          mock.call(['result_3'], 'mock_type')])
+
 
 class TestContentUnitResourceView(unittest.TestCase):
     """
@@ -403,7 +478,7 @@ class TestContentUnitsCollectionView(unittest.TestCase):
                 new=assert_auth_READ())
     @mock.patch('pulp.server.webservices.views.content.reverse')
     @mock.patch('pulp.server.webservices.views.content.serial_content')
-    @mock.patch('pulp.server.webservices.views.content.generate_json_response_with_pulp_encoder')
+    @mock.patch('pulp.server.webservices.views.content.generate_streaming_json_response')
     @mock.patch('pulp.server.webservices.views.content.factory')
     def test_get_content_units_collection_view(self, mock_factory, mock_resp,
                                                mock_serializers, mock_rev):
@@ -429,7 +504,8 @@ class TestContentUnitsCollectionView(unittest.TestCase):
 
         expected_content = [{'_id': 'unit_1', '_href': mock_rev.return_value, 'children': 'child'},
                             {'_id': 'unit_2', '_href': mock_rev.return_value, 'children': 'child'}]
-        mock_resp.assert_called_once_with(expected_content)
+        self.assertEqual(mock_resp.call_count, 1)
+        self.assertEqual(list(mock_resp.call_args[0][0]), expected_content)
         self.assertTrue(response is mock_resp.return_value)
 
 
@@ -574,6 +650,38 @@ class TestUploadsCollectionView(unittest.TestCase):
         mock_redirect.assert_called_once_with(mock_resp.return_value, '/mock/path/')
         self.assertTrue(response is mock_redirect.return_value)
 
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_CREATE())
+    @mock.patch('pulp.server.webservices.views.content.generate_redirect_response')
+    @mock.patch('pulp.server.webservices.views.content.generate_json_response')
+    @mock.patch('pulp.server.webservices.views.content.reverse')
+    @mock.patch('pulp.server.webservices.views.content.factory')
+    def test_post_uploads_collection_view_size(self, mock_factory, mock_reverse, mock_resp,
+                                               mock_redirect):
+        """
+        View post should pass the declared size of the file on to the upload manager.
+        """
+        mock_upload_manager = mock_factory.content_upload_manager.return_value
+        request = mock.MagicMock()
+        request.body = '{"size": 1024}'
+
+        UploadsCollectionView().post(request)
+
+        mock_upload_manager.initialize_upload.assert_called_once_with(1024)
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_CREATE())
+    @mock.patch('pulp.server.webservices.views.content.factory')
+    def test_post_uploads_collection_view_invalid_size(self, mock_factory):
+        """
+        View post should reject a size that is not a non-negative integer.
+        """
+        request = mock.MagicMock()
+        request.body = '{"size": -1}'
+
+        self.assertRaises(InvalidValue, UploadsCollectionView().post, request)
+        self.assertFalse(mock_factory.content_upload_manager.return_value.initialize_upload.called)
+
 
 class TestUploadSegmentResourceView(unittest.TestCase):
     """
@@ -591,12 +699,12 @@ class TestUploadSegmentResourceView(unittest.TestCase):
         mock_upload_manager = mock.MagicMock()
         mock_factory.content_upload_manager.return_value = mock_upload_manager
         request = mock.MagicMock()
-        request.body = 'upload these bits'
+        request.META = {'CONTENT_LENGTH': '17'}
 
         upload_segment_resource = UploadSegmentResourceView()
         response = upload_segment_resource.put(request, 'mock_id', 4)
 
-        mock_upload_manager.save_data.assert_called_once_with('mock_id', 4, 'upload these bits')
+        mock_upload_manager.save_data_stream.assert_called_once_with('mock_id', 4, request, 17)
         mock_resp.assert_called_once_with(None)
         self.assertTrue(response is mock_resp.return_value)
 
@@ -616,6 +724,21 @@ class TestUploadSegmentResourceView(unittest.TestCase):
         self.assertRaises(InvalidValue, upload_segment_resource.put,
                           request, 'mock_id', 'invalid_offset')
 
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_UPDATE())
+    @mock.patch('pulp.server.webservices.views.content.factory')
+    def test_put_upload_segment_resource_bad_length(self, mock_factory):
+        """
+        Test the UploadSegmentResourceView with an invalid Content-Length header
+        """
+        request = mock.MagicMock()
+        request.META = {'CONTENT_LENGTH': 'invalid_length'}
+
+        upload_segment_resource = UploadSegmentResourceView()
+
+        self.assertRaises(InvalidValue, upload_segment_resource.put, request, 'mock_id', 4)
+        self.assertFalse(mock_factory.content_upload_manager.return_value.save_data_stream.called)
+
 
 class TestUploadResourceView(unittest.TestCase):
     """
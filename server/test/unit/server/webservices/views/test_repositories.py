@@ -808,6 +808,62 @@ class TestRepoUnitSearch(unittest.TestCase):
         mock_uqm().get_units_across_types.assert_called_once_with('mock_repo', criteria=criteria)
         mock_resp.assert_called_once_with(mock_uqm().get_units_across_types.return_value)
 
+    @mock.patch('pulp.server.webservices.views.repositories.manager_factory.'
+                'repo_unit_association_query_manager')
+    @mock.patch('pulp.server.webservices.views.repositories.UnitAssociationCriteria')
+    @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
+    def test__generate_response_continuation(self, mock_repo_qs, mock_crit, mock_uqm):
+        """
+        Test that a page of units following the continuation token is returned.
+        """
+        criteria = mock_crit.from_client_input.return_value
+        criteria.limit = 2
+        units = [{'unit_type_id': 'rpm', 'unit_id': 'a'}, {'unit_type_id': 'rpm', 'unit_id': 'b'}]
+        mock_uqm().get_units_page.return_value = units
+        token = util.encode_continuation(['rpm', 'first'])
+
+        response = RepoUnitSearch._generate_response('mock_q', {'continuation': token},
+                                                     repo_id='mock_repo')
+
+        mock_uqm().get_units_page.assert_called_once_with('mock_repo', criteria=criteria,
+                                                          after=['rpm', 'first'])
+        self.assertEqual(json.loads(response.content), units)
+        self.assertEqual(util.decode_continuation(response[util.CONTINUATION_HEADER]),
+                         ['rpm', 'b'])
+
+    @mock.patch('pulp.server.webservices.views.repositories.manager_factory.'
+                'repo_unit_association_query_manager')
+    @mock.patch('pulp.server.webservices.views.repositories.UnitAssociationCriteria')
+    @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
+    def test__generate_response_first_page(self, mock_repo_qs, mock_crit, mock_uqm):
+        """
+        Test that an empty continuation token requests the first page.
+        """
+        criteria = mock_crit.from_client_input.return_value
+        criteria.limit = 2
+        mock_uqm().get_units_page.return_value = []
+
+        response = RepoUnitSearch._generate_response('mock_q', {'continuation': ''},
+                                                     repo_id='mock_repo')
+
+        mock_uqm().get_units_page.assert_called_once_with('mock_repo', criteria=criteria,
+                                                          after=None)
+        self.assertFalse(response.has_header(util.CONTINUATION_HEADER))
+
+    @mock.patch('pulp.server.webservices.views.repositories.manager_factory.'
+                'repo_unit_association_query_manager')
+    @mock.patch('pulp.server.webservices.views.repositories.UnitAssociationCriteria')
+    @mock.patch('pulp.server.webservices.views.repositories.model.Repository.objects')
+    def test__generate_response_invalid_continuation(self, mock_repo_qs, mock_crit, mock_uqm):
+        """
+        Test that a continuation token that is not a unit type id and unit id is rejected.
+        """
+        token = util.encode_continuation(['rpm'])
+
+        self.assertRaises(pulp_exceptions.InvalidValue, RepoUnitSearch._generate_response,
+                          'mock_q', {'continuation': token}, repo_id='mock_repo')
+        self.assertFalse(mock_uqm().get_units_page.called)
+
 
 class TestRepoImportersView(unittest.TestCase):
     """
@@ -266,6 +266,53 @@ class TestSearchView(unittest.TestCase):
         self.assertEqual([c[1][0] for c in FakeSearchView.serializer.mock_calls],
                          ['big money', 'bigger money'])
 
+    def test__generate_response_streamed(self):
+        """
+        Test the _generate_response() method for the case where the SearchView is configured to
+        stream its results.
+        """
+        class FakeSearchView(search.SearchView):
+            response_builder = mock.MagicMock()
+            model = mock.MagicMock()
+            serializer = mock.MagicMock(side_effect=['biggest money', 'unreal money'])
+            stream_results = True
+
+        query = {'filters': {'money': {'$gt': 1000000}}}
+        FakeSearchView.model.objects.find_by_criteria.return_value = ['big money', 'bigger money']
+
+        results = FakeSearchView._generate_response(query, {})
+
+        self.assertEqual(''.join(results), '["biggest money", "unreal money"]')
+        self.assertEqual(results.status_code, 200)
+        self.assertFalse(FakeSearchView.response_builder.called)
+
+    def test_iter_results_is_lazy(self):
+        """
+        Test that iter_results() only serializes results as they are read.
+        """
+        class FakeSearchView(search.SearchView):
+            serializer = mock.MagicMock(side_effect=lambda r: r.upper())
+
+        search_method = mock.MagicMock(return_value=['big money', 'bigger money'])
+
+        results = FakeSearchView.iter_results({}, search_method, {})
+
+        self.assertFalse(FakeSearchView.serializer.called)
+        self.assertEqual(list(results), ['BIG MONEY', 'BIGGER MONEY'])
+
+    @mock.patch('pulp.server.webservices.views.search.QuerySet', new=mock.MagicMock)
+    def test_iter_results_no_cache(self):
+        """
+        Test that iter_results() keeps mongoengine from caching the documents it reads.
+        """
+        query_set = mock.MagicMock()
+        query_set.no_cache.return_value = ['big money']
+        search_method = mock.MagicMock(return_value=query_set)
+
+        results = search.SearchView.iter_results({}, search_method, {})
+
+        self.assertEqual(list(results), ['big money'])
+
 
 class TestParseArgs(unittest.TestCase):
     class FakeSearchView(search.SearchView):
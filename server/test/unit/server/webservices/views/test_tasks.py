@@ -1,6 +1,8 @@
 """
 This module contains tests for the pulp.server.webservices.views.tasks module.
 """
+import json
+
 import mock
 
 from mongoengine.queryset import DoesNotExist
@@ -11,8 +13,9 @@ from pulp.server import exceptions as pulp_exceptions
 from pulp.server.db import model
 from pulp.server.exceptions import MissingResource
 from pulp.server.webservices.views import util
-from pulp.server.webservices.views.tasks import (TaskCollectionView, TaskResourceView,
-                                                 TaskSearchView, task_serializer)
+from pulp.server.webservices.views.tasks import (TaskBulkStatusView, TaskCollectionView,
+                                                 TaskResourceView, TaskSearchView,
+                                                 task_serializer)
 
 
 @mock.patch('pulp.server.webservices.views.tasks.serial_dispatch')
@@ -48,6 +51,7 @@ class TestTaskSearchView(unittest.TestCase):
                          util.generate_json_response_with_pulp_encoder)
         self.assertEqual(TaskSearchView.model, model.TaskStatus)
         self.assertEqual(TaskSearchView.serializer, task_serializer)
+        self.assertTrue(TaskSearchView.stream_results)
 
 
 class TestTaskCollection(unittest.TestCase):
@@ -133,6 +137,98 @@ class TestTaskCollection(unittest.TestCase):
             task_collection.delete(mock_request)
 
 
+class TestTaskBulkStatus(unittest.TestCase):
+    """
+    Tests for TaskBulkStatusView.
+    """
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.dateutils.now_utc_timestamp')
+    @mock.patch('pulp.server.webservices.views.tasks.task_serializer')
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    @mock.patch('pulp.server.webservices.views.tasks.generate_json_response_with_pulp_encoder')
+    def test_post(self, mock_resp, mock_task_status, mock_task_serializer, mock_now):
+        """
+        Test that the status of all of the requested tasks is returned.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.body = json.dumps({'task_ids': ['1', '2', '3']})
+        tasks = [mock.MagicMock(task_id='1'), mock.MagicMock(task_id='3')]
+        mock_task_status.objects.return_value = tasks
+        mock_task_serializer.side_effect = lambda task: task.task_id
+        mock_now.return_value = 1000.0
+
+        response = TaskBulkStatusView().post(mock_request)
+
+        mock_task_status.objects.assert_called_once_with(task_id__in=['1', '2', '3'])
+        mock_resp.assert_called_once_with(
+            {'timestamp': 1000.0, 'tasks': ['1', '3'], 'missing': ['2']})
+        self.assertTrue(response is mock_resp.return_value)
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.dateutils.now_utc_timestamp')
+    @mock.patch('pulp.server.webservices.views.tasks.task_serializer')
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    @mock.patch('pulp.server.webservices.views.tasks.generate_json_response_with_pulp_encoder')
+    def test_post_changed_since(self, mock_resp, mock_task_status, mock_task_serializer,
+                                mock_now):
+        """
+        Test that only the tasks updated since the given time are returned, while tasks that
+        were not updated are not reported as missing.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.body = json.dumps({'task_ids': ['1', '2', '3'], 'changed_since': 900.0})
+        query = mock_task_status.objects.return_value
+        query.distinct.return_value = ['1', '2']
+        query.filter.return_value = [mock.MagicMock(task_id='2')]
+        mock_task_serializer.side_effect = lambda task: task.task_id
+        mock_now.return_value = 1000.0
+
+        TaskBulkStatusView().post(mock_request)
+
+        query.distinct.assert_called_once_with('task_id')
+        self.assertEqual(query.filter.call_count, 1)
+        mock_resp.assert_called_once_with(
+            {'timestamp': 1000.0, 'tasks': ['2'], 'missing': ['3']})
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    def test_post_invalid_task_ids(self, mock_task_status):
+        """
+        Test that task_ids must be a list of task ids.
+        """
+        for body in ({}, {'task_ids': 'abc'}, {'task_ids': [1, 2]}):
+            mock_request = mock.MagicMock()
+            mock_request.body = json.dumps(body)
+            try:
+                TaskBulkStatusView().post(mock_request)
+            except pulp_exceptions.InvalidValue, e:
+                self.assertEqual(e.property_names, ['task_ids'])
+            else:
+                raise AssertionError('InvalidValue should be raised for %s' % body)
+        self.assertFalse(mock_task_status.objects.called)
+
+    @mock.patch('pulp.server.webservices.views.decorators._verify_auth',
+                new=assert_auth_READ())
+    @mock.patch('pulp.server.webservices.views.tasks.TaskStatus')
+    def test_post_invalid_changed_since(self, mock_task_status):
+        """
+        Test that changed_since must be a number.
+        """
+        mock_request = mock.MagicMock()
+        mock_request.body = json.dumps({'task_ids': ['1'], 'changed_since': 'yesterday'})
+        try:
+            TaskBulkStatusView().post(mock_request)
+        except pulp_exceptions.InvalidValue, e:
+            self.assertEqual(e.property_names, ['changed_since'])
+        else:
+            raise AssertionError('InvalidValue should be raised')
+        self.assertFalse(mock_task_status.objects.called)
+
+
 class TestTaskResource(unittest.TestCase):
     """
     View for a single task.
@@ -1,11 +1,16 @@
+import datetime
 import httplib
 import json
 import mock
 import unittest
 
+from django.conf import settings
 from django.http import HttpResponse, HttpResponseNotFound
+from django.test.client import RequestFactory
+from django.utils.importlib import import_module
 
-from pulp.server.exceptions import InputEncodingError, PulpCodedValidationException
+from pulp.server.exceptions import (InputEncodingError, InvalidValue,
+                                    PulpCodedValidationException)
 from pulp.server.webservices.views import util
 from pulp.server.webservices.views.util import (json_body_allow_empty, json_body_required,
                                                 page_not_found, pulp_json_encoder)
@@ -74,6 +79,133 @@ class TestResponseGenerators(unittest.TestCase):
         mock_iri_to_uri.assert_called_once_with(href)
 
 
+class TestGenerateStreamingJsonResponse(unittest.TestCase):
+    """
+    Test the streamed JSON response generator.
+    """
+
+    def test_matches_json_dumps(self):
+        """
+        Make sure the streamed body is the same as the body of a regular response.
+        """
+        for count in (0, 1, 2, 5, 6):
+            items = [{'id': i, 'name': 'item-%d' % i} for i in range(count)]
+            response = util.generate_streaming_json_response(iter(items), chunk_size=3)
+            self.assertEqual(''.join(response), json.dumps(items))
+
+    def test_chunked(self):
+        """
+        Make sure the items are encoded into chunks of the requested size.
+        """
+        chunks = list(util._json_array_chunks(range(5), None, 2))
+        self.assertEqual(chunks, ['[0, 1', ', 2, 3', ', 4]'])
+
+    def test_response(self):
+        response = util.generate_streaming_json_response(iter([]))
+        self.assertEqual(response.status_code, httplib.OK)
+        self.assertEqual(response._headers.get('content-type'),
+                         ('Content-Type', 'application/json; charset=utf-8'))
+
+    def test_pulp_encoder(self):
+        """
+        Make sure the pulp encoder is used by default.
+        """
+        now = datetime.datetime(2015, 1, 1)
+        response = util.generate_streaming_json_response(iter([now]))
+        self.assertEqual(json.loads(''.join(response)), [pulp_json_encoder(now)])
+
+    def test_first_chunk_encoded_early(self):
+        """
+        Make sure errors raised while reading the first items are raised by the view.
+        """
+        def results():
+            raise ValueError()
+            yield
+
+        self.assertRaises(ValueError, util.generate_streaming_json_response, results())
+
+    @mock.patch('pulp.server.webservices.views.util.StreamingHttpResponse', new=None)
+    def test_without_streaming(self):
+        """
+        Make sure the whole body is built when Django cannot stream responses.
+        """
+        items = [{'id': i} for i in range(5)]
+        response = util.generate_streaming_json_response(iter(items), chunk_size=2)
+        self.assertTrue(isinstance(response, HttpResponse))
+        self.assertEqual(response.content, json.dumps(items))
+
+    def _process_response(self, response):
+        """
+        Pass a response through the process_response of the configured middleware, in the order
+        Django calls them.
+        """
+        request = RequestFactory().get('/v2/tasks/search/')
+        for path in reversed(settings.MIDDLEWARE_CLASSES):
+            module_name, class_name = path.rsplit('.', 1)
+            middleware = getattr(import_module(module_name), class_name)()
+            if hasattr(middleware, 'process_response'):
+                response = middleware.process_response(request, response)
+        return response
+
+    def test_middleware(self):
+        """
+        Make sure the configured middleware does not consume the body of a streamed response.
+        """
+        items = [{'id': i} for i in range(5)]
+        response = util.generate_streaming_json_response(iter(items), chunk_size=2)
+        response = self._process_response(response)
+        self.assertEqual(''.join(response), json.dumps(items))
+
+    @mock.patch('pulp.server.webservices.views.util.StreamingHttpResponse', new=None)
+    def test_middleware_without_streaming(self):
+        """
+        Make sure the body and Content-Length agree when Django cannot stream responses.
+        """
+        items = [{'id': i} for i in range(5)]
+        response = util.generate_streaming_json_response(iter(items), chunk_size=2)
+        response = self._process_response(response)
+        self.assertEqual(response.content, json.dumps(items))
+        self.assertEqual(response['Content-Length'], str(len(json.dumps(items))))
+
+
+class TestContinuation(unittest.TestCase):
+    """
+    Test the continuation token helpers.
+    """
+
+    def test_round_trip(self):
+        token = util.encode_continuation(['rpm', 'unit-1'])
+        self.assertTrue(isinstance(token, str))
+        self.assertEqual(util.decode_continuation(unicode(token)), ['rpm', 'unit-1'])
+
+    def test_decode_empty(self):
+        self.assertEqual(util.decode_continuation(''), None)
+        self.assertEqual(util.decode_continuation(None), None)
+
+    def test_decode_invalid(self):
+        for token in ('not a token', util.encode_continuation({'a': 1}), u'\u2603'):
+            try:
+                util.decode_continuation(token)
+                self.fail('InvalidValue expected')
+            except InvalidValue, e:
+                self.assertEqual(e.property_names, ['continuation'])
+
+    def test_set_continuation_full_page(self):
+        response = HttpResponse()
+        util.set_continuation(response, 2, [{'_id': 'a'}, {'_id': 'b'}], lambda r: [r['_id']])
+        self.assertEqual(util.decode_continuation(response[util.CONTINUATION_HEADER]), ['b'])
+
+    def test_set_continuation_last_page(self):
+        response = HttpResponse()
+        util.set_continuation(response, 3, [{'_id': 'a'}, {'_id': 'b'}], lambda r: [r['_id']])
+        self.assertFalse(response.has_header(util.CONTINUATION_HEADER))
+
+    def test_set_continuation_no_limit(self):
+        response = HttpResponse()
+        util.set_continuation(response, None, [], lambda r: [r['_id']])
+        self.assertFalse(response.has_header(util.CONTINUATION_HEADER))
+
+
 class TestMustHaveJSONBody(unittest.TestCase):
 
     def test_json_body_required_valid(self):